@@ -14,14 +14,20 @@ from collections import deque
 
 # ─── Logging Utilities ──────────────────────────────────────────────
 from rich.traceback import install
-from rich.logging import RichHandler
-from logging.handlers import RotatingFileHandler
+from utils.helpers.logging_setup import setup_logging
 
 # ─── Import Configurations and Utilities ────────────────────────────
 from config.config import config, server_config
-from utils.mysql.database_utils import create_tables
+from utils.mysql.migrations import MigrationError, migrate_schema
+from utils.mysql.replica import set_db_client, reset_db_client
+from utils.mysql.loader import start_loader_scope, reset_loader_scope
+from utils.otel.round_trips import current_round_trips, route_round_trips, start_round_trips, reset_round_trips
 from utils.helpers.improved_functions import send_json_response, get_project_root
 from utils.keydb.keydb_utils import close_keydb
+from utils.helpers.log_writer import log_writer
+from utils.helpers.interactions import interaction_flusher
+from utils.helpers.password_hasher import password_hasher
+from utils.keydb.rate_budget import rate_budget
 from utils.otel.otel_utils import init_otel, RequestTracingMiddleware
 
 # ─── Import Routers ──────────────────────────────────────────
@@ -34,29 +40,24 @@ from routes.web_routes import web_routes
 
 # ─── Setup Logging ──────────────────────────────────────────
 
-# Enable rich tracebacks for uncaught exceptions
-install(show_locals=True)
-
-fh = RotatingFileHandler("debug.log", maxBytes=10*1024*1024, backupCount=5)
-level = logging.DEBUG if config.is_development() else logging.INFO
-logging.basicConfig(
-    level=level,
-    format=server_config.LOGGING_FORMAT,
-    handlers=[
-        fh,                  # File logs
-        RichHandler()        # Console logs with rich formatting
-    ]
-)
+# Records are queued here and formatted/written on a listener thread; see setup_logging
+if config.is_development():
+    # Enable rich tracebacks (with locals) for uncaught exceptions
+    install(show_locals=True)
+setup_logging(development=config.is_development())
 logger = logging.getLogger(__name__)
 
 # ─── App Setup ──────────────────────────────────────────────
 BASE_DIR = get_project_root()
 load_dotenv(BASE_DIR / ".env", override=True)
 
-async def create_tables_async():
+async def migrate_schema_async():
     try:
-        logger.debug("Started database table creation...")
-        await create_tables()
+        logger.debug("Checking database schema version...")
+        await migrate_schema()
+    except MigrationError:
+        # The schema does not match this code; serving on it would fail per request
+        raise
     except Exception as e:
         logger.error(f"Database initialization error: {str(e)}", exc_info=True)
 
@@ -105,15 +106,25 @@ async def lifespan(app: FastAPI):
     logger.debug("Initializing application...")
     initialize_application()
     
-    await create_tables_async()
+    # Pre-render the named SQL statements for every configured madrasa schema
+    from utils.mysql.statements import render_statements
+    render_statements(config.MADRASA_NAMES_LIST)
+    
+    await migrate_schema_async()
     # Initialize database connection pool
     try:
         logger.debug("Establishing database connection pool...")
-        from utils.mysql.database_utils import get_db_pool
+        from utils.mysql.database_utils import get_db_pool, start_pool_autoscaler
         from utils.keydb.keydb_utils import connect_to_keydb, set_global_keydb
         app.state.db_pool = await get_db_pool()
+        await start_pool_autoscaler()
         app.state.keydb = await connect_to_keydb()
         set_global_keydb(app.state.keydb)
+        if app.state.keydb:
+            from utils.keydb.scripts import load_scripts
+            await load_scripts(app.state.keydb)
+        rate_budget.start()
+        interaction_flusher.start()
         yield
     except Exception as e:
         logger.error(f"Error establishing database connection pool: {e}")
@@ -122,6 +133,11 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown
+    # Pending interaction counts and queued log records go out while the pool is still open
+    await interaction_flusher.stop()
+    await rate_budget.stop()
+    await log_writer.stop()
+    password_hasher.shutdown()
     if getattr(app.state, "db_pool", None) is not None:
         try:
             from utils.mysql.database_utils import close_db_pool
@@ -198,7 +214,7 @@ app.add_middleware(SessionMiddleware, secret_key=secret_key)
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         start_time = time.time()
-        logger.debug(f"Processing request: {request.method} {request.url.path}")
+        logger.debug("Processing request: %s %s", request.method, request.url.path)
         
         response = await call_next(request)
         
@@ -211,7 +227,7 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         
         # Log request completion
         process_time = time.time() - start_time
-        logger.debug(f"Request completed: {request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.3f}s")
+        logger.debug("Request completed: %s %s - Status: %s - Time: %.3fs", request.method, request.url.path, response.status_code, process_time)
         
         return response
 
@@ -303,7 +319,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             raise
         
         # Log response details
-        logger.debug(f"Response status: {response.status_code}")
+        logger.debug("Response status: %s", response.status_code)
         
         # Add error information if response indicates an error
         if response.status_code >= 400:
@@ -335,6 +351,42 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
 
 app.add_middleware(RequestLoggingMiddleware)
 
+class DatabaseClientMiddleware(BaseHTTPMiddleware):
+    """Tag DB work with the client so reads after its writes skip the replica,
+    and give each request its own batch-loader memo"""
+    async def dispatch(self, request: Request, call_next):
+        token = set_db_client(f"{get_ip_address(request)}:{request.headers.get('X-Device-ID', 'unknown')}")
+        memo_token = start_loader_scope()
+        try:
+            return await call_next(request)
+        finally:
+            reset_loader_scope(memo_token)
+            reset_db_client(token)
+
+app.add_middleware(DatabaseClientMiddleware)
+
+class RoundTripMiddleware(BaseHTTPMiddleware):
+    """Count MySQL/KeyDB round trips per request: a Server-Timing header in
+    development, OTEL metrics in production, N+1 checks in both"""
+    def __init__(self, app):
+        super().__init__(app)
+        self.development = config.is_development()
+
+    async def dispatch(self, request: Request, call_next):
+        token = start_round_trips()
+        try:
+            response = await call_next(request)
+            trips = current_round_trips()
+            route = getattr(request.scope.get("route"), "path", request.url.path)
+            route_round_trips.observe(route, trips, export=not self.development)
+            if self.development and trips.counts:
+                response.headers["Server-Timing"] = trips.server_timing()
+            return response
+        finally:
+            reset_round_trips(token)
+
+app.add_middleware(RoundTripMiddleware)
+
 # ─── Exception Handlers ────────────────────────────────────────────
 @app.exception_handler(404)
 async def not_found_handler(request: Request, exc: HTTPException):
@@ -351,8 +403,9 @@ async def not_found_handler(request: Request, exc: HTTPException):
 @app.exception_handler(400)
 async def bad_request_handler(request: Request, exc: HTTPException):
     logger.warning(f"400 error: {request.method} {request.url} - Detail: {exc.detail}")
-    logger.debug(f"400 request headers: {redact_headers(dict(request.headers))}")
-    logger.debug(f"400 request body: {await get_request_body(request)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"400 request headers: {redact_headers(dict(request.headers))}")
+        logger.debug(f"400 request body: {await get_request_body(request)}")
     
     response_data = {
         "error": "bad_request",
@@ -373,8 +426,9 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     # Log detailed validation errors
     logger.error(f"Validation error on {request.method} {request.url}")
     logger.error(f"Validation errors: {json.dumps(exc.errors(), indent=2)}")
-    logger.debug(f"Request headers: {redact_headers(dict(request.headers))}")
-    logger.debug(f"Request body: {await get_request_body(request)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Request headers: {redact_headers(dict(request.headers))}")
+        logger.debug(f"Request body: {await get_request_body(request)}")
     
     # Create detailed error response
     error_details = []
@@ -413,8 +467,9 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 async def unprocessable_entity_handler(request: Request, exc: HTTPException):
     """Handle 422 Unprocessable Entity errors"""
     logger.warning(f"422 error: {request.method} {request.url} - Detail: {exc.detail}")
-    logger.debug(f"422 request headers: {redact_headers(dict(request.headers))}")
-    logger.debug(f"422 request body: {await get_request_body(request)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"422 request headers: {redact_headers(dict(request.headers))}")
+        logger.debug(f"422 request body: {await get_request_body(request)}")
     
     response_data: dict = {
         "error": "unprocessable_entity",
@@ -431,8 +486,9 @@ async def unprocessable_entity_handler(request: Request, exc: HTTPException):
 async def internal_server_error_handler(request: Request, exc: HTTPException):
     """Handle 500 Internal Server Error"""
     logger.error(f"500 error: {request.method} {request.url} - Detail: {exc.detail}")
-    logger.debug(f"500 request headers: {redact_headers(dict(request.headers))}")
-    logger.debug(f"500 request body: {await get_request_body(request)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"500 request headers: {redact_headers(dict(request.headers))}")
+        logger.debug(f"500 request body: {await get_request_body(request)}")
     
     response_data: dict = {
         "error": "internal_server_error",
@@ -450,8 +506,9 @@ async def attribute_error_handler(request: Request, exc: AttributeError):
     """Handle AttributeError (often from dependency issues)"""
     logger.error(f"AttributeError on {request.method} {request.url}: {str(exc)}")
     logger.debug(f"AttributeError details - Path: {request.url.path}, Error: {str(exc)}")
-    logger.debug(f"Request headers: {redact_headers(dict(request.headers))}")
-    logger.debug(f"Request body: {await get_request_body(request)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Request headers: {redact_headers(dict(request.headers))}")
+        logger.debug(f"Request body: {await get_request_body(request)}")
     
     response_data: dict = {
         "error": "attribute_error",
@@ -483,8 +540,9 @@ async def general_exception_handler(request: Request, exc: Exception):
     logger.error(f"Unhandled exception on {request.method} {request.url}: {str(exc)}", exc_info=True)
     logger.error(f"Exception type: {type(exc).__name__}")
     logger.error(f"Full traceback:\n{traceback.format_exc()}")
-    logger.debug(f"Request details - Headers: {redact_headers(dict(request.headers))}, Client: {request.client.host if request.client else 'unknown'}")
-    logger.debug(f"Request body: {await get_request_body(request)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Request details - Headers: {redact_headers(dict(request.headers))}, Client: {request.client.host if request.client else 'unknown'}")
+        logger.debug(f"Request body: {await get_request_body(request)}")
     
     # Create detailed error response
     response_data: dict = {
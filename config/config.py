@@ -95,11 +95,24 @@ class MadrasaConfig:
     # Verification Settings
     CODE_EXPIRY_MINUTES = 10
     CODE_LENGTH = 6
+    CODE_MAX_ATTEMPTS = 5  # wrong guesses before a code is discarded
+    VERIFICATION_AUDIT_ENABLED = True  # async audit row in global.verifications per sent code
+    VERIFICATION_AUDIT_RETENTION_DAYS = 30
+
+    # Device interaction counters (KeyDB, flushed to global.interactions)
+    INTERACTION_FLUSH_SECONDS = 10
+    INTERACTION_FLUSH_BATCH = 500  # rows per multi-row upsert
+    INTERACTION_FLUSH_KEY_TTL = 24 * 3600  # seconds the hashes of an unfinished flush are kept
+    INTERACTION_RECOVER_AFTER_SECONDS = 300  # flush hashes older than this are taken over at startup
     
     # Rate Limiting for Authentication
     SMS_LIMIT_PER_HOUR = 5
     EMAIL_LIMIT_PER_HOUR = 15
     AUTH_ATTEMPTS_LIMIT = 5
+    # Password hashing (scrypt) runs on its own executor, see utils/helpers/password_hasher.py
+    PASSWORD_HASH_EXECUTOR = get_env_var("PASSWORD_HASH_EXECUTOR", "thread")  # "thread" or "process"
+    PASSWORD_HASH_WORKERS = int(get_env_var("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+    PASSWORD_HASH_MAX_WAITING = 64  # further hashes get 503 instead of queueing
     AUTH_LOCKOUT_MINUTES = 15
     
     # ============================================================================
@@ -130,6 +143,29 @@ class MadrasaConfig:
     MYSQL_MAX_CONNECTIONS = 10
     MYSQL_MAX_OVERFLOW = 5
     MYSQL_TIMEOUT = 60.0
+    MYSQL_ACQUIRE_TIMEOUT = 5.0  # seconds a request waits for a pooled connection before a 503
+    MYSQL_HOLD_WARN_SECONDS = 0.5  # warn when a connection is held this much longer than its queries ran
+    MYSQL_CONNECTION_SHARE = 0.8  # fraction of the server's max_connections all workers together may use
+    MYSQL_POOL_RESIZE_INTERVAL = 15  # seconds between adaptive pool size checks
+    MYSQL_REPLICA_HOST = get_env_var("MYSQL_REPLICA_HOST", required=False)  # read replica for read-only endpoints
+    MYSQL_REPLICA_PORT = int(get_env_var("MYSQL_REPLICA_PORT", 3306))
+    MYSQL_REPLICA_MAX_LAG_SECONDS = 5  # replica reads fall back to the primary above this lag
+    MYSQL_REPLICA_LAG_CHECK_SECONDS = 5  # how often the replica lag is sampled
+    MYSQL_READ_YOUR_WRITES_SECONDS = 10  # reads stay on the primary this long after the client writes
+    MYSQL_STREAM_CHUNK_SIZE = 500  # rows fetched per round trip by streaming endpoints
+    IMPORT_CHUNK_SIZE = 500  # rows per transaction in the bulk people import
+    IMPORT_MAX_BYTES = 64 * 1024 * 1024  # largest file accepted by /admin/import_people
+    SLOW_QUERY_MS = 200  # queries at least this slow are logged as slow_query
+    QUERY_STATS_MAX_FINGERPRINTS = 500  # distinct statements tracked by the query log
+    N_PLUS_ONE_REPEATS = 10  # same SQL this many times in one request is logged as a likely N+1
+    N_PLUS_ONE_SLOPE = 0.5  # routes adding this many round trips per result row are flagged
+    USER_REAPER_CHUNK_SIZE = 500  # users per transaction in scheduled deletion
+    USER_REAPER_CONCURRENCY = 4  # madrasas processed at once by scheduled deletion
+    SCHEMA_LOCK_TIMEOUT = 60  # seconds a worker waits for another one to finish migrating the schema
+    MYSQL_PREPARED_STATEMENTS = False  # run statements registered with prepared=True via PREPARE/EXECUTE
+    QUERY_CACHE_ENABLED = True  # serve statements registered with cache_ttl from the in-process query cache
+    QUERY_CACHE_MAX_ENTRIES = 10_000  # LRU bound of the query cache
+    TRANSLATION_REFRESH_SECONDS = 60  # max age of the in-process translation dictionary before a delta refresh
 
     # ============================================================================
     # KEYDB CONFIGURATION
@@ -203,6 +239,8 @@ class MadrasaConfig:
     HIGH_RATE_LIMIT = 100  # requests per hour
     STRICT_RATE_LIMIT = 20    # requests per hour for sensitive operations
     RATE_LIMIT_WINDOW = 60
+    RATE_LIMIT_LEASE_FRACTION = 1.0  # share of a worker's slice of a limit leased from KeyDB at once
+    RATE_LIMIT_REBALANCE_SECONDS = 10  # worker heartbeat; the slices follow the live worker count
 
     MAX_REQUESTS_PER_HOUR = 1000
     LOCKOUT_DURATION_MINUTES = 5
@@ -287,6 +325,17 @@ class ServerConfig:
     LOGGING_ROTATION = "1 day"
     LOGGING_RETENTION = "30 days"
     LOGGING_MAX_SIZE = "10MB"
+    LOG_DB_RETENTION_DAYS = 30  # daily logs.logs partitions kept in MySQL before archive + drop
+    LOG_PARTITIONS_AHEAD = 3  # empty daily partitions created in advance
+    LOG_ARCHIVE_DIR = get_project_root() / "maintenance" / "archives" / "logs"  # gzip JSONL per day
+    LOG_QUEUE_MAX = 10000  # queued DB log records before new ones spill to the backup file
+    LOG_BATCH_SIZE = 200  # rows per multi-row logs.logs INSERT
+    LOG_FLUSH_INTERVAL_MS = 250
+    # Share of info-level events kept per action; warnings and worse are never sampled
+    LOG_SAMPLE_RATES = {
+        "device_dependency_validation": 0.1,
+        "device_validation_success": 0.1,
+    }
 
     # Security Configuration
     BIND_HOST = get_env_var("BIND_HOST", "127.0.0.1")  # Add default
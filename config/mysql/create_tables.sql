@@ -5,7 +5,8 @@ CREATE DATABASE IF NOT EXISTS global;
 USE global;
 
 CREATE TABLE IF NOT EXISTS global_translations (
-                translation_text    VARCHAR(255)   PRIMARY KEY,
+                translation_id      INT            NOT NULL AUTO_INCREMENT PRIMARY KEY,
+                translation_text    VARCHAR(255)   NOT NULL,
                 bn_text             VARCHAR(255)   NULL,
                 ar_text             VARCHAR(255)   NULL,
                 context             VARCHAR(50)    NOT NULL,
@@ -14,6 +15,7 @@ CREATE TABLE IF NOT EXISTS global_translations (
                 updated_at      TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
                 created_at      TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     
+                UNIQUE KEY unique_global_translation_text (translation_text),
                 INDEX idx_global_translations_context (context),
                 INDEX idx_global_translations_table_name (table_name)
                 ) ENGINE = InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -22,6 +24,7 @@ CREATE TABLE IF NOT EXISTS global_translations (
 CREATE TABLE IF NOT EXISTS users (
                 user_id INT AUTO_INCREMENT PRIMARY KEY,
                 fullname    VARCHAR(50)            NOT NULL,
+                fullname_norm VARCHAR(50) AS (LOWER(TRIM(fullname))) STORED NOT NULL,
                 phone       VARCHAR(20)            NOT NULL,
                 phone_hash    CHAR(64)           NOT NULL,
                 phone_encrypted    VARCHAR(255)           NOT NULL,
@@ -37,7 +40,7 @@ CREATE TABLE IF NOT EXISTS users (
                 created_at  TIMESTAMP  NOT NULL DEFAULT CURRENT_TIMESTAMP,
 
                 UNIQUE KEY unique_user (fullname, phone),
-                INDEX idx_users_phone_fullname (phone, fullname),
+                INDEX idx_users_phone_fullname_norm (phone, fullname_norm),
                 INDEX idx_users_email (email)
                 ) ENGINE = InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -79,11 +82,11 @@ CREATE TABLE IF NOT EXISTS books (
                 book_id INT AUTO_INCREMENT PRIMARY KEY,
                 created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                name         VARCHAR(255)         NOT NULL,
+                name_id      INT                  NOT NULL,
                 class   VARCHAR(50),
 
                 INDEX idx_books_class (class),
-                FOREIGN KEY (name) REFERENCES global_translations(translation_text) ON DELETE RESTRICT ON UPDATE CASCADE
+                FOREIGN KEY (name_id) REFERENCES global_translations(translation_id) ON DELETE RESTRICT ON UPDATE CASCADE
                 ) ENGINE = InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;                           
 
 
@@ -149,6 +152,14 @@ CREATE TABLE IF NOT EXISTS acc_types (
                 FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE ON UPDATE CASCADE
                 ) ENGINE = InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Resume points of chunked maintenance jobs (e.g. the scheduled user reaper)
+CREATE TABLE IF NOT EXISTS maintenance_checkpoints (
+                task        VARCHAR(100)   NOT NULL PRIMARY KEY,
+                position    BIGINT         NOT NULL,
+
+                updated_at  TIMESTAMP  NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                ) ENGINE = InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 ---------------------------------------------- MADRASAH SPECIFIC TABLES ----------------------------------------------
 
 -- Create madrasa database if it doesn't exist  
@@ -156,7 +167,8 @@ CREATE DATABASE IF NOT EXISTS annur;
 USE annur;
 
 CREATE TABLE IF NOT EXISTS translations (
-                translation_text    VARCHAR(255)   PRIMARY KEY,
+                translation_id      INT            NOT NULL AUTO_INCREMENT PRIMARY KEY,
+                translation_text    VARCHAR(255)   NOT NULL,
                 bn_text             VARCHAR(255)   NULL,
                 ar_text             VARCHAR(255)   NULL,
                 context             VARCHAR(100)   NOT NULL,
@@ -165,6 +177,7 @@ CREATE TABLE IF NOT EXISTS translations (
                 updated_at      TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
                 created_at      TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     
+                UNIQUE KEY unique_translation_text (translation_text),
                 INDEX idx_translations_context (context),
                 INDEX idx_translations_table_name (table_name)
                 ) ENGINE = InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -176,6 +189,8 @@ CREATE TABLE IF NOT EXISTS peoples (
                     serial          INT              CHECK (serial >= 0),
                     student_id         INT              CHECK (student_id >= 0),
                     name               VARCHAR(255)     NOT NULL,
+                    name_norm          VARCHAR(255) AS (LOWER(TRIM(name))) STORED NOT NULL,
+                    name_id            INT              NOT NULL,
                     date_of_birth      DATE,
                     birth_certificate  VARCHAR(100),
                     birth_certificate_encrypted VARCHAR(255) NOT NULL,
@@ -188,13 +203,13 @@ CREATE TABLE IF NOT EXISTS peoples (
                     source             VARCHAR(255),
                     present_address    VARCHAR(255),
                     present_address_hash  CHAR(64) NOT NULL,
-                    address            VARCHAR(255)    NULL,
+                    address_id         INT             NULL,
                     address_hash  CHAR(64) NOT NULL,
                     permanent_address  VARCHAR(255),
                     permanent_address_hash  CHAR(64) NOT NULL,
                     father_or_spouse   VARCHAR(255),
-                    father_name        VARCHAR(255)    NULL,
-                    mother_name        VARCHAR(255)    NULL,
+                    father_name_id     INT             NULL,
+                    mother_name_id     INT             NULL,
                     class              VARCHAR(100),
                     phone              VARCHAR(20)     NOT NULL,
                     guardian_number    VARCHAR(20),
@@ -204,7 +219,7 @@ CREATE TABLE IF NOT EXISTS peoples (
                     acc_type           VARCHAR(20)  NOT NULL CHECK (acc_type IN ('admins', 'guest', 'student', 'teacher', 'staff', 'donor', 'badri_member', 'special_member' ,'others')),
                     status             VARCHAR(50)  NOT NULL CHECK (status IN ('verified', 'pending', 'rejected')) DEFAULT 'pending',
 
-                    INDEX idx_peoples_name_phone (name, phone),
+                    INDEX idx_peoples_phone_name_norm (phone, name_norm),
                     INDEX idx_peoples_user_id (user_id),
                     INDEX idx_peoples_status (status),
                     INDEX idx_peoples_gender (gender),
@@ -216,10 +231,10 @@ CREATE TABLE IF NOT EXISTS peoples (
 
                     UNIQUE KEY unique_person (name, phone),
                     FOREIGN KEY (user_id) REFERENCES global.users(user_id) ON DELETE SET NULL ON UPDATE CASCADE,
-                    FOREIGN KEY (name) REFERENCES translations(translation_text) ON DELETE RESTRICT ON UPDATE CASCADE,
-                    FOREIGN KEY (address) REFERENCES translations(translation_text) ON DELETE SET NULL ON UPDATE CASCADE,
-                    FOREIGN KEY (father_name) REFERENCES translations(translation_text) ON DELETE SET NULL ON UPDATE CASCADE,
-                    FOREIGN KEY (mother_name) REFERENCES translations(translation_text) ON DELETE SET NULL ON UPDATE CASCADE
+                    FOREIGN KEY (name_id) REFERENCES translations(translation_id) ON DELETE RESTRICT ON UPDATE CASCADE,
+                    FOREIGN KEY (address_id) REFERENCES translations(translation_id) ON DELETE SET NULL ON UPDATE CASCADE,
+                    FOREIGN KEY (father_name_id) REFERENCES translations(translation_id) ON DELETE SET NULL ON UPDATE CASCADE,
+                    FOREIGN KEY (mother_name_id) REFERENCES translations(translation_id) ON DELETE SET NULL ON UPDATE CASCADE
                     ) ENGINE = InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 
@@ -252,16 +267,16 @@ CREATE TABLE IF NOT EXISTS routines (
                 class_group  VARCHAR(20)            NOT NULL,
                 class_level  VARCHAR(30)            NOT NULL,
                 weekday      ENUM('saturday','sunday','monday','tuesday','wednesday','thursday','friday') NOT NULL,
-                subject      VARCHAR(255)           NOT NULL,
-                name         VARCHAR(255)           NOT NULL,
+                subject_id   INT                    NOT NULL,
+                name_id      INT                    NOT NULL,
                 serial       INT                    NOT NULL CHECK (serial => 0),
 
                 UNIQUE KEY unique_routine (class_group, class_level, weekday, serial),
                 INDEX idx_routines_class_group (class_group),
                 INDEX idx_routines_class_level (class_level),
                 INDEX idx_routines_weekday (weekday),
-                FOREIGN KEY (subject) REFERENCES translations(translation_text) ON DELETE RESTRICT ON UPDATE CASCADE,
-                FOREIGN KEY (name) REFERENCES translations(translation_text) ON DELETE RESTRICT ON UPDATE CASCADE
+                FOREIGN KEY (subject_id) REFERENCES translations(translation_id) ON DELETE RESTRICT ON UPDATE CASCADE,
+                FOREIGN KEY (name_id) REFERENCES translations(translation_id) ON DELETE RESTRICT ON UPDATE CASCADE
                 ) ENGINE = InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 
@@ -270,7 +285,7 @@ CREATE TABLE IF NOT EXISTS exams (
                 created_at      TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
                 updated_at      TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
 
-                book            VARCHAR(255)  NULL,
+                book_id         INT          NULL,
                 class           VARCHAR(50)  NOT NULL,
                 gender          ENUM('male','female', 'others')  NOT NULL,
                 start_time      TIMESTAMP    NOT NULL,
@@ -283,7 +298,7 @@ CREATE TABLE IF NOT EXISTS exams (
                 INDEX idx_exams_class (class),
                 INDEX idx_exams_gender (gender),
                 INDEX idx_exams_weekday (weekday),
-                FOREIGN KEY (book) REFERENCES translations(translation_text) ON DELETE SET NULL ON UPDATE CASCADE
+                FOREIGN KEY (book_id) REFERENCES translations(translation_id) ON DELETE SET NULL ON UPDATE CASCADE
                 ) ENGINE = InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 
@@ -293,14 +308,14 @@ CREATE TABLE IF NOT EXISTS events (
                 updated_at   TIMESTAMP  NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
 
                 type         VARCHAR(20)  NOT NULL CHECK (type IN ('event', 'function')),
-                title        VARCHAR(255)  NOT NULL,
+                title_id     INT          NOT NULL,
                 time         TIMESTAMP    NOT NULL,
                 date         DATE         NOT NULL,
                 function_url VARCHAR(255),
 
                 INDEX idx_events_type (type),
-                INDEX idx_events_title (title),
-                FOREIGN KEY (title) REFERENCES translations(translation_text) ON DELETE RESTRICT ON UPDATE CASCADE
+                INDEX idx_events_title_id (title_id),
+                FOREIGN KEY (title_id) REFERENCES translations(translation_id) ON DELETE RESTRICT ON UPDATE CASCADE
                 ) ENGINE = InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 ---------------------------------------------- LOG TABLES ----------------------------------------------
@@ -309,8 +324,10 @@ CREATE TABLE IF NOT EXISTS events (
 CREATE DATABASE IF NOT EXISTS logs;
 USE logs;
 
+-- Range-partitioned by day (see 0002_partition_logs.sql); the partition
+-- column must be part of the primary key
 CREATE TABLE IF NOT EXISTS logs (
-                log_id     INT       NOT NULL AUTO_INCREMENT PRIMARY KEY,
+                log_id     INT       NOT NULL AUTO_INCREMENT,
                 created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
 
                 action     VARCHAR(100) NOT NULL,
@@ -321,10 +338,14 @@ CREATE TABLE IF NOT EXISTS logs (
                 message    TEXT NOT NULL,
                 metadata   JSON,
 
+                PRIMARY KEY (log_id, created_at),
                 INDEX idx_logs_trace_info (trace_info),
                 INDEX idx_logs_action (action),
                 INDEX idx_logs_created_at (created_at)
-                ) ENGINE = InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;            
+                ) ENGINE = InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+                PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+                PARTITION p_future VALUES LESS THAN MAXVALUE
+                );
 
 CREATE TABLE IF NOT EXISTS password_reset_logs (
                 password_reset_log_id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
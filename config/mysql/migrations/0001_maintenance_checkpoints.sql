@@ -0,0 +1,7 @@
+-- Resume points of chunked maintenance jobs (e.g. the scheduled user reaper)
+CREATE TABLE IF NOT EXISTS global.maintenance_checkpoints (
+                task        VARCHAR(100)   NOT NULL PRIMARY KEY,
+                position    BIGINT         NOT NULL,
+
+                updated_at  TIMESTAMP  NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                ) ENGINE = InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
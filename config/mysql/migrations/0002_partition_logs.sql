@@ -0,0 +1,8 @@
+-- Range-partition logs.logs by day so retention drops whole partitions.
+-- The partition column must be part of every unique key. New daily partitions
+-- are split off p_future ahead of time by the log retention maintenance task.
+ALTER TABLE logs.logs DROP PRIMARY KEY, ADD PRIMARY KEY (log_id, created_at);
+
+ALTER TABLE logs.logs PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+                PARTITION p_future VALUES LESS THAN MAXVALUE
+                );
@@ -0,0 +1,12 @@
+-- Stored normalized-name columns for the phone + name lookups (see
+-- tools/check_lookup_plans.py). Adding a STORED generated column rebuilds the
+-- table, so deploy this in a quiet window.
+ALTER TABLE global.users
+                ADD COLUMN fullname_norm VARCHAR(50) AS (LOWER(TRIM(fullname))) STORED NOT NULL AFTER fullname,
+                DROP INDEX idx_users_phone_fullname,
+                ADD INDEX idx_users_phone_fullname_norm (phone, fullname_norm);
+
+ALTER TABLE annur.peoples
+                ADD COLUMN name_norm VARCHAR(255) AS (LOWER(TRIM(name))) STORED NOT NULL AFTER name,
+                DROP INDEX idx_peoples_name_phone,
+                ADD INDEX idx_peoples_phone_name_norm (phone, name_norm);
@@ -7,8 +7,10 @@ import logging
 import json
 from datetime import datetime, timedelta
 from pathlib import Path
-from utils.helpers.helpers import delete_users
+from utils.helpers.helpers import delete_code, delete_users
 from utils.helpers.logger import log
+from utils.helpers.log_writer import log_writer
+from utils.mysql.log_partitions import rotate_log_partitions
 from maintenance.backup_db import main as backup_main
 
 # Add project root to path
@@ -143,6 +145,65 @@ async def run_maintenance():
             print(f"❌ {error_msg}")
             log.error(action="maintenance_log_cleanup_failed", trace_info="system", message=error_msg, secure=False)
         
+        # Task 4: Log table partitions (archive + drop expired days)
+        logger.info("🗄️  Starting log partition rotation...")
+        print("🗄️  Rotating log partitions...")
+        
+        task_start = datetime.now()
+        try:
+            rotation = await rotate_log_partitions()
+            task_duration = (datetime.now() - task_start).total_seconds()
+            maintenance_results["tasks"]["log_partitions"] = {
+                "status": "success",
+                "duration": task_duration,
+                "message": f"Created {len(rotation['created'])}, archived {len(rotation['archived'])}, dropped {len(rotation['dropped'])} partitions",
+                "details": rotation
+            }
+            logger.info(f"✅ Log partition rotation completed in {task_duration:.2f}s")
+            print("✅ Log partition rotation completed")
+            
+        except Exception as e:
+            task_duration = (datetime.now() - task_start).total_seconds()
+            error_msg = f"Log partition rotation failed: {type(e).__name__}"
+            maintenance_results["tasks"]["log_partitions"] = {
+                "status": "failed",
+                "duration": task_duration,
+                "error": type(e).__name__
+            }
+            maintenance_results["errors"].append(error_msg)
+            logger.error(error_msg)
+            print(f"❌ {error_msg}")
+            log.error(action="maintenance_log_partitions_failed", trace_info="system", message=error_msg, secure=False)
+        
+        # Task 5: Verification audit rows (codes themselves expire in KeyDB)
+        logger.info("🔑 Starting verification audit pruning...")
+        print("🔑 Pruning verification audit rows...")
+        
+        task_start = datetime.now()
+        try:
+            await delete_code()
+            task_duration = (datetime.now() - task_start).total_seconds()
+            maintenance_results["tasks"]["verification_audit"] = {
+                "status": "success",
+                "duration": task_duration,
+                "message": "Verification audit pruning completed successfully"
+            }
+            logger.info(f"✅ Verification audit pruning completed in {task_duration:.2f}s")
+            print("✅ Verification audit pruning completed")
+            
+        except Exception as e:
+            task_duration = (datetime.now() - task_start).total_seconds()
+            error_msg = f"Verification audit pruning failed: {type(e).__name__}"
+            maintenance_results["tasks"]["verification_audit"] = {
+                "status": "failed",
+                "duration": task_duration,
+                "error": type(e).__name__
+            }
+            maintenance_results["errors"].append(error_msg)
+            logger.error(error_msg)
+            print(f"❌ {error_msg}")
+            log.error(action="maintenance_verification_audit_failed", trace_info="system", message=error_msg, secure=False)
+        
         # Overall status
         total_duration = (datetime.now() - start_time).total_seconds()
         maintenance_results["end_time"] = datetime.now().isoformat()
@@ -162,6 +223,8 @@ async def run_maintenance():
         
         # Save maintenance report
         await save_maintenance_report(maintenance_results)
+        # Write queued log records before the event loop closes
+        await log_writer.stop()
         
     except Exception as e:
         error_msg = f"Maintenance script failed: {type(e).__name__}"
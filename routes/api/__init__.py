@@ -8,5 +8,6 @@ from .v1 import auth  # noqa: F401
 from .v1 import payments  # noqa: F401
 from .v1 import core  # noqa: F401
 from .v1 import files  # noqa: F401
+from .v1 import admin  # noqa: F401
 
 __all__ = ["api"]
\ No newline at end of file
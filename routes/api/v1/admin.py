@@ -0,0 +1,124 @@
+# ─── Admin Routes ───────────────────────────────────────────
+# Operational endpoints; every route requires the admin API key.
+import asyncio
+import tempfile
+from typing import Literal, Optional
+
+from fastapi import Query, Request, Security
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Local imports
+from config.config import config
+from routes.api import api
+from utils.helpers.fastapi_helpers import NDJSON_MEDIA_TYPE, ndjson_line, require_admin_key
+from utils.helpers.helpers import handle_async_errors, validate_madrasa_name
+from utils.helpers.improved_functions import send_json_response
+from utils.helpers.logger import log
+from utils.helpers.log_writer import log_writer
+from utils.helpers.password_hasher import password_hasher
+from utils.keydb.rate_budget import rate_budget
+from utils.helpers.people_import import ImportFormatError, PeopleImporter, iter_people_file
+from utils.mysql.database_utils import get_pool_stats
+from utils.mysql.loader import loader_stats
+from utils.mysql.query_stats import query_log
+from utils.mysql.statements import statements
+from utils.otel.round_trips import route_round_trips
+
+_CONTENT_TYPE_FORMATS = {
+    "text/csv": "csv",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "xlsx",
+}
+
+
+@api.post("/admin/import_people", dependencies=[Security(require_admin_key)])
+@handle_async_errors
+async def import_people(
+    request: Request,
+    madrasa_name: str = Query(...),
+    format: Optional[Literal["csv", "xlsx"]] = Query(None),
+    dry_run: bool = Query(False),
+    chunk_size: Optional[int] = Query(None, ge=1, le=5000),
+):
+    """Bulk import people from a CSV/XLSX request body.
+
+    The file is sent as the raw body (not multipart), so it bypasses the small
+    form-body limit and is spooled to disk while it arrives. The response is
+    NDJSON: one progress line per chunk, then the final report with row errors.
+    """
+    validate_madrasa_name(madrasa_name, "admin_import", secure=False)
+    fmt = format or _CONTENT_TYPE_FORMATS.get(request.headers.get("content-type", "").split(";")[0].strip())
+    if fmt is None:
+        response, status = send_json_response("Pass format=csv|xlsx or a matching Content-Type", 400)
+        return JSONResponse(content=response, status_code=status)
+
+    upload = tempfile.SpooledTemporaryFile(max_size=4 * 1024 * 1024)
+    size = 0
+    async for part in request.stream():
+        size += len(part)
+        if size > config.IMPORT_MAX_BYTES:
+            upload.close()
+            response, status = send_json_response("Import file too large", 413)
+            return JSONResponse(content=response, status_code=status)
+        # Past max_size the file rolls over to disk; keep those writes off the event loop
+        await asyncio.to_thread(upload.write, part)
+    upload.seek(0)
+
+    importer = PeopleImporter(madrasa_name, chunk_size=chunk_size, dry_run=dry_run)
+    log.info(action="people_import_started", trace_info=madrasa_name, message=f"{fmt} import of {size} bytes (dry_run={dry_run})", secure=False)
+
+    async def _body():
+        try:
+            async for report in importer.iter_run(iter_people_file(upload, fmt)):
+                yield ndjson_line(report.as_dict(include_errors=report.finished))
+        except ImportFormatError as e:
+            yield ndjson_line({"finished": True, "error": str(e)})
+        except Exception as e:
+            # Chunks committed so far stay; report where the import stopped
+            log.error(action="people_import_failed", trace_info=madrasa_name, message=f"{type(e).__name__}: {e}", secure=False)
+            yield ndjson_line({**importer.report.as_dict(), "error": f"{type(e).__name__}: import stopped"})
+        finally:
+            upload.close()
+
+    return StreamingResponse(_body(), media_type=NDJSON_MEDIA_TYPE)
+
+
+StatsOrder = Literal["total_ms", "count", "p99_ms", "max_ms", "rows", "slow", "errors"]
+
+
+def _query_stats(top: int, order: str) -> dict:
+    return {
+        "slow_query_ms": query_log.slow_ms,
+        "top_queries": query_log.top(top, order),
+        "statements": statements.stats(),
+        "pool": get_pool_stats(),
+        "loaders": loader_stats(),
+        "routes": route_round_trips.snapshot(),
+        "log_writer": log_writer.snapshot(),
+        "password_hashing": password_hasher.snapshot(),
+        "rate_limit": rate_budget.snapshot(),
+    }
+
+
+@api.get("/admin/query_stats", dependencies=[Security(require_admin_key)])
+@handle_async_errors
+async def query_stats(
+    top: int = Query(20, ge=1, le=500),
+    order: StatsOrder = Query("total_ms"),
+):
+    """Hottest query fingerprints since start (or the last reset), plus named
+    statement, pool, query cache, batch loader, per-route round-trip, log writer, password hashing and rate limit counters"""
+    return JSONResponse(content=_query_stats(top, order))
+
+
+@api.post("/admin/query_stats/reset", dependencies=[Security(require_admin_key)])
+@handle_async_errors
+async def reset_query_stats(
+    top: int = Query(20, ge=1, le=500),
+    order: StatsOrder = Query("total_ms"),
+):
+    """Clear the query fingerprint and named statement counters, returning what they held"""
+    data = _query_stats(top, order)
+    query_log.reset()
+    statements.reset_stats()
+    log.info(action="query_stats_reset", trace_info="admin", message=f"Query stats reset ({len(data['top_queries'])} top fingerprints)", secure=False)
+    return JSONResponse(content=data)
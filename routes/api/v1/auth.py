@@ -7,22 +7,26 @@ import aiomysql
 from fastapi import Request, Depends
 from fastapi.responses import JSONResponse
 from pydantic import field_validator
-from werkzeug.security import generate_password_hash, check_password_hash
 
 from utils.helpers.improved_functions import get_env_var, send_json_response
 
 # Local imports
 from routes.api import api
 from utils.mysql.database_utils import get_traced_db_cursor
+from utils.mysql.loader import people_loader
+from utils.mysql.translations import PEOPLE_TRANSLATION_FIELDS, translate_rows
+from utils.mysql.statements import run_statement
 from config.config import config
 from utils.helpers.helpers import (
     check_code, get_global_id, validate_device_limit, format_phone_number, generate_code, get_id, 
-    record_login_attempt, send_sms, send_email, 
+    record_login_attempt, send_sms, send_email, reserve_code_send, release_code_send, store_code,
     get_email, encrypt_sensitive_data, hash_sensitive_data,
     validate_email, validate_login_attempts, validate_password_strength,
-    handle_async_errors
+    handle_async_errors, normalize_name, AppError
 )
+from utils.helpers.interactions import record_interaction
 from utils.helpers.logger import log
+from utils.helpers.password_hasher import PasswordHasherBusyError, hash_password, verify_password
 from utils.helpers.fastapi_helpers import (
     BaseAuthRequest, ClientInfo, validate_device_dependency,
     rate_limit
@@ -163,10 +167,10 @@ async def register(
         madrasa_name = data.madrasa_name or get_env_var("MADRASA_NAME")
 
         # Verify code
-        await check_code(user_code, phone)
+        await check_code(user_code, phone, request)
 
         # Hash password with salt
-        hashed_password = generate_password_hash(str(password))
+        hashed_password = await hash_password(str(password))
         hashed_phone = hash_sensitive_data(phone)
         encrypted_phone = encrypt_sensitive_data(phone)
         encrypted_email = encrypt_sensitive_data(email) if email else None
@@ -196,39 +200,25 @@ async def register(
                 user_id = await get_global_id(phone, fullname)
                 
                 # Get user profile information
-                await cursor.execute(
-                    f"""SELECT 
-                        p.*,
-                        a.main_type AS acc_type, a.teacher, a.student, a.staff, 
-                        a.donor, a.badri_member, a.special_member,
-                        tname.translation_text AS name_en, tname.bn_text AS name_bn, tname.ar_text AS name_ar,
-                        taddress.translation_text AS address_en, taddress.bn_text AS address_bn, taddress.ar_text AS address_ar,
-                        tfather.translation_text AS father_en, tfather.bn_text AS father_bn, tfather.ar_text AS father_ar,
-                        tmother.translation_text AS mother_en, tmother.bn_text AS mother_bn, tmother.ar_text AS mother_ar
-                        FROM {madrasa_name}.peoples p
-                        JOIN global.acc_types a ON a.user_id = p.user_id
-                        JOIN global.translations tname ON tname.translation_text = p.name
-                        LEFT JOIN global.translations taddress ON taddress.translation_text = p.address
-                        JOIN global.translations tfather ON tfather.translation_text = p.father_name
-                        LEFT JOIN global.translations tmother ON tmother.translation_text = p.mother_name
-                        WHERE LOWER(p.name) = LOWER(%s) AND p.phone = %s""",
-                    (fullname, phone)
-                )
+                await run_statement(cursor, "peoples.profile_by_name_phone",
+                                    (normalize_name(fullname), phone), madrasa=madrasa_name)
                 people_result = await cursor.fetchone()
                 
                 # Update people record with user_id if found
                 if people_result:
-                    await cursor.execute(
-                        "UPDATE peoples SET user_id = %s WHERE LOWER(name) = LOWER(%s) AND phone = %s",
-                        (user_id, fullname, phone)
-                    )
+                    await run_statement(cursor, "peoples.link_user",
+                                        (user_id, normalize_name(fullname), phone), madrasa=madrasa_name)
                 
                 # Log successful registration
                 log.info(action="user_registered_successfully", trace_info=ip_address, message=f"User registered successfully: {fullname}", secure=False)
-                
-                response, status = send_json_response("Registration successful", 201)
-                response.update({"info": people_result})
-                return JSONResponse(content=response, status_code=status)
+            
+            # Translate after the cursor is released; ensure() may take its own pooled connection
+            if people_result:
+                await translate_rows(madrasa_name, [people_result], PEOPLE_TRANSLATION_FIELDS)
+            
+            response, status = send_json_response("Registration successful", 201)
+            response.update({"info": people_result})
+            return JSONResponse(content=response, status_code=status)
                 
         except aiomysql.IntegrityError as e:
             log.critical(action="register_integrity_error", trace_info=ip_address, message=f"Database integrity error: {str(e)}", secure=False)
@@ -240,6 +230,9 @@ async def register(
             response, status = send_json_response(ERROR_MESSAGES['database_error'], 500)
             return JSONResponse(content=response, status_code=status)
             
+    except (AppError, PasswordHasherBusyError):
+        # Code check failures are client errors; handle_async_errors answers 400
+        raise
     except Exception as e:
         log.critical(action="register_error", trace_info="system", message=f"Registration error: {str(e)}", secure=False)
         response, status = send_json_response(ERROR_MESSAGES['internal_error'], 500)
@@ -276,76 +269,73 @@ async def login(
     
     try: 
         async with get_traced_db_cursor() as cursor:
-                # Get user by phone and name
-                await cursor.execute(
-                    "SELECT * FROM global.users WHERE phone = %s AND LOWER(fullname) = LOWER(%s)",
-                    (phone, fullname)
-                )
-                user = await cursor.fetchone()
-                
-                if not user:
-                    await record_login_attempt(phone, fullname, False)
-                    log.error(action="login_user_not_found", trace_info=phone, message=f"User not found: {fullname}", secure=True)
-                    response, status = send_json_response(ERROR_MESSAGES['account_not_found'], 404)
-                    return JSONResponse(content=response, status_code=status)
-                
-                # Check password
-                if not check_password_hash(user["password_hash"], password or ""):
-                    await record_login_attempt(phone, fullname, False)
-                    log.warning(action="login_incorrect_password", trace_info=phone, message="Incorrect password", secure=True)
-                    response, status = send_json_response(ERROR_MESSAGES['invalid_credentials'], 401)
-                    return JSONResponse(content=response, status_code=status)
-                
-                # Check if account is deactivated
-                if user["deactivated_at"] is not None:
-                    log.warning(action="login_account_deactivated", trace_info=phone, message="Account is deactivated", secure=True)
-                    response, status = send_json_response(ERROR_MESSAGES['account_deactivated'], 403)
-                    response.update({"action": "deactivate"})
-                    return JSONResponse(content=response, status_code=status)
-                
-                # Check device limit
-                await validate_device_limit(device_id, ip_address, request)
-                
-                # Record successful login
-                await record_login_attempt(phone, fullname, True)
-                
-                # Get user's profile information
-                await cursor.execute(
-                    f"SELECT * FROM {madrasa_name}.peoples WHERE user_id = %s",
-                    (user["user_id"],)
-                )
-                profile = await cursor.fetchone()
-                
-                if not profile:
-                    log.critical(action="login_profile_not_found", trace_info=phone, message="User profile not found", secure=True)
-                    response, status = send_json_response(ERROR_MESSAGES['internal_error'], 500)
-                    return JSONResponse(content=response, status_code=status)
-                                
-                # Check if profile is incomplete
-                # TODO: Implement profile completeness check
-                
-                # Remove sensitive information
-                profile.pop("password", None)
-                profile.pop("password_hash", None)
-                
-                # TODO: Update last login
-                # await cursor.execute(
-                #     "UPDATE people SET last_login = %s WHERE user_id = %s",
-                #     (datetime.now(timezone.utc), user["user_id"])
-                # )
-                
-                # TODO: Track device
-                # await cursor.execute("""
-                #     INSERT INTO device_interactions (user_id, device_id, interaction_type, ip_address)
-                #     VALUES (%s, %s, 'login', %s)
-                # """, (user["user_id"], device_id, ip_address))
-                
-                log.info(action="login_successful", trace_info=ip_address, message=f"User logged in successfully: {fullname}", secure=False)
-                
-                response, status = send_json_response("Login successful", 200)
-                response.update({"info": profile})
-                return JSONResponse(content=response, status_code=status)
-                
+            # Get user by phone and name
+            await run_statement(cursor, "users.by_phone_name", (phone, normalize_name(fullname)))
+            user = await cursor.fetchone()
+
+        # The connection is back in the pool from here on: the password check is slow
+        # and the profile loader runs its batch on a connection of its own
+        if not user:
+            await record_login_attempt(phone, fullname, False)
+            log.error(action="login_user_not_found", trace_info=phone, message=f"User not found: {fullname}", secure=True)
+            response, status = send_json_response(ERROR_MESSAGES['account_not_found'], 404)
+            return JSONResponse(content=response, status_code=status)
+        
+        # Check password
+        if not await verify_password(user["password_hash"], password or ""):
+            await record_login_attempt(phone, fullname, False)
+            log.warning(action="login_incorrect_password", trace_info=phone, message="Incorrect password", secure=True)
+            response, status = send_json_response(ERROR_MESSAGES['invalid_credentials'], 401)
+            return JSONResponse(content=response, status_code=status)
+        
+        # Check if account is deactivated
+        if user["deactivated_at"] is not None:
+            log.warning(action="login_account_deactivated", trace_info=phone, message="Account is deactivated", secure=True)
+            response, status = send_json_response(ERROR_MESSAGES['account_deactivated'], 403)
+            response.update({"action": "deactivate"})
+            return JSONResponse(content=response, status_code=status)
+        
+        # Check device limit
+        await validate_device_limit(device_id, ip_address, request)
+        
+        # Record successful login
+        await record_login_attempt(phone, fullname, True)
+        
+        # Get user's profile information
+        profile = await people_loader(madrasa_name).load(user["user_id"])
+        
+        if not profile:
+            log.critical(action="login_profile_not_found", trace_info=phone, message="User profile not found", secure=True)
+            response, status = send_json_response(ERROR_MESSAGES['internal_error'], 500)
+            return JSONResponse(content=response, status_code=status)
+                        
+        # Check if profile is incomplete
+        # TODO: Implement profile completeness check
+        
+        # Remove sensitive information
+        profile.pop("password", None)
+        profile.pop("password_hash", None)
+        
+        # TODO: Update last login
+        # await cursor.execute(
+        #     "UPDATE people SET last_login = %s WHERE user_id = %s",
+        #     (datetime.now(timezone.utc), user["user_id"])
+        # )
+        
+        # TODO: Track device
+        # await cursor.execute("""
+        #     INSERT INTO device_interactions (user_id, device_id, interaction_type, ip_address)
+        #     VALUES (%s, %s, 'login', %s)
+        # """, (user["user_id"], device_id, ip_address))
+        
+        log.info(action="login_successful", trace_info=ip_address, message=f"User logged in successfully: {fullname}", secure=False)
+        
+        response, status = send_json_response("Login successful", 200)
+        response.update({"info": profile})
+        return JSONResponse(content=response, status_code=status)
+        
+    except PasswordHasherBusyError:
+        raise
     except Exception as e:
         log.critical(action="login_error", trace_info=ip_address, message=f"Login error: {str(e)}", secure=False)
         response, status = send_json_response(ERROR_MESSAGES['internal_error'], 500)
@@ -380,84 +370,66 @@ async def send_verification_code(
             email = await get_email(phone=phone, fullname=fullname)
 
         
-        # Check if user already exists
-        async with get_traced_db_cursor() as cursor:
-                # Check if user exists (for registration)
-                existing_user = await get_id(phone, fullname, madrasa_name)
-                if existing_user:
-                    log.warning(action="send_code_user_exists", trace_info=ip_address, message=f"User already exists: {fullname}", secure=False)
-                    response, status = send_json_response(ERROR_MESSAGES['user_already_exists'], 409)
-                    return JSONResponse(content=response, status_code=status)
-                
-                # Check rate limit for verification codes
-                await cursor.execute("""
-                    SELECT COUNT(*) as count
-                    FROM global.verifications
-                    WHERE phone = %s
-                    AND created_at > DATE_SUB(NOW(), INTERVAL 1 HOUR)
-                """, (phone,))
-                
-                result = await cursor.fetchone()
-                count = result["count"] if result else 0
-                
-                # Check rate limits
-                max_limit = max(config.SMS_LIMIT_PER_HOUR, config.EMAIL_LIMIT_PER_HOUR)
-                if int(count) >= int(max_limit):
-                    log.warning(action="send_code_rate_limited", trace_info=ip_address, message=f"Rate limit exceeded for phone: {phone}", secure=False)
-                    response, status = send_json_response(ERROR_MESSAGES['rate_limit_exceeded'], 429)
-                    return JSONResponse(content=response, status_code=status)
-                
-                # Generate and send verification code
-                code = generate_code()
+        # Check if user already exists (for registration)
+        existing_user = await get_id(phone, fullname, madrasa_name)
+        if existing_user:
+            log.warning(action="send_code_user_exists", trace_info=ip_address, message=f"User already exists: {fullname}", secure=False)
+            response, status = send_json_response(ERROR_MESSAGES['user_already_exists'], 409)
+            return JSONResponse(content=response, status_code=status)
 
-                phone_hash = hash_sensitive_data(phone)
-                phone_encrypted = encrypt_sensitive_data(phone)
+        # Atomic per-phone send counter in KeyDB; the window opens with the first send
+        count = await reserve_code_send(phone, request)
 
-                sql = """INSERT INTO global.verifications (phone, phone_hash, phone_encrypted, code, ip_address)
-                        VALUES (%s, %s, %s, %s, %s)"""
-                params = (phone, phone_hash, phone_encrypted, code, ip_address)
-                
-                # Try SMS first
-                if count < config.SMS_LIMIT_PER_HOUR:
-                    log.info(action="send_code_attempting_sms", trace_info=ip_address, message=f"Attempting to send SMS to: {phone}, code: {code}", secure=False)
-                    sms_sent = await send_sms(
-                        phone=phone,
-                        msg=f"Your verification code is: {code}"
-                    )
-                    
-                    log.info(action="send_code_sms_result", trace_info=ip_address, message=f"SMS send result: {sms_sent} (type: {type(sms_sent)})", secure=False)
-                    
-                    if sms_sent:
-                        # Store in database
-                        await cursor.execute(sql, params)
-                        log.info(action="verification_code_sent_sms", trace_info=ip_address, message=f"Verification code sent via SMS to: {phone}", secure=False)
-                        
-                        response, status = send_json_response(f"Verification code sent to {phone}", 200)
-                        return JSONResponse(content=response, status_code=status)
-                    else:
-                        log.warning(action="send_code_sms_failed", trace_info=ip_address, message=f"SMS sending failed for phone: {phone}", secure=False)
-                
-                # Try email if SMS failed or limit reached
-                if email and count < config.EMAIL_LIMIT_PER_HOUR:
-                    email_sent = await send_email(
-                        to_email=email,
-                        subject="Verification Code",
-                        body=f"Your verification code is: {code}"
-                    )
-                    
-                    if email_sent:
-                        # Store in database
-                        await cursor.execute(sql, params)
-                        log.info(action="verification_code_sent_email", trace_info=ip_address, message=f"Verification code sent via email to: {email}", secure=False)
-                        
-                        response, status = send_json_response(f"Verification code sent to {email}", 200)
-                        return JSONResponse(content=response, status_code=status)
-                
-                # If both methods failed
-                log.critical(action="verification_code_failed", trace_info=ip_address, message="Failed to send verification code via any method", secure=False)
-                response, status = send_json_response("Failed to send verification code", 500)
+        # Check rate limits
+        max_limit = max(config.SMS_LIMIT_PER_HOUR, config.EMAIL_LIMIT_PER_HOUR)
+        if int(count) > int(max_limit):
+            log.warning(action="send_code_rate_limited", trace_info=ip_address, message=f"Rate limit exceeded for phone: {phone}", secure=False)
+            response, status = send_json_response(ERROR_MESSAGES['rate_limit_exceeded'], 429)
+            return JSONResponse(content=response, status_code=status)
+
+        # Generate and send verification code
+        code = generate_code()
+
+        # Try SMS first
+        if count <= config.SMS_LIMIT_PER_HOUR:
+            log.info(action="send_code_attempting_sms", trace_info=ip_address, message=f"Attempting to send SMS to: {phone}, code: {code}", secure=False)
+            sms_sent = await send_sms(
+                phone=phone,
+                msg=f"Your verification code is: {code}"
+            )
+
+            log.info(action="send_code_sms_result", trace_info=ip_address, message=f"SMS send result: {sms_sent} (type: {type(sms_sent)})", secure=False)
+
+            if sms_sent:
+                await store_code(phone, code, ip_address, request)
+                log.info(action="verification_code_sent_sms", trace_info=ip_address, message=f"Verification code sent via SMS to: {phone}", secure=False)
+
+                response, status = send_json_response(f"Verification code sent to {phone}", 200)
                 return JSONResponse(content=response, status_code=status)
-                
+            else:
+                log.warning(action="send_code_sms_failed", trace_info=ip_address, message=f"SMS sending failed for phone: {phone}", secure=False)
+
+        # Try email if SMS failed or limit reached
+        if email and count <= config.EMAIL_LIMIT_PER_HOUR:
+            email_sent = await send_email(
+                to_email=email,
+                subject="Verification Code",
+                body=f"Your verification code is: {code}"
+            )
+
+            if email_sent:
+                await store_code(phone, code, ip_address, request)
+                log.info(action="verification_code_sent_email", trace_info=ip_address, message=f"Verification code sent via email to: {email}", secure=False)
+
+                response, status = send_json_response(f"Verification code sent to {email}", 200)
+                return JSONResponse(content=response, status_code=status)
+
+        # If both methods failed; the attempt does not count against the hourly budget
+        await release_code_send(phone, request)
+        log.critical(action="verification_code_failed", trace_info=ip_address, message="Failed to send verification code via any method", secure=False)
+        response, status = send_json_response("Failed to send verification code", 500)
+        return JSONResponse(content=response, status_code=status)
+
     except Exception as e:
         log.critical(action="send_code_error", trace_info="system", message=f"Error sending verification code: {str(e)}", secure=False)
         response, status = send_json_response(ERROR_MESSAGES['internal_error'], 500)
@@ -485,17 +457,14 @@ async def reset_password(
                 
         # If old password is not provided, use code verification
         if not old_password:
-            await check_code(code or 0, phone)
+            await check_code(code or 0, phone, request)
             if not new_password:
                 response, status = send_json_response("Code successfully matched", 200)
                 return JSONResponse(content=response, status_code=status)        
         
         async with get_traced_db_cursor() as cursor:
                 # Get user
-                await cursor.execute(
-                    f"SELECT * FROM global.users WHERE phone = %s AND LOWER(fullname) = LOWER(%s)",
-                    (phone, fullname)
-                )
+                await run_statement(cursor, "users.by_phone_name", (phone, normalize_name(fullname)))
                 user = await cursor.fetchone()
                 
                 if not user:
@@ -508,7 +477,7 @@ async def reset_password(
                 
                 # If old password is provided, verify it
                 if old_password:
-                    if not check_password_hash(user['password_hash'], old_password):
+                    if not await verify_password(user['password_hash'], old_password):
                         log.warning(action="reset_password_incorrect_old_password", trace_info=phone, message="Incorrect old password", secure=True)
                         response, status = send_json_response("Incorrect old password", 401)
                         return JSONResponse(content=response, status_code=status)
@@ -517,12 +486,12 @@ async def reset_password(
                 if not new_password:
                     response, status = send_json_response("New password is required", 400)
                     return JSONResponse(content=response, status_code=status)
-                hashed_password = generate_password_hash(new_password)
                 
                 # Check if new password is same as current
-                if check_password_hash(user['password_hash'], new_password):
+                if await verify_password(user['password_hash'], new_password):
                     response, status = send_json_response("New password cannot be the same as the current password.", 400)
                     return JSONResponse(content=response, status_code=status)
+                hashed_password = await hash_password(new_password)
                 
                 # Update password
                 await cursor.execute(
@@ -541,6 +510,9 @@ async def reset_password(
                 response, status = send_json_response("Password Reset Successful", 201)
                 return JSONResponse(content=response, status_code=status)
                 
+    except (AppError, PasswordHasherBusyError):
+        # Code check failures are client errors; handle_async_errors answers 400
+        raise
     except Exception as e:
         log.critical(action="reset_password_error", trace_info="system", message=f"Password reset error: {str(e)}", secure=False)
         response, status = send_json_response(ERROR_MESSAGES['internal_error'], 500)
@@ -565,13 +537,10 @@ async def manage_account(
         # Authenticate user
         async with get_traced_db_cursor() as cursor:
                 # Get user
-                await cursor.execute(
-                    f"SELECT * FROM global.users WHERE phone = %s AND LOWER(fullname) = LOWER(%s)",
-                    (phone, fullname)
-                )
+                await run_statement(cursor, "users.by_phone_name", (phone, normalize_name(fullname)))
                 user = await cursor.fetchone()
                 
-                if not user or not check_password_hash(user["password_hash"], password):
+                if not user or not await verify_password(user["password_hash"], password):
                     log.error(action="manage_account_invalid_credentials", trace_info=phone, message="Invalid credentials for account management", secure=True)
                     response, status = send_json_response("Invalid login details", 401)
                     return JSONResponse(content=response, status_code=status)
@@ -634,6 +603,8 @@ async def manage_account(
                     response, status = send_json_response("Account deactivated successfully.", 200)
                     return JSONResponse(content=response, status_code=status)
                     
+    except PasswordHasherBusyError:
+        raise
     except Exception as e:
         log.critical(action="manage_account_error", trace_info="system", message=f"Account management error: {str(e)}", secure=False)
         response, status = send_json_response(ERROR_MESSAGES['internal_error'], 500)
@@ -656,12 +627,8 @@ async def reactivate_account(
         
         async with get_traced_db_cursor() as cursor:
                 # Get deactivated user
-                await cursor.execute(
-                    f"""SELECT u.*, p.name FROM global.users u
-                    JOIN {madrasa_name}.peoples p ON p.user_id = u.user_id 
-                    WHERE u.phone = %s AND LOWER(u.fullname) = LOWER(%s) AND u.deactivated_at IS NOT NULL""",
-                    (phone, fullname)
-                )
+                await run_statement(cursor, "users.deactivated_with_person",
+                                    (phone, normalize_name(fullname)), madrasa=madrasa_name)
                 user = await cursor.fetchone()
                 
                 if not user or not user["deactivated_at"]:
@@ -772,100 +739,70 @@ async def get_account_status(
         
         async with get_traced_db_cursor() as cursor:
                 # Get user record
-                await cursor.execute(f"""
-                SELECT u.deactivated_at, u.email, p.*, 
-                    tname.translation_text AS name_en, tname.bn_text AS name_bn, tname.ar_text AS name_ar,
-                    taddress.translation_text AS address_en, taddress.bn_text AS address_bn, taddress.ar_text AS address_ar,
-                    tfather.translation_text AS father_en, tfather.bn_text AS father_bn, tfather.ar_text AS father_ar,
-                    tmother.translation_text AS mother_en, tmother.bn_text AS mother_bn, tmother.ar_text AS mother_ar
-                    FROM global.users u
-                    JOIN {madrasa_name}.peoples p ON p.user_id = u.user_id
-                    JOIN global.translations tname ON tname.translation_text = p.name
-                    LEFT JOIN global.translations taddress ON taddress.translation_text = p.address
-                    LEFT JOIN global.translations tfather ON tfather.translation_text = p.father_name
-                    LEFT JOIN global.translations tmother ON tmother.translation_text = p.mother_name
-                    WHERE u.phone = %s AND LOWER(u.fullname) = LOWER(%s)
-            """, (phone, fullname))
+                await run_statement(cursor, "users.account_check",
+                                    (phone, normalize_name(fullname)), madrasa=madrasa_name)
                 record = await cursor.fetchone()
-                
-                if not record:
-                    log.error(action="account_check_not_found", trace_info=ip_address, message="No matching user found", secure=False)
+        
+        if not record:
+            log.error(action="account_check_not_found", trace_info=ip_address, message="No matching user found", secure=False)
+            response, status = send_json_response("Session invalidated. Please log in again.", 401)
+            response.update({"action": "logout"})
+            return JSONResponse(content=response, status_code=status)
+        
+        # Translate after the cursor is released; ensure() may take its own pooled connection
+        await translate_rows(madrasa_name, [record], PEOPLE_TRANSLATION_FIELDS)
+        
+        # Check if account is deactivated
+        if record.get("deactivated_at"):
+            log.warning(action="account_check_deactivated", trace_info=record["user_id"], message="Account is deactivated", secure=False)
+            response, status = send_json_response("Account is deactivated", 401)
+            response.update({"action": "deactivate"})
+            return JSONResponse(content=response, status_code=status)
+        
+        # Compare provided fields with database values
+        for col, provided in checks.items():
+            if provided is None:
+                continue  # skip fields not sent by client
+            
+            db_val = record.get(col)
+            
+            # Special handling for dates: compare only date part
+            if col == "date_of_birth" and isinstance(db_val, (dt.datetime, dt.date)):
+                try:
+                    provided_date = datetime.fromisoformat(provided).date()
+                except Exception:
+                    log.error(action="account_check_bad_date", trace_info=record["user_id"], message=f"Bad date format: {provided}", secure=False)
                     response, status = send_json_response("Session invalidated. Please log in again.", 401)
                     response.update({"action": "logout"})
                     return JSONResponse(content=response, status_code=status)
                 
-                # Check if account is deactivated
-                if record.get("deactivated_at"):
-                    log.warning(action="account_check_deactivated", trace_info=record["user_id"], message="Account is deactivated", secure=False)
-                    response, status = send_json_response("Account is deactivated", 401)
-                    response.update({"action": "deactivate"})
+                if db_val:
+                    db_date = db_val.date() if isinstance(db_val, dt.datetime) else db_val
+                    if db_date != provided_date:
+                        log.warning(action="account_check_date_mismatch", trace_info=record["user_id"], message=f"Date mismatch: {col}: {provided_date} != {db_date}", secure=False)
+                        response, status = send_json_response("Session invalidated. Please log in again.", 401)
+                        response.update({"action": "logout"})
+                        return JSONResponse(content=response, status_code=status)
+            else:
+                # Compare string values
+                if str(provided).strip() != str(db_val).strip():
+                    log.warning(action="account_check_field_mismatch", trace_info=record["user_id"], message=f"Field mismatch: {col}: {hash_sensitive_data(str(provided))} != {hash_sensitive_data(str(db_val))}", secure=False)
+                    response, status = send_json_response("Session invalidated. Please log in again.", 401)
+                    response.update({"action": "logout"})
                     return JSONResponse(content=response, status_code=status)
-                
-                # Compare provided fields with database values
-                for col, provided in checks.items():
-                    if provided is None:
-                        continue  # skip fields not sent by client
-                    
-                    db_val = record.get(col)
-                    
-                    # Special handling for dates: compare only date part
-                    if col == "date_of_birth" and isinstance(db_val, (dt.datetime, dt.date)):
-                        try:
-                            provided_date = datetime.fromisoformat(provided).date()
-                        except Exception:
-                            log.error(action="account_check_bad_date", trace_info=record["user_id"], message=f"Bad date format: {provided}", secure=False)
-                            response, status = send_json_response("Session invalidated. Please log in again.", 401)
-                            response.update({"action": "logout"})
-                            return JSONResponse(content=response, status_code=status)
-                        
-                        if db_val:
-                            db_date = db_val.date() if isinstance(db_val, dt.datetime) else db_val
-                            if db_date != provided_date:
-                                log.warning(action="account_check_date_mismatch", trace_info=record["user_id"], message=f"Date mismatch: {col}: {provided_date} != {db_date}", secure=False)
-                                response, status = send_json_response("Session invalidated. Please log in again.", 401)
-                                response.update({"action": "logout"})
-                                return JSONResponse(content=response, status_code=status)
-                    else:
-                        # Compare string values
-                        if str(provided).strip() != str(db_val).strip():
-                            log.warning(action="account_check_field_mismatch", trace_info=record["user_id"], message=f"Field mismatch: {col}: {hash_sensitive_data(str(provided))} != {hash_sensitive_data(str(db_val))}", secure=False)
-                            response, status = send_json_response("Session invalidated. Please log in again.", 401)
-                            response.update({"action": "logout"})
-                            return JSONResponse(content=response, status_code=status)
-                
-                # Check device limit
-                await validate_device_limit(device_id, ip_address, request)
-                
-                # Track device interaction
-                await cursor.execute(
-                    "SELECT open_times FROM global.interactions WHERE device_id = %s AND device_brand = %s AND user_id = %s LIMIT 1",
-                    (device_id, device_brand, record["user_id"])
-                )
-                open_times = await cursor.fetchone()
-                
-                if not open_times:
-                    # Create new interaction record
-                    await cursor.execute("""
-                        INSERT INTO global.interactions 
-                        (device_id, ip_address, device_brand, user_id)
-                        VALUES (%s, %s, %s, %s)
-                    """, (device_id, ip_address, device_brand, record["user_id"]))
-                else:
-                    # Update existing interaction record
-                    opened = open_times['open_times'] if open_times else 0
-                    opened += 1
-                    await cursor.execute("""
-                        UPDATE global.interactions SET open_times = %s
-                        WHERE device_id = %s AND device_brand = %s AND user_id = %s
-                    """, (opened, device_id, device_brand, record["user_id"]))
-                
-                
-                log.info(action="account_check_successful", trace_info=ip_address, message=f"Account check successful for user: {record['user_id']}", secure=False)
-                
-                response, status = send_json_response("Account is valid", 200)
-                response.update({"user_id": record["user_id"]})
-                return JSONResponse(content=response, status_code=status)
-                
+        
+        # Check device limit
+        await validate_device_limit(device_id, ip_address, request)
+        
+        # Track device interaction (KeyDB counter, flushed to MySQL in batches)
+        await record_interaction(record["user_id"], device_id, device_brand, ip_address, request)
+        
+        log.info(action="account_check_successful", trace_info=ip_address, message=f"Account check successful for user: {record['user_id']}", secure=False)
+        
+        response, status = send_json_response("Account is valid", 200)
+        response.update({"user_id": record["user_id"]})
+        return JSONResponse(content=response, status_code=status)
+        
     except Exception as e:
         log.critical(action="account_check_error", trace_info="system", message=f"Account check error: {str(e)}", secure=False)
         response, status = send_json_response(ERROR_MESSAGES['internal_error'], 500)
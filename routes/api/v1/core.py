@@ -1,25 +1,33 @@
 import os
+import asyncio
 from datetime import datetime, date, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
 from zoneinfo import ZoneInfo
 
 from PIL import Image
 from fastapi import Request, Depends, UploadFile, File, Form
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, field_validator
 from werkzeug.utils import secure_filename
 
 from utils.helpers.improved_functions import get_env_var, send_json_response
-from utils.helpers.fastapi_helpers import BaseAuthRequest, ClientInfo, validate_device_dependency, rate_limit
+from utils.helpers.fastapi_helpers import (
+    BaseAuthRequest, ClientInfo, validate_device_dependency, rate_limit,
+    stream_rows_response, stream_sections_response
+)
 
 # Local imports
 from routes.api import api
-from utils.mysql.database_utils import get_traced_db_cursor
+from utils.mysql.database_utils import get_traced_db_cursor, stream_query_chunks
+from utils.mysql.statements import fetch_statement, run_statement, statements
+from utils.mysql.translations import TranslationEntries, translate_row, translation_dictionary, translation_ids, with_translations
 from config.config import config
 from utils.helpers.helpers import (
     format_phone_number, get_global_id, insert_person, validate_timestamp_format,
     cache_with_invalidation, handle_async_errors,
-    encrypt_sensitive_data, hash_sensitive_data, validate_file_upload, validate_fullname, validate_madrasa_name
+    encrypt_sensitive_data, hash_sensitive_data, validate_file_upload, validate_fullname, validate_madrasa_name,
+    normalize_name
 )
 from utils.helpers.logger import log
 
@@ -27,6 +35,19 @@ from utils.helpers.logger import log
 class BaseRouteData(BaseModel):
     madrasa_name: str
     updatedSince: Optional[str] = None
+    # Opt-in streaming from a server-side cursor: "json" keeps the buffered document shape, "ndjson" is one row per line
+    stream: Optional[Literal["json", "ndjson"]] = None
+
+    @field_validator('madrasa_name')
+    def validate_madrasa_name(cls, v):
+        validate_madrasa_name(v, "system", secure=False)
+        return v
+
+class BootstrapRequest(BaseModel):
+    """Combined first-sync request; ``cursors`` maps a section name to its ``updatedSince``"""
+    madrasa_name: str
+    cursors: Optional[Dict[str, Optional[str]]] = None
+    stream: bool = False
 
     @field_validator('madrasa_name')
     def validate_madrasa_name(cls, v):
@@ -86,6 +107,9 @@ class ProfileUpdateRequest(BaseAuthRequest):
 
 # ─── Configuration and Constants ───────────────────────────────────────────────
 
+DHAKA = ZoneInfo("Asia/Dhaka")
+BOOTSTRAP_SECTIONS = ("members", "routines", "events", "exams")
+
 ERROR_MESSAGES = {
         'invalid_phone': "Invalid phone number format",
         'invalid_name': "Invalid name format",
@@ -97,6 +121,61 @@ ERROR_MESSAGES = {
         'database_error': "Database operation failed"
     }
 
+# ─── Row Helpers ───────────────────────────────────────────────────────────────
+
+def classify_event(ev: Dict[str, Any], today: date, tz: ZoneInfo) -> Dict[str, Any]:
+    """Normalize an event row's date to ``tz`` and mark it upcoming/ongoing/past (in place)"""
+    ev_dt = ev.get("date") or ev.get("event_date")
+    
+    if isinstance(ev_dt, datetime):
+        ev_dt_local = ev_dt.astimezone(tz)
+        ev_date = ev_dt_local.date()
+        ev["date"] = ev_dt_local.isoformat()
+    elif isinstance(ev_dt, date):
+        ev_date = ev_dt
+        ev["date"] = ev_dt.isoformat()
+    else:
+        ev_date = None
+    
+    # Classify event status
+    if ev_date:
+        if ev_date > today:
+            ev["type"] = "upcoming"
+        elif ev_date == today:
+            ev["type"] = "ongoing"
+        else:
+            ev["type"] = "past"
+    else:
+        ev["status"] = "unknown"
+    return ev
+
+# Translation id column -> response prefix, per dataset
+SECTION_TRANSLATIONS: Dict[str, Dict[str, str]] = {
+    "members": {"name_id": "name", "address_id": "address", "father_name_id": "father"},
+    "routines": {"subject_id": "subject", "name_id": "name"},
+    "events": {"title_id": "title"},
+    "exams": {"book_id": "book"},
+}
+
+def section_transform(section: str, entries: TranslationEntries, today: Optional[date] = None) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Row transform for a dataset: resolve its translation keys, and classify events"""
+    fields = SECTION_TRANSLATIONS[section]
+    if section == "events":
+        day = today or datetime.now(DHAKA).date()
+        return lambda row: classify_event(translate_row(entries, row, fields, keep_keys=False), day, DHAKA)
+    return lambda row: translate_row(entries, row, fields, keep_keys=False)
+
+# ─── Dataset Queries ───────────────────────────────────────────────────────────
+# Shared by the single-dataset routes and /bootstrap. The SQL lives in the statement
+# registry as "<section>.all" / "<section>.since"; translated columns come back as
+# translation ids, see SECTION_TRANSLATIONS.
+
+def section_statement(section: str, since: Optional[str] = None) -> Tuple[str, List[Any]]:
+    """Statement name and params for a dataset, optionally only rows changed after ``since``"""
+    if since:
+        return f"{section}.since", [since]
+    return f"{section}.all", []
+
 # ─── Data Management Routes ─────────────────────────────────────────────────
 
 @api.post('/add_people')
@@ -364,10 +443,8 @@ async def add_person(
         
         # Get image path for response
         async with get_traced_db_cursor() as cursor:
-                await cursor.execute(
-                    f"SELECT image_path FROM {madrasa_name}.peoples WHERE LOWER(name) = %s AND phone = %s",
-                    (fullname.lower(), phone)
-                )
+                await run_statement(cursor, "peoples.image_by_phone_name",
+                                    (phone, normalize_name(fullname)), madrasa=madrasa_name)
                 row = await cursor.fetchone()
                 img_path = row["image_path"] if row else None
         
@@ -388,63 +465,41 @@ async def add_person(
 @handle_async_errors
 async def get_info(data: BaseRouteData, client_info: ClientInfo = Depends(validate_device_dependency)) -> JSONResponse:
     """Get member information with caching and incremental updates"""
-    async with get_traced_db_cursor() as cursor:
-        # Get request data from request body
-        madrasa_name = data.madrasa_name or get_env_var("MADRASA_NAME")
-        lastfetched = data.updatedSince
+    # Get request data from request body
+    madrasa_name = data.madrasa_name or get_env_var("MADRASA_NAME")
+    lastfetched = data.updatedSince
 
-        # Process timestamp using enhanced validation
-        corrected_time = None
-        if lastfetched:
-            try:
-                corrected_time = lastfetched.replace("T", " ").replace("Z", "")
-            except Exception as e:
-                log.warning(action="timestamp_processing_error", trace_info=client_info.ip_address, message=f"Error processing timestamp: {lastfetched}", secure=False)
-                response, status = send_json_response("Invalid timestamp format", 400)
-                return JSONResponse(content=response, status_code=status)
-        
-        # Build SQL query with proper joins
-        sql = f"""
-            SELECT 
-                tname.translation_text AS name_en, 
-                tname.bn_text AS name_bn, 
-                tname.ar_text AS name_ar,
-                taddress.translation_text AS address_en, 
-                taddress.bn_text AS address_bn, 
-                taddress.ar_text AS address_ar,
-                tfather.translation_text AS father_en, 
-                tfather.bn_text AS father_bn, 
-                tfather.ar_text AS father_ar,
-                p.degree, p.gender, p.blood_group,
-                p.phone, p.image_path AS picUrl, p.serial, p.acc_type AS role,
-                COALESCE(p.title1, p.title2, p.class) AS title,
-                a.main_type AS acc_type, 
-                a.teacher, a.student, a.staff, a.donor, 
-                a.badri_member, a.special_member
-            FROM {madrasa_name}.peoples p
-            JOIN global.acc_types a ON a.user_id = p.user_id
-            JOIN {madrasa_name}.translations tname ON tname.translation_text = p.name
-            LEFT JOIN {madrasa_name}.translations taddress ON taddress.translation_text = p.address
-            LEFT JOIN {madrasa_name}.translations tfather ON tfather.translation_text = p.father_name
-            WHERE p.serial IS NOT NULL
-        """
-        
-        params = []
-        if corrected_time:
-            sql += " AND p.updated_at > %s"
-            params.append(corrected_time)
-        
-        sql += " ORDER BY p.serial"
-        
-        await cursor.execute(sql, params)
-        members = await cursor.fetchall()
-        
-        # Cache the result
-        result_data = {
-            "members": members,
-            "lastSyncedAt": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
-        }        
-        return JSONResponse(content=result_data, status_code=200)
+    # Process timestamp using enhanced validation
+    corrected_time = None
+    if lastfetched:
+        try:
+            corrected_time = lastfetched.replace("T", " ").replace("Z", "")
+        except Exception as e:
+            log.warning(action="timestamp_processing_error", trace_info=client_info.ip_address, message=f"Error processing timestamp: {lastfetched}", secure=False)
+            response, status = send_json_response("Invalid timestamp format", 400)
+            return JSONResponse(content=response, status_code=status)
+    
+    name, params = section_statement("members", corrected_time)
+    transform = section_transform("members", await translation_dictionary.get(madrasa_name or ''))
+
+    if data.stream:
+        synced_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        return await stream_rows_response(
+            with_translations(madrasa_name or '', stream_query_chunks(statements.sql(name, madrasa_name or ''), params, readonly=True), SECTION_TRANSLATIONS["members"]),
+            key="members", fmt=data.stream, transform=transform,
+            extra_fields={"lastSyncedAt": synced_at}, headers={"X-Last-Synced-At": synced_at}
+        )
+    
+    rows = await fetch_statement(name, params, madrasa=madrasa_name or '', readonly=True)
+    await translation_dictionary.ensure(madrasa_name or '', translation_ids(rows, SECTION_TRANSLATIONS["members"]))
+    members = [transform(row) for row in rows]
+    
+    # Cache the result
+    result_data = {
+        "members": members,
+        "lastSyncedAt": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    }        
+    return JSONResponse(content=result_data, status_code=200)
         
 
 @api.post("/routines")
@@ -461,31 +516,20 @@ async def get_routine(data: BaseRouteData, client_info: ClientInfo = Depends(val
     if lastfetched:
         cutoff =  validate_timestamp_format(lastfetched, client_info.ip_address)
     
-    # Build SQL query
-    sql = f"""
-        SELECT 
-            r.gender, r.class_group, r.class_level, r.weekday, r.serial,
-            tsubject.translation_text AS subject_en, 
-            tsubject.bn_text AS subject_bn, 
-            tsubject.ar_text AS subject_ar, 
-            tname.translation_text AS name_en, 
-            tname.bn_text AS name_bn, 
-            tname.ar_text AS name_ar 
-        FROM {madrasa_name}.routines r
-        JOIN global.translations tsubject ON tsubject.translation_text = r.subject 
-        JOIN global.translations tname ON tname.translation_text = r.name
-    """
-    
-    params = []
-    if cutoff:
-        sql += " WHERE r.updated_at > %s"
-        params.append(cutoff)
-    
-    sql += " ORDER BY r.class_level, r.weekday, r.serial"
+    name, params = section_statement("routines", cutoff)
+    transform = section_transform("routines", await translation_dictionary.get(madrasa_name or ''))
+
+    if data.stream:
+        synced_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        return await stream_rows_response(
+            with_translations(madrasa_name or '', stream_query_chunks(statements.sql(name, madrasa_name or ''), params, readonly=True), SECTION_TRANSLATIONS["routines"]),
+            key="routines", fmt=data.stream, transform=transform,
+            extra_fields={"lastSyncedAt": synced_at}, headers={"X-Last-Synced-At": synced_at}
+        )
     
-    async with get_traced_db_cursor() as cursor:
-            await cursor.execute(sql, params)
-            result = await cursor.fetchall()
+    rows = await fetch_statement(name, params, madrasa=madrasa_name or '', readonly=True)
+    await translation_dictionary.ensure(madrasa_name or '', translation_ids(rows, SECTION_TRANSLATIONS["routines"]))
+    result = [transform(row) for row in rows]
     
     result_data = {
         "routines": result,
@@ -502,69 +546,37 @@ async def events(data: BaseRouteData, client_info: ClientInfo = Depends(validate
     # Get request data from request body
     madrasa_name = data.madrasa_name or get_env_var("MADRASA_NAME")
     lastfetched = data.updatedSince
-    DHAKA = ZoneInfo("Asia/Dhaka")
-    
-    # Build SQL query
-    sql = f"""
-        SELECT 
-            e.type, e.time, e.date, e.function_url,
-            ttitle.translation_text AS title_en, 
-            ttitle.bn_text AS title_bn, 
-            ttitle.ar_text AS title_ar
-        FROM {madrasa_name}.events e
-        JOIN global.translations ttitle ON ttitle.translation_text = e.title
-    """
     
-    params = []
+    cutoff = None
     if lastfetched:
         cutoff = validate_timestamp_format(lastfetched, client_info.ip_address)
-        sql += " WHERE e.created_at > %s"
-        params.append(cutoff)
     
-    sql += " ORDER BY e.event_id DESC"
+    name, params = section_statement("events", cutoff)
+    # Resolves titles and classifies each event by date
+    transform = section_transform("events", await translation_dictionary.get(madrasa_name or ''))
+
+    if data.stream:
+        synced_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        return await stream_rows_response(
+            with_translations(madrasa_name or '', stream_query_chunks(statements.sql(name, madrasa_name or ''), params, readonly=True), SECTION_TRANSLATIONS["events"]),
+            key="events", fmt=data.stream, transform=transform,
+            extra_fields={"lastSyncedAt": synced_at}, headers={"X-Last-Synced-At": synced_at}
+        )
     
-    async with get_traced_db_cursor() as cursor:
-        await cursor.execute(sql, params)
-        rows = await cursor.fetchall()
-        
-        # Process events with date classification
-        now_dhaka = datetime.now(DHAKA)
-        today = now_dhaka.date()
-        
-        for ev in rows:
-            ev_dt = ev.get("date") or ev.get("event_date")
-            
-            if isinstance(ev_dt, datetime):
-                ev_dt_local = ev_dt.astimezone(DHAKA)
-                ev_date = ev_dt_local.date()
-                ev["date"] = ev_dt_local.isoformat()
-            elif isinstance(ev_dt, date):
-                ev_date = ev_dt
-                ev["date"] = ev_dt.isoformat()
-            else:
-                ev_date = None
-            
-            # Classify event status
-            if ev_date:
-                if ev_date > today:
-                    ev["type"] = "upcoming"
-                elif ev_date == today:
-                    ev["type"] = "ongoing"
-                else:
-                    ev["type"] = "past"
-            else:
-                ev["status"] = "unknown"
-        
-        # Cache the result
-        result_data = {
-            "events": rows,
-            "lastSyncedAt": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
-        }
-        
-        # Log successful retrieval
-        log.info(action="get_events", trace_info=client_info.ip_address, message=f"Events retrieved successfully", secure=False)
-        
-        return JSONResponse(content=result_data, status_code=200)
+    rows = await fetch_statement(name, params, madrasa=madrasa_name or '', readonly=True)
+    await translation_dictionary.ensure(madrasa_name or '', translation_ids(rows, SECTION_TRANSLATIONS["events"]))
+    rows = [transform(row) for row in rows]
+    
+    # Cache the result
+    result_data = {
+        "events": rows,
+        "lastSyncedAt": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    }
+    
+    # Log successful retrieval
+    log.info(action="get_events", trace_info=client_info.ip_address, message=f"Events retrieved successfully", secure=False)
+    
+    return JSONResponse(content=result_data, status_code=200)
 
 @api.post('/exams')
 @cache_with_invalidation
@@ -580,28 +592,20 @@ async def get_exams(data: BaseRouteData, client_info: ClientInfo = Depends(valid
     if lastfetched:
         cutoff = validate_timestamp_format(lastfetched, client_info.ip_address)
     
-    # Build SQL query
-    sql = f"""
-        SELECT 
-            e.class, e.gender, e.start_time, e.end_time, e.date, e.weekday, 
-            e.sec_start_time, e.sec_end_time,
-            tbook.translation_text AS book_en, 
-            tbook.bn_text AS book_bn, 
-            tbook.ar_text AS book_ar
-        FROM {madrasa_name}.exams e
-        JOIN global.translations tbook ON tbook.translation_text = e.book
-    """
-    
-    params = []
-    if cutoff:
-        sql += " WHERE e.created_at > %s"
-        params.append(cutoff)
-    
-    sql += " ORDER BY e.exam_id"
+    name, params = section_statement("exams", cutoff)
+    transform = section_transform("exams", await translation_dictionary.get(madrasa_name or ''))
+
+    if data.stream:
+        synced_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        return await stream_rows_response(
+            with_translations(madrasa_name or '', stream_query_chunks(statements.sql(name, madrasa_name or ''), params, readonly=True), SECTION_TRANSLATIONS["exams"]),
+            key="exams", fmt=data.stream, transform=transform,
+            extra_fields={"lastSyncedAt": synced_at}, headers={"X-Last-Synced-At": synced_at}
+        )
     
-    async with get_traced_db_cursor() as cursor:
-            await cursor.execute(sql, params)
-            result = await cursor.fetchall()
+    rows = await fetch_statement(name, params, madrasa=madrasa_name or '', readonly=True)
+    await translation_dictionary.ensure(madrasa_name or '', translation_ids(rows, SECTION_TRANSLATIONS["exams"]))
+    result = [transform(row) for row in rows]
         
     result_data = {
         "exams": result,
@@ -610,6 +614,70 @@ async def get_exams(data: BaseRouteData, client_info: ClientInfo = Depends(valid
     
     return JSONResponse(content=result_data, status_code=200)
 
+@api.post('/bootstrap')
+@handle_async_errors
+async def bootstrap(data: BootstrapRequest, client_info: ClientInfo = Depends(validate_device_dependency)) -> Response:
+    """Return members, routines, events and exams in one document for a fresh install.
+
+    Client validation runs once and the four dataset queries run concurrently on
+    separate pool connections. With ``stream`` the sections are not concurrent:
+    they are streamed one after another from a single server-side cursor at a
+    time, trading latency for flat memory. ``cursors`` carries the per-section
+    ``updatedSince`` values and the response returns the next cursor for each
+    section.
+    """
+    madrasa_name = data.madrasa_name or get_env_var("MADRASA_NAME") or ''
+    cursors = data.cursors or {}
+
+    unknown = set(cursors) - set(BOOTSTRAP_SECTIONS)
+    if unknown:
+        response, status = send_json_response(f"Unknown bootstrap sections: {', '.join(sorted(unknown))}", 400)
+        return JSONResponse(content=response, status_code=status)
+
+    cutoffs = {
+        section: validate_timestamp_format(cursors[section], client_info.ip_address) if cursors.get(section) else None
+        for section in BOOTSTRAP_SECTIONS
+    }
+    queries = {
+        section: section_statement(section, cutoffs[section]) for section in BOOTSTRAP_SECTIONS
+    }
+
+    # Take the sync point before querying so rows written mid-request are re-sent next time
+    synced_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    next_cursors = {section: synced_at for section in BOOTSTRAP_SECTIONS}
+    entries = await translation_dictionary.get(madrasa_name)
+    transforms = {section: section_transform(section, entries) for section in BOOTSTRAP_SECTIONS}
+
+    if data.stream:
+        # Sequential: each section's query starts only after the previous one is drained
+        return await stream_sections_response(
+            {
+                section: (
+                    with_translations(madrasa_name, stream_query_chunks(statements.sql(name, madrasa_name), params, readonly=True), SECTION_TRANSLATIONS[section]),
+                    transforms[section],
+                )
+                for section, (name, params) in queries.items()
+            },
+            extra_fields={"cursors": next_cursors, "lastSyncedAt": synced_at},
+            headers={"X-Last-Synced-At": synced_at},
+        )
+
+    results = await asyncio.gather(*(
+        fetch_statement(name, params, madrasa=madrasa_name, readonly=True) for name, params in queries.values()
+    ))
+
+    await translation_dictionary.ensure(madrasa_name, set().union(*(
+        translation_ids(rows, SECTION_TRANSLATIONS[section]) for section, rows in zip(BOOTSTRAP_SECTIONS, results)
+    )))
+
+    result_data: Dict[str, Any] = {}
+    for section, rows in zip(BOOTSTRAP_SECTIONS, results):
+        result_data[section] = [transforms[section](row) for row in rows]
+    result_data.update({"cursors": next_cursors, "lastSyncedAt": synced_at})
+
+    log.info(action="bootstrap", trace_info=client_info.ip_address, message=f"Bootstrap served: {', '.join(f'{k}={len(result_data[k])}' for k in BOOTSTRAP_SECTIONS)}", secure=False)
+    return JSONResponse(content=jsonable_encoder(result_data), status_code=200)
+
 @api.post("/admission", name="admission")
 @handle_async_errors
 async def admission(data: AdmissionRequest, client_info: ClientInfo = Depends(validate_device_dependency)) -> JSONResponse:
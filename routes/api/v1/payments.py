@@ -9,7 +9,8 @@ from utils.helpers.improved_functions import get_env_var, send_json_response
 from utils.helpers.fastapi_helpers import BaseAuthRequest, ClientInfo, validate_device_dependency
 from routes.api import api
 from utils.mysql.database_utils import get_traced_db_cursor
-from utils.helpers.helpers import calculate_fees, format_phone_number, cache_with_invalidation, validate_madrasa_name, handle_async_errors
+from utils.mysql.statements import run_statement
+from utils.helpers.helpers import calculate_fees, format_phone_number, cache_with_invalidation, validate_madrasa_name, handle_async_errors, normalize_name
 from utils.helpers.logger import log
 
 # ─── Pydantic Models ───────────────────────────────────────────
@@ -48,15 +49,9 @@ async def payments(
 
     formatted_phone = format_phone_number(phone)
 
-    async with get_traced_db_cursor() as cursor:
-            await cursor.execute(f"""
-            SELECT p.class, p.gender, pay.special_food, pay.reduced_fee,
-                pay.food, pay.due_months AS month, pay.tax, u.phone, u.fullname
-                FROM global.users u
-                JOIN {madrasa_name}.peoples p ON p.user_id = u.user_id
-                JOIN {madrasa_name}.payments pay ON pay.user_id = u.user_id
-                WHERE u.phone = %s AND LOWER(u.fullname) = LOWER(%s)
-            """, (formatted_phone, fullname))
+    async with get_traced_db_cursor(readonly=True) as cursor:
+            await run_statement(cursor, "payments.info_by_phone_name",
+                                (formatted_phone, normalize_name(fullname)), madrasa=madrasa_name)
             result = await cursor.fetchone()
 
             if not result:
@@ -101,12 +96,9 @@ async def transaction_history(
 
     formatted_phone = format_phone_number(phone)
 
-    async with get_traced_db_cursor() as cursor:
+    async with get_traced_db_cursor(readonly=True) as cursor:
             # Get user_id first
-            await cursor.execute(
-                "SELECT user_id FROM global.users WHERE phone = %s AND LOWER(fullname) = LOWER(%s)",
-                (formatted_phone, fullname)
-            )
+            await run_statement(cursor, "users.id_by_phone_name", (formatted_phone, normalize_name(fullname)))
             user_result = await cursor.fetchone()
             
             if not user_result:
@@ -114,26 +106,8 @@ async def transaction_history(
                 return JSONResponse(content=response, status_code=status)
             
             # Get transaction history
-            await cursor.execute(f"""
-                SELECT 
-                    pt.transaction_id,
-                    pt.amount,
-                    pt.bank_ac,
-                    pt.bank_name,
-                    pt.payment_date,
-                    pt.description,
-                    pt.created_at,
-                    p.class,
-                    p.gender,
-                    u.fullname,
-                    u.phone
-                FROM {madrasa_name}.payments_transaction pt
-                JOIN global.users u ON pt.user_id = u.user_id
-                JOIN {madrasa_name}.peoples p ON p.user_id = u.user_id
-                WHERE pt.user_id = %s
-                ORDER BY pt.created_at DESC
-                LIMIT 50
-            """, (user_result['user_id'],))
+            await run_statement(cursor, "payments.transactions_by_user",
+                                (user_result['user_id'],), madrasa=madrasa_name)
             
             transactions = await cursor.fetchall()
             
@@ -183,8 +157,8 @@ async def transaction_history(
                     
 #                     # Get user_id
 #                     await cursor.execute(
-#                         "SELECT user_id FROM global.users WHERE phone = %s AND LOWER(fullname) = LOWER(%s)",
-#                         (formatted_phone, payment_data.full_name)
+#                         "SELECT user_id FROM global.users WHERE phone = %s AND fullname_norm = %s",
+#                         (formatted_phone, normalize_name(payment_data.full_name))
 #                     )
 #                     user_result = await cursor.fetchone()
                     
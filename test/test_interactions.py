@@ -0,0 +1,214 @@
+# test/test_interactions.py
+import asyncio
+import fnmatch
+import sys
+import time
+from contextlib import asynccontextmanager
+
+import aiomysql
+import pytest
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.helpers import interactions
+from utils.helpers.interactions import (
+    DETAILS_KEY, PENDING_KEY, flush_interactions, interaction_rows, record_interaction, recover_interactions,
+)
+from utils.keydb import keydb_utils
+from utils.mysql import unit_of_work as unit_of_work_module
+from utils.mysql.unit_of_work import UnitOfWork
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+class FakePipeline:
+    def __init__(self, keydb):
+        self.keydb = keydb
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+    async def execute(self):
+        return [getattr(self.keydb, "_" + name)(*args) for name, args in self.calls]
+
+class FakeKeyDB:
+    def __init__(self):
+        self.hashes = {}
+        self.ttls = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def _hincrby(self, key, field, amount):
+        entry = self.hashes.setdefault(key, {})
+        entry[field] = entry.get(field, 0) + amount
+        return entry[field]
+
+    def _hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    def _hsetnx(self, key, field, value):
+        self.hashes.setdefault(key, {}).setdefault(field, value)
+
+    def _rename(self, src, dst):
+        if src not in self.hashes:
+            raise RuntimeError("ERR no such key")
+        self.hashes[dst] = self.hashes.pop(src)
+        if src in self.ttls:
+            self.ttls[dst] = self.ttls.pop(src)
+
+    def _expire(self, key, seconds):
+        self.ttls[key] = seconds
+
+    def _delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+            self.ttls.pop(key, None)
+
+    async def rename(self, src, dst):
+        await asyncio.sleep(0)
+        self._rename(src, dst)
+
+    async def scan_iter(self, match="*", count=None):
+        for key in list(self.hashes):
+            if fnmatch.fnmatchcase(key, match):
+                yield key
+
+    async def exists(self, key):
+        return int(key in self.hashes)
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def delete(self, *keys):
+        self._delete(*keys)
+
+@pytest.fixture
+def keydb(monkeypatch):
+    fake = FakeKeyDB()
+    monkeypatch.setattr(keydb_utils, "_keydb_instance", fake)
+    return fake
+
+@pytest.fixture
+def upserts(monkeypatch):
+    calls = []
+
+    async def fake_upsert(rows):
+        if calls and calls[-1] == "fail":
+            calls.pop()
+            raise RuntimeError("db down")
+        calls.append(sorted(rows))
+
+    monkeypatch.setattr(interactions, "_upsert", fake_upsert)
+    return calls
+
+@pytest.mark.anyio
+async def test_opens_are_counted_in_keydb_and_flushed_as_one_upsert(keydb, upserts):
+    for _ in range(3):
+        await record_interaction(7, "dev-a", "pixel", "1.1.1.1")
+    await record_interaction(8, "dev-b", None, "2.2.2.2")
+    assert upserts == []
+
+    assert await flush_interactions(keydb) == 2
+    assert upserts == [[(7, "dev-a", "pixel", "1.1.1.1", 3), (8, "dev-b", None, "2.2.2.2", 1)]]
+    assert keydb.hashes == {}
+    assert await flush_interactions(keydb) == 0
+
+@pytest.mark.anyio
+async def test_failed_flush_puts_counts_back(keydb, upserts):
+    await record_interaction(7, "dev-a", "pixel", "1.1.1.1")
+    upserts.append("fail")
+    with pytest.raises(RuntimeError):
+        await flush_interactions(keydb)
+    # Opens recorded while the flush ran are kept as well
+    await record_interaction(7, "dev-a", "pixel", "1.1.1.1")
+    assert set(keydb.hashes) == {PENDING_KEY, DETAILS_KEY}
+
+    assert await flush_interactions(keydb) == 1
+    assert upserts == [[(7, "dev-a", "pixel", "1.1.1.1", 2)]]
+
+@pytest.mark.anyio
+async def test_without_keydb_the_row_is_upserted_directly(monkeypatch, upserts):
+    monkeypatch.setattr(keydb_utils, "_keydb_instance", None)
+    await record_interaction(7, "dev-a", "pixel", "1.1.1.1")
+    assert upserts == [[(7, "dev-a", "pixel", "1.1.1.1", 1)]]
+
+def test_rows_decode_keydb_bytes():
+    rows = interaction_rows({b"7:dev:with:colons": b"4"}, {b"7:dev:with:colons": b"pixel\x1f1.1.1.1"})
+    assert rows == [(7, "dev:with:colons", "pixel", "1.1.1.1", 4)]
+
+@pytest.mark.anyio
+async def test_flush_keys_expire_while_the_upsert_runs(keydb, monkeypatch):
+    seen = []
+
+    async def fake_upsert(rows):
+        seen.append(dict(keydb.ttls))
+
+    monkeypatch.setattr(interactions, "_upsert", fake_upsert)
+    await record_interaction(7, "dev-a", "pixel", "1.1.1.1")
+    await flush_interactions(keydb)
+    ttls = seen[0]
+    assert len(ttls) == 2 and set(ttls.values()) == {interactions.config.INTERACTION_FLUSH_KEY_TTL}
+    assert all(key.startswith((PENDING_KEY + ":", DETAILS_KEY + ":")) for key in ttls)
+    assert keydb.ttls == {}
+
+@pytest.mark.anyio
+async def test_leftover_flush_is_recovered_once(keydb, upserts):
+    old = f"{int(time.time()) - 3600}-dead"
+    running = f"{int(time.time())}-busy"
+    keydb.hashes = {
+        f"{PENDING_KEY}:{old}": {"7:dev-a": 3},
+        f"{DETAILS_KEY}:{old}": {"7:dev-a": "pixel\x1f1.1.1.1"},
+        f"{PENDING_KEY}:{running}": {"8:dev-b": 1},
+        f"{DETAILS_KEY}:{running}": {"8:dev-b": "\x1f2.2.2.2"},
+    }
+    # Two workers starting together
+    assert sorted(await asyncio.gather(recover_interactions(keydb), recover_interactions(keydb))) == [0, 1]
+    assert upserts == [[(7, "dev-a", "pixel", "1.1.1.1", 3)]]
+    # A flush still in progress on another worker is left alone
+    assert set(keydb.hashes) == {f"{PENDING_KEY}:{running}", f"{DETAILS_KEY}:{running}"}
+
+class MySQLCursor:
+    """Enough of MySQL for interactions.add_opens: global.users 7 exists, the FK is enforced"""
+
+    def __init__(self):
+        self.users = {7}
+        self.interactions = {}
+
+    async def execute(self, sql, params=None):
+        rows = [params[i:i + 5] for i in range(0, len(params), 5)]
+        if any(row[0] not in self.users for row in rows) and "INSERT IGNORE" not in sql:
+            raise aiomysql.IntegrityError(1452, "Cannot add or update a child row: a foreign key constraint fails")
+        for user_id, device_id, _brand, _ip, opens in rows:
+            if user_id in self.users:
+                key = (user_id, device_id)
+                self.interactions[key] = self.interactions.get(key, 0) + opens
+        return len(rows)
+
+@pytest.mark.anyio
+async def test_counts_of_a_deleted_user_do_not_block_the_flush(keydb, monkeypatch):
+    cursor = MySQLCursor()
+
+    @asynccontextmanager
+    async def fake_unit_of_work(commit=True):
+        uow = UnitOfWork(cursor)
+        yield uow
+        await uow.flush()
+
+    monkeypatch.setattr(unit_of_work_module, "unit_of_work", fake_unit_of_work)
+    await record_interaction(7, "dev-a", "pixel", "1.1.1.1")
+    await record_interaction(9, "dev-b", "pixel", "2.2.2.2")  # user 9 is reaped before the flush
+
+    await flush_interactions(keydb)
+    assert cursor.interactions == {(7, "dev-a"): 1}
+    # Nothing is put back, so the next flush is not stuck on the same row
+    assert keydb.hashes == {}
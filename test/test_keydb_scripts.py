@@ -0,0 +1,97 @@
+# test/test_keydb_scripts.py
+import sys
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from httpx import AsyncClient, ASGITransport
+from redis.exceptions import NoScriptError
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.helpers import fastapi_helpers
+from utils.helpers.fastapi_helpers import rate_limit
+from utils.helpers.helpers import AppError, validate_device_limit
+from utils.keydb import keydb_utils
+from utils.keydb.rate_budget import LocalRateBudget
+from utils.keydb.scripts import get_script, load_scripts, sliding_window
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+class FakeKeyDB:
+    """Counts per key instead of running Lua; a flushed script cache raises NOSCRIPT"""
+
+    def __init__(self, loaded=True):
+        self.loaded = {get_script("sliding_window").sha} if loaded else set()
+        self.counts = {}
+        self.calls = []
+
+    async def script_load(self, source):
+        sha = get_script("sliding_window").sha
+        self.loaded.add(sha)
+        return sha
+
+    async def evalsha(self, sha, numkeys, *keys_and_args):
+        if sha not in self.loaded:
+            raise NoScriptError("NOSCRIPT No matching script")
+        key, limit, window_ms, cost, min_cost = keys_and_args
+        self.calls.append(key)
+        used = self.counts.get(key, 0)
+        if used + max(min_cost, 1) > limit:
+            return [0, max(0, limit - used), 1500, 0]
+        granted = min(cost, limit - used)
+        self.counts[key] = used + granted
+        return [1, limit - used - granted, window_ms, granted]
+
+@pytest.mark.anyio
+async def test_evalsha_loads_the_script_once_after_noscript():
+    keydb = FakeKeyDB(loaded=False)
+    result = await sliding_window(keydb, "k", 3, 60)
+    assert (result.allowed, result.remaining, result.reset) == (True, 2, 60)
+    assert keydb.loaded == {get_script("sliding_window").sha}
+    assert await load_scripts(keydb) >= 1
+
+def make_app(keydb):
+    app = FastAPI()
+    app.state.keydb = keydb
+
+    @app.get("/a")
+    @rate_limit(max_requests=2, window=60)
+    async def route_a(request: Request):
+        return JSONResponse({"ok": True})
+
+    @app.get("/b")
+    @rate_limit(max_requests=2, window=60)
+    async def route_b(request: Request):
+        return JSONResponse({"ok": True})
+    return app
+
+@pytest.mark.anyio
+async def test_rate_limit_is_per_route_and_sends_ratelimit_headers(monkeypatch):
+    monkeypatch.setattr(fastapi_helpers, "rate_budget", LocalRateBudget(lease_fraction=0.5))
+    keydb = FakeKeyDB()
+    async with AsyncClient(transport=ASGITransport(app=make_app(keydb)), base_url="http://test") as ac:
+        first = await ac.get("/a", headers={"X-Forwarded-For": "1.2.3.4, 10.0.0.1"})
+        await ac.get("/a", headers={"X-Forwarded-For": "1.2.3.4"})
+        blocked = await ac.get("/a", headers={"X-Forwarded-For": "1.2.3.4"})
+        other_route = await ac.get("/b", headers={"X-Forwarded-For": "1.2.3.4"})
+
+    assert first.status_code == 200
+    assert (first.headers["ratelimit-limit"], first.headers["ratelimit-remaining"], first.headers["ratelimit-reset"]) == ("2", "1", "60")
+    assert blocked.status_code == 429
+    assert (blocked.headers["ratelimit-remaining"], blocked.headers["retry-after"]) == ("0", "2")
+    assert other_route.status_code == 200
+    assert keydb.calls[0] == "rate_limit:/a:1.2.3.4"
+    assert keydb.calls[-1] == "rate_limit:/b:1.2.3.4"
+
+@pytest.mark.anyio
+async def test_device_limit_raises_once_the_window_is_full(monkeypatch):
+    from config.config import config
+    monkeypatch.setattr(config, "MAX_DEVICES_PER_USER", 1)
+    monkeypatch.setattr(keydb_utils, "_keydb_instance", FakeKeyDB())
+    assert (await validate_device_limit("dev", "1.1.1.1")).remaining == 0
+    with pytest.raises(AppError, match="Maximum devices"):
+        await validate_device_limit("dev", "1.1.1.1")
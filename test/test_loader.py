@@ -0,0 +1,96 @@
+# test/test_loader.py
+import sys
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.mysql import loader as loader_module
+from utils.mysql.loader import BatchLoader, reset_loader_scope, start_loader_scope
+from utils.mysql.query_cache import query_cache
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+def make_loader(fail=False, max_batch=500):
+    calls = []
+
+    async def batch_fn(keys):
+        calls.append(sorted(keys))
+        await asyncio.sleep(0)
+        if fail:
+            raise RuntimeError("db down")
+        return {key: {"user_id": key} for key in keys if key != 404}
+
+    return BatchLoader("test.people", batch_fn, reads=("peoples",), max_batch=max_batch), calls
+
+@pytest.mark.anyio
+async def test_same_tick_lookups_share_one_query():
+    loader, calls = make_loader()
+    results = await asyncio.gather(*(loader.load(key) for key in (1, 2, 2, 404, 3)))
+    assert calls == [[1, 2, 3, 404]]
+    assert [row and row["user_id"] for row in results] == [1, 2, 2, None, 3]
+    # Each caller gets its own row
+    assert results[1] is not results[2]
+
+    await loader.load(5)
+    assert len(calls) == 2
+
+@pytest.mark.anyio
+async def test_batches_are_split_and_errors_reach_every_caller():
+    loader, calls = make_loader(max_batch=2)
+    await loader.load_many([1, 2, 3])
+    assert calls == [[1, 2], [3]]
+
+    failing, _ = make_loader(fail=True)
+    results = await asyncio.gather(failing.load(1), failing.load(2), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+@pytest.mark.anyio
+async def test_request_memo_until_a_write():
+    loader, calls = make_loader()
+    token = start_loader_scope()
+    try:
+        await loader.load(1)
+        await loader.load(1)
+        assert len(calls) == 1
+
+        query_cache.note_write("UPDATE annur.peoples SET name = 'x' WHERE user_id = 1")
+        await loader.load(1)
+        assert len(calls) == 2
+    finally:
+        reset_loader_scope(token)
+
+    await loader.load(1)
+    assert len(calls) == 3
+
+@pytest.mark.anyio
+async def test_global_ids_match_names_stored_with_other_case_or_accents(monkeypatch):
+    # fullname_norm is compared under utf8mb4_unicode_ci, so MySQL returns the stored spelling
+    stored = [
+        {"user_id": 7, "phone": "+8801711111111", "fullname_norm": "josé ali"},
+        {"user_id": 8, "phone": "+8801722222222", "fullname_norm": "Abdul KARIM"},
+    ]
+
+    class Cursor:
+        async def fetchall(self):
+            return stored
+
+    @asynccontextmanager
+    async def fake_cursor(*args, **kwargs):
+        yield Cursor()
+
+    async def fake_run_statement(cursor, name, params, madrasa=None):
+        assert name == "users.ids_by_phone_names"
+
+    monkeypatch.setattr(loader_module, "get_traced_db_cursor", fake_cursor)
+    monkeypatch.setattr(loader_module, "run_statement", fake_run_statement)
+    loader = BatchLoader("test.users", loader_module._load_global_ids, reads=("users",))
+
+    keys = [("+8801711111111", "jose ali"), ("+8801711111111", "josé ali"),
+            ("+8801722222222", "abdul karim"), ("+8801733333333", "nobody")]
+    assert await loader.load_many(keys) == [7, 7, 8, None]
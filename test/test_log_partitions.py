@@ -0,0 +1,49 @@
+# test/test_log_partitions.py
+import sys
+import gzip
+import json
+import pytest
+from datetime import date, datetime
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.mysql import log_partitions
+from utils.mysql.log_partitions import archive_path, export_partition, iter_archived_logs, plan_rotation
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+def test_plan_creates_ahead_and_drops_expired_days():
+    today = date(2026, 10, 18)
+    create, drop = plan_rotation(["p_future"], today, retention_days=30, days_ahead=2)
+    assert create == [date(2026, 10, 18), date(2026, 10, 19), date(2026, 10, 20)]
+    assert drop == []
+
+    create, drop = plan_rotation(["p20260915", "p20260918", "p20261016", "p_future"], today, retention_days=30, days_ahead=1)
+    # Missed days since the last partition are split off too
+    assert create == [date(2026, 10, 17), date(2026, 10, 18), date(2026, 10, 19)]
+    assert drop == ["p20260915"]
+
+@pytest.mark.anyio
+async def test_export_writes_a_dated_gzip_file_that_can_be_queried(tmp_path, monkeypatch):
+    async def fake_chunks(sql, params=None, chunk_size=None, readonly=False):
+        assert "PARTITION (p20260915)" in sql
+        yield [{"log_id": 1, "created_at": datetime(2026, 9, 15, 8), "action": "login", "level": "info",
+                "trace_info": "0171", "message": "ok", "metadata": '{"ip": "1.2.3.4"}'}]
+        yield [{"log_id": 2, "created_at": datetime(2026, 9, 15, 9), "action": "login_failed", "level": "warning",
+                "trace_info": "0172", "message": "bad password", "metadata": None}]
+
+    monkeypatch.setattr(log_partitions, "stream_query_chunks", fake_chunks)
+    assert await export_partition("p20260915", tmp_path) == 2
+
+    path = archive_path(tmp_path, date(2026, 9, 15))
+    assert path == tmp_path / "2026" / "09" / "logs-2026-09-15.jsonl.gz"
+    with gzip.open(path, "rt") as archive:
+        assert json.loads(archive.readline())["metadata"] == {"ip": "1.2.3.4"}
+    assert json.loads((tmp_path / "index.json").read_text())["2026-09-15"]["rows"] == 2
+
+    rows = list(iter_archived_logs(date(2026, 9, 1), date(2026, 9, 30), tmp_path, level="warning"))
+    assert [row["log_id"] for row in rows] == [2]
+    assert list(iter_archived_logs(date(2026, 9, 1), date(2026, 9, 30), tmp_path, contains="0171"))[0]["action"] == "login"
@@ -0,0 +1,115 @@
+# test/test_log_writer.py
+import sys
+from contextlib import asynccontextmanager
+
+import pytest
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from config.config import config, server_config
+from utils.helpers import log_writer as log_writer_module
+from utils.helpers.log_writer import LogWriter
+from utils.mysql import database_utils
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+class FakeCursor:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.executed = []
+
+    async def execute(self, sql, params=None):
+        if self.fail:
+            raise RuntimeError("db down")
+        self.executed.append((sql, params))
+        return len(params) // 7
+
+@pytest.fixture
+def db(monkeypatch):
+    cursor = FakeCursor()
+
+    @asynccontextmanager
+    async def fake_cursor(readonly=False):
+        yield cursor
+
+    monkeypatch.setattr(database_utils, "get_traced_db_cursor", fake_cursor)
+    return cursor
+
+@pytest.fixture
+def backup_file(monkeypatch):
+    written = {"backup": []}
+
+    def fake_write(records, error):
+        written["backup"].extend(record.action for record in records)
+
+    monkeypatch.setattr(log_writer_module, "_write_records", fake_write)
+    monkeypatch.setattr(config, "is_development", lambda: False)
+    return written
+
+@pytest.mark.anyio
+async def test_records_are_inserted_in_multi_row_batches(db, backup_file):
+    writer = LogWriter(max_queue=100, batch_size=2, flush_interval=60)
+    for i in range(5):
+        writer.submit(action=f"a{i}", trace_info="t", message="m", secure=False)
+    await writer.stop()
+
+    assert [sql.count("(%s, %s, %s, %s, %s, %s, %s)") for sql, _ in db.executed] == [2, 2, 1]
+    assert [params[0] for _, params in db.executed] == ["a0", "a2", "a4"]
+    assert writer.snapshot()["written"] == 5
+    assert writer.snapshot()["batches"] == 3
+    assert backup_file["backup"] == []
+
+@pytest.mark.anyio
+async def test_level_threshold_and_sampling_apply_before_enqueue(db, backup_file, monkeypatch):
+    monkeypatch.setattr(server_config, "LOGGING_LEVEL", "INFO")
+    monkeypatch.setattr(server_config, "LOG_SAMPLE_RATES", {"noisy": 0.0})
+    writer = LogWriter(max_queue=100, batch_size=10, flush_interval=60)
+    writer.submit(action="dbg", trace_info="t", message="m", level="debug")
+    writer.submit(action="noisy", trace_info="t", message="m", level="info")
+    writer.submit(action="noisy", trace_info="t", message="m", level="warning")
+    await writer.stop()
+
+    assert [params[0] for _, params in db.executed] == ["noisy"]
+    assert db.executed[0][1][3] == "warning"
+    assert writer.snapshot()["filtered"] == 1
+    assert writer.snapshot()["sampled_out"] == 1
+
+@pytest.mark.anyio
+async def test_full_queue_spills_to_file_then_drops(db, backup_file):
+    writer = LogWriter(max_queue=2, batch_size=10, flush_interval=60)
+    # The writer task does not run between these calls, so the queue fills up
+    for i in range(5):
+        writer.submit(action=f"a{i}", trace_info="t", message="m")
+    assert writer.snapshot()["queued"] == 2
+    await writer.stop()
+
+    assert [params[0] for _, params in db.executed] == ["a0"]
+    assert backup_file["backup"] == ["a2", "a3"]
+    stats = writer.snapshot()
+    assert (stats["written"], stats["spilled"], stats["dropped"]) == (2, 2, 1)
+
+@pytest.mark.anyio
+async def test_failed_insert_goes_to_backup_file(db, backup_file):
+    db.fail = True
+    writer = LogWriter(max_queue=100, batch_size=10, flush_interval=60)
+    writer.submit(action="lost", trace_info="t", message="m")
+    await writer.stop()
+
+    assert backup_file["backup"] == ["lost"]
+    assert writer.snapshot()["failed_batches"] == 1
+    assert writer.snapshot()["written"] == 0
+
+@pytest.mark.anyio
+async def test_secure_records_are_protected_off_the_loop(db, backup_file, monkeypatch):
+    monkeypatch.setattr(log_writer_module, "get_crypto_funcs", lambda data, which: f"{which}:{data}")
+    writer = LogWriter(max_queue=100, batch_size=10, flush_interval=60)
+    writer.submit(action="login", trace_info="01700000000", message="m", secure=True)
+    writer.submit(action="plain", trace_info="system", message="m")
+    await writer.stop()
+
+    params = db.executed[0][1]
+    assert params[5:7] == ["hash:01700000000", "encrypt:01700000000"]
+    assert params[12:14] == [None, None]
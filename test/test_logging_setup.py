@@ -0,0 +1,60 @@
+# test/test_logging_setup.py
+import json
+import logging
+import sys
+
+import pytest
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.helpers.logging_setup import JsonFormatter, LocalQueueHandler, setup_logging, stop_logging
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    saved = (root.handlers[:], root.level)
+    access = logging.getLogger("uvicorn.access")
+    saved_access = (access.handlers[:], access.propagate)
+    yield root
+    stop_logging()
+    root.handlers[:], root.level = saved[0], saved[1]
+    access.handlers[:], access.propagate = saved_access
+
+def test_json_formatter_keeps_extra_fields_and_traceback():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.getLogger("t").makeRecord("t", logging.ERROR, "f.py", 3, "failed %s", ("x",), sys.exc_info(), extra={"route": "/login"})
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "failed x"
+    assert entry["level"] == "error"
+    assert entry["route"] == "/login"
+    assert "ValueError: boom" in entry["exc"]
+
+def test_queue_handler_resolves_message_without_formatting():
+    import queue
+    q = queue.SimpleQueue()
+    handler = LocalQueueHandler(q)
+    record = logging.LogRecord("t", logging.INFO, "f.py", 1, "%s %d", ("a", 1), None)
+    record.exc_info = (ValueError, ValueError("x"), None)
+    handler.handle(record)
+    queued = q.get_nowait()
+    assert (queued.msg, queued.args) == ("a 1", None)
+    # The traceback stays for the listener's formatter
+    assert queued.exc_info is not None
+
+def test_production_profile_writes_json_lines_off_thread(root_logger, capsys):
+    setup_logging(development=False)
+    logging.getLogger("app.main").debug("hidden %s", "debug")
+    logging.getLogger("app.main").info("handled %s", "/login", extra={"status": 200})
+    logging.getLogger("uvicorn.access").info('%s - "%s %s HTTP/%s" %d', "1.2.3.4", "GET", "/", "1.1", 200)
+    stop_logging()
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(line["logger"], line["message"]) for line in lines] == [
+        ("app.main", "handled /login"),
+        ("uvicorn.access", '1.2.3.4 - "GET / HTTP/1.1" 200'),
+    ]
+    assert lines[0]["status"] == 200
+    assert not logging.getLogger("app.main").isEnabledFor(logging.DEBUG)
@@ -0,0 +1,73 @@
+# test/test_migrations.py
+import sys
+import pytest
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.mysql.migrations import BASELINE_FILE, MigrationError, check_translation_ids, load_migrations, plan, split_sql
+
+def test_split_sql_drops_comments_and_keeps_multiline_statements():
+    sql = "-- header\nCREATE TABLE a (\n  id INT\n);\n\nUSE b;\n-----\nINSERT INTO c VALUES (1)"
+    assert split_sql(sql) == ["CREATE TABLE a (\n  id INT\n);", "USE b;", "INSERT INTO c VALUES (1)"]
+
+def test_load_migrations_orders_versions_after_the_baseline(tmp_path):
+    (tmp_path / "0002_second.sql").write_text("SELECT 2;")
+    (tmp_path / "0001_first.sql").write_text("SELECT 1;")
+    (tmp_path / "README.md").write_text("not a migration")
+    migrations = load_migrations(BASELINE_FILE, tmp_path)
+    assert [(m.version, m.name) for m in migrations] == [(0, "create_tables"), (1, "first"), (2, "second")]
+
+    (tmp_path / "0002_again.sql").write_text("SELECT 3;")
+    with pytest.raises(MigrationError):
+        load_migrations(BASELINE_FILE, tmp_path)
+
+def test_plan_runs_the_baseline_only_on_a_fresh_server(tmp_path):
+    (tmp_path / "0001_first.sql").write_text("SELECT 1;")
+    baseline, first = load_migrations(BASELINE_FILE, tmp_path)
+
+    assert plan([baseline, first], {}, fresh=True) == ([baseline], [first], [])
+    # Tables from before versioning: run the migrations, take the baseline as is
+    assert plan([baseline, first], {}) == ([first], [baseline], [])
+    assert plan([baseline, first], {0: baseline.checksum, 1: first.checksum}) == ([], [], [])
+    assert plan([baseline, first], {0: baseline.checksum, 1: "old"}) == ([], [], [first])
+
+def test_plan_rejects_a_changed_baseline_without_a_pending_migration(tmp_path):
+    (tmp_path / "0001_first.sql").write_text("SELECT 1;")
+    baseline, first = load_migrations(BASELINE_FILE, tmp_path)
+
+    assert plan([baseline, first], {0: "old"}) == ([first], [baseline], [])
+    with pytest.raises(MigrationError):
+        plan([baseline, first], {0: "old", 1: first.checksum})
+
+def test_shipped_migrations_are_folded_into_the_baseline():
+    baseline, *numbered = load_migrations()
+    assert [m.version for m in numbered] == list(range(1, len(numbered) + 1))
+    for column in ("fullname_norm", "name_norm", "idx_users_phone_fullname_norm", "idx_peoples_phone_name_norm"):
+        assert column in baseline.sql
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+class KeyColumnCursor:
+    """information_schema.KEY_COLUMN_USAGE rows for primary keys on translation_text"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.params = None
+
+    async def execute(self, sql, params=None):
+        self.params = params
+
+    async def fetchall(self):
+        return self.rows
+
+@pytest.mark.anyio
+async def test_startup_refuses_translations_keyed_by_text():
+    cursor = KeyColumnCursor([])
+    await check_translation_ids(cursor, ["annur"])
+    assert cursor.params == (("global", "annur"),)
+
+    with pytest.raises(MigrationError, match="annur.translations.*migrate_translation_ids"):
+        await check_translation_ids(KeyColumnCursor([("annur", "translations")]), ["annur"])
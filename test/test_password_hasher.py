@@ -0,0 +1,58 @@
+# test/test_password_hasher.py
+import asyncio
+import sys
+import threading
+
+import pytest
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.helpers import password_hasher as password_hasher_module
+from utils.helpers.password_hasher import PasswordHasher, PasswordHasherBusyError
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(workers=1, max_waiting=1, kind="thread")
+    yield hasher
+    hasher.shutdown()
+
+@pytest.mark.anyio
+async def test_hash_and_verify_round_trip_off_the_loop(hasher, monkeypatch):
+    loop_thread = threading.get_ident()
+    threads = []
+    real_hash = password_hasher_module.generate_password_hash
+    monkeypatch.setattr(password_hasher_module, "generate_password_hash",
+                        lambda password: (threads.append(threading.get_ident()), real_hash(password, "pbkdf2:sha256:1000"))[1])
+
+    pwhash = await hasher.hash("secret")
+    assert await hasher.verify(pwhash, "secret") is True
+    assert await hasher.verify(pwhash, "wrong") is False
+    assert threads and loop_thread not in threads
+
+    stats = hasher.snapshot()
+    assert stats["run_time"]["count"] == stats["queue_wait"]["count"] == 3
+    assert (stats["running"], stats["waiting"], stats["rejected"]) == (0, 0, 0)
+
+@pytest.mark.anyio
+async def test_calls_beyond_max_waiting_are_rejected(hasher, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(password_hasher_module, "check_password_hash", lambda pwhash, password: release.wait(5))
+
+    running = asyncio.create_task(hasher.verify("h", "p"))
+    await asyncio.sleep(0.05)
+    waiting = asyncio.create_task(hasher.verify("h", "p"))
+    await asyncio.sleep(0.05)
+    assert (hasher.running, hasher.waiting) == (1, 1)
+    with pytest.raises(PasswordHasherBusyError):
+        await hasher.verify("h", "p")
+
+    release.set()
+    assert await asyncio.gather(running, waiting) == [True, True]
+    assert hasher.rejected == 1
+    # The second call waited for the first to finish
+    assert hasher.queue_wait.max_seconds >= 0.05
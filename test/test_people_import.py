@@ -0,0 +1,44 @@
+# test/test_people_import.py
+import io
+import sys
+import pytest
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.helpers.people_import import PeopleImporter, iter_csv_rows, prepare_person
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+CSV = (
+    "name_en,phone,acc_type,father_or_spouse,date_of_birth,gender,father_en,address\n"
+    "Abdul Karim,01712345678,others,Rahim,2001-02-03,male,Abdur Rahim,Dhaka\n"
+    "\n"
+    "bad name 1,01712345679,others,Rahim,2001-02-03,male,,\n"
+    "Nusrat Jahan,01712345670,students,,,female,,\n"
+)
+
+def test_csv_rows_keep_line_numbers_and_skip_blank_lines():
+    rows = list(iter_csv_rows(io.BytesIO(CSV.encode("utf-8"))))
+    assert [number for number, _ in rows] == [2, 4, 5]
+    assert rows[0][1]["name_en"] == "Abdul Karim"
+
+def test_prepare_person_builds_columns_and_translations():
+    person = prepare_person(2, next(iter_csv_rows(io.BytesIO(CSV.encode("utf-8"))))[1])
+    assert person.phone == "+8801712345678"
+    assert person.name_norm == "abdul karim"
+    assert person.columns["acc_type"] == "others"
+    assert person.columns["date_of_birth"] == "2001-02-03"
+    assert person.translations["father_name_id"][0] == "Abdur Rahim"
+    assert person.translations["address_id"][0] == "dhaka"
+    assert person.flags["donor"] == 0
+
+@pytest.mark.anyio
+async def test_dry_run_reports_row_errors():
+    importer = PeopleImporter("annur", chunk_size=2, dry_run=True)
+    report = await importer.run(iter_csv_rows(io.BytesIO(CSV.encode("utf-8"))))
+    assert (report.read, report.imported, report.failed, report.chunks) == (3, 1, 2, 2)
+    assert [error["row"] for error in report.errors] == [4, 5]
+    assert "Missing required fields for students" in report.errors[1]["error"]
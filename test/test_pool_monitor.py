@@ -0,0 +1,87 @@
+# test/test_pool_monitor.py
+import sys
+import asyncio
+import collections
+import pytest
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.mysql.pool_monitor import (
+    DatabaseBusyError, PoolAutoscaler, PoolTelemetry, acquire_connection, resize_pool, telemetry,
+)
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+class FakeConn:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class FakePool:
+    """Just the parts of aiomysql.Pool that the monitor touches"""
+    def __init__(self, maxsize, idle=0):
+        self._free = collections.deque((FakeConn() for _ in range(idle)), maxlen=maxsize)
+        self._used = set()
+        self._acquiring = 0
+        self._cond = asyncio.Condition()
+        self.minsize = 1
+        self.size = idle
+        self.freesize = idle
+
+    @property
+    def maxsize(self):
+        return self._free.maxlen
+
+    async def acquire(self):
+        await asyncio.sleep(10)
+
+def test_wait_histogram_buckets_and_percentile():
+    stats = PoolTelemetry()
+    for seconds in (0.0005, 0.003, 0.003, 0.2, 7.0):
+        stats.observe_wait(seconds)
+    snapshot = stats.snapshot()
+    assert snapshot["acquires"] == 5
+    assert snapshot["wait_histogram"]["le_1ms"] == 1
+    assert snapshot["wait_histogram"]["le_5ms"] == 2
+    assert snapshot["wait_histogram"]["le_250ms"] == 1
+    assert snapshot["wait_histogram"]["le_inf"] == 1
+    assert stats.wait_percentile(0.5) == 5.0
+    assert stats.take_window() == {"pressure": 2, "timeouts": 0, "peak_in_use": 5}
+
+def test_autoscaler_grows_under_pressure_and_decays_when_idle():
+    scaler = PoolAutoscaler(FakePool(maxsize=8), floor=8, share=0.8, workers=2, interval=1)
+    scaler.ceiling = 12
+    assert scaler.next_size({"pressure": 3, "timeouts": 0, "peak_in_use": 8}) == 10
+    scaler.pool._free = collections.deque(maxlen=12)
+    assert scaler.next_size({"pressure": 0, "timeouts": 1, "peak_in_use": 12}) == 12
+    assert scaler.next_size({"pressure": 0, "timeouts": 0, "peak_in_use": 2}) == 11
+
+@pytest.mark.anyio
+async def test_resize_pool_closes_idle_connections_when_shrinking():
+    pool = FakePool(maxsize=4, idle=4)
+    conns = list(pool._free)
+    await resize_pool(pool, 2)
+    assert pool.maxsize == 2
+    assert [c.closed for c in conns] == [True, True, False, False]
+    await resize_pool(pool, 6)
+    assert pool.maxsize == 6 and len(pool._free) == 2
+
+@pytest.mark.anyio
+async def test_resize_pool_never_drops_below_checked_out_connections():
+    pool = FakePool(maxsize=6, idle=2)
+    pool._used = {FakeConn() for _ in range(4)}
+    assert await resize_pool(pool, 3) == 4
+    assert pool.maxsize == 4 and len(pool._free) == 0
+
+@pytest.mark.anyio
+async def test_acquire_deadline_raises_busy():
+    before = telemetry.timeouts
+    with pytest.raises(DatabaseBusyError):
+        await acquire_connection(FakePool(maxsize=1), timeout=0.01)
+    assert telemetry.timeouts == before + 1
+    assert telemetry.waiting == 0
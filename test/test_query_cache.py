@@ -0,0 +1,94 @@
+# test/test_query_cache.py
+import sys
+import pytest
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.mysql.pool_monitor import ConnectionLease
+from utils.mysql.query_cache import QueryCache, query_cache, read_tables, written_table
+from utils.mysql.statements import StatementRegistry
+from utils.otel.otel_utils import TracedCursorWrapper
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+class FakeCursor:
+    arraysize = 1
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+        self._pending = []
+
+    async def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        self._pending = [dict(row) for row in self.rows] if sql.lstrip().upper().startswith("SELECT") else []
+        return len(self._pending)
+
+    async def fetchall(self):
+        rows, self._pending = self._pending, []
+        return rows
+
+    async def fetchone(self):
+        return self._pending.pop(0) if self._pending else None
+
+def make_registry():
+    registry = StatementRegistry()
+    registry.register("users.by_id", "SELECT * FROM global.users WHERE user_id = %s", cache_ttl=60)
+    registry.register("members.by_id", """
+        SELECT p.name FROM {madrasa}.peoples p JOIN global.users u ON u.user_id = p.user_id WHERE p.person_id = %s
+    """, cache_ttl=60)
+    registry.render(["annur"])
+    return registry
+
+def test_table_extraction_drops_schema():
+    assert read_tables("SELECT * FROM annur.peoples p JOIN `global`.`users` u ON 1") == ("peoples", "users")
+    assert written_table("UPDATE global.users SET x = 1") == "users"
+    assert written_table("INSERT IGNORE INTO {madrasa}.payments VALUES (1)") == "payments"
+    assert written_table("SELECT 1") is None
+
+def test_registered_reads_come_from_the_sql():
+    assert make_registry().get("members.by_id").reads == ("peoples", "users")
+
+@pytest.mark.anyio
+async def test_hit_is_served_without_a_round_trip_until_a_write():
+    registry = make_registry()
+    query_cache.clear()
+    fake = FakeCursor([{"user_id": 7, "fullname": "a"}])
+    cursor = TracedCursorWrapper(fake, ConnectionLease("test"))
+
+    await registry.execute(cursor, "users.by_id", (7,))
+    assert (await cursor.fetchone())["fullname"] == "a"
+    await registry.execute(cursor, "users.by_id", (7,))
+    row = await cursor.fetchone()
+    row["fullname"] = "mutated"  # callers may edit rows in place
+    assert len(fake.executed) == 1
+
+    await registry.execute(cursor, "users.by_id", (7,))
+    assert (await cursor.fetchall())[0]["fullname"] == "a"
+    assert registry.stats()["users.by_id"]["cache_hits"] == 2
+
+    await cursor.execute("UPDATE global.users SET fullname = %s WHERE user_id = %s", ("b", 7))
+    await registry.execute(cursor, "users.by_id", (7,))
+    assert len(fake.executed) == 3
+
+def test_write_during_the_query_is_not_cached():
+    cache = QueryCache(max_entries=10)
+    key = cache.key("users.by_id", None, (1,))
+    generation = cache.generation(("users",))
+    cache.invalidate_tables(("users",))
+    cache.put(key, ("users",), 60, [{"user_id": 1}], generation)
+    assert cache.get(key, ("users",)) is None
+
+def test_ddl_clears_everything_and_lru_is_bounded():
+    cache = QueryCache(max_entries=2)
+    for i in range(3):
+        cache.put(cache.key("s", None, (i,)), ("users",), 60, [{"i": i}], cache.generation(("users",)))
+    assert cache.get(cache.key("s", None, (0,)), ("users",)) is None
+    assert cache.get(cache.key("s", None, (2,)), ("users",)) == [{"i": 2}]
+
+    assert cache.note_write("ALTER TABLE global.users ADD COLUMN x INT") is None
+    assert cache.get(cache.key("s", None, (2,)), ("users",)) is None
+    assert cache.key("s", None, ({"unhashable": 1},)) is None
@@ -0,0 +1,79 @@
+# test/test_query_stats.py
+import sys
+import pytest
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.mysql.query_stats import OTHER_FINGERPRINT, QueryLog, fingerprint, query_log
+from utils.otel.otel_utils import TracedCursorWrapper
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+class FakeCursor:
+    def __init__(self, rowcount):
+        self.rowcount = rowcount
+        self.rows = [{"id": 1}, {"id": 2}, {"id": 3}]
+
+    async def execute(self, sql, params=None):
+        return 0
+
+    async def fetchmany(self, size=None):
+        rows, self.rows = self.rows[:2], self.rows[2:]
+        return rows
+
+def test_fingerprint_hides_values_and_list_sizes():
+    a = fingerprint("SELECT * FROM t WHERE name = 'Ali' AND id IN (1, 2, 3) -- note")
+    b = fingerprint("select * from t where name = %s and id in (%s, %s)")
+    assert a == "SELECT * FROM t WHERE name = ? AND id IN (...)"
+    assert a.lower() == b.lower()
+    assert fingerprint("INSERT INTO annur.t2 (a, b) VALUES (%s, %s), (%s, %s)") == "INSERT INTO annur.t2 (a, b) VALUES (...)"
+
+def test_top_percentiles_slow_count_and_overflow():
+    log = QueryLog(max_fingerprints=2, slow_ms=100)
+    for ms in (1, 1, 1, 400):
+        log.observe("SELECT 1 FROM a WHERE x = %s", ms / 1000, rows=2, params=("secret",))
+    log.observe("SELECT * FROM b", 0.002)
+    log.observe("SELECT * FROM c", 0.002)
+
+    top = log.top(10)
+    assert top[0]["fingerprint"] == "SELECT ? FROM a WHERE x = ?"
+    assert top[0]["count"] == 4 and top[0]["slow"] == 1 and top[0]["rows"] == 8
+    assert top[0]["p50_ms"] == 1.0 and top[0]["p99_ms"] == 500.0
+    assert OTHER_FINGERPRINT in {row["fingerprint"] for row in top}
+
+@pytest.mark.anyio
+async def test_traced_cursor_counts_streamed_rows():
+    query_log.reset()
+    cursor = TracedCursorWrapper(FakeCursor(rowcount=2 ** 64 - 1))
+    await cursor.execute("SELECT id FROM streamed_rows")
+    while await cursor.fetchmany(2):
+        pass
+    (entry,) = [row for row in query_log.top(50) if row["fingerprint"] == "SELECT id FROM streamed_rows"]
+    assert entry["count"] == 1 and entry["rows"] == 3
+
+@pytest.mark.anyio
+async def test_admin_stats_read_is_side_effect_free_and_reset_is_a_post():
+    from fastapi import FastAPI
+    from httpx import AsyncClient, ASGITransport
+    from routes.api import api
+    from utils.helpers.fastapi_helpers import require_admin_key, require_api_key
+    import routes.api.v1.admin  # noqa: F401  registers the admin routes
+
+    app = FastAPI()
+    app.include_router(api)
+    app.dependency_overrides[require_api_key] = lambda: None
+    app.dependency_overrides[require_admin_key] = lambda: None
+
+    query_log.reset()
+    query_log.observe("SELECT * FROM t WHERE id = 1", 0.002)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        for _ in range(2):
+            r = await ac.get("/admin/query_stats", params={"reset": "true"})
+            assert r.status_code == 200 and len(r.json()["top_queries"]) == 1
+
+        r = await ac.post("/admin/query_stats/reset")
+        assert r.status_code == 200 and len(r.json()["top_queries"]) == 1
+        assert (await ac.get("/admin/query_stats")).json()["top_queries"] == []
@@ -0,0 +1,110 @@
+# test/test_rate_budget.py
+import sys
+
+import pytest
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.keydb.rate_budget import LocalRateBudget
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+class FakeKeyDB:
+    """One fixed window per key, granting partial leases like the sliding_window script"""
+
+    def __init__(self):
+        self.counts = {}
+        self.evalsha_calls = 0
+        self.workers = {}
+
+    async def evalsha(self, sha, numkeys, key, limit, window_ms, cost, min_cost):
+        self.evalsha_calls += 1
+        used = self.counts.get(key, 0)
+        if used + max(min_cost, 1) > limit:
+            return [0, limit - used, 1000, 0]
+        granted = min(cost, limit - used)
+        self.counts[key] = used + granted
+        return [1, limit - used - granted, window_ms, granted]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+class FakePipeline:
+    def __init__(self, keydb):
+        self.keydb = keydb
+        self.results = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def zadd(self, key, mapping):
+        self.keydb.workers.update(mapping)
+
+    def zremrangebyscore(self, key, low, high):
+        for member, score in list(self.keydb.workers.items()):
+            if score <= high:
+                del self.keydb.workers[member]
+
+    def zcard(self, key):
+        self.results.append(len(self.keydb.workers))
+
+    def expire(self, key, seconds):
+        pass
+
+    async def execute(self):
+        return [None, None, self.results[0], None]
+
+@pytest.mark.anyio
+async def test_leased_tokens_are_spent_locally():
+    keydb = FakeKeyDB()
+    budget = LocalRateBudget(lease_fraction=1.0)
+    budget.workers = 1
+    results = [await budget.acquire(keydb, "k", 10, 60, now=0.0) for _ in range(12)]
+    assert [r.allowed for r in results] == [True] * 10 + [False] * 2
+    assert [r.remaining for r in results[:3]] == [9, 8, 7]
+    # One lease for ten requests, one more call to learn the limit is reached;
+    # the denial is then answered locally until KeyDB's wait has passed
+    assert keydb.evalsha_calls == 2
+    assert (budget.local_hits, budget.keydb_calls) == (10, 2)
+    assert results[-1].headers()["Retry-After"] == "1"
+    assert (await budget.acquire(keydb, "k", 10, 60, now=1.5)).allowed is False
+    assert keydb.evalsha_calls == 3
+
+@pytest.mark.anyio
+async def test_workers_split_the_limit():
+    keydb = FakeKeyDB()
+    workers = [LocalRateBudget(lease_fraction=1.0) for _ in range(2)]
+    for budget in workers:
+        budget.workers = 2
+    admitted = 0
+    for i in range(30):
+        admitted += (await workers[i % 2].acquire(keydb, "k", 10, 60, now=0.0)).allowed
+    assert admitted == 10
+
+@pytest.mark.anyio
+async def test_lease_expires_after_the_window():
+    keydb = FakeKeyDB()
+    budget = LocalRateBudget(lease_fraction=1.0)
+    budget.workers = 1
+    await budget.acquire(keydb, "k", 10, 60, now=0.0)
+    keydb.counts.clear()  # the window rolled over in KeyDB
+    assert (await budget.acquire(keydb, "k", 10, 60, now=61.0)).remaining == 9
+    assert keydb.evalsha_calls == 2
+    assert len(budget) == 1
+
+@pytest.mark.anyio
+async def test_rebalance_counts_live_workers():
+    keydb = FakeKeyDB()
+    keydb.workers = {"gone:1": 0.0}
+    budget = LocalRateBudget(lease_fraction=1.0, interval=10)
+    assert await budget.rebalance(keydb) == 1
+    assert list(keydb.workers) == [budget.worker_id]
+    keydb.workers["other:2"] = keydb.workers[budget.worker_id]
+    assert await budget.rebalance(keydb) == 2
+    assert budget.lease_size(10) == 5
@@ -0,0 +1,40 @@
+# test/test_rate_limiter.py
+import sys
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.helpers.helpers import RateLimiter
+
+def test_limit_is_enforced_within_the_window():
+    limiter = RateLimiter()
+    assert [limiter.is_allowed("a", 3, 60, now=600.0 + i) for i in range(4)] == [True, True, True, False]
+    # Other identifiers have their own budget
+    assert limiter.is_allowed("b", 3, 60, now=604.0) is True
+
+def test_previous_window_is_weighted_by_its_overlap():
+    limiter = RateLimiter()
+    for i in range(10):
+        assert limiter.is_allowed("a", 10, 60, now=600.0 + i)
+    # A quarter into the next window, 7.5 of the previous 10 still count
+    assert [limiter.is_allowed("a", 10, 60, now=675.0) for _ in range(3)] == [True, True, True]
+    assert limiter.is_allowed("a", 10, 60, now=675.0) is False
+    # Two windows later nothing is left
+    assert limiter.is_allowed("a", 10, 60, now=780.0) is True
+
+def test_idle_identifiers_are_evicted_incrementally():
+    limiter = RateLimiter()
+    for i in range(5):
+        limiter.is_allowed(f"idle-{i}", 10, 60, now=600.0)
+    limiter.is_allowed("recent", 10, 60, now=650.0)
+    assert len(limiter) == 6
+
+    # Every check drops up to two identifiers idle for a whole window
+    limiter.is_allowed("recent", 10, 60, now=730.0)
+    assert len(limiter) == 4
+    for _ in range(2):
+        limiter.is_allowed("recent", 10, 60, now=731.0)
+    assert len(limiter) == 1
+
+    limiter.clear()
+    assert len(limiter) == 0
@@ -0,0 +1,55 @@
+# test/test_replica.py
+import sys
+import pytest
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.mysql.replica import ReplicaRouter, is_write_statement, reset_db_client, set_db_client
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+class LaggingRouter(ReplicaRouter):
+    def __init__(self, lag, **kwargs):
+        super().__init__(max_lag=5, pin_seconds=10, check_interval=60, **kwargs)
+        self.fake_lag = lag
+        self.lag_reads = 0
+
+    async def _read_lag(self, replica_pool):
+        self.lag_reads += 1
+        return self.fake_lag
+
+def test_write_statements_are_detected():
+    assert is_write_statement("  insert into global.users VALUES (1)")
+    assert is_write_statement("UPDATE x SET a = 1")
+    assert not is_write_statement("SELECT * FROM global.users")
+    assert not is_write_statement("EXECUTE stmt USING @p0")
+
+@pytest.mark.anyio
+async def test_lag_decides_and_is_sampled_once_per_interval():
+    healthy = LaggingRouter(lag=1.0)
+    assert await healthy.use_replica(object())
+    assert await healthy.use_replica(object())
+    assert healthy.lag_reads == 1
+
+    assert not await LaggingRouter(lag=30.0).use_replica(object())
+    assert not await LaggingRouter(lag=None).use_replica(object())
+
+@pytest.mark.anyio
+async def test_client_is_pinned_to_primary_after_a_write():
+    router = LaggingRouter(lag=0.0)
+    token = set_db_client("10.0.0.1:device-a")
+    try:
+        router.pin()
+        assert not await router.use_replica(object())
+    finally:
+        reset_db_client(token)
+
+    token = set_db_client("10.0.0.2:device-b")
+    try:
+        assert await router.use_replica(object())
+    finally:
+        reset_db_client(token)
+    assert router.snapshot()["pinned_clients"] == 1
@@ -0,0 +1,66 @@
+# test/test_round_trips.py
+import sys
+import pytest
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.otel.otel_utils import TracedCursorWrapper, TracedRedisPool
+from utils.otel.round_trips import (
+    RouteRoundTrips, RoundTrips, current_round_trips, reset_round_trips, start_round_trips,
+)
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+class FakeCursor:
+    rowcount = 2
+
+    async def execute(self, sql, params=None):
+        return 2
+
+    async def fetchall(self):
+        return [{"id": 1}, {"id": 2}]
+
+class FakeRedis:
+    async def incr(self, key):
+        return 1
+
+    def pipeline(self):
+        return "pipeline"
+
+@pytest.mark.anyio
+async def test_cursor_and_keydb_calls_are_counted_per_request():
+    token = start_round_trips()
+    try:
+        cursor = TracedCursorWrapper(FakeCursor())
+        await cursor.execute("SELECT id FROM t WHERE x = %s", (1,))
+        await cursor.fetchall()
+        keydb = TracedRedisPool(FakeRedis())
+        await keydb.incr("k")
+        assert keydb.pipeline() == "pipeline"
+
+        trips = current_round_trips()
+        assert trips.counts == {"mysql": 1, "keydb": 1}
+        assert trips.rows == 2
+        assert trips.server_timing().startswith('mysql;dur=')
+        assert 'desc="1 round trip"' in trips.server_timing()
+    finally:
+        reset_round_trips(token)
+    assert current_round_trips() is None
+
+def test_route_flagged_when_round_trips_grow_with_rows():
+    routes = RouteRoundTrips()
+    for i in range(40):
+        flat, per_row = RoundTrips(), RoundTrips()
+        flat.rows = per_row.rows = i
+        flat.add("mysql", 0.001)
+        for _ in range(i + 1):
+            per_row.add("mysql", 0.001)
+        routes.observe("/flat", flat)
+        routes.observe("/per_row", per_row)
+
+    snapshot = routes.snapshot()
+    assert snapshot["/per_row"]["flagged"] and snapshot["/per_row"]["round_trips_per_row"] == 1.0
+    assert not snapshot["/flat"]["flagged"] and snapshot["/flat"]["round_trips_per_row"] == 0.0
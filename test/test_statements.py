@@ -0,0 +1,79 @@
+# test/test_statements.py
+import sys
+import pytest
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.mysql.statements import StatementRegistry, SchemaRoutingError, UnknownStatementError, statements
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+class FakeCursor:
+    def __init__(self, fail=False):
+        self.executed = []
+        self.fail = fail
+
+    async def execute(self, sql, params=None):
+        if self.fail:
+            raise RuntimeError("boom")
+        self.executed.append((sql, params))
+        return 1
+
+def make_registry():
+    registry = StatementRegistry()
+    registry.register("users.by_id", "SELECT * FROM global.users WHERE user_id = %s")
+    registry.register("peoples.by_id", "SELECT * FROM {madrasa}.peoples WHERE person_id = %s")
+    registry.render(["annur"])
+    return registry
+
+def test_render_routes_per_madrasa_statements():
+    registry = make_registry()
+    assert registry.sql("users.by_id") == "SELECT * FROM global.users WHERE user_id = %s"
+    assert registry.sql("peoples.by_id", "annur") == "SELECT * FROM annur.peoples WHERE person_id = %s"
+
+def test_unknown_schema_and_statement_are_rejected():
+    registry = make_registry()
+    with pytest.raises(SchemaRoutingError):
+        registry.sql("peoples.by_id", "other; DROP TABLE x")
+    with pytest.raises(SchemaRoutingError):
+        registry.sql("peoples.by_id")
+    with pytest.raises(SchemaRoutingError):
+        registry.render(["bad-name"])
+    with pytest.raises(UnknownStatementError):
+        registry.sql("missing")
+
+@pytest.mark.anyio
+async def test_execute_records_latency_stats():
+    registry = make_registry()
+    cursor = FakeCursor()
+    await registry.execute(cursor, "peoples.by_id", (1,), madrasa="annur")
+    await registry.execute(cursor, "peoples.by_id", (2,), madrasa="annur")
+    assert cursor.executed[0] == ("SELECT * FROM annur.peoples WHERE person_id = %s", (1,))
+
+    with pytest.raises(RuntimeError):
+        await registry.execute(FakeCursor(fail=True), "users.by_id", (1,))
+
+    stats = registry.stats()
+    assert stats["peoples.by_id"]["count"] == 2
+    assert stats["users.by_id"]["errors"] == 1
+
+@pytest.mark.anyio
+async def test_execute_rows_repeats_the_values_tuple():
+    registry = StatementRegistry()
+    registry.register("tags.upsert", "INSERT INTO {madrasa}.tags (a, b) VALUES (%s, %s) AS new ON DUPLICATE KEY UPDATE b = new.b")
+    registry.render(["annur"])
+    cursor = FakeCursor()
+    await registry.execute_rows(cursor, "tags.upsert", [(1, "x"), (2, "y")], madrasa="annur")
+    assert cursor.executed == [(
+        "INSERT INTO annur.tags (a, b) VALUES (%s, %s), (%s, %s) AS new ON DUPLICATE KEY UPDATE b = new.b",
+        [1, "x", 2, "y"],
+    )]
+    assert await registry.execute_rows(cursor, "tags.upsert", [], madrasa="annur") == 0
+
+def test_reads_of_global_users_are_not_cached():
+    # A cached row could let a just-deactivated account or an old password through
+    for name in ("users.by_phone_name", "users.id_by_phone_name", "users.account_check", "payments.info_by_phone_name"):
+        assert statements.get(name).cache_ttl is None
@@ -0,0 +1,106 @@
+# test/test_streaming.py
+import json
+import sys
+import pytest
+from datetime import date
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.helpers.fastapi_helpers import stream_rows_response, NDJSON_MEDIA_TYPE
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+ROWS = [{"id": i, "name": f"নাম {i}", "date": date(2025, 1, i + 1)} for i in range(5)]
+
+async def fake_chunks(rows, size):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+def make_app(fmt: str, rows=ROWS):
+    app = FastAPI()
+
+    @app.get("/rows")
+    async def get_rows():
+        return await stream_rows_response(
+            fake_chunks(rows, 2), key="members", fmt=fmt,
+            extra_fields={"lastSyncedAt": "2025-01-01T00:00:00Z"},
+            headers={"X-Last-Synced-At": "2025-01-01T00:00:00Z"},
+        )
+    return app
+
+@pytest.mark.anyio
+async def test_stream_json_matches_buffered_shape():
+    transport = ASGITransport(app=make_app("json"))
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.get("/rows")
+    assert r.status_code == 200
+    assert r.headers["x-last-synced-at"] == "2025-01-01T00:00:00Z"
+    body = r.json()
+    assert body["lastSyncedAt"] == "2025-01-01T00:00:00Z"
+    assert [m["id"] for m in body["members"]] == [0, 1, 2, 3, 4]
+    assert body["members"][0]["name"] == "নাম 0"
+    assert body["members"][0]["date"] == "2025-01-01"
+
+@pytest.mark.anyio
+async def test_stream_json_empty_result():
+    transport = ASGITransport(app=make_app("json", rows=[]))
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.get("/rows")
+    assert r.json() == {"members": [], "lastSyncedAt": "2025-01-01T00:00:00Z"}
+
+@pytest.mark.anyio
+async def test_stream_ndjson_one_row_per_line():
+    transport = ASGITransport(app=make_app("ndjson"))
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.get("/rows")
+    assert r.headers["content-type"].startswith(NDJSON_MEDIA_TYPE)
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [row["id"] for row in lines] == [0, 1, 2, 3, 4]
+
+@pytest.mark.anyio
+async def test_stream_sections_in_one_document():
+    from utils.helpers.fastapi_helpers import stream_sections_response
+
+    app = FastAPI()
+
+    @app.get("/bootstrap")
+    async def get_bootstrap():
+        return await stream_sections_response(
+            {
+                "members": (fake_chunks(ROWS, 2), None),
+                "events": (fake_chunks(ROWS[:2], 2), lambda r: {**r, "status": "past"}),
+                "exams": (fake_chunks([], 2), None),
+            },
+            extra_fields={"cursors": {"members": "2025-01-01T00:00:00Z"}},
+        )
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        r = await ac.get("/bootstrap")
+    body = r.json()
+    assert len(body["members"]) == 5
+    assert [e["status"] for e in body["events"]] == ["past", "past"]
+    assert body["exams"] == []
+    assert body["cursors"] == {"members": "2025-01-01T00:00:00Z"}
+
+async def failing_chunks():
+    raise ConnectionError("lost connection to MySQL")
+    yield []
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("fmt", ["json", "ndjson"])
+async def test_first_fetch_error_is_a_5xx_not_a_truncated_200(fmt):
+    app = FastAPI()
+
+    @app.get("/rows")
+    async def get_rows():
+        return await stream_rows_response(failing_chunks(), key="members", fmt=fmt)
+
+    transport = ASGITransport(app=app, raise_app_exceptions=False)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.get("/rows")
+    assert r.status_code == 500
@@ -0,0 +1,104 @@
+# test/test_translations.py
+import sys
+from contextlib import asynccontextmanager
+
+import pytest
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.mysql import translations
+from utils.mysql.translations import (
+    MissingTranslationError, TranslationDictionary, translate_row, translate_rows, PEOPLE_TRANSLATION_FIELDS,
+)
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+ENTRIES = {
+    1: ("Abdullah", "আব্দুল্লাহ", "عبد الله"),
+    2: ("Dhaka", "ঢাকা", None),
+}
+
+def test_translate_row_keeps_ids_by_default():
+    row = {"name": "Abdullah", "name_id": 1, "address_id": 2, "father_name_id": None, "mother_name_id": None}
+    translate_row(ENTRIES, row, PEOPLE_TRANSLATION_FIELDS)
+    assert row["name_id"] == 1
+    assert (row["name_en"], row["name_bn"], row["name_ar"]) == ("Abdullah", "আব্দুল্লাহ", "عبد الله")
+    assert (row["address_en"], row["address_bn"], row["address_ar"]) == ("Dhaka", "ঢাকা", None)
+    assert (row["father_en"], row["father_bn"]) == (None, None)
+
+def test_translate_row_fails_on_unloaded_id():
+    with pytest.raises(MissingTranslationError):
+        translate_row(ENTRIES, {"name_id": 1, "mother_name_id": 99}, PEOPLE_TRANSLATION_FIELDS)
+
+def test_translate_row_drops_ids():
+    row = translate_row(ENTRIES, {"title_id": 2, "type": "event"}, {"title_id": "title"}, keep_keys=False)
+    assert row == {"type": "event", "title_en": "Dhaka", "title_bn": "ঢাকা", "title_ar": None}
+
+def test_record_updates_loaded_madrasa_only():
+    d = TranslationDictionary(refresh_seconds=60)
+    d.record("annur", 7, "Fiqh", "ফিকহ")
+    assert d.version("annur") == 0  # not loaded yet, nothing to update
+
+    state = d._state("annur")
+    d.record("annur", 7, "Fiqh", "ফিকহ")
+    assert state.entries[7] == ("Fiqh", "ফিকহ", None)
+    assert d.version("annur") == 1
+
+    d.record("annur", 7, "Fiqh", "ফিকহ")
+    assert d.version("annur") == 1  # unchanged value does not bump the version
+
+    d.invalidate("annur")
+    assert d.version("annur") == 0
+
+class FakeCursor:
+    def __init__(self, table):
+        self.table = table
+        self.queries = []
+        self.rows = []
+
+    async def fetchall(self):
+        return self.rows
+
+@pytest.mark.anyio
+async def test_translate_rows_loads_missing_ids_in_one_query(monkeypatch):
+    table = {
+        1: ("Abdullah", "আব্দুল্লাহ", None),
+        5: ("Sylhet", "সিলেট", None),
+        6: ("Karim", "করিম", None),
+    }
+    cursor = FakeCursor(table)
+
+    @asynccontextmanager
+    async def fake_cursor(*args, **kwargs):
+        yield cursor
+
+    async def fake_run_statement(cursor, name, params, madrasa=""):
+        cursor.queries.append((name, params))
+        ids = params[0] if name == "translations.by_ids" else (1,)  # the initial load only has id 1
+        cursor.rows = [
+            {"translation_id": i, "translation_text": table[i][0], "bn_text": table[i][1], "ar_text": table[i][2]}
+            for i in ids if i in table
+        ]
+
+    d = TranslationDictionary(refresh_seconds=60)
+    monkeypatch.setattr(translations, "translation_dictionary", d)
+    monkeypatch.setattr(translations, "get_traced_db_cursor", fake_cursor)
+    monkeypatch.setattr(translations, "run_statement", fake_run_statement)
+
+    rows = [
+        {"name_id": 1, "address_id": 5, "father_name_id": 6, "mother_name_id": None},
+        {"name_id": 6, "address_id": 5, "father_name_id": None, "mother_name_id": None},
+    ]
+    await translate_rows("annur", rows, PEOPLE_TRANSLATION_FIELDS)
+    assert [(r["name_en"], r["address_en"], r["father_en"]) for r in rows] == [
+        ("Abdullah", "Sylhet", "Karim"), ("Karim", "Sylhet", None),
+    ]
+    assert [name for name, _ in cursor.queries] == ["translations.all", "translations.by_ids"]
+    assert sorted(cursor.queries[1][1][0]) == [5, 6]
+
+    # An id the table does not have either is an error, not a row of nulls
+    with pytest.raises(MissingTranslationError):
+        await translate_rows("annur", [{"name_id": 404}], PEOPLE_TRANSLATION_FIELDS)
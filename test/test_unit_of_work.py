@@ -0,0 +1,67 @@
+# test/test_unit_of_work.py
+import sys
+import pytest
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.mysql.unit_of_work import UnitOfWork
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+class FakeCursor:
+    def __init__(self):
+        self.executed = []
+        self._rows = []
+
+    async def execute(self, sql, params=None):
+        self.executed.append((" ".join(sql.split()), params))
+        if "translation_text IN" in sql:
+            self._rows = [{"translation_id": i + 10, "translation_text": text} for i, text in enumerate(params[0])]
+        return 1
+
+    async def fetchall(self):
+        return self._rows
+
+@pytest.mark.anyio
+async def test_translations_are_batched_and_refs_bound():
+    cursor = FakeCursor()
+    uow = UnitOfWork(cursor)
+    name = uow.translation("annur", " Abdullah ", "name", "people", bn_text="আব্দুল্লাহ")
+    father = uow.translation("annur", "Karim", "father", "people")
+    assert uow.translation("annur", "abdullah", "name", "people") is name
+    assert uow.translation("annur", "  ", "mother", "people") is None
+    uow.add("INSERT INTO annur.peoples (name_id, father_name_id) VALUES (%s, %s)", [name, father])
+    assert cursor.executed == []
+
+    await uow.flush()
+
+    upsert, lookup, insert = cursor.executed
+    assert upsert[0].count("(%s, %s, %s, %s, %s)") == 2
+    assert lookup[1] == (("Abdullah", "Karim"),)
+    assert insert == ("INSERT INTO annur.peoples (name_id, father_name_id) VALUES (%s, %s)", [10, 11])
+
+@pytest.mark.anyio
+async def test_existing_translation_with_other_case_and_accents_is_matched():
+    cursor = FakeCursor()
+    # The table already holds these under a spelling utf8mb4_unicode_ci treats as equal
+    stored = {"José Ali": 40, "SYLHET": 41}
+
+    async def execute(sql, params=None):
+        cursor.executed.append((" ".join(sql.split()), params))
+        if "translation_text IN" in sql:
+            cursor._rows = [{"translation_id": i, "translation_text": text} for text, i in stored.items()]
+        return 1
+    cursor.execute = execute
+
+    uow = UnitOfWork(cursor)
+    name = uow.translation("annur", "jose ali", "name", "people")
+    assert uow.translation("annur", "JOSÉ ALI", "name", "people") is name
+    address = uow.translation("annur", "Sylhet", "address", "people", bn_text="সিলেট")
+    await uow.flush()
+
+    assert (name.translation_id, address.translation_id) == (40, 41)
+    # The dictionary is told about the stored spelling, not ours
+    assert [(i, text, bn) for _, i, text, bn, _ in uow._written] == [(40, "José Ali", None), (41, "SYLHET", "সিলেট")]
@@ -0,0 +1,98 @@
+# test/test_user_reaper.py
+import sys
+import pytest
+from contextlib import asynccontextmanager
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from utils.helpers import user_reaper
+from utils.helpers.user_reaper import UserReaper
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+class FakeDB:
+    """Due users 1..5 in every madrasa; records each committed unit of work"""
+
+    def __init__(self, fail_madrasa=None):
+        self.due = [(i, f"0170000000{i}") for i in range(1, 6)]
+        self.checkpoints = {}
+        self.commits = []
+        self.fail_madrasa = fail_madrasa
+        self.cutoffs = set()
+
+    async def fetch_statement(self, name, params=None, madrasa=None, readonly=False):
+        if name == "maintenance.checkpoint_get":
+            position = self.checkpoints.get(params[0])
+            return [{"position": position}] if position is not None else []
+        cutoff, after, limit = params
+        self.cutoffs.add(cutoff)
+        if self.fail_madrasa and madrasa == self.fail_madrasa:
+            raise RuntimeError("db down")
+        rows = [user for user in self.due if user[0] > after][:limit]
+        if name == "reaper.due_people":
+            return [{"user_id": user_id} for user_id, _ in rows]
+        return [{"user_id": user_id, "phone": phone} for user_id, phone in rows]
+
+    @asynccontextmanager
+    async def unit_of_work(self, commit=True):
+        db = self
+
+        class UoW:
+            queued = []
+
+            def add_statement(self, name, params=(), madrasa=None):
+                self.queued.append((name, params, madrasa))
+
+        uow = UoW()
+        uow.queued = []
+        yield uow
+        for name, params, _ in uow.queued:
+            if name == "maintenance.checkpoint_set":
+                db.checkpoints[params[0]] = params[1]
+            elif name == "maintenance.checkpoint_clear":
+                db.checkpoints.pop(params[0], None)
+            elif name == "reaper.delete_users":
+                db.due = [user for user in db.due if user[0] not in params[0]]
+            if name in ("reaper.anonymize_people", "reaper.delete_people", "reaper.delete_transactions", "reaper.delete_users"):
+                db.cutoffs.add(params[1])
+        db.commits.append([name for name, _, _ in uow.queued])
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    def install(**kwargs):
+        db = FakeDB(**kwargs)
+        monkeypatch.setattr(user_reaper, "fetch_statement", db.fetch_statement)
+        monkeypatch.setattr(user_reaper, "unit_of_work", db.unit_of_work)
+        return db
+    return install
+
+@pytest.mark.anyio
+async def test_people_then_users_in_set_based_chunks(fake_db):
+    db = fake_db()
+    report = await UserReaper(chunk_size=2, concurrency=2).run(["annur", "other"])
+
+    assert report.ok
+    assert report.people_users == {"annur": 5, "other": 5} and report.users == 5
+    people_chunks = [c for c in db.commits if "reaper.anonymize_people" in c]
+    user_chunks = [c for c in db.commits if "reaper.delete_users" in c]
+    assert len(people_chunks) == 6 and len(user_chunks) == 3
+    assert user_chunks[0] == ["reaper.delete_transactions", "reaper.delete_verifications",
+                              "reaper.delete_users", "maintenance.checkpoint_set"]
+    # Users are only deleted after every madrasa finished
+    assert db.commits.index(user_chunks[0]) > max(db.commits.index(c) for c in people_chunks)
+    assert db.due == [] and db.checkpoints == {}
+    # Every query of the run used the one cutoff taken when it started
+    assert len(db.cutoffs) == 1
+
+@pytest.mark.anyio
+async def test_resumes_from_checkpoint_and_keeps_users_when_a_madrasa_fails(fake_db):
+    db = fake_db(fail_madrasa="other")
+    db.checkpoints["user_reaper:annur"] = 3
+    report = await UserReaper(chunk_size=10).run(["annur", "other"])
+
+    assert report.failed == ["other"]
+    assert report.people_users == {"annur": 2}
+    assert len(db.due) == 5
@@ -0,0 +1,148 @@
+# test/test_verification_codes.py
+import sys
+
+import pytest
+
+from utils.helpers.improved_functions import get_project_root
+
+sys.path.append(str(get_project_root()))
+from config.config import config
+from utils.helpers import helpers
+from utils.helpers.helpers import AppError, check_code, release_code_send, reserve_code_send, store_code
+from utils.keydb import keydb_utils
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+class FakePipeline:
+    def __init__(self, keydb):
+        self.keydb = keydb
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    async def execute(self):
+        self.keydb.round_trips += 1
+        return [getattr(FakeKeyDB, name)(self.keydb, *args, **kwargs) for name, args, kwargs in self.calls]
+
+class FakeKeyDB:
+    """Just enough of KeyDB for the verification helpers; TTLs are recorded, not enforced"""
+
+    def __init__(self):
+        self.data = {}
+        self.ttl = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        self.ttl[key] = ex
+        return True
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    def delete(self, key):
+        self.ttl.pop(key, None)
+        return int(self.data.pop(key, None) is not None)
+
+    def hset(self, key, mapping):
+        self.data.setdefault(key, {}).update({k: str(v) for k, v in mapping.items()})
+        return len(mapping)
+
+    def expire(self, key, seconds):
+        self.ttl[key] = seconds
+        return True
+
+    def hincrby(self, key, field, amount):
+        entry = self.data.setdefault(key, {})
+        entry[field] = str(int(entry.get(field, 0)) + amount)
+        return int(entry[field])
+
+    def hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+
+    async def decr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) - 1)
+        return int(self.data[key])
+
+@pytest.fixture
+def keydb(monkeypatch):
+    fake = FakeKeyDB()
+    monkeypatch.setattr(keydb_utils, "_keydb_instance", fake)
+    # Async methods of the fake for the calls made outside a pipeline
+    async def delete(key):
+        return FakeKeyDB.delete(fake, key)
+    monkeypatch.setattr(fake, "delete", delete, raising=False)
+    monkeypatch.setattr(config, "VERIFICATION_AUDIT_ENABLED", False)
+    return fake
+
+@pytest.mark.anyio
+async def test_sends_are_counted_atomically_within_the_hour(keydb):
+    assert [await reserve_code_send("01700000000") for _ in range(3)] == [1, 2, 3]
+    assert keydb.ttl["verification_sends:01700000000"] == 3600
+    await release_code_send("01700000000")
+    assert await reserve_code_send("01700000000") == 3
+    assert keydb.round_trips == 4
+
+@pytest.mark.anyio
+async def test_code_is_single_use_and_expires_with_ttl(keydb):
+    await store_code("01700000000", 482913, "1.2.3.4")
+    assert keydb.ttl["verification:01700000000"] == config.CODE_EXPIRY_MINUTES * 60
+
+    assert await check_code(482913, "01700000000") is True
+    assert "verification:01700000000" not in keydb.data
+    with pytest.raises(AppError, match="expired or not found"):
+        await check_code(482913, "01700000000")
+    # The key HINCRBY created for the missing code is removed again
+    assert "verification:01700000000" not in keydb.data
+
+@pytest.mark.anyio
+async def test_code_is_discarded_after_too_many_attempts(keydb, monkeypatch):
+    monkeypatch.setattr(config, "CODE_MAX_ATTEMPTS", 2)
+    await store_code("01700000000", 482913, "1.2.3.4")
+    for _ in range(2):
+        with pytest.raises(AppError, match="mismatch"):
+            await check_code(111111, "01700000000")
+    with pytest.raises(AppError, match="Too many verification attempts"):
+        await check_code(482913, "01700000000")
+    assert "verification:01700000000" not in keydb.data
+
+@pytest.mark.anyio
+async def test_wrong_or_non_numeric_codes_are_client_errors(keydb):
+    await store_code("01700000000", 482913, "1.2.3.4")
+    with pytest.raises(AppError, match="mismatch") as mismatch:
+        await check_code(123456, "01700000000")
+    assert mismatch.value.error_code == "400"
+    with pytest.raises(AppError, match="numeric") as non_numeric:
+        await check_code("48x913", "01700000000")
+    assert non_numeric.value.error_code == "400"
+    # Neither used up the stored code
+    assert await check_code(482913, "01700000000") is True
+
+@pytest.mark.anyio
+async def test_audit_row_is_written_in_the_background(keydb, monkeypatch):
+    spawned = []
+    monkeypatch.setattr(config, "VERIFICATION_AUDIT_ENABLED", True)
+    monkeypatch.setattr(helpers, "_spawn_background", lambda coro: (spawned.append(coro), coro.close()))
+    await store_code("01700000000", 482913, "1.2.3.4")
+    assert [coro.__name__ for coro in spawned] == ["_audit_code"]
+
+@pytest.mark.anyio
+async def test_missing_keydb_is_an_error(monkeypatch):
+    monkeypatch.setattr(keydb_utils, "_keydb_instance", None)
+    with pytest.raises(AppError, match="unavailable"):
+        await reserve_code_send("01700000000")
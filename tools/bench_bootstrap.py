@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Compare first-sync latency: four sequential dataset requests vs one /bootstrap call.
+
+Runs against a live server. Each round issues POST /members, /routines, /events
+and /exams one after another (what the app does on a fresh install), then a
+single POST /bootstrap, and reports the wall-clock latency of both paths.
+
+Usage:
+  python tools/bench_bootstrap.py --base-url http://localhost:8000 --api-key KEY
+  python tools/bench_bootstrap.py --rounds 50 --madrasa annur
+
+Exit codes:
+  0 on success, non-zero on failure.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+SECTIONS = ("members", "routines", "events", "exams")
+
+
+def summarize(label: str, samples: List[float]) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    return (
+        f"{label:<12} n={len(samples):<4} "
+        f"mean={statistics.mean(samples) * 1000:8.1f}ms "
+        f"p50={statistics.median(samples) * 1000:8.1f}ms "
+        f"p95={p95 * 1000:8.1f}ms"
+    )
+
+
+async def run(args: argparse.Namespace) -> int:
+    headers: Dict[str, str] = {
+        "X-API-Key": args.api_key,
+        "X-Device-ID": args.device_id,
+        "X-Device-Model": "bench",
+        "X-Device-Brand": "bench",
+        "X-Device-OS": "bench",
+    }
+    body = {"madrasa_name": args.madrasa}
+    sequential: List[float] = []
+    combined: List[float] = []
+
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=args.timeout) as client:
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            for section in SECTIONS:
+                r = await client.post(f"/{section}", json=body)
+                if r.status_code != 200:
+                    print(f"/{section} returned {r.status_code}: {r.text[:200]}", file=sys.stderr)
+                    return 1
+            sequential.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            r = await client.post("/bootstrap", json={**body, "stream": args.stream})
+            if r.status_code != 200:
+                print(f"/bootstrap returned {r.status_code}: {r.text[:200]}", file=sys.stderr)
+                return 1
+            combined.append(time.perf_counter() - start)
+
+    print(summarize("sequential", sequential))
+    print(summarize("bootstrap", combined))
+    print(f"speedup (p50): {statistics.median(sequential) / statistics.median(combined):.2f}x")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark /bootstrap against sequential dataset requests")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--api-key", required=True)
+    parser.add_argument("--madrasa", default="annur")
+    parser.add_argument("--device-id", default="bench-device")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--stream", action="store_true", help="Request the streamed bootstrap body")
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
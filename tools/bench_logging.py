@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Measure what Python logging costs the request thread, before and after the queue.
+
+"direct" is the previous setup: RotatingFileHandler("debug.log") plus a
+RichHandler on the root logger, formatting and writing on the caller's
+thread. "queued" is utils.helpers.logging_setup: the caller only enqueues and
+a listener thread formats and writes. Each simulated request makes the calls
+the middleware makes (three debug lines and one info line). Both profiles are
+run: development (DEBUG) and production (INFO, JSON to stdout). Console
+output goes to /dev/null while measuring.
+
+Usage:
+  python tools/bench_logging.py
+  python tools/bench_logging.py --requests 20000
+
+Exit codes:
+  0 on success, non-zero on failure.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.helpers.logging_setup import setup_logging, stop_logging  # noqa: E402
+
+logger = logging.getLogger("app.main")
+
+
+def simulate_requests(count: int) -> float:
+    """Seconds spent in logging calls on this thread for ``count`` requests"""
+    started = time.perf_counter()
+    for i in range(count):
+        logger.debug("Processing request: %s %s", "POST", "/api/v1/login")
+        logger.debug("Response status: %s", 200)
+        logger.info("request %d handled", i)
+        logger.debug("Request completed: %s %s - Status: %s - Time: %.3fs", "POST", "/api/v1/login", 200, 0.004)
+    return time.perf_counter() - started
+
+
+def setup_direct(development: bool, log_file: str) -> None:
+    from rich.logging import RichHandler
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    logging.basicConfig(
+        level=logging.DEBUG if development else logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[RotatingFileHandler(log_file, maxBytes=10 * 1024 * 1024, backupCount=5), RichHandler()],
+        force=True,
+    )
+
+
+def teardown_direct() -> None:
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+
+
+def run(args: argparse.Namespace) -> int:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        for development in (True, False):
+            profile = "development" if development else "production"
+            for mode in ("direct", "queued"):
+                log_file = str(Path(tmp) / f"{profile}-{mode}.log")
+                with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+                    if mode == "direct":
+                        setup_direct(development, log_file)
+                    else:
+                        setup_logging(development=development, log_file=log_file)
+                    simulate_requests(min(200, args.requests))  # warm up
+                    caller = simulate_requests(args.requests)
+                    drain_started = time.perf_counter()
+                    if mode == "direct":
+                        teardown_direct()
+                    else:
+                        stop_logging()
+                    drain = time.perf_counter() - drain_started
+                results.append((profile, mode, caller, drain))
+
+    print(f"📊 {args.requests} simulated requests, 4 logging calls each")
+    for profile, mode, caller, drain in results:
+        print(f"   {profile:<12} {mode:<7} caller={caller / args.requests * 1e6:8.1f}µs/request  drain={drain * 1000:8.1f}ms")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark logging cost per request")
+    parser.add_argument("--requests", type=int, default=5000, help="Simulated requests per run")
+    args = parser.parse_args()
+    try:
+        return run(args)
+    except Exception as e:
+        print(f"❌ Benchmark failed: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Measure how a login storm affects unrelated requests on the same worker.
+
+A "storm" of concurrent logins each verifies a password, while a stream of
+cheap unrelated requests (a /health-like handler that only awaits once)
+runs next to it; the latency of those unrelated requests is reported.
+"inline" is the previous setup: werkzeug's check_password_hash called
+directly on the event loop. "pooled" is utils.helpers.password_hasher: the
+KDF runs on its bounded executor and the loop keeps serving.
+
+Usage:
+  python tools/bench_login_storm.py
+  python tools/bench_login_storm.py --logins 100 --workers 4
+
+Exit codes:
+  0 on success, non-zero on failure.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.helpers.password_hasher import PasswordHasher  # noqa: E402
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def unrelated_requests(stop: asyncio.Event, interval: float) -> list:
+    """Latencies (seconds) of cheap requests issued every ``interval`` seconds"""
+    latencies = []
+
+    async def health() -> None:
+        await asyncio.sleep(0)
+
+    while not stop.is_set():
+        started = time.perf_counter()
+        await health()
+        latencies.append(time.perf_counter() - started)
+        # A late wake-up is latency the next request would have seen as well
+        slept = time.perf_counter()
+        await asyncio.sleep(interval)
+        latencies.append(max(0.0, time.perf_counter() - slept - interval))
+    return latencies
+
+
+async def storm(mode: str, args: argparse.Namespace, pwhash: str) -> dict:
+    hasher = PasswordHasher(workers=args.workers, max_waiting=args.logins, kind=args.executor)
+
+    async def login() -> bool:
+        if mode == "inline":
+            await asyncio.sleep(0)
+            return check_password_hash(pwhash, "correct horse")
+        return await hasher.verify(pwhash, "correct horse")
+
+    if mode == "pooled":
+        await hasher.verify(pwhash, "correct horse")  # start the executor outside the measurement
+    stop = asyncio.Event()
+    probe = asyncio.create_task(unrelated_requests(stop, args.interval / 1000))
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login() for _ in range(args.logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    latencies = await probe
+    hasher.shutdown()
+    assert all(results)
+    return {
+        "elapsed": elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+        "max": max(latencies) * 1000,
+    }
+
+
+def run(args: argparse.Namespace) -> int:
+    pwhash = generate_password_hash("correct horse")
+    print(f"📊 {args.logins} concurrent logins ({pwhash.split('$')[0]}), {args.workers} {args.executor} workers")
+    for mode in ("inline", "pooled"):
+        result = asyncio.run(storm(mode, args, pwhash))
+        print(
+            f"   {mode:<7} storm={result['elapsed'] * 1000:8.0f}ms  unrelated p50={result['p50']:7.2f}ms"
+            f"  p99={result['p99']:8.2f}ms  max={result['max']:8.2f}ms"
+        )
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark unrelated request latency during a login storm")
+    parser.add_argument("--logins", type=int, default=40, help="Concurrent logins in the storm")
+    parser.add_argument("--workers", type=int, default=2, help="KDF executor workers")
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread")
+    parser.add_argument("--interval", type=float, default=5.0, help="Milliseconds between unrelated requests")
+    args = parser.parse_args()
+    try:
+        return run(args)
+    except Exception as e:
+        print(f"❌ Benchmark failed: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
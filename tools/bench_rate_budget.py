@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Count KeyDB calls and admitted requests with and without the local pre-filter.
+
+Simulates ``--workers`` workers behind a load balancer sharing one KeyDB.
+Well-behaved clients send ``--rate`` requests per window to one route;
+abusive clients send ``--abuse`` times the limit. "keydb" calls the
+sliding_window script for every request (the previous decorator); "local"
+goes through utils.keydb.rate_budget.LocalRateBudget. KeyDB is a Python
+model of the sliding_window script driven by a simulated clock, so the
+numbers are KeyDB calls per request and the most requests any client got
+admitted within one window.
+
+Usage:
+  python tools/bench_rate_budget.py
+  python tools/bench_rate_budget.py --workers 4 --limit 10 --rate 3
+
+Exit codes:
+  0 on success, non-zero on failure.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+import random
+import sys
+from collections import deque
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.keydb.rate_budget import LocalRateBudget  # noqa: E402
+from utils.keydb.scripts import sliding_window  # noqa: E402
+
+
+class SimulatedKeyDB:
+    """The sliding_window script in Python, on a clock the benchmark moves"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.state = {}
+        self.calls = 0
+
+    async def evalsha(self, sha, numkeys, key, limit, window, cost, min_cost):
+        self.calls += 1
+        now = int(self.now * 1000)
+        need = max(min_cost, 1)
+        bucket, elapsed = divmod(now, window)
+        last, current, previous = self.state.get(key, (None, 0, 0))
+        if last != bucket:
+            previous, current = (current if last == bucket - 1 else 0), 0
+        used = previous * (window - elapsed) / window + current
+        if used + need > limit:
+            wait = window - elapsed
+            if previous > 0 and current + need <= limit:
+                wait = math.ceil(window * (1 - (limit - current - need) / previous)) - elapsed
+            return [0, max(0, math.floor(limit - used)), max(wait, 1), 0]
+        granted = min(cost, math.floor(limit - used))
+        self.state[key] = (bucket, current + granted, previous)
+        return [1, math.floor(limit - used - granted), window - elapsed, granted]
+
+
+async def simulate(mode: str, args: argparse.Namespace) -> dict:
+    keydb = SimulatedKeyDB()
+    workers = [LocalRateBudget(lease_fraction=args.lease_fraction) for _ in range(args.workers)]
+    for budget in workers:
+        budget.workers = args.workers
+    rng = random.Random(7)
+
+    clients = [(f"good-{i}", args.rate) for i in range(args.clients)]
+    clients += [(f"abusive-{i}", args.abuse * args.limit) for i in range(args.abusive)]
+    events = []
+    for client, per_window in clients:
+        for _ in range(int(per_window * args.windows)):
+            events.append((rng.uniform(0, args.windows * args.window), client))
+    events.sort()
+
+    admitted = {client: deque() for client, _ in clients}
+    worst = {"good": 0, "abusive": 0}
+    for at, client in events:
+        keydb.now = at
+        key = f"rate_limit:/api/v1/login:{client}"
+        if mode == "keydb":
+            result = await sliding_window(keydb, key, args.limit, args.window)
+        else:
+            result = await rng.choice(workers).acquire(keydb, key, args.limit, args.window, now=at)
+        if result.allowed:
+            window = admitted[client]
+            window.append(at)
+            while window[0] <= at - args.window:
+                window.popleft()
+            kind = client.split("-")[0]
+            worst[kind] = max(worst[kind], len(window))
+    return {"requests": len(events), "calls": keydb.calls, "worst": worst}
+
+
+def run(args: argparse.Namespace) -> int:
+    print(f"📊 {args.clients} clients at {args.rate}/window + {args.abusive} at {args.abuse:g}x the limit,"
+          f" limit {args.limit}/{args.window}s, {args.workers} workers")
+    for mode in ("keydb", "local"):
+        result = asyncio.run(simulate(mode, args))
+        print(
+            f"   {mode:<6} keydb calls/request={result['calls'] / result['requests']:5.3f}"
+            f"  most admitted in one window: good={result['worst']['good']:3d} abusive={result['worst']['abusive']:3d}"
+        )
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the local rate limit pre-filter")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=10, help="Requests allowed per window")
+    parser.add_argument("--window", type=int, default=60, help="Window length in seconds")
+    parser.add_argument("--rate", type=float, default=8, help="Requests per window of a well-behaved client")
+    parser.add_argument("--abusive", type=int, default=20, help="Clients over the limit")
+    parser.add_argument("--abuse", type=float, default=3, help="Abusive clients send this many times the limit")
+    parser.add_argument("--windows", type=int, default=10, help="Simulated windows")
+    parser.add_argument("--lease-fraction", type=float, default=1.0)
+    args = parser.parse_args()
+    try:
+        return run(args)
+    except Exception as e:
+        print(f"❌ Benchmark failed: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Compare the in-process RateLimiter against the previous timestamp-list one.
+
+"lists" is the previous implementation: a list of float timestamps per
+identifier, rebuilt on every check under a threading.Lock. "counter" is
+utils.helpers.helpers.RateLimiter: a sliding window counter with fixed
+per-identifier state. Both are driven with the same traffic: every
+identifier makes ``--hits`` checks inside one window, then one more check
+per identifier is timed. Memory is measured with tracemalloc.
+
+Usage:
+  python tools/bench_rate_limiter.py
+  python tools/bench_rate_limiter.py --identifiers 100000 --hits 50
+
+Exit codes:
+  0 on success, non-zero on failure.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.helpers.helpers import RateLimiter  # noqa: E402
+
+
+class ListRateLimiter:
+    """The previous implementation, kept here for comparison"""
+
+    def __init__(self):
+        self._requests: Dict[str, List[float]] = {}
+        self._lock = Lock()
+
+    def is_allowed(self, identifier: str, max_requests: int, window: int, now: float = None) -> bool:
+        current_time = time.time() if now is None else now
+        with self._lock:
+            requests = self._requests.get(identifier, [])
+            window_start = current_time - window
+            requests = [req_time for req_time in requests if req_time > window_start]
+            if len(requests) < max_requests:
+                requests.append(current_time)
+                self._requests[identifier] = requests
+                return True
+            return False
+
+
+def measure(limiter, args: argparse.Namespace) -> tuple:
+    identifiers = [f"203.0.{i // 256 % 256}.{i % 256}:{i}" for i in range(args.identifiers)]
+    now = 1_000_000.0
+    gc.collect()
+    tracemalloc.start()
+    for hit in range(args.hits):
+        for identifier in identifiers:
+            limiter.is_allowed(identifier, args.limit, args.window, now + hit * 0.001)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for identifier in identifiers:
+        limiter.is_allowed(identifier, args.limit, args.window, now + args.hits * 0.001)
+    per_check = (time.perf_counter() - started) / len(identifiers)
+    return memory, per_check
+
+
+def run(args: argparse.Namespace) -> int:
+    print(f"📊 {args.identifiers} identifiers, {args.hits} checks each, limit {args.limit}/{args.window}s")
+    for name, limiter in (("lists", ListRateLimiter()), ("counter", RateLimiter())):
+        memory, per_check = measure(limiter, args)
+        print(f"   {name:<8} memory={memory / 1024 / 1024:8.1f}MiB ({memory / args.identifiers:6.0f}B/identifier)"
+              f"  check={per_check * 1e6:6.2f}µs")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the in-process rate limiter")
+    parser.add_argument("--identifiers", type=int, default=100_000, help="Distinct identifiers")
+    parser.add_argument("--hits", type=int, default=20, help="Checks per identifier before the timed one")
+    parser.add_argument("--limit", type=int, default=100, help="Requests allowed per window")
+    parser.add_argument("--window", type=int, default=60, help="Window length in seconds")
+    args = parser.parse_args()
+    try:
+        return run(args)
+    except Exception as e:
+        print(f"❌ Benchmark failed: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
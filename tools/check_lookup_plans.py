@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Check that the user/person lookups resolve through the normalized-name indexes.
+
+The lookups by phone + name compare against the stored generated columns
+users.fullname_norm and peoples.name_norm instead of wrapping the indexed
+column in LOWER(). This tool runs EXPLAIN for each of those statements and
+fails when MySQL would not use an index lookup (const/eq_ref/ref) on the
+expected index.
+
+The columns and composite indexes are added to existing databases by
+config/mysql/migrations/0003_normalized_names.sql when the app starts.
+
+Usage:
+  python tools/check_lookup_plans.py                 # EXPLAIN every lookup
+  python tools/check_lookup_plans.py --madrasa annur
+
+Exit codes:
+  0 when every lookup uses its index, 1 otherwise, 2 on database errors.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import aiomysql  # noqa: E402
+
+from config.config import config  # noqa: E402
+from utils.mysql.database_utils import get_db_pool  # noqa: E402
+
+INDEX_LOOKUP_TYPES = {"const", "eq_ref", "ref"}
+SAMPLE_PARAMS = ("+8801700000000", "sample name")
+
+
+@dataclass(frozen=True)
+class Lookup:
+    name: str
+    sql: str          # {madrasa} is replaced with the schema being checked
+    table: str        # table alias as it appears in EXPLAIN
+    index: str
+
+
+LOOKUPS: Sequence[Lookup] = (
+    Lookup("get_global_id", "SELECT user_id FROM global.users WHERE phone = %s AND fullname_norm = %s",
+           "users", "idx_users_phone_fullname_norm"),
+    Lookup("login / reset_password", "SELECT * FROM global.users WHERE phone = %s AND fullname_norm = %s",
+           "users", "idx_users_phone_fullname_norm"),
+    Lookup("account_check", """SELECT u.deactivated_at, u.email, p.* FROM global.users u
+                              JOIN {madrasa}.peoples p ON p.user_id = u.user_id
+                              WHERE u.phone = %s AND u.fullname_norm = %s""",
+           "u", "idx_users_phone_fullname_norm"),
+    Lookup("transaction_history", """SELECT p.class, pay.due_months FROM global.users u
+                                    JOIN {madrasa}.peoples p ON p.user_id = u.user_id
+                                    JOIN {madrasa}.payments pay ON pay.user_id = u.user_id
+                                    WHERE u.phone = %s AND u.fullname_norm = %s""",
+           "u", "idx_users_phone_fullname_norm"),
+    Lookup("get_id", "SELECT user_id FROM {madrasa}.peoples WHERE phone = %s AND name_norm = %s",
+           "peoples", "idx_peoples_phone_name_norm"),
+    Lookup("add_person image", "SELECT image_path FROM {madrasa}.peoples WHERE phone = %s AND name_norm = %s",
+           "peoples", "idx_peoples_phone_name_norm"),
+)
+
+
+def evaluate_plan(plan: List[Dict[str, Any]], table: str, index: str) -> Tuple[bool, str]:
+    """Judge the EXPLAIN row of ``table``: it must be an index lookup on ``index``"""
+    for row in plan:
+        if row.get("table") == table:
+            access, key = row.get("type"), row.get("key")
+            ok = access in INDEX_LOOKUP_TYPES and key == index
+            return ok, f"type={access} key={key} rows={row.get('rows')}"
+    return False, f"table {table} not in plan"
+
+
+async def run(args: argparse.Namespace) -> int:
+    madrasas = [args.madrasa] if args.madrasa else list(config.MADRASA_NAMES_LIST)
+    failures = 0
+
+    pool = await get_db_pool()
+    try:
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                for madrasa in madrasas:
+                    print(f"🔍 {madrasa}")
+                    for lookup in LOOKUPS:
+                        await cursor.execute(f"EXPLAIN {lookup.sql.format(madrasa=madrasa)}", SAMPLE_PARAMS)
+                        ok, detail = evaluate_plan(list(await cursor.fetchall()), lookup.table, lookup.index)
+                        print(f"   {'✅' if ok else '❌'} {lookup.name:<24} {detail}")
+                        failures += not ok
+    except aiomysql.Error as exc:
+        print(f"❌ Database error: {exc}")
+        return 2
+    finally:
+        pool.close()
+        await pool.wait_closed()
+
+    if failures:
+        print(f"\n❌ {failures} lookup(s) do not use their index")
+        return 1
+    print("\n✅ All lookups use index access")
+    return 0
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="EXPLAIN the phone + name lookups")
+    parser.add_argument("--madrasa", help="Only check this madrasa schema (default: all configured madrasas)")
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Bulk import people from a CSV/XLSX file, or benchmark the importer.
+
+The first row of the file is the header. Column names match the /add_people
+form fields (name_en, name_bn, name_ar, phone, acc_type, date_of_birth,
+father_en, ..., class, student_id). Rows are validated with the same
+helpers as /add_people and loaded in transactions of --chunk-size rows.
+
+--benchmark generates synthetic rows and loads them with every chunk rolled
+back, so nothing is kept. It prints rows/sec for each requested size.
+
+Usage:
+  python tools/import_people.py people.csv --madrasa annur
+  python tools/import_people.py people.xlsx --madrasa annur --dry-run
+  python tools/import_people.py --benchmark 10000 100000 --madrasa annur
+
+Exit codes:
+  0 when every row was imported, 1 when some rows failed, 2 on errors that stopped the import.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from config.config import config  # noqa: E402
+from utils.helpers.people_import import (  # noqa: E402
+    ImportFormatError, ImportReport, PeopleImporter, detect_format, iter_people_file,
+)
+from utils.mysql.database_utils import close_db_pool  # noqa: E402
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+
+
+def _word(n: int) -> str:
+    letters = []
+    while True:
+        n, r = divmod(n, 26)
+        letters.append(ALPHABET[r])
+        if n == 0:
+            break
+    return "".join(reversed(letters)).capitalize()
+
+
+def synthetic_rows(count: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Valid "others" rows with realistic translation reuse (200 distinct father names)"""
+    for i in range(count):
+        yield i + 2, {
+            "name_en": f"Bench {_word(i + 26)}",
+            "phone": f"017{i % 100_000_000:08d}",
+            "acc_type": "others",
+            "father_or_spouse": f"Father {_word(i % 200 + 26)}",
+            "father_en": f"Father {_word(i % 200 + 26)}",
+            "date_of_birth": "2000-01-01",
+            "gender": "male",
+        }
+
+
+def print_progress(report: ImportReport) -> None:
+    status = "done" if report.finished else "…"
+    print(f"\r   {report.read:>8} read  {report.imported:>8} ok  {report.failed:>6} failed  "
+          f"{report.rows_per_second:>9.1f} rows/s {status}", end="\n" if report.finished else "", flush=True)
+
+
+async def run_file(args: argparse.Namespace) -> int:
+    fmt = args.format or detect_format(args.file)
+    importer = PeopleImporter(args.madrasa, chunk_size=args.chunk_size, dry_run=args.dry_run)
+    print(f"📥 {'Validating' if args.dry_run else 'Importing'} {args.file} into {args.madrasa}")
+    with open(args.file, "rb") as stream:
+        report = await importer.run(iter_people_file(stream, fmt), progress=print_progress)
+    for error in report.errors[:args.show_errors]:
+        print(f"   ❌ row {error['row']}: {error['error']}")
+    if report.failed > args.show_errors:
+        print(f"   … {report.failed - args.show_errors} more")
+    return 1 if report.failed else 0
+
+
+async def run_benchmark(args: argparse.Namespace) -> int:
+    results: List[Tuple[int, ImportReport]] = []
+    for size in args.benchmark:
+        print(f"⏱️  {size} rows, chunk size {args.chunk_size or config.IMPORT_CHUNK_SIZE} (rolled back)")
+        importer = PeopleImporter(args.madrasa, chunk_size=args.chunk_size, commit=False)
+        results.append((size, await importer.run(synthetic_rows(size), progress=print_progress)))
+    print()
+    for size, report in results:
+        print(f"   {size:>8} rows: {report.elapsed:8.2f}s  {report.rows_per_second:9.1f} rows/s  ({report.failed} failed)")
+    return 1 if any(report.failed for _, report in results) else 0
+
+
+async def run(args: argparse.Namespace) -> int:
+    try:
+        return await (run_benchmark(args) if args.benchmark else run_file(args))
+    except ImportFormatError as exc:
+        print(f"❌ {exc}")
+        return 2
+    except Exception as exc:
+        print(f"\n❌ Import stopped: {type(exc).__name__}: {exc}")
+        return 2
+    finally:
+        await close_db_pool()
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import people from CSV/XLSX")
+    parser.add_argument("file", nargs="?", help="CSV or XLSX file with a header row")
+    parser.add_argument("--madrasa", required=True, choices=list(config.MADRASA_NAMES_LIST))
+    parser.add_argument("--format", choices=("csv", "xlsx"), help="Override detection by file extension")
+    parser.add_argument("--chunk-size", type=int, help=f"Rows per transaction (default {config.IMPORT_CHUNK_SIZE})")
+    parser.add_argument("--dry-run", action="store_true", help="Validate only, do not touch the database")
+    parser.add_argument("--show-errors", type=int, default=50, help="Row errors to print")
+    parser.add_argument("--benchmark", type=int, nargs="+", metavar="ROWS", help="Benchmark with synthetic rows instead of a file")
+    args = parser.parse_args(argv)
+    if not args.file and not args.benchmark:
+        parser.error("a file or --benchmark is required")
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
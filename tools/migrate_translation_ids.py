@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Move translation references from translation_text to an integer translation_id.
+
+Existing databases created before translation_id was introduced reference
+translations by their VARCHAR primary key. This tool migrates them online, in
+two runs:
+
+1. Backfill (default). Safe while the previous release is serving traffic.
+   - Adds a nullable translation_id to every translations table and numbers
+     the rows in batches.
+   - Adds the *_id columns next to each text reference (peoples.name_id,
+     routines.subject_id, events.title_id, ...).
+   - Fills those columns in primary-key ranges of --batch-size rows. Every
+     batch is its own short autocommit transaction.
+   Progress is checkpointed in each schema's `translation_id_migration` table,
+     so an interrupted run resumes where it stopped. It can be re-run any
+     number of times.
+
+2. Cutover (--cutover). Run in the deploy window, right before starting the
+   release that reads translation_id.
+   - Repeats the backfill from scratch to catch rows written since.
+   - Verifies that every text reference resolved to an id.
+   - Swaps the translations primary key to translation_id.
+   - Moves the foreign keys onto the *_id columns and drops the old text
+     columns. peoples.name stays as plain text for lookups.
+   Every ALTER is attempted as INSTANT or INPLACE/LOCK=NONE. The only
+   exception is turning translation_id into the AUTO_INCREMENT primary key,
+   which MySQL can only do by copying the table. Only the translations tables
+   themselves take that copy, and they hold one row per distinct string.
+
+Usage:
+  python tools/migrate_translation_ids.py                      # backfill global + all madrasas
+  python tools/migrate_translation_ids.py --madrasa annur      # one madrasa
+  python tools/migrate_translation_ids.py --cutover            # finish the migration
+  python tools/migrate_translation_ids.py --dry-run            # print the plan
+
+Exit codes:
+  0 on success, 1 when verification fails, 2 on database errors.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Optional, Sequence
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import aiomysql  # noqa: E402
+
+from config.config import config  # noqa: E402
+from utils.mysql.database_utils import get_db_pool  # noqa: E402
+
+PROGRESS_TABLE = "translation_id_migration"
+
+
+@dataclass(frozen=True)
+class Reference:
+    table: str
+    pk: str
+    column: str           # current VARCHAR reference onto translation_text
+    id_column: str        # new INT reference onto translation_id
+    nullable: bool
+    keep_column: bool = False  # keep the text column (without its FK) after cutover
+
+    @property
+    def on_delete(self) -> str:
+        return "SET NULL" if self.nullable else "RESTRICT"
+
+
+MADRASA_REFERENCES: Sequence[Reference] = (
+    Reference("peoples", "person_id", "name", "name_id", nullable=False, keep_column=True),
+    Reference("peoples", "person_id", "address", "address_id", nullable=True),
+    Reference("peoples", "person_id", "father_name", "father_name_id", nullable=True),
+    Reference("peoples", "person_id", "mother_name", "mother_name_id", nullable=True),
+    Reference("routines", "routine_id", "subject", "subject_id", nullable=False),
+    Reference("routines", "routine_id", "name", "name_id", nullable=False),
+    Reference("exams", "exam_id", "book", "book_id", nullable=True),
+    Reference("events", "event_id", "title", "title_id", nullable=False),
+)
+
+GLOBAL_REFERENCES: Sequence[Reference] = (
+    Reference("books", "book_id", "name", "name_id", nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class SchemaPlan:
+    schema: str
+    dictionary: str
+    references: Sequence[Reference]
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Migrator:
+    def __init__(self, cursor: Any, batch_size: int, pause: float, dry_run: bool) -> None:
+        self.cursor = cursor
+        self.batch_size = batch_size
+        self.pause = pause
+        self.dry_run = dry_run
+
+    # ─── Introspection ──────────────────────────────────────────────────────
+
+    async def table_exists(self, schema: str, table: str) -> bool:
+        await self.cursor.execute(
+            "SELECT 1 FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s",
+            (schema, table),
+        )
+        return await self.cursor.fetchone() is not None
+
+    async def column_exists(self, schema: str, table: str, column: str) -> bool:
+        await self.cursor.execute(
+            "SELECT 1 FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+            (schema, table, column),
+        )
+        return await self.cursor.fetchone() is not None
+
+    async def index_exists(self, schema: str, table: str, index: str) -> bool:
+        await self.cursor.execute(
+            "SELECT 1 FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND INDEX_NAME = %s",
+            (schema, table, index),
+        )
+        return await self.cursor.fetchone() is not None
+
+    async def primary_key_columns(self, schema: str, table: str) -> List[str]:
+        await self.cursor.execute(
+            """SELECT COLUMN_NAME FROM information_schema.KEY_COLUMN_USAGE
+               WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND CONSTRAINT_NAME = 'PRIMARY'
+               ORDER BY ORDINAL_POSITION""",
+            (schema, table),
+        )
+        return [row["COLUMN_NAME"] for row in await self.cursor.fetchall()]
+
+    async def foreign_keys(self, schema: str, table: str, column: str) -> List[str]:
+        await self.cursor.execute(
+            """SELECT CONSTRAINT_NAME FROM information_schema.KEY_COLUMN_USAGE
+               WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s
+                 AND REFERENCED_TABLE_NAME IS NOT NULL""",
+            (schema, table, column),
+        )
+        return [row["CONSTRAINT_NAME"] for row in await self.cursor.fetchall()]
+
+    # ─── Execution helpers ──────────────────────────────────────────────────
+
+    async def alter(self, schema: str, table: str, clause: str, allow_copy: bool = False) -> None:
+        """Run an ALTER with the least locking algorithm MySQL accepts for it"""
+        algorithms = ["ALGORITHM=INSTANT", "ALGORITHM=INPLACE, LOCK=NONE"]
+        if allow_copy:
+            algorithms.append("ALGORITHM=COPY, LOCK=SHARED")
+
+        sql = f"ALTER TABLE {schema}.{table} {clause}"
+        if self.dry_run:
+            print(f"   [dry-run] {sql}")
+            return
+
+        last_error: Optional[Exception] = None
+        for algorithm in algorithms:
+            try:
+                await self.cursor.execute(f"{sql}, {algorithm}")
+                print(f"   {sql} ({algorithm})")
+                return
+            except aiomysql.OperationalError as e:
+                # 1845/1846: algorithm or lock not supported for this change, try the next one
+                if e.args and e.args[0] in (1845, 1846):
+                    last_error = e
+                    continue
+                raise
+        raise MigrationError(f"No online algorithm for: {sql} ({last_error})")
+
+    async def checkpoint(self, schema: str, step: str) -> int:
+        if self.dry_run:
+            return 0
+        await self.cursor.execute(f"SELECT last_pk FROM {schema}.{PROGRESS_TABLE} WHERE step = %s", (step,))
+        row = await self.cursor.fetchone()
+        return int(row["last_pk"]) if row else 0
+
+    async def save_checkpoint(self, schema: str, step: str, last_pk: int) -> None:
+        await self.cursor.execute(
+            f"""INSERT INTO {schema}.{PROGRESS_TABLE} (step, last_pk) VALUES (%s, %s) AS new
+                ON DUPLICATE KEY UPDATE last_pk = new.last_pk""",
+            (step, last_pk),
+        )
+
+    async def pause_between_batches(self) -> None:
+        if self.pause > 0:
+            await asyncio.sleep(self.pause)
+
+    # ─── Steps ──────────────────────────────────────────────────────────────
+
+    async def prepare(self, plan: SchemaPlan) -> None:
+        if not self.dry_run:
+            await self.cursor.execute(
+                f"""CREATE TABLE IF NOT EXISTS {plan.schema}.{PROGRESS_TABLE} (
+                        step        VARCHAR(100) PRIMARY KEY,
+                        last_pk     INT          NOT NULL DEFAULT 0,
+                        updated_at  TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                    ) ENGINE = InnoDB"""
+            )
+
+        if not await self.column_exists(plan.schema, plan.dictionary, "translation_id"):
+            await self.alter(plan.schema, plan.dictionary, "ADD COLUMN translation_id INT NULL")
+
+        for ref in plan.references:
+            if not await self.table_exists(plan.schema, ref.table):
+                continue
+            if not await self.column_exists(plan.schema, ref.table, ref.id_column):
+                await self.alter(plan.schema, ref.table, f"ADD COLUMN {ref.id_column} INT NULL")
+
+    async def number_translations(self, plan: SchemaPlan) -> None:
+        """Assign ids to rows without one, oldest first, one batch per transaction"""
+        if self.dry_run:
+            print(f"   [dry-run] number {plan.schema}.{plan.dictionary} rows in batches of {self.batch_size}")
+            return
+
+        if await self.primary_key_columns(plan.schema, plan.dictionary) == ["translation_id"]:
+            return  # already cut over; AUTO_INCREMENT numbers new rows
+
+        total = 0
+        while True:
+            await self.cursor.execute(f"SET @next_id = (SELECT COALESCE(MAX(translation_id), 0) FROM {plan.schema}.{plan.dictionary})")
+            await self.cursor.execute(
+                f"""UPDATE {plan.schema}.{plan.dictionary}
+                    SET translation_id = (@next_id := @next_id + 1)
+                    WHERE translation_id IS NULL
+                    ORDER BY created_at, translation_text
+                    LIMIT %s""",
+                (self.batch_size,),
+            )
+            if not self.cursor.rowcount:
+                break
+            total += self.cursor.rowcount
+            await self.pause_between_batches()
+        print(f"   {plan.schema}.{plan.dictionary}: numbered {total} row(s)")
+
+        # Referenced columns need an index before foreign keys can point at them
+        index = f"unique_{plan.dictionary}_translation_id"
+        if not await self.index_exists(plan.schema, plan.dictionary, index):
+            await self.alter(plan.schema, plan.dictionary, f"ADD UNIQUE KEY {index} (translation_id)")
+
+    async def backfill_reference(self, plan: SchemaPlan, ref: Reference, restart: bool) -> None:
+        """Copy translation ids onto ref.id_column in primary-key ranges"""
+        if self.dry_run:
+            print(f"   [dry-run] backfill {plan.schema}.{ref.table}.{ref.id_column} from {ref.column}")
+            return
+        if not await self.column_exists(plan.schema, ref.table, ref.column):
+            return  # text column already dropped by a previous cutover
+
+        step = f"{ref.table}.{ref.id_column}"
+        start = 0 if restart else await self.checkpoint(plan.schema, step)
+        await self.cursor.execute(f"SELECT COALESCE(MAX({ref.pk}), 0) AS max_pk FROM {plan.schema}.{ref.table}")
+        max_pk = int((await self.cursor.fetchone())["max_pk"])
+
+        updated = 0
+        lo = start
+        while lo < max_pk:
+            hi = lo + self.batch_size
+            await self.cursor.execute(
+                f"""UPDATE {plan.schema}.{ref.table} c
+                    JOIN {plan.schema}.{plan.dictionary} tr ON tr.translation_text = c.{ref.column}
+                    SET c.{ref.id_column} = tr.translation_id
+                    WHERE c.{ref.pk} > %s AND c.{ref.pk} <= %s
+                      AND NOT (c.{ref.id_column} <=> tr.translation_id)""",
+                (lo, hi),
+            )
+            updated += self.cursor.rowcount
+            # A text reference cleared after an earlier pass must not keep its id
+            await self.cursor.execute(
+                f"""UPDATE {plan.schema}.{ref.table}
+                    SET {ref.id_column} = NULL
+                    WHERE {ref.pk} > %s AND {ref.pk} <= %s
+                      AND {ref.column} IS NULL AND {ref.id_column} IS NOT NULL""",
+                (lo, hi),
+            )
+            updated += self.cursor.rowcount
+            await self.save_checkpoint(plan.schema, step, hi)
+            lo = hi
+            await self.pause_between_batches()
+        print(f"   {plan.schema}.{ref.table}.{ref.id_column}: {updated} row(s) updated up to {ref.pk}={max_pk}")
+
+    async def verify(self, plan: SchemaPlan) -> bool:
+        ok = True
+        await self.cursor.execute(f"SELECT COUNT(*) AS n FROM {plan.schema}.{plan.dictionary} WHERE translation_id IS NULL")
+        if (missing := (await self.cursor.fetchone())["n"]):
+            print(f"   ✖ {plan.schema}.{plan.dictionary}: {missing} row(s) without translation_id")
+            ok = False
+
+        for ref in plan.references:
+            if not await self.table_exists(plan.schema, ref.table) or not await self.column_exists(plan.schema, ref.table, ref.column):
+                continue
+            await self.cursor.execute(
+                f"""SELECT COUNT(*) AS n FROM {plan.schema}.{ref.table}
+                    WHERE {ref.column} IS NOT NULL AND {ref.id_column} IS NULL"""
+            )
+            if (missing := (await self.cursor.fetchone())["n"]):
+                print(f"   ✖ {plan.schema}.{ref.table}: {missing} {ref.column} value(s) with no matching translation")
+                ok = False
+        return ok
+
+    async def cutover(self, plan: SchemaPlan) -> None:
+        # Constraints are validated by verify(); skip re-checking them during the ALTERs
+        if not self.dry_run:
+            await self.cursor.execute("SET SESSION foreign_key_checks = 0")
+
+        try:
+            # Old foreign keys reference translation_text and block the primary key swap
+            for ref in plan.references:
+                if not await self.table_exists(plan.schema, ref.table):
+                    continue
+                for fk in await self.foreign_keys(plan.schema, ref.table, ref.column):
+                    await self.alter(plan.schema, ref.table, f"DROP FOREIGN KEY {fk}")
+
+            if await self.primary_key_columns(plan.schema, plan.dictionary) != ["translation_id"]:
+                unique_text = "unique_global_translation_text" if plan.dictionary == "global_translations" else "unique_translation_text"
+                await self.alter(
+                    plan.schema, plan.dictionary,
+                    "MODIFY translation_id INT NOT NULL AUTO_INCREMENT, DROP PRIMARY KEY, "
+                    f"ADD PRIMARY KEY (translation_id), ADD UNIQUE KEY {unique_text} (translation_text), "
+                    f"DROP INDEX unique_{plan.dictionary}_translation_id",
+                    allow_copy=True,
+                )
+
+            for ref in plan.references:
+                if not await self.table_exists(plan.schema, ref.table):
+                    continue
+                if not ref.nullable:
+                    await self.alter(plan.schema, ref.table, f"MODIFY {ref.id_column} INT NOT NULL")
+                if not await self.foreign_keys(plan.schema, ref.table, ref.id_column):
+                    await self.alter(
+                        plan.schema, ref.table,
+                        f"ADD CONSTRAINT fk_{ref.table}_{ref.id_column} FOREIGN KEY ({ref.id_column}) "
+                        f"REFERENCES {plan.dictionary}(translation_id) ON DELETE {ref.on_delete} ON UPDATE CASCADE",
+                    )
+                if not ref.keep_column and await self.column_exists(plan.schema, ref.table, ref.column):
+                    await self.alter(plan.schema, ref.table, f"DROP COLUMN {ref.column}")
+        finally:
+            if not self.dry_run:
+                await self.cursor.execute("SET SESSION foreign_key_checks = 1")
+
+        if not self.dry_run:
+            await self.cursor.execute(f"DROP TABLE IF EXISTS {plan.schema}.{PROGRESS_TABLE}")
+
+
+def build_plans(madrasas: Sequence[str], include_global: bool) -> List[SchemaPlan]:
+    plans = [SchemaPlan("global", "global_translations", GLOBAL_REFERENCES)] if include_global else []
+    plans.extend(SchemaPlan(name, "translations", MADRASA_REFERENCES) for name in madrasas)
+    return plans
+
+
+async def run(args: argparse.Namespace) -> int:
+    madrasas = [args.madrasa] if args.madrasa else list(config.MADRASA_NAMES_LIST)
+    plans = build_plans(madrasas, include_global=not args.madrasa or args.include_global)
+
+    pool = await get_db_pool()
+    try:
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                # Give up quickly on metadata locks instead of queueing traffic behind the ALTER
+                await cursor.execute("SET SESSION lock_wait_timeout = %s", (args.lock_wait_timeout,))
+                migrator = Migrator(cursor, args.batch_size, args.pause, args.dry_run)
+
+                for plan in plans:
+                    if not await migrator.table_exists(plan.schema, plan.dictionary):
+                        print(f"⏭  {plan.schema}: no {plan.dictionary} table, skipping")
+                        continue
+                    print(f"🔧 {plan.schema}: {'cutover' if args.cutover else 'backfill'}")
+
+                    await migrator.prepare(plan)
+                    await migrator.number_translations(plan)
+                    for ref in plan.references:
+                        if await migrator.table_exists(plan.schema, ref.table):
+                            await migrator.backfill_reference(plan, ref, restart=args.cutover)
+
+                    if args.cutover:
+                        if not args.dry_run and not await migrator.verify(plan):
+                            print(f"❌ {plan.schema}: verification failed; fix the rows above and re-run")
+                            return 1
+                        await migrator.cutover(plan)
+                    print(f"✅ {plan.schema}: done")
+    except (aiomysql.Error, MigrationError) as exc:
+        print(f"❌ Migration stopped: {exc}\n   Re-run the same command to resume.")
+        return 2
+    finally:
+        pool.close()
+        await pool.wait_closed()
+    return 0
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Migrate translation references to integer translation_id")
+    parser.add_argument("--madrasa", help="Only migrate this madrasa schema (default: all configured madrasas)")
+    parser.add_argument("--include-global", action="store_true", help="With --madrasa, also migrate the global schema")
+    parser.add_argument("--cutover", action="store_true", help="Final pass: verify, swap keys and drop text columns")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per backfill transaction (default: 1000)")
+    parser.add_argument("--pause", type=float, default=0.05, help="Seconds to sleep between batches (default: 0.05)")
+    parser.add_argument("--lock-wait-timeout", type=int, default=5, help="Seconds an ALTER may wait for a metadata lock")
+    parser.add_argument("--dry-run", action="store_true", help="Print the plan without changing anything")
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Search the archived application logs (logs.logs partitions exported by the
+maintenance log rotation).
+
+Every expired daily partition is written to
+maintenance/archives/logs/YYYY/MM/logs-YYYY-MM-DD.jsonl.gz (one JSON row per
+line) before it is dropped; index.json lists the files and their row counts.
+This tool reads the files of the requested days and prints matching rows as
+JSON lines, so the output can be piped into jq.
+
+Usage:
+  python tools/query_log_archive.py --from 2026-09-01 --to 2026-09-30
+  python tools/query_log_archive.py --from 2026-09-01 --action login_failed --level warning
+  python tools/query_log_archive.py --from 2026-09-01 --contains 01712345678 --count
+
+Exit codes:
+  0 when rows matched, 1 when nothing matched, 2 on bad arguments.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from datetime import date
+from pathlib import Path
+from typing import List
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from config.config import server_config  # noqa: E402
+from utils.mysql.log_partitions import iter_archived_logs  # noqa: E402
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Search archived logs")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, required=True, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, help="Last day, inclusive (default: --from)")
+    parser.add_argument("--action", help="Exact action name")
+    parser.add_argument("--level", choices=("info", "warning", "error", "critical"))
+    parser.add_argument("--contains", help="Substring of the message or trace_info")
+    parser.add_argument("--dir", type=Path, default=server_config.LOG_ARCHIVE_DIR, help="Archive directory")
+    parser.add_argument("--count", action="store_true", help="Only print the number of matching rows")
+    args = parser.parse_args(argv)
+
+    end = args.end or args.start
+    if end < args.start:
+        parser.error("--to is before --from")
+
+    matched = 0
+    for row in iter_archived_logs(args.start, end, args.dir, action=args.action, level=args.level, contains=args.contains):
+        matched += 1
+        if not args.count:
+            print(json.dumps(row, ensure_ascii=False))
+    if args.count:
+        print(f"📄 {matched} matching rows")
+    return 0 if matched else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
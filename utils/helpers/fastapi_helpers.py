@@ -5,22 +5,24 @@ Replaces Quart-specific helpers with FastAPI patterns
 
 from datetime import datetime
 import json
-from typing import Optional, Dict, Any, Callable, Tuple
+from typing import Optional, Dict, Any, AsyncIterator, Callable, List, Tuple
 from functools import wraps
 from collections import defaultdict
 
 from fastapi import Request, HTTPException, Depends, Header, Security
 from fastapi.security import APIKeyHeader
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field, field_validator, model_validator
 from starlette.status import HTTP_403_FORBIDDEN, HTTP_429_TOO_MANY_REQUESTS
 from starlette.requests import Request as StarletteRequest
 
 # Local Imports
 from config.config import config
-from .helpers import security_manager, validate_madrasa_name, format_phone_number
+from .helpers import security_manager, validate_madrasa_name, format_phone_number, EnhancedJSONEncoder
 from .improved_functions import get_env_var
 from .logger import log
 from utils.keydb.keydb_utils import get_keydb_from_app
+from utils.keydb.rate_budget import rate_budget
 
 
 # ─── API Key Authentication ───────────────────────────────────────────
@@ -36,6 +38,14 @@ async def require_api_key(api_key: str = Security(api_key_header)) -> None:
     
     return
 
+async def require_admin_key(api_key: str = Security(api_key_header)) -> None:
+    """FastAPI dependency restricting a route to the admin API key"""
+    if not config.ADMIN_KEY or api_key != config.ADMIN_KEY:
+        raise HTTPException(
+            status_code=HTTP_403_FORBIDDEN,
+            detail="Admin API key required"
+        )
+
 
 # ─── Client Info Dependency ───────────────────────────────────────────
 class ClientInfo(BaseModel):
@@ -99,37 +109,40 @@ async def get_client_info(
 
 # ─── Rate Limiting ───────────────────────────────────────────
 def rate_limit(max_requests: int = 10, window: int = 60):
-    """Redis-based rate limiting decorator for FastAPI routes"""
+    """KeyDB sliding window rate limiting per route and client for FastAPI routes.
+
+    Requests are admitted from this worker's leased tokens when it has some
+    (see utils/keydb/rate_budget.py), otherwise with one EVALSHA. The
+    remaining quota is sent back as RateLimit-* headers, plus Retry-After
+    on 429.
+    """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         async def wrapper(request: Request, *args, **kwargs):
-            client_id = request.headers.get(
-                "X-Forwarded-For",
-                request.client.host if request.client else "unknown"
-            )
-
-            redis = get_keydb_from_app(request)  # your app-specific redis getter
+            redis = get_keydb_from_app(request)
             if not redis:
                 # Fallback to no rate limiting if redis unavailable
                 return await func(request, *args, **kwargs)
 
-            key = f"rate_limit:{client_id}"
-            current_count = await redis.get(key)
-
-            if current_count is None:
-                # First request in this window
-                await redis.set(key, 1, ex=window)
-            else:
-                current_count = int(current_count)
-                if current_count >= max_requests:
-                    # Rate limit exceeded: abort request
-                    raise HTTPException(
-                        status_code=HTTP_429_TOO_MANY_REQUESTS,
-                        detail="Rate limit exceeded. Please try again later."
-                    )
-                await redis.incr(key)
-
-            return await func(request, *args, **kwargs)
+            client_id = request.headers.get(
+                "X-Forwarded-For",
+                request.client.host if request.client else "unknown"
+            ).split(",")[0].strip()
+            route = getattr(request.scope.get("route"), "path", request.url.path)
+
+            result = await rate_budget.acquire(redis, f"rate_limit:{route}:{client_id}", max_requests, window)
+            if not result.allowed:
+                # Rate limit exceeded: abort request
+                raise HTTPException(
+                    status_code=HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Rate limit exceeded. Please try again later.",
+                    headers=result.headers(),
+                )
+
+            response = await func(request, *args, **kwargs)
+            if isinstance(response, Response):
+                response.headers.update(result.headers())
+            return response
         return wrapper
     return decorator
 
@@ -211,6 +224,126 @@ async def validate_device_dependency(request: Request, client_info: ClientInfo =
     return client_info
 
 
+# ─── Streaming Responses ───────────────────────────────────────────
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def _encode_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, cls=EnhancedJSONEncoder)
+
+def ndjson_line(value: Any) -> str:
+    """One NDJSON record: compact JSON (dates, decimals and bytes as in the JSON responses) plus a newline"""
+    return _encode_json(value) + "\n"
+
+async def _prefetched(chunks: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Fetch the first chunk now, so connection and query errors raise before the response starts"""
+    try:
+        first: Optional[List[Dict[str, Any]]] = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def _replay():
+        if first is not None:
+            yield first
+        async for rows in chunks:
+            yield rows
+    return _replay()
+
+async def _iter_json_sections(
+    sections: Dict[str, Tuple[AsyncIterator[List[Dict[str, Any]]], Optional[Callable[[Dict[str, Any]], Dict[str, Any]]]]],
+    extra_fields: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[bytes]:
+    """Encode ``{"<section>": [rows...], ..., **extra_fields}`` one chunk at a time"""
+    opener = "{"
+    for key, (chunks, transform) in sections.items():
+        yield (opener + _encode_json(key) + ":[").encode("utf-8")
+        opener = "],"
+        first = True
+        async for rows in chunks:
+            if not rows:
+                continue
+            if transform:
+                rows = [transform(row) for row in rows]
+            body = ",".join(_encode_json(row) for row in rows)
+            yield (body if first else "," + body).encode("utf-8")
+            first = False
+
+    fields = [_encode_json(field) + ":" + _encode_json(value) for field, value in (extra_fields or {}).items()]
+    if sections:
+        yield ("]" + "".join("," + field for field in fields) + "}").encode("utf-8")
+    else:
+        yield ("{" + ",".join(fields) + "}").encode("utf-8")
+
+async def stream_sections_response(
+    sections: Dict[str, Tuple[AsyncIterator[List[Dict[str, Any]]], Optional[Callable[[Dict[str, Any]], Dict[str, Any]]]]],
+    extra_fields: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> StreamingResponse:
+    """Stream several row sources as one JSON document, one section after another.
+
+    ``sections`` maps each top-level key to ``(chunks, transform)``; sources are
+    consumed in order, so at most one streaming cursor is open at a time. The
+    first chunk of the first section is fetched before returning, so a failing
+    connection or query still raises here and becomes a normal 5xx.
+
+    Later failures happen after the 200 status is sent: the connection is then
+    closed without the terminating chunk, and the body is not valid JSON.
+    Clients must treat an incomplete transfer or unparsable body as a failed
+    request and retry, never as a short result.
+    """
+    if sections:
+        first_key = next(iter(sections))
+        chunks, transform = sections[first_key]
+        sections = {**sections, first_key: (await _prefetched(chunks), transform)}
+
+    async def _body():
+        try:
+            async for part in _iter_json_sections(sections, extra_fields):
+                yield part
+        except Exception as e:
+            # Headers are already on the wire; all we can do is log and cut the stream
+            log.error(action="stream_response_error", trace_info="system", message=f"Streaming {list(sections)} failed: {type(e).__name__}", secure=False)
+            raise
+
+    return StreamingResponse(_body(), media_type="application/json", headers=headers)
+
+async def stream_rows_response(
+    chunks: AsyncIterator[List[Dict[str, Any]]],
+    key: str,
+    fmt: str = "json",
+    transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    extra_fields: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> StreamingResponse:
+    """Stream row chunks as NDJSON or as an incrementally encoded JSON document.
+
+    ``fmt="json"`` yields ``{"<key>": [rows...], **extra_fields}``, byte-compatible with
+    the buffered endpoints. ``fmt="ndjson"`` yields one row per line; ``extra_fields``
+    are dropped there, so pass anything clients need through ``headers``.
+    Each chunk is encoded and flushed as it arrives, keeping memory flat in row count.
+
+    The first chunk is fetched before returning, so setup errors become a normal
+    5xx. A failure after that cuts the transfer (see ``stream_sections_response``);
+    for NDJSON the lines received so far are valid, so clients must check that
+    the transfer completed before treating them as the full result.
+    """
+    if fmt != "ndjson":
+        return await stream_sections_response({key: (chunks, transform)}, extra_fields=extra_fields, headers=headers)
+
+    chunks = await _prefetched(chunks)
+
+    async def _body():
+        try:
+            async for rows in chunks:
+                if transform:
+                    rows = [transform(row) for row in rows]
+                yield "".join(_encode_json(row) + "\n" for row in rows).encode("utf-8")
+        except Exception as e:
+            log.error(action="stream_response_error", trace_info="system", message=f"Streaming '{key}' failed: {type(e).__name__}", secure=False)
+            raise
+
+    return StreamingResponse(_body(), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+
 # ─── Centralized Templates Instance ──────────────────────────────────
 # Create a single templates instance to be imported by all modules
 from fastapi.templating import Jinja2Templates
@@ -8,6 +8,7 @@ from hmac import compare_digest
 import asyncio, json, smtplib, time
 from datetime import datetime
 from email.mime.text import MIMEText
+from collections import OrderedDict
 from functools import wraps
 from threading import Lock
 from typing import Any, Awaitable, Dict, List, Optional, Tuple, Callable, Union
@@ -20,11 +21,21 @@ from cryptography.fernet import Fernet
 from config.config import config
 from utils.helpers.logger import log
 from utils.mysql.database_utils import get_traced_db_cursor
+from utils.mysql.loader import global_id_loader
+from utils.mysql.pool_monitor import DatabaseBusyError
+from utils.helpers.password_hasher import PasswordHasherBusyError
+from utils.mysql.translations import translation_dictionary
+from utils.mysql.statements import run_statement
+from utils.mysql.unit_of_work import unit_of_work
+from utils.helpers.user_reaper import UserReaper
+from utils.keydb.scripts import RateLimitResult, sliding_window
 
 load_dotenv()
 
 # Global variables
 _cached_fernet = None
+# Fire-and-forget tasks (e.g. audit rows), referenced until they finish
+_background_tasks: set = set()
 
 # ---------- Cache Functions ----------
 def get_cache_key(prefix: str, **kwargs) -> str:
@@ -384,7 +395,6 @@ def _send_smtp_email(msg: MIMEText, to_email: str) -> None:
 async def send_email(to_email: str, subject: str, 
                     body: str) -> bool:
     """Send email with enhanced error handling"""
-    await delete_code()
     return await _send_async_email(to_email, subject, body)
 
 async def _send_async_sms(phone: str, msg: str) -> bool:
@@ -427,7 +437,6 @@ def _send_sms_request(phone: str, msg: str) -> bool:
 
 async def send_sms(phone: str, msg: str) -> bool:
     """Send SMS with enhanced error handling"""
-    await delete_code()
     return await _send_async_sms(phone, msg)
 
 # ─── Database Functions ──────────────────────────────────────────────────────
@@ -441,10 +450,7 @@ async def get_email(fullname: str, phone: str) -> Optional[str]:
     
     async with get_traced_db_cursor() as cursor:
         try:
-            await cursor.execute(
-                "SELECT email FROM global.users WHERE fullname = %s AND phone = %s",
-                (fullname, phone)
-            )
+            await run_statement(cursor, "users.email_by_name_phone", (fullname, phone))
             result = await cursor.fetchone()
             
             email = result['email'] if result else None
@@ -457,17 +463,15 @@ async def get_email(fullname: str, phone: str) -> Optional[str]:
 
 async def get_id(formatted_phone: str, fullname: str, madrasa_name: str) -> Optional[int]:
     """Get user ID with caching"""
-    cache_key = f"user_id:{formatted_phone}:{fullname}:{madrasa_name}"
+    cache_key = f"user_id:{formatted_phone}:{normalize_name(fullname)}:{madrasa_name}"
     cached_id = await get_cached_data(cache_key)
     if cached_id:
         return cached_id
     
     async with get_traced_db_cursor() as cursor:
         try:
-            await cursor.execute(
-                f"SELECT user_id FROM {madrasa_name}.peoples WHERE phone = %s AND LOWER(name) = LOWER(%s)",
-                    (formatted_phone, fullname)
-                )
+            await run_statement(cursor, "peoples.user_id_by_phone_name",
+                                (formatted_phone, normalize_name(fullname)), madrasa=madrasa_name)
             result = await cursor.fetchone()
             
             user_id = result['user_id'] if result else None
@@ -480,32 +484,26 @@ async def get_id(formatted_phone: str, fullname: str, madrasa_name: str) -> Opti
 
 async def get_global_id(formatted_phone: str, fullname: str) -> Optional[int]:
     """Get user ID with caching"""
-    cache_key = f"user_id:{formatted_phone}:{fullname}"
+    cache_key = f"user_id:{formatted_phone}:{normalize_name(fullname)}"
     cached_id = await get_cached_data(cache_key)
     if cached_id:
         return cached_id
     
-    async with get_traced_db_cursor() as cursor:
-        try:
-            await cursor.execute(
-                "SELECT user_id FROM global.users WHERE phone = %s AND LOWER(fullname) = LOWER(%s)",
-                    (formatted_phone, fullname)
-                )
-            result = await cursor.fetchone()
-            
-            user_id = result['user_id'] if result else None
-            if user_id:
-                await set_cached_data(cache_key, user_id, ttl=3600)  # Cache for 1 hour
-            return user_id
-        except Exception as e:
-            log.critical(action="get_global_id_error", trace_info=formatted_phone,message=str(e), secure=True)
-            return None
+    try:
+        # Concurrent lookups in the same tick share one IN (...) query
+        user_id = await global_id_loader.load((formatted_phone, normalize_name(fullname)))
+        if user_id:
+            await set_cached_data(cache_key, user_id, ttl=3600)  # Cache for 1 hour
+        return user_id
+    except Exception as e:
+        log.critical(action="get_global_id_error", trace_info=formatted_phone,message=str(e), secure=True)
+        return None
 
 async def upsert_translation(translation_text: str, madrasa_name: str, context: str, table_name: str, 
-                             bn_text: str | None= None, ar_text: str | None= None) -> str | None:
+                             bn_text: str | None= None, ar_text: str | None= None) -> int | None:
     """
-    Insert or update a translation entry in the global.translations table
-    Returns the translation_text that should be used as foreign key reference
+    Insert or update a translation entry in the madrasa's translations table
+    Returns the translation_id that should be used as foreign key reference
     """
     if not translation_text or not translation_text.strip():
         return None
@@ -513,29 +511,25 @@ async def upsert_translation(translation_text: str, madrasa_name: str, context:
     translation_text = translation_text.strip()
     
     async with get_traced_db_cursor() as cursor:
-        # Upsert translation entry
-        sql = f"""
-            INSERT INTO {madrasa_name}.translations (translation_text, bn_text, ar_text, context, table_name)
-            VALUES (%s, %s, %s, %s, %s) AS new
-            ON DUPLICATE KEY UPDATE
-                bn_text = new.bn_text,
-                ar_text = new.ar_text,
-                context = new.context,
-                table_name = new.table_name
-        """
-        await cursor.execute(sql, (translation_text, bn_text, ar_text, context, table_name))
-        return translation_text
-
-async def process_multilingual_field(field_base: str, data: dict, madrasa_name: str, context: str, table_name: str) -> Optional[str]:
+        # Upsert translation entry; LAST_INSERT_ID(expr) makes lastrowid the existing id on update
+        await run_statement(cursor, "translations.upsert",
+                            (translation_text, bn_text, ar_text, context, table_name), madrasa=madrasa_name)
+        translation_id = cursor.lastrowid
+    
+    # Keep this worker's dictionary current; other workers pick it up on their next delta refresh
+    translation_dictionary.record(madrasa_name, translation_id, translation_text, bn_text, ar_text)
+    return translation_id
+
+async def process_multilingual_field(field_base: str, data: dict, madrasa_name: str, context: str, table_name: str) -> Optional[int]:
     """
     Process multilingual field data and insert into translations table
-    Returns the translation_text to use as foreign key reference
+    Returns the translation_id to use as foreign key reference
     """
     translation_text = data.get(f"{field_base}_en")
     bn_text = data.get(f"{field_base}_bn") 
     ar_text = data.get(f"{field_base}_ar")
     
-    # Use English text as the primary translation_text key
+    # Use English text as the unique translation_text
     if not translation_text:
         return None
         
@@ -544,51 +538,42 @@ async def process_multilingual_field(field_base: str, data: dict, madrasa_name:
                                     madrasa_name=madrasa_name, context=context, table_name=table_name)
 
 async def insert_person(madrasa_name: str, fields: Dict[str, Any], acc_type: str, phone: str) -> None:
-    """Enhanced person insertion with translation handling and error handling"""
+    """Enhanced person insertion with translation handling and error handling.
+
+    Translations, the acc_types row and the peoples row are written in one
+    transaction; all translation upserts go out as a single multi-row statement.
+    """
     fields = {k: v.strip() if isinstance(v, str) else v for k, v in fields.items()}
     
-    async with get_traced_db_cursor() as cursor:
-        try:
+    try:
+        async with unit_of_work() as uow:
             # Handle translations first for foreign key fields
             translation_fields = {}
             
-            # Process name translations
-            if any(k.startswith('name_') for k in fields.keys()):
-                name_translation = await process_multilingual_field(field_base='name', data=fields, madrasa_name=madrasa_name, context="name", table_name="people")
-                if name_translation:
-                    translation_fields['name'] = name_translation
-                    # Remove individual language fields
-                    fields = {k: v for k, v in fields.items() if not k.startswith('name_')}
-            
-            # Process father name translations  
-            if any(k.startswith('father_') for k in fields.keys()):
-                father_translation = await process_multilingual_field(field_base='father', data=fields, madrasa_name=madrasa_name, context="father", table_name="people")
-                if father_translation:
-                    translation_fields['father_name'] = father_translation
-                    # Remove individual language fields
-                    fields = {k: v for k, v in fields.items() if not k.startswith('father_')}
-            
-            # Process mother name translations
-            if any(k.startswith('mother_') for k in fields.keys()):
-                mother_translation = await process_multilingual_field(field_base='mother', data=fields, madrasa_name=madrasa_name, context="mother", table_name="people")
-                if mother_translation:
-                    translation_fields['mother_name'] = mother_translation
+            # Queue name/father/mother translations; peoples.name keeps the English text for lookups
+            for field_base, id_column in (('name', 'name_id'), ('father', 'father_name_id'), ('mother', 'mother_name_id')):
+                if not any(k.startswith(f'{field_base}_') for k in fields.keys()):
+                    continue
+                ref = uow.translation(madrasa_name, fields.get(f'{field_base}_en'), context=field_base, table_name="people",
+                                      bn_text=fields.get(f'{field_base}_bn'), ar_text=fields.get(f'{field_base}_ar'))
+                if ref:
+                    if field_base == 'name':
+                        translation_fields['name'] = fields['name_en']
+                    translation_fields[id_column] = ref
                     # Remove individual language fields
-                    fields = {k: v for k, v in fields.items() if not k.startswith('mother_')}
+                    fields = {k: v for k, v in fields.items() if not k.startswith(f'{field_base}_')}
             
-            # Handle address fields
+            # Handle address fields; only `address` is a translation reference, the others stay text
             address_fields = ['present_address', 'permanent_address', 'address']
             for field in address_fields:
                 if field in fields and fields[field]:
                     address_text = fields[field].strip().lower()
-                    address_translation = await upsert_translation(
-                        translation_text=address_text, 
-                        madrasa_name=madrasa_name, 
-                        context=field, 
-                        table_name="people"
-                    )
-                    if address_translation:
-                        translation_fields[field] = address_translation
+                    address_ref = uow.translation(madrasa_name, address_text, context=field, table_name="people")
+                    if address_ref and field == 'address':
+                        fields.pop('address')
+                        translation_fields['address_id'] = address_ref
+                    elif address_ref:
+                        translation_fields[field] = address_text
             
             # Merge translation fields with other fields
             fields.update(translation_fields)
@@ -632,7 +617,7 @@ async def insert_person(madrasa_name: str, fields: Dict[str, Any], acc_type: str
                     VALUES ({acc_placeholders}) AS new
                     ON DUPLICATE KEY UPDATE {acc_updates}
                 """
-                await cursor.execute(acc_sql, list(acc_type_data.values()))
+                uow.add(acc_sql, list(acc_type_data.values()))
             
             # Insert into peoples table AFTER acc_types
             columns = ', '.join(peoples_fields.keys())
@@ -651,71 +636,18 @@ async def insert_person(madrasa_name: str, fields: Dict[str, Any], acc_type: str
                 VALUES ({placeholders}) AS new
                 ON DUPLICATE KEY UPDATE {updates}
             """
-            await cursor.execute(sql, list(peoples_fields.values()))
+            uow.add(sql, list(peoples_fields.values()))
             
-            log.info(action="insert_success", trace_info=phone, message="Upserted into peoples with translations", secure=True)
-        except Exception as e:
-            log.critical(action="db_insert_error", trace_info=phone,message=str(e), secure=True)
-            raise
+        log.info(action="insert_success", trace_info=phone, message="Upserted into peoples with translations", secure=True)
+    except Exception as e:
+        log.critical(action="db_insert_error", trace_info=phone,message=str(e), secure=True)
+        raise
 
-async def delete_users(madrasa_name:Union[str, list[str]] | None= None, uid = None, acc_type = None) -> bool:
-    """Enhanced user deletion with comprehensive cleanup"""
-    if not madrasa_name:
-        madrasa_name = config.MADRASA_NAMES_LIST
-    for madrasa in madrasa_name if isinstance(madrasa_name, list) else [madrasa_name]:
-        async with get_traced_db_cursor() as cursor:
-            try:
-                if not uid and not acc_type:
-                    await cursor.execute(f"""
-                        SELECT u.user_id, p.acc_type 
-                        FROM global.users u
-                        JOIN {madrasa}.peoples p ON u.user_id = p.user_id
-                        WHERE u.scheduled_deletion_at IS NOT NULL
-                        AND u.scheduled_deletion_at < NOW()
-                    """)
-                    users_to_delete = await cursor.fetchall()
-                else:
-                    users_to_delete = [{'user_id': uid, 'acc_type': acc_type}]
-                
-                for user in users_to_delete:
-                    uid = user["user_id"]
-                    acc_type = user["acc_type"]
-                    
-                    if acc_type not in ['students', 'teachers', 'staffs', 'admins', 'badri_members']:
-                        await cursor.execute(f"DELETE FROM {madrasa}.peoples WHERE user_id = %s", (uid,))
-                    else:
-                        await cursor.execute(f"""
-                            UPDATE {madrasa}.peoples SET 
-                                date_of_birth = NULL,
-                                birth_certificate = NULL,
-                                national_id = NULL,
-                                source = NULL,
-                                present_address = NULL,
-                                permanent_address = NULL,
-                                father_or_spouse = NULL,
-                                mother_en = NULL,
-                                mother_bn = NULL,
-                                mother_ar = NULL,
-                                guardian_number = NULL,
-                                available = NULL,
-                                is_donor = NULL,
-                                is_badri_member = NULL,
-                                is_foundation_member = NULL
-                            WHERE user_id = %s
-                        """, (uid,))
-                    
-                    await cursor.execute(f"DELETE FROM global.transactions WHERE user_id = %s", (uid,))
-                    await cursor.execute(f"DELETE FROM global.verifications WHERE user_id = %s", (uid,))
-                    await cursor.execute(f"DELETE FROM global.users WHERE user_id = %s", (uid,))
-                return True
-                
-            except IntegrityError as e:
-                log.critical(action="auto_delete_error", trace_info="Null", message=f"IntegrityError: {e}", secure=False)
-                return False
-            except Exception as e:
-                log.critical(action="auto_delete_error", trace_info="Null", message=str(e), secure=False)
-                return False
-    return False
+async def delete_users(madrasa_name: Union[str, list[str]] | None= None) -> bool:
+    """Delete users whose scheduled deletion is due, in set-based chunks (see UserReaper)"""
+    madrasas = [madrasa_name] if isinstance(madrasa_name, str) else madrasa_name
+    report = await UserReaper().run(madrasas)
+    return report.ok
 
 # ─── Business Logic Functions ────────────────────────────────────────────────
 
@@ -803,7 +735,7 @@ async def get_system_health(request: Request | None= None) -> Dict[str, Any]:
         "keydb": keydb_health,
         "maintenance_mode": config.is_maintenance(),
         "cache_size": cache_size,
-        "rate_limiter_size": len(rate_limiter._requests)
+        "rate_limiter_size": len(rate_limiter)
     }
 
 
@@ -835,6 +767,20 @@ def handle_async_errors(func: Callable) -> Callable:
             # Re-raise HTTP exceptions
             log.critical(action="Async error", message="An error occured, HTTPExeption on handle async")
             raise
+        except DatabaseBusyError as e:
+            # Pool exhausted: tell the client to back off instead of queueing forever
+            raise HTTPException(
+                status_code=503,
+                detail={"message": str(e), "error_code": "database_busy"},
+                headers={"Retry-After": "1"},
+            )
+        except PasswordHasherBusyError as e:
+            # Too many logins already waiting for a KDF worker
+            raise HTTPException(
+                status_code=503,
+                detail={"message": str(e), "error_code": "server_busy"},
+                headers={"Retry-After": "1"},
+            )
         except Exception as e:
             log.error(
                 action=f"unhandled_error_{func.__name__}", 
@@ -853,7 +799,7 @@ def initialize_application() -> bool:
     """Initialize application with all necessary components"""
     try:
         # Initialize rate limiter
-        rate_limiter._requests.clear()
+        rate_limiter.clear()
         
         # Log successful initialization  
         log.info(action="app_initialized", trace_info="system", message="Application initialized successfully", secure=False)
@@ -870,55 +816,71 @@ def initialize_application() -> bool:
 
 # ─── Rate Limiting ───────────────────────────────────────────────────────────
 
+class _WindowCounter:
+    """Requests counted in the current and the previous fixed window of one identifier"""
+    __slots__ = ("bucket", "current", "previous")
+
+    def __init__(self, bucket: int) -> None:
+        self.bucket = bucket
+        self.current = 0
+        self.previous = 0
+
+
 class RateLimiter:
-    """Advanced rate limiting with sliding window and thread safety"""
-    
-    def __init__(self):
-        self._requests: Dict[str, List[float]] = {}
-        self._cleanup_interval = 1 * 3600  # 1 hour
-        self._last_cleanup = time.time()
-        self._lock = Lock()
-    
-    def is_allowed(self, identifier: str, max_requests: int, window: int) -> bool:
-        """Check if request is allowed based on rate limit (thread-safe)"""
-        current_time = time.time()
-        
-        with self._lock:
-            # Cleanup old entries periodically
-            if current_time - self._last_cleanup > self._cleanup_interval:
-                self._cleanup()
-                self._last_cleanup = current_time
-            
-            # Get request history for this identifier
-            requests = self._requests.get(identifier, [])
-            
-            # Remove requests outside the window
-            window_start = current_time - window
-            requests = [req_time for req_time in requests if req_time > window_start]
-            
-            # Check if under limit
-            if len(requests) < max_requests:
-                requests.append(current_time)
-                self._requests[identifier] = requests
-                return True
-            
-            return False
-    
-    def _cleanup(self) -> None:
-        """Remove old request records (thread-safe)"""
-        current_time = time.time()
-        old_identifiers = []
-        
-        for identifier, requests in self._requests.items():
-            # Keep only recent requests (within last hour)
-            recent_requests = [req for req in requests if current_time - req < 3600]
-            if recent_requests:
-                self._requests[identifier] = recent_requests
-            else:
-                old_identifiers.append(identifier)
-        
-        for identifier in old_identifiers:
-            del self._requests[identifier]
+    """Sliding window counter rate limiting with fixed per-identifier state.
+
+    Each identifier keeps two counters: requests in the current fixed window
+    and in the previous one. The previous count is weighted by how much of it
+    still overlaps the sliding window, so a check is O(1) whatever the
+    traffic. Identifiers are kept per window length in least-recently-used
+    order, and every check evicts a few idle ones from the front, so memory
+    follows the number of active identifiers without a periodic sweep.
+
+    There is no await inside ``is_allowed``, so it is atomic on the event
+    loop and needs no lock.
+    """
+
+    _EVICT_PER_CALL = 2
+
+    def __init__(self) -> None:
+        self._windows: Dict[int, "OrderedDict[str, _WindowCounter]"] = {}
+
+    def __len__(self) -> int:
+        return sum(len(counters) for counters in self._windows.values())
+
+    def clear(self) -> None:
+        self._windows.clear()
+
+    def is_allowed(self, identifier: str, max_requests: int, window: int, now: Optional[float] = None) -> bool:
+        """Check if request is allowed based on rate limit, counting it if so"""
+        now = time.monotonic() if now is None else now
+        counters = self._windows.get(window)
+        if counters is None:
+            counters = self._windows[window] = OrderedDict()
+        bucket = int(now // window)
+
+        # Idle identifiers: nothing counted in this or the previous window
+        for _ in range(self._EVICT_PER_CALL):
+            oldest = next(iter(counters.values()), None)
+            if oldest is None or oldest.bucket >= bucket - 1:
+                break
+            counters.popitem(last=False)
+
+        counter = counters.get(identifier)
+        if counter is None:
+            counter = counters[identifier] = _WindowCounter(bucket)
+        else:
+            counters.move_to_end(identifier)
+            if counter.bucket != bucket:
+                counter.previous = counter.current if counter.bucket == bucket - 1 else 0
+                counter.current = 0
+                counter.bucket = bucket
+
+        overlap = 1.0 - (now - bucket * window) / window
+        if counter.previous * overlap + counter.current < max_requests:
+            counter.current += 1
+            return True
+        return False
 
 # Global rate limiter instance
 rate_limiter = RateLimiter()
@@ -1045,50 +1007,109 @@ def generate_code(code_length: Optional[int] = None) -> int:
     code_length = code_length or config.CODE_LENGTH
     return random.randint(10**(code_length-1), 10**code_length - 1)
 
-async def check_code(user_code: int, phone: str) -> bool:
-    """Enhanced code verification with security features"""    
+def _code_key(phone: str) -> str:
+    return f"verification:{phone}"
+
+def _code_sends_key(phone: str) -> str:
+    return f"verification_sends:{phone}"
+
+def _verification_keydb(request: Request | None = None) -> Any:
+    from utils.keydb.keydb_utils import get_keydb_from_app
+    pool = get_keydb_from_app(request)
+    if not pool:
+        # Codes only live in KeyDB; without it they can neither be stored nor checked
+        raise AppError("Verification service unavailable", error_code="503")
+    return pool
+
+async def reserve_code_send(phone: str, request: Request | None = None) -> int:
+    """Count a code send against the phone's hourly budget; returns the sends in this hour, this one included"""
+    from utils.otel.round_trips import round_trip
+    pool = _verification_keydb(request)
+    key = _code_sends_key(phone)
+    # The window starts with the first send; INCR keeps the TTL set by SET NX
+    async with pool.pipeline(transaction=True) as pipe:
+        pipe.set(key, 0, ex=3600, nx=True)
+        pipe.incr(key)
+        with round_trip("keydb"):
+            _created, sends = await pipe.execute()
+    return int(sends)
+
+async def release_code_send(phone: str, request: Request | None = None) -> None:
+    """Give back a reserved send when no code went out"""
+    pool = _verification_keydb(request)
+    await pool.decr(_code_sends_key(phone))
+
+async def store_code(phone: str, code: int, ip_address: str, request: Request | None = None) -> None:
+    """Keep the code in KeyDB until it expires, is used or runs out of attempts"""
+    from utils.otel.round_trips import round_trip
+    pool = _verification_keydb(request)
+    key = _code_key(phone)
+    async with pool.pipeline(transaction=True) as pipe:
+        pipe.delete(key)
+        pipe.hset(key, mapping={"code": str(code), "attempts": 0})
+        pipe.expire(key, config.CODE_EXPIRY_MINUTES * 60)
+        with round_trip("keydb"):
+            await pipe.execute()
+    if config.VERIFICATION_AUDIT_ENABLED:
+        _spawn_background(_audit_code(phone, code, ip_address))
+
+def _spawn_background(coro: Awaitable[Any]) -> None:
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def _audit_code(phone: str, code: int, ip_address: str) -> None:
+    """Audit row for a sent code; never read back by the auth flow"""
     try:
+        params = (phone, hash_sensitive_data(phone), encrypt_sensitive_data(phone), code, ip_address)
         async with get_traced_db_cursor() as cursor:
-            await cursor.execute("""
-                SELECT code, created_at FROM global.verifications
-                WHERE phone = %s
-                ORDER BY created_at DESC
-                LIMIT 1
-            """, (phone,))
-            result = await cursor.fetchone()
-            
-            if not result:
-                raise AppError("No verification code found", error_code="400")
-            
-            db_code = result["code"]
-            created_at = result["created_at"]
-            now = datetime.now()
-            
-            # Check expiration
-            if (now - created_at).total_seconds() > config.CODE_EXPIRY_MINUTES * 6000: # TODO: the mysql and datetime now doesnt match
-                raise AppError("Verification code expired", error_code="400")
-            
-            # Constant-time comparison
-            if int(user_code) == int(db_code):
-                await delete_code()
-                return True
-            elif int(user_code) == 123456: # TODO: Remove this after testing
-                return True
-            else:
-                log.warning(action="verification_failed", trace_info=phone, message="Code mismatch", secure=True)
-                raise AppError("Verification code mismatch", error_code="400")
+            await run_statement(cursor, "verifications.audit", params)
+    except Exception as e:
+        log.error(action="verification_audit_failed", trace_info="system", message=f"{type(e).__name__}: {e}", secure=False)
+
+async def check_code(user_code: int, phone: str, request: Request | None = None) -> bool:
+    """Check a code against the one stored for the phone; a matching code is used up"""
+    from utils.otel.round_trips import round_trip
+    try:
+        code = str(int(user_code))
+    except (TypeError, ValueError):
+        raise AppError("Verification code must be numeric", error_code="400")
+    try:
+        pool = _verification_keydb(request)
+        key = _code_key(phone)
+        async with pool.pipeline(transaction=True) as pipe:
+            pipe.hincrby(key, "attempts", 1)
+            pipe.hget(key, "code")
+            with round_trip("keydb"):
+                attempts, stored = await pipe.execute()
+
+        if stored is None:
+            # HINCRBY just created the key without a TTL
+            await pool.delete(key)
+            raise AppError("Verification code expired or not found", error_code="400")
+        if int(attempts) > config.CODE_MAX_ATTEMPTS:
+            await pool.delete(key)
+            log.warning(action="verification_attempts_exceeded", trace_info=phone, message="Too many code attempts", secure=True)
+            raise AppError("Too many verification attempts; request a new code", error_code="400")
+
+        stored = stored.decode() if isinstance(stored, bytes) else str(stored)
+        # Constant-time comparison
+        if compare_digest(code, stored):
+            await pool.delete(key)
+            return True
+        log.warning(action="verification_failed", trace_info=phone, message="Code mismatch", secure=True)
+        raise AppError("Verification code mismatch", error_code="400")
     
+    except AppError:
+        raise
     except Exception as e:
         log.critical(action="verification_error", trace_info=phone, message=str(e), secure=True)
         raise AppError(f"Error: {str(e)}", error_code="500")
 
 async def delete_code() -> None:
-    """Delete expired verification codes"""
+    """Delete verification audit rows past their retention (maintenance)"""
     async with get_traced_db_cursor() as cursor:
-            await cursor.execute("""
-                DELETE FROM global.verifications
-                WHERE created_at < NOW() - INTERVAL 1 DAY
-            """)
+        await run_statement(cursor, "verifications.prune", (config.VERIFICATION_AUDIT_RETENTION_DAYS,))
 
 # ─── Validation Functions ────────────────────────────────────────────────────
 
@@ -1132,6 +1153,10 @@ def format_phone_number(phone: str) -> str:
         raise AppError("Invalid phone number format", error_code="400")
 
 
+def normalize_name(name: str) -> str:
+    """Normalize a name the way the stored ``*_norm`` columns do: LOWER(TRIM(name))"""
+    return name.strip(" ").lower()
+
 def validate_fullname(fullname: str) -> bool:
     """Enhanced fullname validation with comprehensive checks"""
     # Allow letters, spaces, apostrophes, and hyphens
@@ -1344,68 +1369,61 @@ async def validate_file_upload(
     return
 
 # ──── User Login Limits ────────────────────────────────────────────────────
-async def validate_device_limit(device_id: str, ip_address: str, request: Request | None= None) -> bool:
-    """Check if user has reached device limit"""
-    from utils.keydb.keydb_utils import get_keydb_from_app    
+async def validate_device_limit(device_id: str, ip_address: str, request: Request | None= None) -> Optional[RateLimitResult]:
+    """Check if user has reached device limit; returns the remaining quota (None without KeyDB)"""
+    from utils.keydb.keydb_utils import get_keydb_from_app
     pool = get_keydb_from_app(request)
     if not pool:
         # If KeyDB not available, allow by default (or raise an error if strict)
-        return True
-
-    # Construct a key for this device + IP
-    cache_key = f"device_limit:{device_id}:{ip_address}"
+        return None
 
-    # Use atomic operation to increment count
-    attempts = await pool.incr(cache_key)
-    # Set expiry if this is the first time
-    if attempts == 1:
-        await pool.expire(cache_key, config.DEVICE_REGISTRATION_WINDOW)
+    # Sliding window per device + IP, counted atomically in one round trip
+    result = await sliding_window(pool, f"device_window:{device_id}:{ip_address}", config.MAX_DEVICES_PER_USER, config.DEVICE_REGISTRATION_WINDOW)
 
-    if attempts > config.MAX_DEVICES_PER_USER:
+    if not result.allowed:
         log.critical(action="device_limit_exceeded", trace_info=ip_address, message=f"Maximum devices ({config.MAX_DEVICES_PER_USER}) reached for device: {device_id}", secure=False)
         raise AppError(f"Maximum devices ({config.MAX_DEVICES_PER_USER}) reached. Please remove an existing device to add this one.", error_code="400")
 
-    return True
+    return result
             
 
-async def validate_login_attempts(formatted_phone: str, fullname: str, request: Optional[Request] = None) -> bool:
+def _login_attempts_key(formatted_phone: str, fullname: str) -> str:
+    return f"login_window:{formatted_phone}:{fullname}"
+
+async def validate_login_attempts(formatted_phone: str, fullname: str, request: Optional[Request] = None) -> Optional[RateLimitResult]:
     """
-    Check login attempts in KeyDB and return (allowed, remaining).
+    Check that one more failed login would still fit in the window; returns the remaining quota.
     """
     from utils.keydb.keydb_utils import get_keydb_from_app
     pool = get_keydb_from_app(request)
     if not pool:
         # KeyDB unavailable, allow login
-        return True
+        return None
 
-    raw = await pool.get(f"login_attempts:{formatted_phone}:{fullname}")
-    attempts = int(raw or 0)
+    # Cost 0: checked, not counted
+    result = await sliding_window(pool, _login_attempts_key(formatted_phone, fullname), config.AUTH_ATTEMPTS_LIMIT, int(config.AUTH_LOCKOUT_MINUTES * 60), cost=0)
 
-    if attempts >= config.AUTH_ATTEMPTS_LIMIT:
+    if not result.allowed:
         log.critical(action="login_attempts_exceeded", trace_info=formatted_phone, message=f"Login attempts exceeded for: {fullname}", secure=True)
         raise AppError(f"Login attempts exceeded for: {fullname}", error_code="400")
 
-    return True
+    return result
 
 async def record_login_attempt(
     formatted_phone: str, fullname: str, success: bool, request: Optional[Request] = None
-) -> None:
-    """Record login attempt in KeyDB."""
+) -> Optional[RateLimitResult]:
+    """Record login attempt in KeyDB; returns the remaining quota after a failure."""
     from utils.keydb.keydb_utils import get_keydb_from_app
     pool = get_keydb_from_app(request)
     if not pool:
-        return
+        return None
 
-    key = f"login_attempts:{formatted_phone}:{fullname}"
+    key = _login_attempts_key(formatted_phone, fullname)
 
     if success:
         await pool.delete(key)
-    else:
-        # Atomic increment
-        attempts = await pool.incr(key)
-        # Set expiration only if key was newly created
-        if attempts == 1:
-            await pool.expire(key, int(config.AUTH_LOCKOUT_MINUTES * 60))
+        return None
+    return await sliding_window(pool, key, config.AUTH_ATTEMPTS_LIMIT, int(config.AUTH_LOCKOUT_MINUTES * 60))
 
 # ─── Utility Functions ─────────────────────────────────────────────────────
 def hash_sensitive_data(data: str) -> str:
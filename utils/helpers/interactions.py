@@ -0,0 +1,202 @@
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.config import config
+from utils.helpers.logger import log
+from utils.otel.round_trips import round_trip
+
+# user_id:device_id -> app opens since the last flush
+PENDING_KEY = "interactions:pending"
+# user_id:device_id -> latest "device_brand\x1fip_address"
+DETAILS_KEY = "interactions:details"
+_SEP = "\x1f"
+
+
+def _field(user_id: int, device_id: str) -> str:
+    return f"{user_id}:{device_id}"
+
+
+def _decode(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def interaction_rows(counts: Dict[Any, Any], details: Dict[Any, Any]) -> List[Tuple[Any, ...]]:
+    """``(user_id, device_id, device_brand, ip_address, opens)`` rows for ``interactions.add_opens``"""
+    rows = []
+    for field, opens in counts.items():
+        field = _decode(field)
+        user_id, _, device_id = field.partition(":")
+        detail = details.get(field) or details.get(field.encode())
+        device_brand, _, ip_address = _decode(detail).partition(_SEP) if detail is not None else ("", "", "")
+        rows.append((int(user_id), device_id, device_brand or None, ip_address, int(opens)))
+    return rows
+
+
+async def _upsert(rows: List[Tuple[Any, ...]]) -> None:
+    from utils.mysql.unit_of_work import unit_of_work
+    async with unit_of_work() as uow:
+        for start in range(0, len(rows), config.INTERACTION_FLUSH_BATCH):
+            uow.add_rows("interactions.add_opens", rows[start:start + config.INTERACTION_FLUSH_BATCH])
+
+
+async def record_interaction(user_id: int, device_id: str, device_brand: Optional[str], ip_address: str,
+                             request: Any = None) -> None:
+    """Count one app open for the user's device.
+
+    The count goes into a KeyDB hash with HINCRBY and reaches MySQL on the
+    next flush. Without KeyDB the row is upserted directly, which is still
+    an atomic increment.
+    """
+    from utils.keydb.keydb_utils import get_keydb_from_app
+    pool = get_keydb_from_app(request)
+    if not pool:
+        await _upsert([(user_id, device_id, device_brand, ip_address, 1)])
+        return
+    field = _field(user_id, device_id)
+    async with pool.pipeline(transaction=True) as pipe:
+        pipe.hincrby(PENDING_KEY, field, 1)
+        pipe.hset(DETAILS_KEY, field, f"{device_brand or ''}{_SEP}{ip_address}")
+        with round_trip("keydb"):
+            await pipe.execute()
+
+
+def _flush_keys() -> Tuple[str, str]:
+    # The creation time in the name tells recovery a flush in progress from one a dead worker left behind
+    suffix = f"{int(time.time())}-{uuid.uuid4().hex}"
+    return f"{PENDING_KEY}:{suffix}", f"{DETAILS_KEY}:{suffix}"
+
+
+async def _write_flushed(pool: Any, counts_key: str, details_key: str) -> int:
+    """Upsert the counts held under a flush's keys, then drop the keys"""
+    counts = await pool.hgetall(counts_key)
+    details = await pool.hgetall(details_key)
+    rows = interaction_rows(counts, details)
+    try:
+        if rows:
+            await _upsert(rows)
+    except Exception:
+        async with pool.pipeline(transaction=True) as pipe:
+            for field, opens in counts.items():
+                pipe.hincrby(PENDING_KEY, field, int(opens))
+            for field, detail in details.items():
+                pipe.hsetnx(DETAILS_KEY, field, detail)
+            pipe.delete(counts_key, details_key)
+            await pipe.execute()
+        raise
+    await pool.delete(counts_key, details_key)
+    return len(rows)
+
+
+async def flush_interactions(pool: Any) -> int:
+    """Move the pending counts into MySQL; returns the number of rows written.
+
+    Both hashes are renamed to a name unique to this flush in one MULTI, so
+    increments that arrive meanwhile start a fresh hash and every worker can
+    flush without double counting. If the upsert fails, the counts are added
+    back to the pending hash for the next flush. The renamed hashes expire
+    after ``INTERACTION_FLUSH_KEY_TTL`` in case the worker dies mid-flush;
+    ``recover_interactions`` takes them over before that.
+    """
+    if not await pool.exists(PENDING_KEY):
+        return 0
+    counts_key, details_key = _flush_keys()
+    try:
+        async with pool.pipeline(transaction=True) as pipe:
+            pipe.rename(PENDING_KEY, counts_key)
+            pipe.rename(DETAILS_KEY, details_key)
+            pipe.expire(counts_key, config.INTERACTION_FLUSH_KEY_TTL)
+            pipe.expire(details_key, config.INTERACTION_FLUSH_KEY_TTL)
+            await pipe.execute()
+    except Exception:
+        # Another worker flushed the hash since the EXISTS check
+        return 0
+    return await _write_flushed(pool, counts_key, details_key)
+
+
+async def recover_interactions(pool: Any, older_than: Optional[float] = None) -> int:
+    """Write out the counts of flushes that never finished; returns the number of rows written.
+
+    Flush hashes older than ``older_than`` seconds (default
+    ``INTERACTION_RECOVER_AFTER_SECONDS``) belong to a worker that died mid-flush.
+    Each is claimed with a RENAME, so two workers starting together never write
+    the same counts twice, and then flushed like a fresh one.
+    """
+    older_than = config.INTERACTION_RECOVER_AFTER_SECONDS if older_than is None else older_than
+    leftovers = []
+    async for key in pool.scan_iter(match=f"{PENDING_KEY}:*", count=100):
+        suffix = _decode(key)[len(PENDING_KEY) + 1:]
+        created, _, _ = suffix.partition("-")
+        if created.isdigit() and time.time() - int(created) >= older_than:
+            leftovers.append(suffix)
+
+    written = 0
+    for suffix in leftovers:
+        counts_key, details_key = _flush_keys()
+        try:
+            await pool.rename(f"{PENDING_KEY}:{suffix}", counts_key)
+        except Exception:
+            continue  # claimed by another worker
+        try:
+            await pool.rename(f"{DETAILS_KEY}:{suffix}", details_key)
+        except Exception:
+            pass  # rows are written without device details
+        written += await _write_flushed(pool, counts_key, details_key)
+    return written
+
+
+class InteractionFlusher:
+    """Periodically flush the KeyDB interaction counters into ``global.interactions``.
+
+    On start it first writes out flushes that a dead worker left behind.
+    """
+
+    def __init__(self, interval: Optional[float] = None) -> None:
+        self.interval = interval or config.INTERACTION_FLUSH_SECONDS
+        self._task: Optional[asyncio.Task] = None
+
+    async def flush(self) -> int:
+        from utils.keydb.keydb_utils import get_keydb_from_app
+        pool = get_keydb_from_app(None)
+        return await flush_interactions(pool) if pool else 0
+
+    async def recover(self) -> int:
+        from utils.keydb.keydb_utils import get_keydb_from_app
+        pool = get_keydb_from_app(None)
+        return await recover_interactions(pool) if pool else 0
+
+    async def _run(self) -> None:
+        try:
+            recovered = await self.recover()
+            if recovered:
+                log.info(action="interaction_flush_recovered", trace_info="system", message=f"Wrote {recovered} rows left by an unfinished flush", secure=False)
+        except Exception as e:
+            log.error(action="interaction_flush_error", trace_info="system", message=f"{type(e).__name__}: {e}", secure=False)
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                log.error(action="interaction_flush_error", trace_info="system", message=f"{type(e).__name__}: {e}", secure=False)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the loop and flush what is pending (application shutdown)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            log.error(action="interaction_flush_error", trace_info="system", message=f"{type(e).__name__}: {e}", secure=False)
+
+
+interaction_flusher = InteractionFlusher()
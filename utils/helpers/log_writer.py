@@ -0,0 +1,250 @@
+import asyncio
+import contextvars
+import json
+import random
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from utils.helpers.logger import _log_error, _write_log_file, get_crypto_funcs
+
+# Numeric order of the log levels; logs.logs only accepts info and above
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40, "critical": 50}
+MAX_ACTION_LEN = 50
+MAX_MESSAGE_LEN = 255
+MAX_TRACE_LEN = 100
+
+
+class LogRecord:
+    __slots__ = ("action", "trace_info", "message", "level", "metadata", "secure", "trace_info_hash", "trace_info_encrypted")
+
+    def __init__(self, action: str, trace_info: str, message: str, level: str, metadata: Optional[Dict[str, Any]], secure: bool) -> None:
+        self.action = action[:MAX_ACTION_LEN]
+        self.trace_info = trace_info[:MAX_TRACE_LEN]
+        self.message = message[:MAX_MESSAGE_LEN]
+        self.level = level
+        self.secure = secure
+        self.trace_info_hash: Optional[str] = None
+        self.trace_info_encrypted: Optional[str] = None
+        # Stamped now: the row itself is only inserted at the next flush
+        self.metadata = dict(metadata or {})
+        self.metadata.update({
+            "timestamp": datetime.now().isoformat(),
+            "level": level,
+            "action": self.action,
+            "trace_info": self.trace_info,
+            "message": self.message,
+        })
+
+    def protect(self) -> None:
+        """Hash and encrypt trace_info; falls back to plain logging if crypto fails"""
+        trace_info_hash = get_crypto_funcs(data=self.trace_info, which="hash")
+        trace_info_encrypted = get_crypto_funcs(data=self.trace_info, which="encrypt")
+        if not trace_info_hash or not trace_info_encrypted:
+            _log_error("Crypto functions failed, falling back to non-secure logging")
+            return
+        self.trace_info_hash = trace_info_hash
+        self.trace_info_encrypted = trace_info_encrypted
+
+    def row(self) -> tuple:
+        return (self.action, self.trace_info, self.message, self.level, json.dumps(self.metadata, default=str),
+                self.trace_info_hash, self.trace_info_encrypted)
+
+    def file_entry(self) -> Dict[str, Any]:
+        entry = {
+            "timestamp": self.metadata["timestamp"],
+            "level": self.level,
+            "action": self.action,
+            "trace_info": self.trace_info,
+            "message": self.message,
+            "metadata": self.metadata,
+        }
+        if self.secure:
+            entry.update({"trace_info_hash": self.trace_info_hash, "trace_info_encrypted": self.trace_info_encrypted})
+        return entry
+
+
+def _protect_all(records: List[LogRecord]) -> None:
+    for record in records:
+        record.protect()
+
+
+def _write_records(records: List[LogRecord], error: bool) -> None:
+    _write_log_file([record.file_entry() for record in records], error=error)
+
+
+class LogWriter:
+    """Buffered writer for the ``logs.logs`` table.
+
+    ``log.info(...)`` and friends only build a record and append it to a
+    bounded in-memory queue; levels under ``LOGGING_LEVEL`` and the sampled-out
+    share of actions in ``LOG_SAMPLE_RATES`` are dropped before that. One
+    writer task per event loop sends the queue as multi-row INSERTs of up to
+    ``LOG_BATCH_SIZE`` rows, every ``LOG_FLUSH_INTERVAL_MS`` or as soon as a
+    full batch is waiting. Hashing and encrypting ``secure`` records and all
+    file writes run in a worker thread.
+
+    When the queue holds ``LOG_QUEUE_MAX`` records, new ones are spilled to
+    the backup log file instead, and counted as dropped once the spill buffer
+    is full as well. A batch whose INSERT fails also goes to the backup file.
+    """
+
+    def __init__(self, max_queue: Optional[int] = None, batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None) -> None:
+        self._max_queue = max_queue
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue: Deque[LogRecord] = deque()
+        self._spill: List[LogRecord] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self.written = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.filtered = 0
+        self.sampled_out = 0
+        self.spilled = 0
+        self.dropped = 0
+
+    @property
+    def max_queue(self) -> int:
+        if self._max_queue is None:
+            from config.config import server_config
+            return int(getattr(server_config, "LOG_QUEUE_MAX", 10000))
+        return self._max_queue
+
+    @property
+    def batch_size(self) -> int:
+        if self._batch_size is None:
+            from config.config import server_config
+            return int(getattr(server_config, "LOG_BATCH_SIZE", 200))
+        return self._batch_size
+
+    @property
+    def flush_interval(self) -> float:
+        if self._flush_interval is None:
+            from config.config import server_config
+            return getattr(server_config, "LOG_FLUSH_INTERVAL_MS", 250) / 1000
+        return self._flush_interval
+
+    def accepts(self, action: str, level: str) -> bool:
+        """Level threshold and per-action sampling, checked before a record is built"""
+        from config.config import server_config
+        if LEVELS.get(level, 20) < LEVELS.get(server_config.LOGGING_LEVEL.lower(), 20):
+            self.filtered += 1
+            return False
+        # Warnings and worse are always kept
+        rate = server_config.LOG_SAMPLE_RATES.get(action) if LEVELS.get(level, 20) < LEVELS["warning"] else None
+        if rate is not None and random.random() >= rate:
+            self.sampled_out += 1
+            return False
+        return True
+
+    def submit(self, action: str, trace_info: str, message: str, secure: bool = False,
+               level: str = "info", metadata: Optional[Dict[str, Any]] = None) -> None:
+        from config.config import server_config
+        if not server_config.LOGGING_ENABLED or not self.accepts(action, level):
+            return
+        record = LogRecord(action, trace_info, message, level, metadata, secure)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None:
+            # Worker threads (e.g. the crypto helpers) hand records to the writer's loop
+            if self._loop is not None and self._loop.is_running():
+                self._loop.call_soon_threadsafe(self._enqueue, record)
+            else:
+                _log_error("Skipping log - no event loop running")
+            return
+        if loop is not self._loop or self._task is None or self._task.done():
+            self._start(loop)
+        self._enqueue(record)
+
+    def _start(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        # A fresh context keeps the writer's inserts out of the request that started it
+        self._task = loop.create_task(self._run(), context=contextvars.Context())
+
+    def _enqueue(self, record: LogRecord) -> None:
+        if len(self._queue) >= self.max_queue:
+            if len(self._spill) < self.max_queue:
+                self._spill.append(record)
+                self.spilled += 1
+            else:
+                self.dropped += 1
+            self._wakeup.set()
+            return
+        self._queue.append(record)
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        from utils.otel.round_trips import label_round_trips
+        label_round_trips("log")
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write everything queued so far"""
+        while self._queue:
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            await self._write(batch)
+        if self._spill:
+            spill, self._spill = self._spill, []
+            await asyncio.to_thread(_write_records, spill, True)
+
+    async def _write(self, batch: List[LogRecord]) -> None:
+        from config.config import config
+        from utils.mysql.database_utils import get_traced_db_cursor
+        from utils.mysql.statements import statements
+
+        secure = [record for record in batch if record.secure]
+        if secure:
+            await asyncio.to_thread(_protect_all, secure)
+        if config.is_development():
+            await asyncio.to_thread(_write_records, batch, True)
+        try:
+            async with get_traced_db_cursor() as cursor:
+                await statements.execute_rows(cursor, "logs.insert", [record.row() for record in batch])
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed_batches += 1
+            _log_error(f"Database logging failed: {type(e).__name__}")
+            await asyncio.to_thread(_write_records, batch, True)
+
+    async def stop(self) -> None:
+        """Flush the queue and end the writer task (application shutdown)"""
+        task = self._task
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            self._stopping = True
+            self._wakeup.set()
+            await task
+        self._task = None
+        await self.flush()
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "queued": len(self._queue),
+            "spill_pending": len(self._spill),
+            "written": self.written,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "filtered": self.filtered,
+            "sampled_out": self.sampled_out,
+            "spilled": self.spilled,
+            "dropped": self.dropped,
+        }
+
+
+log_writer = LogWriter()
@@ -30,12 +30,8 @@ def get_crypto_funcs(data: str, which: str) -> str | None:
         _log_error(f"Failed to execute crypto function: {type(e).__name__}")
         return None
 
-log_count = 0
-log_count_lock = asyncio.Lock()
-
 async def log_event(action: str, message: str, trace_info: str= "system", secure: bool= False, level: str= "info", metadata=None) -> None:
     """Enhanced logging function with better error handling and metadata support"""
-    global log_count
 
     MAX_ACTION_LEN = 50
     MAX_MESSAGE_LEN = 255
@@ -51,12 +47,15 @@ async def log_event(action: str, message: str, trace_info: str= "system", secure
         _log_error("Logging is disabled in the configuration")
         return
     # Check if we are in development mode
-    if default_config.is_development:
+    if default_config.is_development():
         await _log_to_file(action=action, trace_info=trace_info, secure=secure,
                             message=message, level=level, metadata=metadata, error=True)
     
     try:
         from utils.mysql.database_utils import get_traced_db_cursor
+        from utils.otel.round_trips import label_round_trips
+        # Runs as its own task, so the label stays out of the request's context
+        label_round_trips("log")
         async with get_traced_db_cursor() as cursor:
                 # Prepare metadata
                 log_metadata = metadata or {}
@@ -84,36 +83,9 @@ async def log_event(action: str, message: str, trace_info: str= "system", secure
                 else:
                     params.extend([None, None])
 
+                # Retention drops whole daily partitions (utils/mysql/log_partitions.py)
                 await cursor.execute(sql, params)
                 
-                
-                async with log_count_lock:
-                    if log_count > 500:
-                        # Enhanced auto-prune with better performance
-                        await cursor.execute("SELECT COUNT(*) AS total FROM logs.logs")
-                        result = await cursor.fetchone()
-                        total = result['total'] if result else 0
-
-                        
-                        # If more than 1000, delete oldest (increased from 500)
-                        if total > 1000:
-                            
-                            await cursor.execute("""
-                                DELETE FROM logs.logs 
-                                WHERE log_id IN (
-                                    SELECT log_id FROM (
-                                        SELECT log_id FROM logs.logs 
-                                        ORDER BY created_at ASC 
-                                        LIMIT %s
-                                    ) AS old_logs
-                                )
-                            """, (total - 1000,))
-                            log_count = 0
-                        
-                    else:
-                        log_count += 1
-                
-                
     except Exception as e:
         # Fallback to file logging if database fails
         _log_error(f"Database logging failed: {type(e).__name__}")
@@ -122,6 +94,23 @@ async def log_event(action: str, message: str, trace_info: str= "system", secure
 
 async def _log_to_file(action : str, trace_info: str,  message : str, level, secure: bool, metadata=None, error=False) -> None:
     """Log to file as backup when database logging fails"""
+    log_entry = {
+        "timestamp": datetime.now().isoformat(),
+        "level": level,
+        "action": action,
+        "trace_info": trace_info,
+        "message": message,
+        "metadata": metadata or {},
+    }
+    if secure:
+        log_entry.update({
+            "trace_info_hash": get_crypto_funcs(trace_info, "hash"),
+            "trace_info_encrypted": get_crypto_funcs(trace_info, "encrypt")
+        })
+    _write_log_file([log_entry], error=error)
+
+def _write_log_file(entries: list, error: bool = False) -> None:
+    """Append log entries to today's backup file (blocking; the log writer calls it from a thread)"""
     try:
         log_dir = Path("logs")
         log_dir.mkdir(exist_ok=True)
@@ -129,55 +118,24 @@ async def _log_to_file(action : str, trace_info: str,  message : str, level, sec
         log_file = log_dir / f"app_{datetime.now().strftime('%Y%m%d')}.log"
 
         from config.config import config as default_config
-        if default_config.is_development:
-            log_devlopment = f"{level.upper()}: {action}\ndetails: {message}"
-            with open(log_file, "a+", encoding="utf-8") as f:
-                f.write(f"{log_devlopment}\n")
-                return
-        
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "level": level,
-            "action": action,
-            "trace_info": trace_info,
-            "message": message,
-            "metadata": metadata or {},
-            "source": "file_backup" if error else "database"
-        }
-
-        if secure:
-            log_entry.update({
-                "trace_info_hash": get_crypto_funcs(trace_info, "hash"),
-                "trace_info_encrypted": get_crypto_funcs(trace_info, "encrypt")
-            })
+        if default_config.is_development():
+            lines = [f"{entry['level'].upper()}: {entry['action']}\ndetails: {entry['message']}" for entry in entries]
+        else:
+            lines = [json.dumps({**entry, "source": "file_backup" if error else "database"}, default=str) for entry in entries]
         
         with open(log_file, "a+", encoding="utf-8") as f:
-            f.write(json.dumps(log_entry) + "\n")
-            return
+            f.write("\n".join(lines) + "\n")
             
     except Exception as e:
         _log_error(f"File logging also failed: {type(e).__name__}")
 
 def log_event_async(action: str, trace_info: str, message: str, secure: bool, level="info", metadata=None) -> None:
-    """Non-blocking wrapper for log_event that schedules logging in the background."""
+    """Non-blocking logging: queues the event for the batched DB writer (utils/helpers/log_writer.py)."""
     try:
-        # Get current event loop, create one if none exists
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        
-        # Schedule the task without waiting for it
-        if loop.is_running():
-            asyncio.create_task(log_event(action=action, trace_info=trace_info, secure=secure,
-                                          message=message, level=level, metadata=metadata
-                                          ))
-        else:
-            # If no loop is running, just skip logging silently
-            _log_error(f"Skipping log - no event loop running")
+        from utils.helpers.log_writer import log_writer
+        log_writer.submit(action=action, trace_info=trace_info, message=message, secure=secure, level=level, metadata=metadata)
     except Exception as e:
-        _log_error(f"Failed to schedule log task: {type(e).__name__}")
+        _log_error(f"Failed to queue log event: {type(e).__name__}")
 
 def log_event_sync(action : str, trace_info: str, message : str, secure: bool, level="info", metadata=None) -> None:
     """Enhanced synchronous wrapper that runs the logging operation and waits for completion."""
@@ -0,0 +1,117 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, List, Optional
+
+# LogRecord attributes that are not structured "extra" fields
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+# Loggers that uvicorn configures with their own synchronous handlers
+_UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; ``extra={...}`` fields are kept as keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+            "where": f"{record.module}:{record.lineno}",
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class LocalQueueHandler(QueueHandler):
+    """Hand records to the listener thread without formatting them first.
+
+    The stock ``prepare`` formats the message and the traceback on the
+    caller's thread so records can be pickled; an in-process queue does not
+    need that, so the caller only pays for resolving the message arguments.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def build_handlers(development: bool, log_file: Optional[str] = "debug.log") -> List[logging.Handler]:
+    """Handlers run by the listener thread.
+
+    Development keeps the rich console (with locals in tracebacks) and the
+    rotating ``debug.log``; production writes JSON lines to stdout only, for
+    the container log collector.
+    """
+    handlers: List[logging.Handler] = []
+    if development:
+        from rich.logging import RichHandler
+        handlers.append(RichHandler(rich_tracebacks=True, tracebacks_show_locals=True))
+        if log_file:
+            file_handler = RotatingFileHandler(log_file, maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8")
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+    else:
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(JsonFormatter())
+        handlers.append(stream)
+    return handlers
+
+
+def setup_logging(development: bool, level: Optional[str] = None, log_file: Optional[str] = "debug.log") -> QueueListener:
+    """Route the root logger (and uvicorn's loggers) through one queue.
+
+    Callers on the event loop only build the record and put it on a
+    ``SimpleQueue``; formatting and console/file I/O happen on the
+    listener's thread. The root level is the cheap gate: a disabled
+    ``logger.debug`` returns after a cached level check. Safe to call again,
+    e.g. on reload; the previous listener is stopped first.
+    """
+    global _listener
+    stop_logging()
+
+    level_name = (level or ("DEBUG" if development else "INFO")).upper()
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(LocalQueueHandler(log_queue))
+    root.setLevel(level_name)
+
+    for name in _UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    _listener = QueueListener(log_queue, *build_handlers(development, log_file), respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Stop the listener after it has written every queued record"""
+    global _listener
+    if _listener is not None:
+        listener, _listener = _listener, None
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,173 @@
+import asyncio
+import time
+from bisect import bisect_left
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from utils.helpers.logger import log
+
+# Upper bounds (ms) of the queue-wait and run-time histogram buckets; the last bucket is +Inf
+KDF_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PasswordHasherBusyError(RuntimeError):
+    """Too many password hashes are already waiting for a KDF worker"""
+
+
+def _timed(fn: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    # Runs in the worker, so the run time excludes the wait for a free worker
+    started = time.perf_counter()
+    return fn(*args), time.perf_counter() - started
+
+
+class _Histogram:
+    __slots__ = ("buckets", "total_seconds", "max_seconds", "count")
+
+    def __init__(self) -> None:
+        self.buckets: List[int] = [0] * (len(KDF_BUCKETS_MS) + 1)
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.buckets[bisect_left(KDF_BUCKETS_MS, seconds * 1000)] += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.count += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound (ms) of the bucket holding the q-th percentile"""
+        if not self.count:
+            return None
+        target, seen = q * self.count, 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return float(KDF_BUCKETS_MS[i]) if i < len(KDF_BUCKETS_MS) else float("inf")
+        return float("inf")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_seconds * 1000 / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 3),
+            "p50_ms": self.percentile(0.5),
+            "p99_ms": self.percentile(0.99),
+        }
+
+
+class PasswordHasher:
+    """Run password KDF work (werkzeug scrypt/pbkdf2) off the event loop.
+
+    Hashes run on a dedicated executor with ``workers`` workers: threads by
+    default, as hashlib's scrypt and pbkdf2 release the GIL, or processes
+    with ``PASSWORD_HASH_EXECUTOR = "process"``. At most ``workers`` calls
+    are in the executor at once; the rest wait on a semaphore, and once
+    ``max_waiting`` are waiting new calls fail fast with
+    PasswordHasherBusyError instead of piling up behind a login storm. The
+    time spent waiting and running is kept per call.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_waiting: Optional[int] = None,
+                 kind: Optional[str] = None) -> None:
+        self._workers = workers
+        self._max_waiting = max_waiting
+        self._kind = kind
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.waiting = 0
+        self.running = 0
+        self.rejected = 0
+        self.queue_wait = _Histogram()
+        self.run_time = _Histogram()
+
+    @property
+    def workers(self) -> int:
+        if self._workers is None:
+            from config.config import config
+            return max(1, int(config.PASSWORD_HASH_WORKERS))
+        return self._workers
+
+    @property
+    def max_waiting(self) -> int:
+        if self._max_waiting is None:
+            from config.config import config
+            return int(config.PASSWORD_HASH_MAX_WAITING)
+        return self._max_waiting
+
+    @property
+    def kind(self) -> str:
+        if self._kind is None:
+            from config.config import config
+            return config.PASSWORD_HASH_EXECUTOR
+        return self._kind
+
+    def _executor_for_loop(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="kdf")
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.workers)
+        return self._executor
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        executor = self._executor_for_loop()
+        if self.waiting >= self.max_waiting:
+            self.rejected += 1
+            log.warning(action="password_hash_busy", trace_info="system", message=f"{self.waiting} password hashes already waiting", secure=False)
+            raise PasswordHasherBusyError("Server is busy, try again shortly")
+        queued = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            self.queue_wait.observe(time.perf_counter() - queued)
+            self.running += 1
+            result, seconds = await asyncio.get_running_loop().run_in_executor(executor, _timed, fn, *args)
+            self.run_time.observe(seconds)
+            return result
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(generate_password_hash, password)
+
+    async def verify(self, pwhash: str, password: str) -> bool:
+        return await self._run(check_password_hash, pwhash, password)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "running": self.running,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "queue_wait": self.queue_wait.as_dict(),
+            "run_time": self.run_time.as_dict(),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
+
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
+
+
+async def verify_password(pwhash: str, password: str) -> bool:
+    return await password_hasher.verify(pwhash, password)
@@ -0,0 +1,386 @@
+"""
+Bulk import of people from CSV/XLSX files into ``{madrasa}.peoples``.
+
+Rows are read lazily, validated with the same helpers as /add_people and
+loaded in chunks. Each chunk is one transaction that sends one multi-row
+translation upsert, one user-id lookup, one multi-row peoples upsert and, for
+people that already have an account, one multi-row acc_types upsert. A chunk
+that fails is retried row by row so that only the offending rows are reported.
+"""
+
+import csv
+import io
+import time
+import asyncio
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Callable, Dict, IO, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import aiomysql
+
+from config.config import config
+from utils.helpers.helpers import (
+    AppError, encrypt_sensitive_data, format_phone_number, hash_sensitive_data, normalize_name, validate_fullname,
+)
+from utils.helpers.logger import log
+from utils.mysql.loader import match_phone_names
+from utils.mysql.statements import PEOPLE_IMPORT_COLUMNS, collation_key, run_statement
+from utils.mysql.unit_of_work import TranslationRef, UnitOfWork, unit_of_work
+
+# Account type as sent by clients -> peoples.acc_type / acc_types.main_type
+ACC_TYPES: Dict[str, str] = {
+    "students": "student",
+    "teachers": "teacher",
+    "staffs": "staff",
+    "donors": "donor",
+    "badri_members": "badri_member",
+    "admins": "admins",
+    "others": "others",
+}
+
+# Same requirements as /add_people; gender is required everywhere because the column is NOT NULL
+_STAFF_FIELDS = (
+    "name_en", "name_bn", "name_ar", "date_of_birth", "national_id", "blood_group", "gender",
+    "present_address", "permanent_address", "father_en", "father_bn", "father_ar",
+    "mother_en", "mother_bn", "mother_ar", "phone",
+)
+REQUIRED_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "students": (
+        "name_en", "name_bn", "name_ar", "date_of_birth", "birth_certificate", "blood_group", "gender",
+        "source", "present_address", "permanent_address", "father_en", "father_bn", "father_ar",
+        "mother_en", "mother_bn", "mother_ar", "class", "phone", "student_id", "guardian_number",
+    ),
+    "teachers": _STAFF_FIELDS + ("title1",),
+    "admins": _STAFF_FIELDS + ("title1",),
+    "staffs": _STAFF_FIELDS + ("title2",),
+    "others": ("name_en", "phone", "father_or_spouse", "date_of_birth", "gender"),
+}
+GENDERS = ("male", "female", "others")
+ACC_FLAGS = ("teacher", "student", "staff", "donor", "badri_member", "special_member")
+
+# Translated fields: id column -> (field prefix, translation context)
+TRANSLATED_FIELDS: Dict[str, Tuple[str, str]] = {
+    "name_id": ("name", "name"),
+    "father_name_id": ("father", "father"),
+    "mother_name_id": ("mother", "mother"),
+}
+
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+# ─── Reading ────────────────────────────────────────────────────────────────
+
+def detect_format(filename: str) -> str:
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith(".xlsx"):
+        return "xlsx"
+    raise ImportFormatError(f"Unsupported file type: {filename!r} (expected .csv or .xlsx)")
+
+
+def _header(cells: Iterable[Any]) -> List[str]:
+    return [str(cell).strip().lower() if cell is not None else "" for cell in cells]
+
+
+def iter_csv_rows(stream: IO[bytes]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield ``(line_number, row)`` from a binary CSV stream with a header line"""
+    reader = csv.reader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    header = _header(next(reader, []))
+    for line_number, cells in enumerate(reader, start=2):
+        if any(cell.strip() for cell in cells):
+            yield line_number, dict(zip(header, cells))
+
+
+def iter_xlsx_rows(stream: IO[bytes]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield ``(row_number, row)`` from the first sheet of an XLSX workbook"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:  # pragma: no cover
+        raise ImportFormatError("XLSX import needs openpyxl; install it or upload a CSV file")
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = _header(next(rows, ()))
+        for row_number, cells in enumerate(rows, start=2):
+            if any(cell not in (None, "") for cell in cells):
+                yield row_number, dict(zip(header, cells))
+    finally:
+        workbook.close()
+
+
+def iter_people_file(stream: IO[bytes], fmt: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    if fmt == "csv":
+        return iter_csv_rows(stream)
+    if fmt == "xlsx":
+        return iter_xlsx_rows(stream)
+    raise ImportFormatError(f"Unsupported format: {fmt!r}")
+
+
+# ─── Validation ─────────────────────────────────────────────────────────────
+
+@dataclass
+class PreparedPerson:
+    row_number: int
+    columns: Dict[str, Any]                                     # peoples columns except translation ids
+    translations: Dict[str, Tuple[str, Optional[str], Optional[str], str]]  # id column -> (en, bn, ar, context)
+    acc_type: str
+    flags: Dict[str, int]
+    phone: str
+    name_norm: str
+
+
+def _text(row: Mapping[str, Any], key: str) -> str:
+    value = row.get(key)
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # numeric cells such as student ids come back as floats
+    return str(value).strip()
+
+
+def _date(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    try:
+        return date.fromisoformat(str(value).strip()).isoformat()
+    except ValueError:
+        raise AppError(f"date_of_birth must be YYYY-MM-DD, got {value!r}", error_code="400")
+
+
+def prepare_person(row_number: int, row: Mapping[str, Any]) -> PreparedPerson:
+    """Validate one import row and build its peoples columns; raises AppError"""
+    acc_type = _text(row, "acc_type").lower() or "others"
+    if not acc_type.endswith("s"):
+        acc_type = f"{acc_type}s"
+    if acc_type not in ACC_TYPES:
+        acc_type = "others"
+
+    required = REQUIRED_FIELDS.get(acc_type, REQUIRED_FIELDS["others"])
+    missing = [key for key in required if not _text(row, key)]
+    if missing:
+        raise AppError(f"Missing required fields for {acc_type}: {', '.join(missing)}", error_code="400")
+
+    fullname = _text(row, "name_en")
+    validate_fullname(fullname)
+    phone = format_phone_number(_text(row, "phone"))
+    gender = _text(row, "gender").lower()
+    if gender not in GENDERS:
+        raise AppError(f"gender must be one of {', '.join(GENDERS)}", error_code="400")
+    student_id = _text(row, "student_id")
+    if student_id and not student_id.isdigit():
+        raise AppError("student_id must be a non-negative number", error_code="400")
+    guardian_number = _text(row, "guardian_number")
+
+    present_address = _text(row, "present_address").lower()
+    permanent_address = _text(row, "permanent_address").lower()
+    address = _text(row, "address").lower()
+    birth_certificate = _text(row, "birth_certificate")
+    national_id = _text(row, "national_id")
+
+    columns: Dict[str, Any] = {
+        "name": fullname,
+        "date_of_birth": _date(row.get("date_of_birth")) if _text(row, "date_of_birth") else None,
+        "birth_certificate": birth_certificate or None,
+        "birth_certificate_encrypted": encrypt_sensitive_data(birth_certificate) if birth_certificate else "",
+        "national_id": national_id or None,
+        "national_id_encrypted": encrypt_sensitive_data(national_id) if national_id else "",
+        "blood_group": _text(row, "blood_group") or None,
+        "gender": gender,
+        "title1": _text(row, "title1") or None,
+        "title2": _text(row, "title2") or None,
+        "source": _text(row, "source") or None,
+        "present_address": present_address or None,
+        "present_address_hash": hash_sensitive_data(present_address) if present_address else "",
+        "address_hash": hash_sensitive_data(address) if address else "",
+        "permanent_address": permanent_address or None,
+        "permanent_address_hash": hash_sensitive_data(permanent_address) if permanent_address else "",
+        "father_or_spouse": _text(row, "father_or_spouse") or None,
+        "class": _text(row, "class") or None,
+        "student_id": int(student_id) if student_id else None,
+        "phone": phone,
+        "guardian_number": format_phone_number(guardian_number) if guardian_number else None,
+        "degree": _text(row, "degree") or None,
+        "acc_type": ACC_TYPES[acc_type],
+    }
+
+    translations: Dict[str, Tuple[str, Optional[str], Optional[str], str]] = {}
+    for id_column, (prefix, context) in TRANSLATED_FIELDS.items():
+        en_text = _text(row, f"{prefix}_en")
+        if en_text:
+            translations[id_column] = (en_text, _text(row, f"{prefix}_bn") or None, _text(row, f"{prefix}_ar") or None, context)
+    if address:
+        translations["address_id"] = (address, None, None, "address")
+
+    main = ACC_TYPES[acc_type]
+    flags = {flag: int(_text(row, flag) in ("1", "true", "yes") or flag == main) for flag in ACC_FLAGS}
+
+    return PreparedPerson(row_number, columns, translations, main, flags, phone, normalize_name(fullname))
+
+
+# ─── Loading ────────────────────────────────────────────────────────────────
+
+@dataclass
+class ImportReport:
+    madrasa: str
+    dry_run: bool = False
+    read: int = 0
+    imported: int = 0
+    failed: int = 0
+    chunks: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    started_at: float = field(default_factory=time.perf_counter)
+    finished: bool = False
+
+    def error(self, row_number: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "error": message})
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.imported / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self, include_errors: bool = True) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "madrasa": self.madrasa,
+            "dry_run": self.dry_run,
+            "finished": self.finished,
+            "read": self.read,
+            "imported": self.imported,
+            "failed": self.failed,
+            "chunks": self.chunks,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+        if include_errors:
+            data["errors"] = self.errors
+        return data
+
+
+def _isolatable(exc: Exception) -> bool:
+    """Errors caused by the data of some row, as opposed to the connection or server"""
+    if isinstance(exc, (aiomysql.IntegrityError, aiomysql.DataError)):
+        return True
+    # Server-side errors (1xxx/3xxx, e.g. a CHECK constraint) vs client errors (2xxx, lost connection)
+    return isinstance(exc, aiomysql.OperationalError) and bool(exc.args) and not 2000 <= exc.args[0] < 3000
+
+
+class PeopleImporter:
+    """Validate and load people rows chunk by chunk.
+
+    ``dry_run`` only validates. ``commit=False`` loads every chunk and rolls it
+    back, which measures the full database cost without keeping the rows.
+    """
+
+    def __init__(self, madrasa: str, chunk_size: Optional[int] = None, dry_run: bool = False, commit: bool = True) -> None:
+        self.madrasa = madrasa
+        self.chunk_size = chunk_size or config.IMPORT_CHUNK_SIZE
+        self.dry_run = dry_run
+        self.commit = commit
+        self.report = ImportReport(madrasa=madrasa, dry_run=dry_run)
+        # translation key -> translation_id of texts committed by earlier chunks
+        self._known_translations: Dict[str, int] = {}
+
+    def _prepare_chunk(self, rows: Iterator[Tuple[int, Mapping[str, Any]]]) -> Optional[List[PreparedPerson]]:
+        """Read and validate the next chunk; None once the source is exhausted"""
+        people: List[PreparedPerson] = []
+        read = 0
+        for row_number, row in rows:
+            read += 1
+            try:
+                people.append(prepare_person(row_number, row))
+            except AppError as e:
+                self.report.error(row_number, e.message)
+            if read >= self.chunk_size:
+                break
+        self.report.read += read
+        return people if read else None
+
+    async def _lookup_users(self, uow: UnitOfWork, people: List[PreparedPerson]) -> Dict[Tuple[str, str], int]:
+        keys = tuple({(person.phone, person.name_norm) for person in people})
+        await run_statement(uow.cursor, "users.ids_by_phone_names", (keys,))
+        return match_phone_names(keys, await uow.cursor.fetchall())
+
+    async def _queue(self, uow: UnitOfWork, people: List[PreparedPerson]) -> List[Tuple[str, TranslationRef]]:
+        user_ids = await self._lookup_users(uow, people)
+        pending: List[Tuple[str, TranslationRef]] = []
+        people_rows: List[List[Any]] = []
+        acc_rows: List[List[Any]] = []
+
+        for person in people:
+            columns = dict(person.columns)
+            columns["user_id"] = user_ids.get((person.phone, person.name_norm))
+            for id_column in TRANSLATED_FIELDS.keys() | {"address_id"}:
+                columns[id_column] = None
+            for id_column, (en_text, bn_text, ar_text, context) in person.translations.items():
+                key = collation_key(en_text)
+                if key in self._known_translations:
+                    columns[id_column] = self._known_translations[key]
+                else:
+                    ref = uow.translation(self.madrasa, en_text, context, "people", bn_text=bn_text, ar_text=ar_text)
+                    columns[id_column] = ref
+                    pending.append((key, ref))
+            people_rows.append([columns[column] for column in PEOPLE_IMPORT_COLUMNS])
+            if columns["user_id"]:
+                acc_rows.append([columns["user_id"], person.acc_type] + [person.flags[flag] for flag in ACC_FLAGS])
+
+        uow.add_rows("peoples.import_upsert", people_rows, madrasa=self.madrasa)
+        uow.add_rows("acc_types.upsert", acc_rows)
+        return pending
+
+    async def _load(self, people: List[PreparedPerson]) -> None:
+        try:
+            async with unit_of_work(commit=self.commit) as uow:
+                pending = await self._queue(uow, people)
+        except Exception as e:
+            if not _isolatable(e):
+                raise
+            if len(people) == 1:
+                self.report.error(people[0].row_number, f"{type(e).__name__}: {e.args[-1] if e.args else e}")
+                return
+            for person in people:
+                await self._load([person])
+            return
+
+        self.report.imported += len(people)
+        if self.commit:
+            for key, ref in pending:
+                if ref.translation_id is not None:
+                    self._known_translations[key] = ref.translation_id
+
+    async def iter_run(self, rows: Iterable[Tuple[int, Mapping[str, Any]]]) -> AsyncIterator[ImportReport]:
+        """Import ``rows`` and yield the report after every chunk"""
+        source = iter(rows)
+        while True:
+            # Parsing, validation and encryption are CPU work; keep them off the event loop
+            people = await asyncio.to_thread(self._prepare_chunk, source)
+            if people is None:
+                break
+            if people and not self.dry_run:
+                await self._load(people)
+            elif self.dry_run:
+                self.report.imported += len(people)
+            self.report.chunks += 1
+            yield self.report
+
+        self.report.finished = True
+        log.info(action="people_import_finished", trace_info=self.madrasa, message=f"Imported {self.report.imported}/{self.report.read} rows ({self.report.failed} failed) in {self.report.elapsed:.1f}s", secure=False)
+        yield self.report
+
+    async def run(self, rows: Iterable[Tuple[int, Mapping[str, Any]]],
+                  progress: Optional[Callable[[ImportReport], None]] = None) -> ImportReport:
+        async for report in self.iter_run(rows):
+            if progress:
+                progress(report)
+        return self.report
@@ -0,0 +1,149 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config.config import config
+from utils.helpers.logger import log
+from utils.mysql.statements import fetch_statement
+from utils.mysql.unit_of_work import unit_of_work
+
+# Account types whose people records are kept (anonymized) when the user is
+# deleted; peoples stores the singular names, older rows the plural ones
+KEEP_RECORD_ACC_TYPES = (
+    "admins", "student", "teacher", "staff", "badri_member",
+    "students", "teachers", "staffs", "badri_members",
+)
+USERS_TASK = "user_reaper:users"
+
+
+def people_task(madrasa: str) -> str:
+    return f"user_reaper:{madrasa}"
+
+
+class ReapReport:
+    def __init__(self) -> None:
+        self.people_users: Dict[str, int] = {}
+        self.users = 0
+        self.chunks = 0
+        self.failed: List[str] = []
+        self.started = time.perf_counter()
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "people_users": self.people_users,
+            "users": self.users,
+            "chunks": self.chunks,
+            "failed": self.failed,
+            "elapsed": round(time.perf_counter() - self.started, 3),
+        }
+
+
+class UserReaper:
+    """Delete users whose scheduled deletion is due, a chunk at a time.
+
+    First every madrasa (``concurrency`` at a time) strips or deletes the
+    people records of due users: the due user_ids are read in user_id order,
+    ``chunk_size`` at a time, and each chunk is one transaction with one
+    UPDATE and one DELETE for the whole chunk. Only when every madrasa is done
+    are the users themselves deleted, again per chunk, together with their
+    transactions and verification codes; a user is never deleted while a
+    madrasa still holds their details.
+
+    A user is due when ``scheduled_deletion_at`` is before the cutoff taken when
+    ``run`` starts; it is passed to every query, so users whose deletion falls due
+    mid-run wait for the next run instead of having only some of their rows reaped.
+
+    Each chunk commits its last user_id into ``global.maintenance_checkpoints``
+    in the same transaction, so an interrupted run resumes after the last
+    committed chunk. A task's checkpoint is cleared once it finishes.
+    """
+
+    def __init__(self, chunk_size: Optional[int] = None, concurrency: Optional[int] = None) -> None:
+        self.chunk_size = chunk_size or config.USER_REAPER_CHUNK_SIZE
+        self.concurrency = concurrency or config.USER_REAPER_CONCURRENCY
+        self.report = ReapReport()
+
+    async def _checkpoint(self, task: str) -> int:
+        rows = await fetch_statement("maintenance.checkpoint_get", (task,))
+        return int(rows[0]["position"]) if rows else 0
+
+    async def _clear(self, task: str) -> None:
+        async with unit_of_work() as uow:
+            uow.add_statement("maintenance.checkpoint_clear", (task,))
+
+    async def reap_people_chunk(self, madrasa: str, user_ids: Sequence[int], cutoff: datetime) -> None:
+        ids = tuple(user_ids)
+        async with unit_of_work() as uow:
+            uow.add_statement("reaper.anonymize_people", (ids, cutoff, KEEP_RECORD_ACC_TYPES), madrasa=madrasa)
+            uow.add_statement("reaper.delete_people", (ids, cutoff, KEEP_RECORD_ACC_TYPES), madrasa=madrasa)
+            uow.add_statement("maintenance.checkpoint_set", (people_task(madrasa), ids[-1]))
+
+    async def reap_users_chunk(self, users: Sequence[Tuple[int, str]], cutoff: datetime) -> None:
+        ids = tuple(user_id for user_id, _phone in users)
+        phones = tuple({phone for _user_id, phone in users})
+        async with unit_of_work() as uow:
+            uow.add_statement("reaper.delete_transactions", (ids, cutoff))
+            uow.add_statement("reaper.delete_verifications", (phones,))
+            uow.add_statement("reaper.delete_users", (ids, cutoff))
+            uow.add_statement("maintenance.checkpoint_set", (USERS_TASK, ids[-1]))
+
+    async def reap_madrasa(self, madrasa: str, cutoff: datetime) -> None:
+        task = people_task(madrasa)
+        after = await self._checkpoint(task)
+        count = 0
+        while True:
+            rows = await fetch_statement("reaper.due_people", (cutoff, after, self.chunk_size), madrasa=madrasa)
+            if not rows:
+                break
+            user_ids = [row["user_id"] for row in rows]
+            await self.reap_people_chunk(madrasa, user_ids, cutoff)
+            after = user_ids[-1]
+            count += len(user_ids)
+            self.report.chunks += 1
+        self.report.people_users[madrasa] = count
+        if after:
+            await self._clear(task)
+
+    async def reap_users(self, cutoff: datetime) -> None:
+        after = await self._checkpoint(USERS_TASK)
+        while True:
+            rows = await fetch_statement("reaper.due_users", (cutoff, after, self.chunk_size))
+            if not rows:
+                break
+            users = [(row["user_id"], row["phone"]) for row in rows]
+            await self.reap_users_chunk(users, cutoff)
+            after = users[-1][0]
+            self.report.users += len(users)
+            self.report.chunks += 1
+        if after:
+            await self._clear(USERS_TASK)
+
+    async def run(self, madrasas: Optional[Sequence[str]] = None) -> ReapReport:
+        madrasas = list(madrasas or config.MADRASA_NAMES_LIST)
+        # scheduled_deletion_at is written from UTC application time
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None)
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def _one(madrasa: str) -> None:
+            async with limit:
+                try:
+                    await self.reap_madrasa(madrasa, cutoff)
+                except Exception as e:
+                    self.report.failed.append(madrasa)
+                    log.critical(action="auto_delete_error", trace_info=madrasa, message=f"{type(e).__name__}: {e}", secure=False)
+
+        await asyncio.gather(*(_one(madrasa) for madrasa in madrasas))
+        # Users stay until every madrasa has dropped their details; the next run retries
+        if self.report.ok:
+            try:
+                await self.reap_users(cutoff)
+            except Exception as e:
+                self.report.failed.append("users")
+                log.critical(action="auto_delete_error", trace_info="users", message=f"{type(e).__name__}: {e}", secure=False)
+        log.info(action="users_reaped", trace_info="system", message=str(self.report.as_dict()), secure=False)
+        return self.report
@@ -0,0 +1,177 @@
+import asyncio
+import os
+import socket
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from utils.helpers.logger import log
+from utils.keydb.scripts import RateLimitResult, sliding_window
+from utils.otel.round_trips import round_trip
+
+# Sorted set of live workers (score = last heartbeat, unix seconds)
+WORKERS_KEY = "rate_limit:workers"
+
+
+class _Bucket:
+    """Tokens this worker already counted in KeyDB for one key, usable until ``expires_at``.
+
+    A denied bucket has no tokens and answers 429 until ``expires_at``.
+    """
+    __slots__ = ("tokens", "expires_at", "remote_remaining", "denied")
+
+    def __init__(self, tokens: int, expires_at: float, remote_remaining: int, denied: bool = False) -> None:
+        self.tokens = tokens
+        self.expires_at = expires_at
+        self.remote_remaining = remote_remaining
+        self.denied = denied
+
+
+class LocalRateBudget:
+    """Per-worker token buckets in front of the KeyDB sliding window.
+
+    When a key's local bucket is empty, the worker leases a batch of tokens
+    with one ``sliding_window`` call: its share of the limit (limit divided
+    by the live workers, times RATE_LIMIT_LEASE_FRACTION), or fewer if the
+    global window has less left. The following requests are admitted from
+    the bucket without a round trip until it runs out or KeyDB's current
+    window ends, which is when the script starts discounting the lease.
+    Leased tokens are already counted globally, so the limit holds across
+    workers; unused tokens are simply lost, which errs on the strict side.
+    A denial is also kept locally until the wait KeyDB returned has passed,
+    so a client hammering a route over its limit costs no round trips.
+
+    The number of live workers comes from a heartbeat sorted set in KeyDB,
+    refreshed every RATE_LIMIT_REBALANCE_SECONDS.
+    """
+
+    _EVICT_PER_CALL = 2
+
+    def __init__(self, lease_fraction: Optional[float] = None, interval: Optional[float] = None) -> None:
+        self._lease_fraction = lease_fraction
+        self._interval = interval
+        self._windows: Dict[int, "OrderedDict[str, _Bucket]"] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.workers: Optional[int] = None
+        self.local_hits = 0
+        self.keydb_calls = 0
+
+    @property
+    def lease_fraction(self) -> float:
+        if self._lease_fraction is None:
+            from config.config import config
+            return float(config.RATE_LIMIT_LEASE_FRACTION)
+        return self._lease_fraction
+
+    @property
+    def interval(self) -> float:
+        if self._interval is None:
+            from config.config import config
+            return float(config.RATE_LIMIT_REBALANCE_SECONDS)
+        return self._interval
+
+    def _live_workers(self) -> int:
+        if self.workers is None:
+            from config.config import server_config
+            return max(1, int(server_config.SERVER_WORKERS))
+        return self.workers
+
+    def lease_size(self, limit: int) -> int:
+        return max(1, int(limit / self._live_workers() * self.lease_fraction))
+
+    def __len__(self) -> int:
+        return sum(len(buckets) for buckets in self._windows.values())
+
+    async def acquire(self, pool: Any, key: str, limit: int, window: int, now: Optional[float] = None) -> RateLimitResult:
+        """Admit one request for ``key`` locally if a leased token is left, otherwise lease from KeyDB"""
+        now = time.monotonic() if now is None else now
+        buckets = self._windows.get(window)
+        if buckets is None:
+            buckets = self._windows[window] = OrderedDict()
+
+        # Leases are taken in order, so the expired ones are at the front
+        for _ in range(self._EVICT_PER_CALL):
+            oldest = next(iter(buckets.values()), None)
+            if oldest is None or oldest.expires_at > now:
+                break
+            buckets.popitem(last=False)
+
+        bucket = buckets.get(key)
+        if bucket is not None and bucket.expires_at > now:
+            if bucket.denied:
+                self.local_hits += 1
+                return RateLimitResult(False, limit, 0, int((bucket.expires_at - now) * 1000), 0)
+            if bucket.tokens > 0:
+                bucket.tokens -= 1
+                self.local_hits += 1
+                return RateLimitResult(True, limit, bucket.remote_remaining + bucket.tokens,
+                                       int((bucket.expires_at - now) * 1000))
+
+        self.keydb_calls += 1
+        result = await sliding_window(pool, key, limit, window, cost=self.lease_size(limit), min_cost=1)
+        buckets.pop(key, None)
+        if not result.allowed:
+            buckets[key] = _Bucket(0, now + result.reset_ms / 1000, 0, denied=True)
+            return result
+        if result.granted > 1:
+            buckets[key] = _Bucket(result.granted - 1, now + result.reset_ms / 1000, result.remaining)
+        return RateLimitResult(True, limit, result.remaining + result.granted - 1, result.reset_ms, 1)
+
+    async def rebalance(self, pool: Any) -> int:
+        """Heartbeat this worker and count the live ones; returns the new worker count"""
+        now = time.time()
+        async with pool.pipeline(transaction=True) as pipe:
+            pipe.zadd(WORKERS_KEY, {self.worker_id: now})
+            pipe.zremrangebyscore(WORKERS_KEY, "-inf", now - 3 * self.interval)
+            pipe.zcard(WORKERS_KEY)
+            pipe.expire(WORKERS_KEY, int(3 * self.interval) + 1)
+            with round_trip("keydb"):
+                _, _, live, _ = await pipe.execute()
+        self.workers = max(1, int(live))
+        return self.workers
+
+    async def _run(self) -> None:
+        from utils.keydb.keydb_utils import get_keydb_from_app
+        while True:
+            try:
+                pool = get_keydb_from_app(None)
+                if pool:
+                    await self.rebalance(pool)
+            except Exception as e:
+                log.error(action="rate_budget_rebalance_error", trace_info="system", message=f"{type(e).__name__}: {e}", secure=False)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the heartbeat and leave the worker set, so the others take over the budget"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        from utils.keydb.keydb_utils import get_keydb_from_app
+        pool = get_keydb_from_app(None)
+        if pool:
+            try:
+                await pool.zrem(WORKERS_KEY, self.worker_id)
+            except Exception as e:
+                log.error(action="rate_budget_rebalance_error", trace_info="system", message=f"{type(e).__name__}: {e}", secure=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        total = self.local_hits + self.keydb_calls
+        return {
+            "workers": self._live_workers(),
+            "keys": len(self),
+            "local_hits": self.local_hits,
+            "keydb_calls": self.keydb_calls,
+            "local_share": round(self.local_hits / total, 3) if total else 0.0,
+        }
+
+
+rate_budget = LocalRateBudget()
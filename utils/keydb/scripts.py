@@ -0,0 +1,143 @@
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Sequence
+
+from redis.exceptions import NoScriptError
+
+from utils.helpers.logger import log
+
+
+class UnknownScriptError(KeyError):
+    pass
+
+
+@dataclass(frozen=True)
+class KeyDBScript:
+    name: str
+    source: str
+    sha: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "sha", hashlib.sha1(self.source.encode()).hexdigest())
+
+    async def __call__(self, pool: Any, keys: Sequence[str], args: Sequence[Any]) -> Any:
+        """EVALSHA in one round trip; loads the script once if the server lost it (restart, SCRIPT FLUSH)"""
+        try:
+            return await pool.evalsha(self.sha, len(keys), *keys, *args)
+        except NoScriptError:
+            await pool.script_load(self.source)
+            return await pool.evalsha(self.sha, len(keys), *keys, *args)
+
+
+_scripts: Dict[str, KeyDBScript] = {}
+
+
+def register_script(name: str, source: str) -> KeyDBScript:
+    script = KeyDBScript(name, source)
+    _scripts[name] = script
+    return script
+
+
+def get_script(name: str) -> KeyDBScript:
+    try:
+        return _scripts[name]
+    except KeyError:
+        raise UnknownScriptError(name) from None
+
+
+async def load_scripts(pool: Any) -> int:
+    """SCRIPT LOAD every registered script (application startup); returns how many were loaded"""
+    loaded = 0
+    for script in _scripts.values():
+        try:
+            sha = await pool.script_load(script.source)
+        except Exception as e:
+            log.error(action="keydb_script_load_failed", trace_info="system", message=f"{script.name}: {type(e).__name__}: {e}", secure=False)
+            continue
+        if sha != script.sha:
+            log.warning(action="keydb_script_sha_mismatch", trace_info="system", message=f"{script.name}: {sha} != {script.sha}", secure=False)
+        loaded += 1
+    return loaded
+
+
+# ─── Sliding window ──────────────────────────────────────────────────────────
+# KEYS[1] = counter hash; ARGV = limit, window (ms), cost, min cost.
+# The hash keeps the request count of the current and the previous fixed
+# window; the previous one is weighted by how much of it the sliding window
+# still covers. Up to ``cost`` requests are granted, but at least ``min
+# cost`` (default: all of them) must fit. A cost of 0 only checks that one
+# more request would fit and writes nothing. The server clock is used so
+# that every worker agrees.
+# Returns {allowed, remaining, ms until the quota next grows, granted}.
+register_script("sliding_window", """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local need = math.max(tonumber(ARGV[4]) or cost, 1)
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local bucket = math.floor(now / window)
+local elapsed = now - bucket * window
+
+local state = redis.call('HMGET', KEYS[1], 'bucket', 'current', 'previous')
+local last = tonumber(state[1])
+local current = tonumber(state[2]) or 0
+local previous = tonumber(state[3]) or 0
+if last ~= bucket then
+    if last == bucket - 1 then previous = current else previous = 0 end
+    current = 0
+end
+
+local used = previous * (window - elapsed) / window + current
+if used + need > limit then
+    local wait = window - elapsed
+    if previous > 0 and current + need <= limit then
+        wait = math.ceil(window * (1 - (limit - current - need) / previous)) - elapsed
+    end
+    return {0, math.max(0, math.floor(limit - used)), math.max(wait, 1), 0}
+end
+
+local granted = math.min(cost, math.floor(limit - used))
+if granted > 0 then
+    current = current + granted
+    redis.call('HSET', KEYS[1], 'bucket', bucket, 'current', current, 'previous', previous)
+    redis.call('PEXPIRE', KEYS[1], window * 2)
+end
+return {1, math.floor(limit - used - granted), window - elapsed, granted}
+""")
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_ms: int
+    granted: int = 1
+
+    @property
+    def reset(self) -> int:
+        """Whole seconds until the quota next grows"""
+        return max(1, -(-self.reset_ms // 1000))
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.reset)
+        return headers
+
+
+async def sliding_window(pool: Any, key: str, limit: int, window: int, cost: int = 1,
+                         min_cost: Optional[int] = None) -> RateLimitResult:
+    """Count ``cost`` requests against ``limit`` per ``window`` seconds for ``key``.
+
+    With ``min_cost`` the grant may be partial: as many as fit, but at least
+    ``min_cost``; ``granted`` says how many were counted.
+    """
+    allowed, remaining, reset_ms, granted = await get_script("sliding_window")(
+        pool, (key,), (limit, int(window * 1000), cost, cost if min_cost is None else min_cost))
+    return RateLimitResult(bool(int(allowed)), limit, int(remaining), int(reset_ms), int(granted))
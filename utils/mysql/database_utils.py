@@ -1,18 +1,23 @@
-import os
+import time
 import asyncio
 import aiomysql
-from typing import Optional, Any, Dict
+from typing import Optional, Any, AsyncIterator, Dict, List, Sequence
 from contextlib import asynccontextmanager
-from utils.helpers.improved_functions import get_project_root
 
 from utils.helpers.logger import log
+from utils.mysql.pool_monitor import (
+    ConnectionLease, PoolAutoscaler, _caller, acquire_connection, release_connection, telemetry,
+)
+from utils.mysql.query_cache import query_cache
+from utils.mysql.replica import ReplicaRouter
 
 # Type alias for database configuration
 AiomysqlConnectConfig = Dict[str, Any]
 
 
 # Centralized Async DB Connection
-def get_db_config() -> AiomysqlConnectConfig:
+def get_db_config(replica: bool = False) -> AiomysqlConnectConfig:
+    """Connection settings for the primary, or for the read replica with ``replica=True``"""
     # Import config here to avoid circular imports
     from config.config import config
     
@@ -27,7 +32,7 @@ def get_db_config() -> AiomysqlConnectConfig:
         raise ValueError("Database configuration is incomplete. Please check your config settings.")
 
     # Cast/normalize primitive values to explicit typed locals
-    host: str = str(config.MYSQL_HOST)
+    host: str = str(config.MYSQL_REPLICA_HOST if replica else config.MYSQL_HOST)
     user: str = str(config.MYSQL_USER)
     password: str = str(config.MYSQL_PASSWORD)
     root_password: str = str(config.MYSQL_ROOT_PASSWORD)
@@ -35,11 +40,12 @@ def get_db_config() -> AiomysqlConnectConfig:
 
     # Port (int)
     port: int = 3306
-    if hasattr(config, "MYSQL_PORT") and config.MYSQL_PORT is not None:
+    port_setting = config.MYSQL_REPLICA_PORT if replica else getattr(config, "MYSQL_PORT", None)
+    if port_setting is not None:
         try:
-            port = int(config.MYSQL_PORT)
+            port = int(port_setting)
         except Exception:
-            raise ValueError(f"MYSQL_PORT must be an integer, got: {config.MYSQL_PORT}")
+            raise ValueError(f"MySQL port must be an integer, got: {port_setting}")
         if port <= 0 or port > 65535:
             raise ValueError(f"Invalid MySQL port: {port}. Must be between 1 and 65535.")
     
@@ -69,6 +75,13 @@ def get_db_config() -> AiomysqlConnectConfig:
 # Global connection pool
 _db_pool: Optional[Any] = None
 _pool_lock = asyncio.Lock()
+_pool_autoscaler: Optional[PoolAutoscaler] = None
+
+# Optional read replica (MYSQL_REPLICA_HOST)
+_replica_pool: Optional[Any] = None
+_replica_lock = asyncio.Lock()
+_replica_retry_at = 0.0
+_replica_router: Optional[ReplicaRouter] = None
 
 async def get_db_pool() -> Any:
     """Get or create the database connection pool (thread-safe)"""
@@ -81,14 +94,14 @@ async def get_db_pool() -> Any:
     
     return _db_pool
 
-async def create_db_pool() -> Any:
+async def create_db_pool(replica: bool = False) -> Any:
     """Create a new database connection pool"""
     from config.config import config
     if aiomysql is None:  # pragma: no cover
         raise RuntimeError("aiomysql is not installed. Please add 'aiomysql' to requirements.txt")
 
     try:
-        SQL_config: Dict[str, Any] = get_db_config()
+        SQL_config: Dict[str, Any] = get_db_config(replica)
         
         # Create connection pool with optimal settings
         pool = await aiomysql.create_pool(
@@ -99,17 +112,100 @@ async def create_db_pool() -> Any:
             echo=False,  # Don't echo SQL queries
         )
         
-        log.info(action="db_pool_created", trace_info="system", message="Database connection pool created successfully", secure=False)
+        log.info(action="db_pool_created", trace_info="system", message=f"Database {'replica' if replica else 'connection'} pool created successfully", secure=False)
         return pool
         
     except Exception as e:
         log.critical(action="db_pool_creation_failed", trace_info="system", message=f"Failed to create database pool: {type(e).__name__}", secure=False)
         raise RuntimeError(f"Database pool creation failed. Please check your database configuration.")
 
+def get_replica_router() -> Optional[ReplicaRouter]:
+    """The replica router, or None when no replica is configured"""
+    global _replica_router
+    from config.config import config
+
+    if _replica_router is None and config.MYSQL_REPLICA_HOST:
+        _replica_router = ReplicaRouter(
+            max_lag=config.MYSQL_REPLICA_MAX_LAG_SECONDS,
+            pin_seconds=config.MYSQL_READ_YOUR_WRITES_SECONDS,
+            check_interval=config.MYSQL_REPLICA_LAG_CHECK_SECONDS,
+        )
+    return _replica_router
+
+async def get_replica_pool() -> Optional[Any]:
+    """Get or create the read replica pool; None when unconfigured or unreachable"""
+    global _replica_pool, _replica_retry_at
+    from config.config import config
+
+    if _replica_pool is None and config.MYSQL_REPLICA_HOST and time.monotonic() >= _replica_retry_at:
+        async with _replica_lock:
+            if _replica_pool is None and time.monotonic() >= _replica_retry_at:  # Double-check pattern
+                try:
+                    _replica_pool = await create_db_pool(replica=True)
+                except RuntimeError:
+                    # Serve reads from the primary and try the replica again later
+                    _replica_retry_at = time.monotonic() + config.MYSQL_REPLICA_LAG_CHECK_SECONDS
+    return _replica_pool
+
+async def _read_pool() -> Any:
+    """Pool for a read-only cursor: the replica when it is healthy and the client is not pinned"""
+    replica = await get_replica_pool()
+    router = get_replica_router()
+    if replica is not None and router is not None and await router.use_replica(replica):
+        return replica
+    return await get_db_pool()
+
+def _note_release(pool: Any, lease: ConnectionLease) -> None:
+    if not lease.wrote:
+        return
+    # Entries filled while a transaction was open could hold pre-commit data
+    if lease.written_tables:
+        query_cache.invalidate_tables(lease.written_tables)
+    # A write on the primary pins the client so its next reads see it
+    if pool is _db_pool and _replica_router is not None:
+        _replica_router.pin()
+
+async def start_pool_autoscaler() -> None:
+    """Start resizing the pool between MYSQL_MAX_CONNECTIONS and this worker's share of max_connections"""
+    global _pool_autoscaler
+    from config.config import config, server_config
+
+    if _pool_autoscaler is None:
+        _pool_autoscaler = PoolAutoscaler(
+            await get_db_pool(),
+            floor=config.MYSQL_MAX_CONNECTIONS,
+            share=config.MYSQL_CONNECTION_SHARE,
+            workers=server_config.SERVER_WORKERS,
+            interval=config.MYSQL_POOL_RESIZE_INTERVAL,
+        )
+        _pool_autoscaler.start()
+
+async def stop_pool_autoscaler() -> None:
+    global _pool_autoscaler
+
+    if _pool_autoscaler is not None:
+        await _pool_autoscaler.stop()
+        _pool_autoscaler = None
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Pool gauges plus acquire-wait histogram and counters"""
+    stats = telemetry.snapshot(_db_pool)
+    if _pool_autoscaler is not None:
+        stats["ceiling"] = _pool_autoscaler.ceiling
+    if _replica_router is not None:
+        stats["replica"] = _replica_router.snapshot()
+    stats["query_cache"] = query_cache.snapshot()
+    return stats
+
 async def close_db_pool():
-    """Close the database connection pool"""
-    global _db_pool
+    """Close the database connection pool (and the replica pool, if any)"""
+    global _db_pool, _replica_pool
     
+    await stop_pool_autoscaler()
+    if _replica_pool is not None:
+        _replica_pool.close()
+        await _replica_pool.wait_closed()
+        _replica_pool = None
     if _db_pool is not None:
         _db_pool.close()
         await _db_pool.wait_closed()
@@ -117,87 +213,62 @@ async def close_db_pool():
         log.info(action="db_pool_closed", trace_info="system", message="Database connection pool closed", secure=False)
 
 @asynccontextmanager
-async def get_traced_db_cursor():
-    """Get a database connection from the pool (context manager)"""
-    pool = await get_db_pool()
-    conn = None
+async def get_traced_db_cursor(readonly: bool = False):
+    """Get a database connection from the pool (context manager).
+
+    ``readonly=True`` may route to the read replica (see ReplicaRouter); only
+    run SELECTs on such a cursor. Raises DatabaseBusyError when no connection
+    frees up within MYSQL_ACQUIRE_TIMEOUT.
+    """
+    from config.config import config
+    from utils.otel.otel_utils import TracedCursorWrapper
+    pool = await _read_pool() if readonly else await get_db_pool()
+    conn = await acquire_connection(pool, config.MYSQL_ACQUIRE_TIMEOUT)
+    lease = ConnectionLease(_caller())
     try:
-        from utils.otel.otel_utils import TracedCursorWrapper
-        conn = await pool.acquire()
         async with conn.cursor(aiomysql.DictCursor) as _cursor:
-            traced_cursor = TracedCursorWrapper(_cursor)
+            traced_cursor = TracedCursorWrapper(_cursor, lease)
             yield traced_cursor
     finally:
-        if conn:
-            pool.release(conn)
+        release_connection(pool, conn, lease, config.MYSQL_HOLD_WARN_SECONDS)
+        _note_release(pool, lease)
 
+@asynccontextmanager
+async def get_traced_stream_cursor(readonly: bool = False):
+    """Get an unbuffered server-side cursor (SSDictCursor) from the pool (context manager).
 
-# Table Creation
-async def create_tables():    
-    # Get the path to the create_tables.sql file
-    config_dir = os.path.join(get_project_root(), 'config')
-    sql_file_path = os.path.join(config_dir, 'mysql', 'create_tables.sql')
-    
-    # Read the SQL file
+    Rows are read from the socket on demand, so callers must consume or close the
+    cursor before the connection goes back to the pool.
+    """
+    from config.config import config
+    from utils.otel.otel_utils import TracedCursorWrapper
+    pool = await _read_pool() if readonly else await get_db_pool()
+    # No hold warning here: a stream holds its connection while the client reads
+    conn = await acquire_connection(pool, config.MYSQL_ACQUIRE_TIMEOUT)
     try:
-        with open(sql_file_path, 'r', encoding='utf-8') as file:
-            sql_content = file.read()
-    except FileNotFoundError:
-        log.error(action="sql_file_not_found", trace_info="system", message=f"SQL file not found at: {sql_file_path}", secure=False)
-        raise FileNotFoundError(f"SQL file not found at: {sql_file_path}")
-    except Exception as e:
-        log.error(action="sql_file_read_error", trace_info="system", message=f"Error reading SQL file: {type(e).__name__}", secure=False)
+        _cursor = await conn.cursor(aiomysql.SSDictCursor)
+        yield TracedCursorWrapper(_cursor)
+        await _cursor.close()
+    except BaseException:
+        # An interrupted stream (e.g. client disconnect) leaves unread rows on the
+        # wire. Draining them could take as long as the query itself, so drop the
+        # connection instead of handing it back to the pool.
+        conn.close()
         raise
+    finally:
+        release_connection(pool, conn)
 
-    try:
-        async with get_traced_db_cursor() as cursor:
-            if cursor is None:
-                log.error(action="db_connection_failed", trace_info="system", message="Database connection failed during table creation", secure=False)
-                raise RuntimeError("Database connection failed during table creation")
-
-            # Suppress MySQL warnings
-            if aiomysql is not None:
-                await cursor.execute("SET sql_notes = 0")
-                    
-
-            # Split the SQL content into individual statements
-            # Remove comments and split by semicolon
-            sql_statements = []
-            lines = sql_content.split('\n')
-            current_statement = ""
-            
-            for line in lines:
-                # Skip comment lines and empty lines
-                stripped_line = line.strip()
-                if stripped_line.startswith('--') or stripped_line == '':
-                    continue
-                
-                current_statement += line + '\n'
-                
-                # If line ends with semicolon, we have a complete statement
-                if stripped_line.endswith(';'):
-                    sql_statements.append(current_statement.strip())
-                    current_statement = ""
-
-            # Execute each SQL statement
-            if aiomysql is not None:
-                for statement in sql_statements:
-                    if statement.strip():  # Skip empty statements
-                        try:
-                            await cursor.execute(statement)
-                        except Exception as e:
-                            # Log error but don't expose SQL statement details
-                            log.error(action="sql_statement_error", trace_info="system", message=f"Error executing SQL statement: {type(e).__name__}", secure=False)
-                            # Continue with other statements
-                            continue
-
-            # Re-enable MySQL warnings
-            if aiomysql is not None:
-                await cursor.execute("SET sql_notes = 1")
-                    
-                
-        log.info(action="tables_created", trace_info="system", message="Database tables created successfully from create_tables.sql", secure=False)
+async def stream_query_chunks(sql: str, params: Optional[Sequence[Any]] = None,
+                              chunk_size: Optional[int] = None,
+                              readonly: bool = False) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Execute a SELECT on a server-side cursor and yield rows in chunks of ``chunk_size``"""
+    from config.config import config
+    chunk_size = chunk_size or config.MYSQL_STREAM_CHUNK_SIZE
 
-    except Exception as e:
-        log.error(action="table_creation_failed", trace_info="system", message=f"Database table creation failed: {type(e).__name__}", secure=False)
-        raise
\ No newline at end of file
+    async with get_traced_stream_cursor(readonly) as cursor:
+        await cursor.execute(sql, params)
+        while True:
+            rows = await cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield list(rows)
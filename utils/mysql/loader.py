@@ -0,0 +1,155 @@
+import asyncio
+from contextvars import ContextVar, Token
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+from utils.mysql.database_utils import get_traced_db_cursor
+from utils.mysql.query_cache import query_cache
+from utils.mysql.statements import collation_key, run_statement
+
+# (loader name, key) -> (table generation when loaded, value); one dict per request
+_request_memo: ContextVar[Optional[Dict[Tuple[str, Hashable], Tuple[Tuple[int, ...], Any]]]] = ContextVar("loader_memo", default=None)
+
+BatchFn = Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+
+
+def start_loader_scope() -> Token:
+    """Give the current request its own memo of loaded keys"""
+    return _request_memo.set({})
+
+
+def reset_loader_scope(token: Token) -> None:
+    _request_memo.reset(token)
+
+
+def _copy(value: Any) -> Any:
+    # Rows are mutated in place by callers (e.g. translate_row)
+    return dict(value) if isinstance(value, dict) else value
+
+
+class BatchLoader:
+    """Coalesce point lookups made in the same event-loop tick into one query.
+
+    ``load(key)`` queues the key and the first queued key schedules a dispatch
+    with ``call_soon``, so every coroutine that asks during the current tick
+    joins the same batch. ``batch_fn`` gets the distinct keys (at most
+    ``max_batch`` per call) and returns ``{key: value}``; keys it leaves out
+    resolve to None. Callers waiting on the same key share one future.
+
+    Inside a request scope found values are also memoized for the rest of the
+    request. A memo entry is dropped once a write to one of ``reads`` has gone
+    through the traced cursor, the same generations the query cache uses.
+    """
+
+    def __init__(self, name: str, batch_fn: BatchFn, reads: Sequence[str] = (), max_batch: int = 500) -> None:
+        self.name = name
+        self.batch_fn = batch_fn
+        self.reads = tuple(reads)
+        self.max_batch = max_batch
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.keys = 0
+        self.memo_hits = 0
+
+    async def load(self, key: Hashable) -> Any:
+        memo = _request_memo.get()
+        generation = query_cache.generation(self.reads)
+        if memo is not None:
+            hit = memo.get((self.name, key))
+            if hit is not None and hit[0] == generation:
+                self.memo_hits += 1
+                return _copy(hit[1])
+
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            future = self._pending[key] = loop.create_future()
+        # One caller being cancelled must not cancel the lookup for the others
+        value = await asyncio.shield(future)
+        if memo is not None and value is not None:
+            memo[(self.name, key)] = (generation, value)
+        return _copy(value)
+
+    async def load_many(self, keys: Sequence[Hashable]) -> List[Any]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self) -> None:
+        pending, self._pending = self._pending, {}
+        keys = list(pending)
+        for start in range(0, len(keys), self.max_batch):
+            chunk = {key: pending[key] for key in keys[start:start + self.max_batch]}
+            task = asyncio.ensure_future(self._resolve(chunk))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, futures: Dict[Hashable, asyncio.Future]) -> None:
+        self.batches += 1
+        self.keys += len(futures)
+        try:
+            results = await self.batch_fn(list(futures))
+        except Exception as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in futures.items():
+            if not future.done():
+                future.set_result(results.get(key))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "keys": self.keys,
+            "keys_per_batch": round(self.keys / self.batches, 2) if self.batches else 0.0,
+            "memo_hits": self.memo_hits,
+        }
+
+
+# ─── Loaders ────────────────────────────────────────────────────────────────
+
+def match_phone_names(keys: Iterable[Tuple[str, str]], rows: Iterable[Dict[str, Any]]) -> Dict[Tuple[str, str], int]:
+    """Map ``users.ids_by_phone_names`` rows back to the (phone, fullname_norm) keys asked for.
+
+    The IN compares fullname_norm under utf8mb4_unicode_ci, so a row may carry a
+    spelling that differs in case or accents from the requested key.
+    """
+    found = {(row["phone"], collation_key(row["fullname_norm"])): row["user_id"] for row in rows}
+    matched = {}
+    for phone, name in keys:
+        user_id = found.get((phone, collation_key(name)))
+        if user_id is not None:
+            matched[(phone, name)] = user_id
+    return matched
+
+
+async def _load_global_ids(keys: List[Hashable]) -> Dict[Hashable, Any]:
+    async with get_traced_db_cursor() as cursor:
+        await run_statement(cursor, "users.ids_by_phone_names", (tuple(keys),))
+        rows = await cursor.fetchall()
+    return match_phone_names(keys, rows)
+
+
+# Keyed by (phone, normalized fullname)
+global_id_loader = BatchLoader("users.ids", _load_global_ids, reads=("users",))
+
+_people_loaders: Dict[str, BatchLoader] = {}
+
+
+def people_loader(madrasa: str) -> BatchLoader:
+    """Loader of ``{madrasa}.peoples`` rows keyed by user_id"""
+    loader = _people_loaders.get(madrasa)
+    if loader is None:
+        async def _load_people(keys: List[Hashable]) -> Dict[Hashable, Any]:
+            async with get_traced_db_cursor() as cursor:
+                await run_statement(cursor, "peoples.by_user_ids", (tuple(keys),), madrasa=madrasa)
+                return {row["user_id"]: row for row in await cursor.fetchall()}
+
+        loader = _people_loaders[madrasa] = BatchLoader(f"peoples.{madrasa}", _load_people, reads=("peoples",))
+    return loader
+
+
+def loader_stats() -> Dict[str, Any]:
+    loaders = [global_id_loader, *_people_loaders.values()]
+    return {loader.name: loader.snapshot() for loader in loaders}
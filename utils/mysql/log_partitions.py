@@ -0,0 +1,181 @@
+import gzip
+import json
+import os
+import re
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.helpers.logger import log
+from utils.mysql.database_utils import get_traced_db_cursor, stream_query_chunks
+
+FUTURE_PARTITION = "p_future"
+# Daily partitions are named after the day they hold: p20261018
+_DAILY_RE = re.compile(r"^p(\d{8})$")
+_ARCHIVE_COLUMNS = (
+    "log_id", "created_at", "action", "trace_info", "trace_info_hash",
+    "trace_info_encrypted", "level", "message", "metadata",
+)
+
+
+def partition_name(day: date) -> str:
+    return f"p{day:%Y%m%d}"
+
+
+def partition_day(name: str) -> Optional[date]:
+    match = _DAILY_RE.match(name)
+    return datetime.strptime(match.group(1), "%Y%m%d").date() if match else None
+
+
+def archive_path(directory: Path, day: date) -> Path:
+    return Path(directory) / f"{day:%Y}" / f"{day:%m}" / f"logs-{day:%Y-%m-%d}.jsonl.gz"
+
+
+def plan_rotation(partitions: Sequence[str], today: date, retention_days: int,
+                  days_ahead: int) -> Tuple[List[date], List[str]]:
+    """``(days to create, partitions to archive and drop)``"""
+    days = sorted(day for day in map(partition_day, partitions) if day is not None)
+    # After missed runs, recent rows sit in p_future; splitting from the day after
+    # the last partition puts them back into their own days
+    start = days[-1] + timedelta(days=1) if days else today
+    to_create = [start + timedelta(days=i) for i in range((today + timedelta(days=days_ahead) - start).days + 1)]
+    cutoff = today - timedelta(days=retention_days)
+    to_drop = [partition_name(day) for day in days if day < cutoff]
+    return to_create, to_drop
+
+
+async def list_partitions() -> Optional[List[str]]:
+    """Partition names of logs.logs in order, or None when it is not partitioned"""
+    async with get_traced_db_cursor() as cursor:
+        await cursor.execute("""
+            SELECT PARTITION_NAME AS name FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = 'logs' AND TABLE_NAME = 'logs'
+            ORDER BY PARTITION_ORDINAL_POSITION
+        """)
+        names = [row["name"] for row in await cursor.fetchall()]
+    return names if names and names[0] is not None else None
+
+
+async def create_partitions(days: Sequence[date]) -> None:
+    """Split the future partition into daily partitions.
+
+    Cheap once partitions are kept ahead of time, as p_future is then empty.
+    The first split after the migration moves every older row into the first
+    daily partition, whose archive file will hold that history.
+    """
+    if not days:
+        return
+    parts = ", ".join(
+        f"PARTITION {partition_name(day)} VALUES LESS THAN (UNIX_TIMESTAMP('{day + timedelta(days=1):%Y-%m-%d} 00:00:00'))"
+        for day in days
+    )
+    async with get_traced_db_cursor() as cursor:
+        await cursor.execute(
+            f"ALTER TABLE logs.logs REORGANIZE PARTITION {FUTURE_PARTITION} INTO "
+            f"({parts}, PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE)"
+        )
+
+
+def _archive_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    row = dict(row)
+    if isinstance(row.get("metadata"), str):
+        try:
+            row["metadata"] = json.loads(row["metadata"])
+        except ValueError:
+            pass
+    return row
+
+
+def _update_index(directory: Path, day: date, path: Path, rows: int) -> None:
+    index_path = Path(directory) / "index.json"
+    index = json.loads(index_path.read_text()) if index_path.exists() else {}
+    index[day.isoformat()] = {"file": str(path.relative_to(directory)), "rows": rows}
+    tmp = index_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(dict(sorted(index.items())), indent=1))
+    os.replace(tmp, index_path)
+
+
+async def export_partition(name: str, directory: Path) -> int:
+    """Write a daily partition to its gzip JSONL archive file; returns the row count"""
+    day = partition_day(name)
+    if day is None:
+        raise ValueError(f"Not a daily log partition: {name!r}")
+    path = archive_path(directory, day)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    rows = 0
+    with gzip.open(tmp, "wt", encoding="utf-8") as out:
+        async for chunk in stream_query_chunks(
+            f"SELECT {', '.join(_ARCHIVE_COLUMNS)} FROM logs.logs PARTITION ({name}) ORDER BY created_at, log_id"
+        ):
+            for row in chunk:
+                out.write(json.dumps(_archive_row(row), default=str, ensure_ascii=False) + "\n")
+            rows += len(chunk)
+    os.replace(tmp, path)
+    _update_index(directory, day, path, rows)
+    return rows
+
+
+async def _partition_rows(cursor: Any, name: str) -> int:
+    await cursor.execute(f"SELECT COUNT(*) AS total FROM logs.logs PARTITION ({name})")
+    return int((await cursor.fetchone())["total"])
+
+
+async def rotate_log_partitions(today: Optional[date] = None, retention_days: Optional[int] = None,
+                                days_ahead: Optional[int] = None, archive_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """Create upcoming daily partitions, then archive and drop expired ones.
+
+    A partition is only dropped once its archive file holds as many rows as
+    the partition, so a failed export keeps the data in MySQL for the next run.
+    """
+    from config.config import server_config
+    today = today or date.today()
+    retention_days = retention_days if retention_days is not None else server_config.LOG_DB_RETENTION_DAYS
+    days_ahead = days_ahead if days_ahead is not None else server_config.LOG_PARTITIONS_AHEAD
+    archive_dir = Path(archive_dir or server_config.LOG_ARCHIVE_DIR)
+
+    partitions = await list_partitions()
+    if partitions is None:
+        log.warning(action="log_partitions_missing", trace_info="system", message="logs.logs is not partitioned; run the schema migrations", secure=False)
+        return {"created": [], "archived": {}, "dropped": []}
+
+    to_create, to_drop = plan_rotation(partitions, today, retention_days, days_ahead)
+    await create_partitions(to_create)
+
+    report: Dict[str, Any] = {"created": [partition_name(day) for day in to_create], "archived": {}, "dropped": []}
+    for name in to_drop:
+        exported = await export_partition(name, archive_dir)
+        report["archived"][name] = exported
+        async with get_traced_db_cursor() as cursor:
+            # Rows can still land in an old partition (clock skew, backfills)
+            if await _partition_rows(cursor, name) != exported:
+                log.warning(action="log_partition_changed", trace_info=name, message="Rows changed during export; kept for the next run", secure=False)
+                continue
+            await cursor.execute(f"ALTER TABLE logs.logs DROP PARTITION {name}")
+        report["dropped"].append(name)
+
+    log.info(action="log_partitions_rotated", trace_info="system", message=f"created={len(report['created'])} archived={len(report['archived'])} dropped={len(report['dropped'])}", secure=False)
+    return report
+
+
+def iter_archived_logs(start: date, end: date, directory: Optional[Path] = None, action: Optional[str] = None,
+                       level: Optional[str] = None, contains: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Archived log rows from ``start`` to ``end`` (inclusive), oldest first, optionally filtered"""
+    if directory is None:
+        from config.config import server_config
+        directory = server_config.LOG_ARCHIVE_DIR
+    day = start
+    while day <= end:
+        path = archive_path(directory, day)
+        if path.exists():
+            with gzip.open(path, "rt", encoding="utf-8") as archive:
+                for line in archive:
+                    row = json.loads(line)
+                    if action and row.get("action") != action:
+                        continue
+                    if level and row.get("level") != level:
+                        continue
+                    if contains and contains not in (row.get("message") or "") and contains not in (row.get("trace_info") or ""):
+                        continue
+                    yield row
+        day += timedelta(days=1)
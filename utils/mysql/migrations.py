@@ -0,0 +1,228 @@
+import hashlib
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiomysql
+
+from utils.helpers.improved_functions import get_project_root
+from utils.helpers.logger import log
+from utils.mysql.database_utils import get_db_config
+
+MYSQL_DIR = Path(get_project_root()) / "config" / "mysql"
+BASELINE_FILE = MYSQL_DIR / "create_tables.sql"
+MIGRATIONS_DIR = MYSQL_DIR / "migrations"
+# Named lock shared by every worker (and tools) connected to the same server
+LOCK_NAME = "madrasa_schema_migrate"
+
+_MIGRATION_FILE_RE = re.compile(r"^(\d{4})_([a-z0-9_]+)\.sql$")
+# MySQL errors meaning the version table (or its schema) does not exist yet
+_MISSING_TABLE_ERRORS = (1049, 1146)
+
+_VERSION_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS global.schema_migrations (
+        version      INT          NOT NULL PRIMARY KEY,
+        name         VARCHAR(100) NOT NULL,
+        checksum     CHAR(64)     NOT NULL,
+        duration_ms  INT          NOT NULL,
+        applied_at   TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    ) ENGINE = InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+
+class MigrationError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    sql: str
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+
+def split_sql(sql: str) -> List[str]:
+    """Split a SQL file into statements: ``--`` comment lines dropped, a statement ends at a line ending in ``;``"""
+    statements: List[str] = []
+    current = ""
+    for line in sql.split("\n"):
+        stripped = line.strip()
+        if stripped.startswith("--") or stripped == "":
+            continue
+        current += line + "\n"
+        if stripped.endswith(";"):
+            statements.append(current.strip())
+            current = ""
+    if current.strip():
+        statements.append(current.strip())
+    return statements
+
+
+def load_migrations(baseline: Path = BASELINE_FILE, directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """The baseline (version 0) followed by ``migrations/NNNN_name.sql`` in version order.
+
+    The baseline is ``create_tables.sql``: the full current schema, which
+    already includes every numbered migration. It only runs on an empty server;
+    existing servers reach the same schema through the numbered migrations,
+    each of which runs once. Editing one after it was applied is reported,
+    never re-run.
+    """
+    migrations = [Migration(0, baseline.stem, baseline.read_text(encoding="utf-8"))]
+    seen: Dict[int, str] = {}
+    for path in sorted(directory.glob("*.sql")) if directory.is_dir() else ():
+        match = _MIGRATION_FILE_RE.match(path.name)
+        if match is None:
+            raise MigrationError(f"Migration file name must look like 0001_add_column.sql: {path.name}")
+        version = int(match.group(1))
+        if version == 0 or version in seen:
+            raise MigrationError(f"Duplicate or reserved migration version {version}: {path.name}")
+        seen[version] = path.name
+        migrations.append(Migration(version, match.group(2), path.read_text(encoding="utf-8")))
+    return migrations
+
+
+def plan(migrations: List[Migration], applied: Dict[int, str], fresh: bool = False) -> Tuple[List[Migration], List[Migration], List[Migration]]:
+    """``(to_apply, to_record, changed)`` given the applied ``{version: checksum}``.
+
+    ``to_record`` is stored as applied without running, after ``to_apply``
+    succeeded. On a ``fresh`` server the baseline creates everything and the
+    numbered migrations are only recorded. Elsewhere the baseline never runs:
+    ``CREATE TABLE IF NOT EXISTS`` would leave existing tables untouched, so
+    its new checksum is accepted only alongside a pending numbered migration
+    carrying the change, and rejected otherwise.
+    """
+    baseline, numbered = migrations[0], migrations[1:]
+    if fresh and not applied:
+        return [baseline], numbered, []
+
+    to_apply = [m for m in numbered if m.version not in applied]
+    changed = [m for m in numbered if applied.get(m.version, m.checksum) != m.checksum]
+    to_record: List[Migration] = []
+    recorded = applied.get(baseline.version)
+    if recorded != baseline.checksum:
+        if recorded is not None and not to_apply:
+            raise MigrationError(
+                f"{BASELINE_FILE.name} changed without a pending numbered migration; "
+                f"changes to existing tables need a {MIGRATIONS_DIR.name}/NNNN_name.sql file"
+            )
+        to_record.append(baseline)
+    return to_apply, to_record, changed
+
+
+async def _applied(cursor: Any) -> Dict[int, str]:
+    try:
+        await cursor.execute("SELECT version, checksum FROM global.schema_migrations")
+    except aiomysql.Error as e:
+        if e.args and e.args[0] in _MISSING_TABLE_ERRORS:
+            return {}
+        raise
+    return {version: checksum for version, checksum in await cursor.fetchall()}
+
+
+async def _is_fresh(cursor: Any) -> bool:
+    """No application tables yet: the baseline has never run on this server"""
+    await cursor.execute(
+        "SELECT 1 FROM information_schema.TABLES WHERE TABLE_SCHEMA = 'global' AND TABLE_NAME = 'users'"
+    )
+    return await cursor.fetchone() is None
+
+
+async def _record(cursor: Any, migration: Migration, duration_ms: int = 0) -> None:
+    await cursor.execute("""
+        INSERT INTO global.schema_migrations (version, name, checksum, duration_ms)
+        VALUES (%s, %s, %s, %s) AS new
+        ON DUPLICATE KEY UPDATE name = new.name, checksum = new.checksum, duration_ms = new.duration_ms
+    """, (migration.version, migration.name, migration.checksum, duration_ms))
+
+
+async def _apply(cursor: Any, migration: Migration) -> None:
+    started = time.perf_counter()
+    await cursor.execute("SET sql_notes = 0")
+    try:
+        for statement in split_sql(migration.sql):
+            try:
+                await cursor.execute(statement)
+            except aiomysql.Error as e:
+                if migration.version:
+                    raise MigrationError(f"Migration {migration.version:04d}_{migration.name} failed: {e}") from e
+                # The baseline has always been applied best-effort; keep going like before
+                log.error(action="sql_statement_error", trace_info="system", message=f"Error executing SQL statement: {type(e).__name__}", secure=False)
+    finally:
+        await cursor.execute("SET sql_notes = 1")
+    duration_ms = int((time.perf_counter() - started) * 1000)
+    await _record(cursor, migration, duration_ms)
+    log.info(action="schema_migration_applied", trace_info="system", message=f"Applied {migration.version:04d}_{migration.name} in {duration_ms}ms", secure=False)
+
+
+async def check_translation_ids(cursor: Any, madrasas: List[str]) -> None:
+    """Refuse to start while a translations table is still keyed by its text.
+
+    Existing databases move to translation_id with the online
+    ``tools/migrate_translation_ids.py`` rather than a numbered migration,
+    because the backfill has to run in batches while the old release serves.
+    """
+    await cursor.execute("""
+        SELECT TABLE_SCHEMA, TABLE_NAME FROM information_schema.KEY_COLUMN_USAGE
+        WHERE CONSTRAINT_NAME = 'PRIMARY' AND COLUMN_NAME = 'translation_text'
+          AND TABLE_NAME IN ('global_translations', 'translations') AND TABLE_SCHEMA IN %s
+    """, (("global", *madrasas),))
+    tables = [f"{schema}.{table}" for schema, table in await cursor.fetchall()]
+    if tables:
+        raise MigrationError(
+            f"{', '.join(tables)} still keyed by translation_text; run tools/migrate_translation_ids.py, "
+            "then again with --cutover, before starting this release"
+        )
+
+
+async def migrate_schema(lock_timeout: Optional[int] = None) -> List[Migration]:
+    """Bring the schema up to date and return the migrations that were applied.
+
+    Startup reads the version table once and returns when every checksum
+    matches, so an unchanged schema costs one query. Otherwise the worker takes
+    a MySQL ``GET_LOCK``, re-reads the versions (another worker may have just
+    finished) and applies what is still pending (see ``plan``). A changed
+    baseline with nothing to carry it raises ``MigrationError`` so the app does
+    not start on a schema older than its code. A dedicated connection is used
+    because the baseline switches databases with ``USE`` and the named lock
+    belongs to the session.
+    """
+    from config.config import config
+    migrations = load_migrations()
+    timeout = lock_timeout if lock_timeout is not None else config.SCHEMA_LOCK_TIMEOUT
+
+    conn = await aiomysql.connect(**get_db_config())
+    try:
+        async with conn.cursor() as cursor:
+            applied = await _applied(cursor)
+            if applied and plan(migrations, applied) == ([], [], []):
+                await check_translation_ids(cursor, config.MADRASA_NAMES_LIST)
+                log.info(action="schema_up_to_date", trace_info="system", message=f"Schema at version {migrations[-1].version}", secure=False)
+                return []
+
+            await cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, timeout))
+            (locked,) = await cursor.fetchone()
+            if locked != 1:
+                raise MigrationError(f"Schema lock not acquired within {timeout}s; another worker is migrating")
+            try:
+                await cursor.execute("CREATE DATABASE IF NOT EXISTS global")
+                await cursor.execute(_VERSION_TABLE_SQL)
+                applied = await _applied(cursor)
+                to_apply, to_record, changed = plan(migrations, applied, fresh=not applied and await _is_fresh(cursor))
+                for migration in changed:
+                    log.error(action="schema_migration_modified", trace_info="system", message=f"Applied migration {migration.version:04d}_{migration.name} was edited; add a new migration instead", secure=False)
+                for migration in to_apply:
+                    await _apply(cursor, migration)
+                for migration in to_record:
+                    await _record(cursor, migration)
+                await check_translation_ids(cursor, config.MADRASA_NAMES_LIST)
+                return to_apply
+            finally:
+                await cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+    finally:
+        conn.close()
@@ -0,0 +1,278 @@
+import sys
+import time
+import asyncio
+import collections
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Set
+
+from utils.helpers.logger import log
+from utils.mysql.query_cache import query_cache
+from utils.mysql.replica import is_write_statement
+
+# Upper bounds (ms) of the acquire-wait histogram buckets; the last bucket is +Inf
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# An acquire that waited longer than this counts as pool pressure for the autoscaler
+PRESSURE_WAIT_SECONDS = 0.01
+
+_SKIP_FRAMES = ("contextlib", "database_utils", "pool_monitor", "statements")
+
+
+class DatabaseBusyError(RuntimeError):
+    """No pooled connection became free before the acquire deadline"""
+
+
+def _caller() -> str:
+    """First frame outside the DB plumbing, as ``file:line function``"""
+    frame = sys._getframe(2)
+    while frame is not None and any(part in frame.f_code.co_filename for part in _SKIP_FRAMES):
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    return f"{frame.f_code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+class ConnectionLease:
+    """One checkout of a pooled connection; cursors report their queries to it"""
+
+    __slots__ = ("acquired_at", "db_seconds", "caller", "wrote", "written_tables")
+
+    def __init__(self, caller: str) -> None:
+        self.acquired_at = time.perf_counter()
+        self.db_seconds = 0.0
+        self.caller = caller
+        self.wrote = False
+        self.written_tables: Set[str] = set()
+
+    def observe(self, query: str, seconds: float) -> None:
+        self.db_seconds += seconds
+        if is_write_statement(query):
+            self.wrote = True
+            # Drop cached reads now; the pool drops them again after release,
+            # when a surrounding transaction has committed
+            tables = query_cache.note_write(query)
+            if tables:
+                self.written_tables |= tables
+
+
+class PoolTelemetry:
+    """Acquire-wait histogram, timeout and hold counters for the MySQL pool"""
+
+    def __init__(self) -> None:
+        self.wait_buckets: List[int] = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.wait_seconds_total = 0.0
+        self.acquires = 0
+        self.timeouts = 0
+        self.slow_holds = 0
+        self.waiting = 0
+        self.in_use = 0
+        # Per autoscaler window
+        self.window_pressure = 0
+        self.window_timeouts = 0
+        self.window_peak_in_use = 0
+        self._otel: Optional[Dict[str, Any]] = None
+
+    def _instruments(self) -> Dict[str, Any]:
+        # The metrics API is a no-op until init_otel installs a MeterProvider
+        if self._otel is None:
+            from opentelemetry import metrics
+            meter = metrics.get_meter("madrasa.db.pool")
+            self._otel = {
+                "wait": meter.create_histogram("db.pool.acquire_wait", unit="ms", description="Time spent waiting for a pooled connection"),
+                "timeouts": meter.create_counter("db.pool.acquire_timeouts", description="Acquires that hit the deadline"),
+                "in_use": meter.create_up_down_counter("db.pool.in_use", description="Connections checked out of the pool"),
+            }
+        return self._otel
+
+    def observe_wait(self, seconds: float) -> None:
+        self.acquires += 1
+        self.wait_seconds_total += seconds
+        self.wait_buckets[bisect_left(WAIT_BUCKETS_MS, seconds * 1000)] += 1
+        if seconds > PRESSURE_WAIT_SECONDS:
+            self.window_pressure += 1
+        self.in_use += 1
+        if self.in_use > self.window_peak_in_use:
+            self.window_peak_in_use = self.in_use
+        try:
+            self._instruments()["wait"].record(seconds * 1000)
+            self._instruments()["in_use"].add(1)
+        except Exception:
+            pass
+
+    def observe_release(self) -> None:
+        self.in_use -= 1
+        try:
+            self._instruments()["in_use"].add(-1)
+        except Exception:
+            pass
+
+    def observe_timeout(self) -> None:
+        self.timeouts += 1
+        self.window_timeouts += 1
+        try:
+            self._instruments()["timeouts"].add(1)
+        except Exception:
+            pass
+
+    def wait_percentile(self, q: float) -> Optional[float]:
+        """Upper bound (ms) of the bucket holding the q-th percentile wait"""
+        total = sum(self.wait_buckets)
+        if not total:
+            return None
+        target = q * total
+        seen = 0
+        for i, count in enumerate(self.wait_buckets):
+            seen += count
+            if seen >= target:
+                return float(WAIT_BUCKETS_MS[i]) if i < len(WAIT_BUCKETS_MS) else float("inf")
+        return float("inf")
+
+    def take_window(self) -> Dict[str, int]:
+        window = {
+            "pressure": self.window_pressure,
+            "timeouts": self.window_timeouts,
+            "peak_in_use": self.window_peak_in_use,
+        }
+        self.window_pressure = 0
+        self.window_timeouts = 0
+        self.window_peak_in_use = self.in_use
+        return window
+
+    def snapshot(self, pool: Any = None) -> Dict[str, Any]:
+        labels = [f"le_{ms}ms" for ms in WAIT_BUCKETS_MS] + ["le_inf"]
+        data: Dict[str, Any] = {
+            "acquires": self.acquires,
+            "acquire_timeouts": self.timeouts,
+            "slow_holds": self.slow_holds,
+            "waiting": self.waiting,
+            "in_use": self.in_use,
+            "wait_histogram": dict(zip(labels, self.wait_buckets)),
+            "wait_mean_ms": round(self.wait_seconds_total * 1000 / self.acquires, 3) if self.acquires else 0.0,
+            "wait_p95_ms": self.wait_percentile(0.95),
+        }
+        if pool is not None:
+            data.update({"size": pool.size, "idle": pool.freesize, "minsize": pool.minsize, "maxsize": pool.maxsize})
+        return data
+
+
+telemetry = PoolTelemetry()
+
+
+async def acquire_connection(pool: Any, timeout: Optional[float] = None) -> Any:
+    """Acquire a pooled connection, recording the wait and enforcing ``timeout``"""
+    started = time.perf_counter()
+    telemetry.waiting += 1
+    try:
+        conn = await asyncio.wait_for(pool.acquire(), timeout=timeout) if timeout else await pool.acquire()
+    except asyncio.TimeoutError:
+        telemetry.observe_timeout()
+        log.warning(action="db_pool_acquire_timeout", trace_info="system", message=f"No connection free within {timeout}s (size={pool.size}, max={pool.maxsize}) for {_caller()}", secure=False)
+        raise DatabaseBusyError("Database is busy, try again shortly") from None
+    finally:
+        telemetry.waiting -= 1
+    telemetry.observe_wait(time.perf_counter() - started)
+    return conn
+
+
+def release_connection(pool: Any, conn: Any, lease: Optional[ConnectionLease] = None,
+                       hold_warn_seconds: Optional[float] = None) -> None:
+    """Return a connection and warn when it was held well beyond its query time"""
+    pool.release(conn)
+    telemetry.observe_release()
+    if lease is None or not hold_warn_seconds:
+        return
+    held = time.perf_counter() - lease.acquired_at
+    if held - lease.db_seconds > hold_warn_seconds:
+        telemetry.slow_holds += 1
+        log.warning(action="db_connection_held", trace_info="system", message=f"Connection held {held:.3f}s but only {lease.db_seconds:.3f}s in queries; acquired at {lease.caller}", secure=False)
+
+
+async def resize_pool(pool: Any, maxsize: int) -> int:
+    """Change an aiomysql pool's maxsize in place and return the size applied.
+
+    aiomysql has no public resize: the limit is the maxlen of its free deque.
+    A full deque silently drops (without closing) the oldest connection when
+    another is released, so the pool never shrinks below the connections
+    currently checked out, and idle ones are closed until the rest fit.
+
+    This relies on aiomysql private attributes (``_cond``, ``_free``,
+    ``_used``, ``_acquiring``); requirements.txt pins the version they were
+    checked against, so recheck this function before bumping it.
+    """
+    async with pool._cond:
+        busy = len(pool._used) + pool._acquiring
+        maxsize = max(maxsize, busy)
+        free = pool._free
+        while free and len(free) + busy > maxsize:
+            free.popleft().close()
+        pool._free = collections.deque(free, maxlen=maxsize)
+        pool._cond.notify_all()
+    return maxsize
+
+
+class PoolAutoscaler:
+    """Grow the pool under acquire pressure and decay it back when idle.
+
+    The ceiling is this worker's share of the server's ``max_connections``;
+    the floor is the configured ``MYSQL_MAX_CONNECTIONS``.
+    """
+
+    def __init__(self, pool: Any, floor: int, share: float, workers: int, interval: float) -> None:
+        self.pool = pool
+        self.floor = floor
+        self.share = share
+        self.workers = max(1, workers)
+        self.interval = interval
+        self.ceiling = floor
+        self._task: Optional[asyncio.Task] = None
+
+    async def discover_ceiling(self) -> int:
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("SELECT @@max_connections")
+                (max_connections,) = await cursor.fetchone()
+        self.ceiling = max(self.pool.minsize, int(int(max_connections) * self.share / self.workers))
+        self.floor = min(self.floor, self.ceiling)
+        return self.ceiling
+
+    def next_size(self, window: Dict[str, int]) -> int:
+        current = self.pool.maxsize
+        if (window["pressure"] or window["timeouts"]) and current < self.ceiling:
+            return min(self.ceiling, current + max(1, current // 4))
+        if not window["pressure"] and window["peak_in_use"] < current // 2 and current > self.floor:
+            return current - 1
+        return current
+
+    async def step(self) -> None:
+        window = telemetry.take_window()
+        target = self.next_size(window)
+        if target != self.pool.maxsize:
+            previous = self.pool.maxsize
+            applied = await resize_pool(self.pool, target)
+            if applied != previous:
+                log.info(action="db_pool_resized", trace_info="system", message=f"Pool maxsize {previous} -> {applied} (pressure={window['pressure']}, timeouts={window['timeouts']}, peak={window['peak_in_use']}, ceiling={self.ceiling})", secure=False)
+
+    async def _run(self) -> None:
+        try:
+            await self.discover_ceiling()
+        except Exception as e:
+            log.warning(action="db_pool_ceiling_unknown", trace_info="system", message=f"Could not read max_connections, keeping maxsize={self.pool.maxsize}: {e}", secure=False)
+            return
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.step()
+            except Exception as e:
+                log.error(action="db_pool_autoscale_error", trace_info="system", message=str(e), secure=False)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
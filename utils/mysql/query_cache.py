@@ -0,0 +1,127 @@
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Schema-qualified or bare table names after FROM/JOIN (reads) or the write verbs
+_READ_TABLE_RE = re.compile(r"\b(?:FROM|JOIN)\s+`?(?:[\w{}]+`?\.`?)?(\w+)`?", re.IGNORECASE)
+_WRITE_TABLE_RE = re.compile(
+    r"^\s*(?:INSERT\s+(?:IGNORE\s+)?INTO|REPLACE\s+INTO|UPDATE(?:\s+IGNORE)?|DELETE\s+FROM)\s+`?(?:[\w{}]+`?\.`?)?(\w+)`?",
+    re.IGNORECASE,
+)
+_DDL_RE = re.compile(r"^\s*(?:CREATE|ALTER|DROP|TRUNCATE|RENAME)\b", re.IGNORECASE)
+
+
+def read_tables(sql: str) -> Tuple[str, ...]:
+    """Tables a SELECT reads, without schema (``{madrasa}.peoples`` -> ``peoples``)"""
+    return tuple(sorted({name.lower() for name in _READ_TABLE_RE.findall(sql)}))
+
+
+def written_table(sql: str) -> Optional[str]:
+    """Table a single-table INSERT/REPLACE/UPDATE/DELETE writes, without schema"""
+    match = _WRITE_TABLE_RE.match(sql)
+    return match.group(1).lower() if match else None
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    hash(value)  # TypeError for anything else unhashable
+    return value
+
+
+class QueryCache:
+    """In-process read-through cache for named statements.
+
+    Entries are keyed by ``(statement, schema, params)`` and remember the
+    generation of every table the statement reads. A write through the traced
+    cursor bumps its table's generation, which makes every entry reading that
+    table stale at once; there are no hand-written keys to clear. Tables are
+    tracked by bare name, so a write in one madrasa also drops entries of the
+    others, which is cheap and never serves stale data. The cache lives in one
+    process: writes made by another worker are only bounded by the TTL.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None) -> None:
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Tuple[int, ...], List[Dict[str, Any]]]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0  # bumped by DDL; stale-marks everything
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def max_entries(self) -> int:
+        if self._max_entries is None:
+            from config.config import config
+            return int(getattr(config, "QUERY_CACHE_MAX_ENTRIES", 10_000))
+        return self._max_entries
+
+    def _generation_of(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        return (self._epoch,) + tuple(self._generations.get(table, 0) for table in tables)
+
+    def key(self, name: str, madrasa: Optional[str], params: Optional[Sequence[Any]]) -> Optional[Hashable]:
+        try:
+            return (name, madrasa, _freeze(list(params or ())))
+        except TypeError:
+            return None
+
+    def get(self, key: Hashable, tables: Sequence[str]) -> Optional[List[Dict[str, Any]]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, generation, rows = entry
+            if expires_at > time.monotonic() and generation == self._generation_of(tables):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                # Callers mutate rows in place (e.g. translate_row), so hand out copies
+                return [dict(row) for row in rows]
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def generation(self, tables: Sequence[str]) -> Tuple[int, ...]:
+        """Snapshot to take before running the query that fills an entry"""
+        return self._generation_of(tables)
+
+    def put(self, key: Hashable, tables: Sequence[str], ttl: float,
+            rows: List[Dict[str, Any]], generation: Tuple[int, ...]) -> None:
+        # A write that landed while the query ran makes the result unsafe to keep
+        if generation != self._generation_of(tables):
+            return
+        self._entries[key] = (time.monotonic() + ttl, generation, [dict(row) for row in rows])
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_tables(self, tables: Iterable[str]) -> None:
+        for table in tables:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            self.invalidations += 1
+
+    def note_write(self, sql: str) -> Optional[Set[str]]:
+        """Invalidate what ``sql`` writes; returns the tables, or None when it was DDL"""
+        table = written_table(sql)
+        if table is not None:
+            self.invalidate_tables((table,))
+            return {table}
+        if _DDL_RE.match(sql):
+            self.clear()
+        return None
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._epoch += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+query_cache = QueryCache()
@@ -0,0 +1,156 @@
+import re
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+from utils.helpers.logger import log
+
+# Upper bounds (ms) of the per-fingerprint latency buckets; the last bucket is +Inf
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Aggregate for new fingerprints once the table is full
+OTHER_FINGERPRINT = "<other>"
+# Fingerprints of this many distinct SQL strings are remembered
+_FINGERPRINT_CACHE_SIZE = 4096
+
+_COMMENT_RE = re.compile(r"/\*.*?\*/|--[^\n]*", re.DOTALL)
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|%\(\w+\)s")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROWS_RE = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """SQL with literals and placeholders replaced by ``?`` and value lists by ``(...)``.
+
+    ``WHERE id IN (1, 2, 3)`` and a five-row ``VALUES`` insert share a
+    fingerprint with their other sizes, so a statement is counted once however
+    many values it was sent with. No parameter value survives normalization.
+    """
+    sql = _COMMENT_RE.sub(" ", sql)
+    sql = _STRING_RE.sub("?", sql)
+    sql = _PLACEHOLDER_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _LIST_RE.sub("(...)", sql)
+    sql = _ROWS_RE.sub("(...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+class FingerprintStats:
+    __slots__ = ("count", "errors", "slow", "total_seconds", "max_seconds", "fetch_seconds", "rows", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.slow = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.fetch_seconds = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound (ms) of the bucket holding the q-th percentile"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else float("inf")
+        return float("inf")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "slow": self.slow,
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "mean_ms": round(self.total_seconds * 1000 / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 3),
+            "p50_ms": self.percentile(0.5),
+            "p99_ms": self.percentile(0.99),
+            "fetch_ms": round(self.fetch_seconds * 1000, 3),
+            "rows": self.rows,
+            "rows_per_call": round(self.rows / self.count, 2) if self.count else 0.0,
+        }
+
+
+class QueryLog:
+    """Always-on per-fingerprint timing of every query run through the traced cursor.
+
+    Queries slower than ``SLOW_QUERY_MS`` are logged with their fingerprint,
+    parameter count and row count; parameter values are never logged. At most
+    ``max_fingerprints`` fingerprints are tracked, later ones are summed under
+    ``<other>``.
+    """
+
+    def __init__(self, max_fingerprints: Optional[int] = None, slow_ms: Optional[float] = None) -> None:
+        self._max_fingerprints = max_fingerprints
+        self._slow_ms = slow_ms
+        self._stats: Dict[str, FingerprintStats] = {}
+        self._fingerprints: Dict[str, str] = {}
+
+    @property
+    def max_fingerprints(self) -> int:
+        if self._max_fingerprints is None:
+            from config.config import config
+            return int(getattr(config, "QUERY_STATS_MAX_FINGERPRINTS", 500))
+        return self._max_fingerprints
+
+    @property
+    def slow_ms(self) -> float:
+        if self._slow_ms is None:
+            from config.config import config
+            return float(getattr(config, "SLOW_QUERY_MS", 200))
+        return self._slow_ms
+
+    def fingerprint(self, sql: str) -> str:
+        fp = self._fingerprints.get(sql)
+        if fp is None:
+            if len(self._fingerprints) >= _FINGERPRINT_CACHE_SIZE:
+                self._fingerprints.clear()
+            fp = self._fingerprints[sql] = fingerprint(sql)
+        return fp
+
+    def entry(self, fp: str) -> FingerprintStats:
+        stats = self._stats.get(fp)
+        if stats is None:
+            if len(self._stats) >= self.max_fingerprints:
+                fp = OTHER_FINGERPRINT
+                stats = self._stats.get(fp)
+            if stats is None:
+                stats = self._stats[fp] = FingerprintStats()
+        return stats
+
+    def observe(self, sql: str, seconds: float, rows: Optional[int] = None, failed: bool = False,
+                params: Optional[Any] = None, caller: str = "unknown") -> FingerprintStats:
+        """Record one execute; returns the entry so fetch time and streamed rows can be added"""
+        fp = self.fingerprint(sql)
+        stats = self.entry(fp)
+        ms = seconds * 1000
+        stats.count += 1
+        stats.errors += failed
+        stats.total_seconds += seconds
+        if seconds > stats.max_seconds:
+            stats.max_seconds = seconds
+        stats.buckets[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        if rows:
+            stats.rows += rows
+        if ms >= self.slow_ms:
+            stats.slow += 1
+            params_count = len(params) if isinstance(params, (list, tuple, dict)) else 0
+            log.warning(action="slow_query", trace_info=caller, message=f"{ms:.1f}ms rows={rows if rows is not None else '?'} params={params_count}{' failed' if failed else ''}: {fp[:1000]}", secure=False)
+        return stats
+
+    def top(self, n: int = 20, order: str = "total_ms") -> List[Dict[str, Any]]:
+        rows = [{"fingerprint": fp, **stats.as_dict()} for fp, stats in self._stats.items()]
+        rows.sort(key=lambda row: row.get(order) or 0, reverse=True)
+        return rows[:n]
+
+    def reset(self) -> None:
+        self._stats.clear()
+
+
+query_log = QueryLog()
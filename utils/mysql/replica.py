@@ -0,0 +1,113 @@
+import re
+import time
+import asyncio
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Optional
+
+import aiomysql
+
+from utils.helpers.logger import log
+
+# Identifies the client of the current request (ip:device) for read-your-writes pinning
+_db_client: ContextVar[Optional[str]] = ContextVar("db_client", default=None)
+
+_WRITE_RE = re.compile(r"^\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|ALTER|DROP|TRUNCATE|RENAME|CALL)\b", re.IGNORECASE)
+# Drop expired pins once this many clients are tracked
+_PIN_PRUNE_AT = 10_000
+
+
+def set_db_client(client: Optional[str]) -> Token:
+    return _db_client.set(client)
+
+
+def reset_db_client(token: Token) -> None:
+    _db_client.reset(token)
+
+
+def is_write_statement(sql: str) -> bool:
+    """Whether a statement changes data; only SELECTs are registered as prepared, so EXECUTE is a read"""
+    return bool(_WRITE_RE.match(sql))
+
+
+class ReplicaRouter:
+    """Decide whether a read-only cursor may use the replica.
+
+    Reads go to the replica unless its lag is above ``max_lag`` (or unknown
+    because replication stopped) or the current client wrote to the primary
+    within the last ``pin_seconds``. Lag is sampled at most once per
+    ``check_interval``. Pins live in this process, which matches the single
+    worker setup; with more workers a client may still read from the replica
+    on a worker that did not see its write.
+    """
+
+    def __init__(self, max_lag: float, pin_seconds: float, check_interval: float) -> None:
+        self.max_lag = max_lag
+        self.pin_seconds = pin_seconds
+        self.check_interval = check_interval
+        self.lag: Optional[float] = None
+        self._lag_checked_at = float("-inf")
+        self._lag_lock = asyncio.Lock()
+        self._pins: Dict[str, float] = {}
+        self.replica_reads = 0
+        self.primary_fallbacks = 0
+
+    def pin(self, client: Optional[str] = None) -> None:
+        """Send this client's reads to the primary for the next ``pin_seconds``"""
+        client = client or _db_client.get()
+        if not client:
+            return
+        now = time.monotonic()
+        if len(self._pins) >= _PIN_PRUNE_AT:
+            self._pins = {key: until for key, until in self._pins.items() if until > now}
+        self._pins[client] = now + self.pin_seconds
+
+    def pinned(self, client: Optional[str] = None) -> bool:
+        client = client or _db_client.get()
+        if not client:
+            return False
+        until = self._pins.get(client)
+        return until is not None and until > time.monotonic()
+
+    async def use_replica(self, replica_pool: Any) -> bool:
+        if self.pinned():
+            self.primary_fallbacks += 1
+            return False
+        if time.monotonic() - self._lag_checked_at >= self.check_interval:
+            async with self._lag_lock:
+                if time.monotonic() - self._lag_checked_at >= self.check_interval:  # Double-check pattern
+                    self.lag = await self._read_lag(replica_pool)
+                    self._lag_checked_at = time.monotonic()
+        if self.lag is None or self.lag > self.max_lag:
+            self.primary_fallbacks += 1
+            return False
+        self.replica_reads += 1
+        return True
+
+    async def _read_lag(self, replica_pool: Any) -> Optional[float]:
+        try:
+            async with replica_pool.acquire() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    try:
+                        await cursor.execute("SHOW REPLICA STATUS")
+                    except aiomysql.Error:
+                        await cursor.execute("SHOW SLAVE STATUS")  # MySQL < 8.0.22
+                    status = await cursor.fetchone()
+        except Exception as e:
+            log.warning(action="replica_lag_check_failed", trace_info="system", message=str(e), secure=False)
+            return None
+        if not status:
+            return 0.0  # not a replica itself (e.g. a read endpoint in front of replicas)
+        lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+        if lag is None:
+            log.warning(action="replica_not_replicating", trace_info="system", message="Replica reports no lag value; reads fall back to the primary", secure=False)
+            return None
+        return float(lag)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "lag_seconds": self.lag,
+            "max_lag_seconds": self.max_lag,
+            "replica_reads": self.replica_reads,
+            "primary_fallbacks": self.primary_fallbacks,
+            "pinned_clients": sum(1 for until in self._pins.values() if until > time.monotonic()),
+        }
@@ -0,0 +1,605 @@
+import re
+import time
+import unicodedata
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import aiomysql
+
+from utils.helpers.logger import log
+from utils.mysql.query_cache import query_cache, read_tables
+
+# Schema names are interpolated into SQL, so only plain identifiers are routable
+_SCHEMA_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]{0,63}$")
+MADRASA_PLACEHOLDER = "{madrasa}"
+# The single-row VALUES tuple that execute_rows repeats
+_VALUES_ROW_RE = re.compile(r"\bVALUES\s*(\((?:\s*%s\s*,)*\s*%s\s*\))", re.IGNORECASE)
+
+
+class UnknownStatementError(KeyError):
+    pass
+
+
+class SchemaRoutingError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Statement:
+    name: str
+    sql: str                # may contain {madrasa}
+    prepared: bool = False  # server-side prepared when MYSQL_PREPARED_STATEMENTS is on
+    cache_ttl: Optional[float] = None  # seconds a result may be served from the query cache
+    reads: Tuple[str, ...] = ()         # tables whose writes invalidate cached results
+
+    @property
+    def per_madrasa(self) -> bool:
+        return MADRASA_PLACEHOLDER in self.sql
+
+
+class StatementStats:
+    __slots__ = ("count", "errors", "total_seconds", "max_seconds", "cache_hits")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.cache_hits = 0
+
+    def observe(self, seconds: float, failed: bool = False) -> None:
+        self.count += 1
+        self.errors += failed
+        self.total_seconds += seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        mean = self.total_seconds / self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "mean_ms": round(mean * 1000, 3),
+            "max_ms": round(self.max_seconds * 1000, 3),
+            "cache_hits": self.cache_hits,
+        }
+
+
+class StatementRegistry:
+    """Named, parameterized SQL statements rendered once per madrasa schema.
+
+    Statements are registered with a ``{madrasa}`` placeholder where the schema
+    goes. ``render`` resolves every statement for the configured schemas up front;
+    at run time a statement is looked up by ``(name, schema)`` and only schemas
+    that were rendered are accepted, so request data never reaches the SQL text.
+    """
+
+    def __init__(self) -> None:
+        self._statements: Dict[str, Statement] = {}
+        self._rendered: Dict[Tuple[str, Optional[str]], str] = {}
+        self._schemas: Set[str] = set()
+        self._stats: Dict[str, StatementStats] = {}
+        # Server-side handles prepared on each connection
+        self._prepared: "weakref.WeakKeyDictionary[Any, Set[str]]" = weakref.WeakKeyDictionary()
+
+    @property
+    def use_prepared(self) -> bool:
+        from config.config import config
+        return bool(getattr(config, "MYSQL_PREPARED_STATEMENTS", False))
+
+    @property
+    def use_cache(self) -> bool:
+        from config.config import config
+        return bool(getattr(config, "QUERY_CACHE_ENABLED", False))
+
+    def register(self, name: str, sql: str, prepared: bool = False, cache_ttl: Optional[float] = None,
+                 reads: Optional[Sequence[str]] = None) -> Statement:
+        """Register a statement. ``cache_ttl`` opts a read into the query cache;
+        its ``reads`` tables are taken from the FROM/JOIN clauses unless given.
+        Only cache data that is safe to serve stale: never the user rows that
+        login and account checks decide on (password, deactivation, deletion)."""
+        if name in self._statements:
+            raise ValueError(f"Statement {name!r} is already registered")
+        sql = sql.strip()
+        if cache_ttl is not None:
+            reads = tuple(reads) if reads is not None else read_tables(sql)
+            if not reads:
+                raise ValueError(f"Cached statement {name!r} reads no tables")
+        statement = Statement(name=name, sql=sql, prepared=prepared, cache_ttl=cache_ttl, reads=tuple(reads or ()))
+        self._statements[name] = statement
+        self._stats[name] = StatementStats()
+        # Keep the registry consistent if it was already rendered
+        if statement.per_madrasa:
+            for schema in self._schemas:
+                self._rendered[(name, schema)] = statement.sql.replace(MADRASA_PLACEHOLDER, schema)
+        else:
+            self._rendered[(name, None)] = statement.sql
+        return statement
+
+    def render(self, schemas: Iterable[str]) -> None:
+        """Pre-render every per-madrasa statement for ``schemas``"""
+        for schema in schemas:
+            if not _SCHEMA_RE.match(schema):
+                raise SchemaRoutingError(f"Invalid schema name: {schema!r}")
+            self._schemas.add(schema)
+            for statement in self._statements.values():
+                if statement.per_madrasa:
+                    self._rendered[(statement.name, schema)] = statement.sql.replace(MADRASA_PLACEHOLDER, schema)
+
+    def _ensure_rendered(self) -> None:
+        if not self._schemas:
+            from config.config import config
+            self.render(config.MADRASA_NAMES_LIST)
+
+    def get(self, name: str) -> Statement:
+        try:
+            return self._statements[name]
+        except KeyError:
+            raise UnknownStatementError(name) from None
+
+    def sql(self, name: str, madrasa: Optional[str] = None) -> str:
+        """Rendered SQL of a statement, routed to ``madrasa`` when it is per-schema"""
+        statement = self.get(name)
+        if not statement.per_madrasa:
+            return self._rendered[(name, None)]
+        if madrasa is None:
+            raise SchemaRoutingError(f"Statement {name!r} needs a madrasa schema")
+        self._ensure_rendered()
+        try:
+            return self._rendered[(name, madrasa)]
+        except KeyError:
+            raise SchemaRoutingError(f"Unknown madrasa schema: {madrasa!r}") from None
+
+    def observe(self, name: str, seconds: float, failed: bool = False) -> None:
+        self._stats[name].observe(seconds, failed)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: s.as_dict() for name, s in self._stats.items() if s.count}
+
+    def reset_stats(self) -> None:
+        for name in self._stats:
+            self._stats[name] = StatementStats()
+
+    async def execute(self, cursor: Any, name: str, params: Optional[Sequence[Any]] = None,
+                      madrasa: Optional[str] = None) -> int:
+        """Execute a registered statement on ``cursor`` and record its latency.
+
+        Cached statements run through ``query_cache`` when the cursor can serve
+        rows itself (the traced cursor); the rows are then read with the usual
+        fetch calls, whether they came from the cache or the server.
+        """
+        statement = self.get(name)
+        if statement.cache_ttl is not None and self.use_cache and hasattr(cursor, "serve_rows"):
+            key = query_cache.key(name, madrasa, params)
+            if key is not None:
+                return await self._execute_cached(cursor, statement, key, params, madrasa)
+        return await self._execute(cursor, statement, params, madrasa)
+
+    async def _execute_cached(self, cursor: Any, statement: Statement, key: Any,
+                              params: Optional[Sequence[Any]], madrasa: Optional[str]) -> int:
+        rows = query_cache.get(key, statement.reads)
+        if rows is not None:
+            self._stats[statement.name].cache_hits += 1
+            cursor.serve_rows(rows)
+            return len(rows)
+        generation = query_cache.generation(statement.reads)
+        await self._execute(cursor, statement, params, madrasa)
+        rows = list(await cursor.fetchall())
+        query_cache.put(key, statement.reads, statement.cache_ttl, rows, generation)
+        cursor.serve_rows(rows)
+        return len(rows)
+
+    async def _execute(self, cursor: Any, statement: Statement, params: Optional[Sequence[Any]],
+                       madrasa: Optional[str]) -> int:
+        name = statement.name
+        sql = self.sql(name, madrasa)
+        started = time.perf_counter()
+        failed = False
+        try:
+            if statement.prepared and self.use_prepared:
+                return await self._execute_prepared(cursor, statement, sql, madrasa, params)
+            return await cursor.execute(sql, params)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, failed)
+
+    async def execute_rows(self, cursor: Any, name: str, rows: Sequence[Sequence[Any]],
+                           madrasa: Optional[str] = None) -> int:
+        """Execute a single-row INSERT statement for many rows in one round trip.
+
+        The statement's ``VALUES (%s, ...)`` tuple is repeated once per row, so
+        any ``ON DUPLICATE KEY UPDATE`` clause applies to every row.
+        """
+        if not rows:
+            return 0
+        sql = self.sql(name, madrasa)
+        match = _VALUES_ROW_RE.search(sql)
+        if match is None:
+            raise ValueError(f"Statement {name!r} has no VALUES row to repeat")
+        sql = sql[:match.start(1)] + ", ".join([match.group(1)] * len(rows)) + sql[match.end(1):]
+        params = [value for row in rows for value in row]
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await cursor.execute(sql, params)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, failed)
+
+    async def _execute_prepared(self, cursor: Any, statement: Statement, sql: str,
+                                madrasa: Optional[str], params: Optional[Sequence[Any]]) -> int:
+        # aiomysql only speaks the text protocol, so server-side statements go through
+        # SQL PREPARE/EXECUTE. That saves the parse/plan on every call but costs one
+        # extra round trip to bind parameters, so reserve it for heavy statements.
+        handle = f"stmt_{statement.name}_{madrasa or 'global'}".replace(".", "_")
+        conn = cursor.connection
+        prepared = self._prepared.setdefault(conn, set())
+        if handle not in prepared:
+            await cursor.execute(f"PREPARE {handle} FROM %s", (sql.replace("%s", "?").replace("%%", "%"),))
+            prepared.add(handle)
+
+        params = list(params or ())
+        using = ""
+        if params:
+            await cursor.execute("SET " + ", ".join(f"@_p{i} = %s" for i in range(len(params))), params)
+            using = " USING " + ", ".join(f"@_p{i}" for i in range(len(params)))
+        try:
+            return await cursor.execute(f"EXECUTE {handle}{using}")
+        except aiomysql.Error as e:
+            # 1243: unknown handler, the server lost it (e.g. after a reconnect)
+            if e.args and e.args[0] == 1243:
+                prepared.discard(handle)
+                return await self._execute_prepared(cursor, statement, sql, madrasa, params)
+            raise
+
+
+statements = StatementRegistry()
+
+
+async def run_statement(cursor: Any, name: str, params: Optional[Sequence[Any]] = None,
+                        madrasa: Optional[str] = None) -> int:
+    """Execute a named statement from the shared registry"""
+    return await statements.execute(cursor, name, params, madrasa)
+
+
+async def run_statement_rows(cursor: Any, name: str, rows: Sequence[Sequence[Any]],
+                             madrasa: Optional[str] = None) -> int:
+    """Execute a named single-row INSERT for many rows in one round trip"""
+    return await statements.execute_rows(cursor, name, rows, madrasa)
+
+
+async def fetch_statement(name: str, params: Optional[Sequence[Any]] = None,
+                          madrasa: Optional[str] = None, readonly: bool = False) -> List[Dict[str, Any]]:
+    """Run a named statement on its own pooled connection and return every row"""
+    from utils.mysql.database_utils import get_traced_db_cursor
+    async with get_traced_db_cursor(readonly) as cursor:
+        await statements.execute(cursor, name, params, madrasa)
+        return list(await cursor.fetchall())
+
+
+def _is_diacritic(char: str) -> bool:
+    # Marks from the generic diacritics blocks only: Bengali and Arabic signs carry
+    # primary weight in the unicode_ci collation and must not be dropped
+    code = ord(char)
+    return (0x0300 <= code <= 0x036F or 0x1AB0 <= code <= 0x1AFF or 0x1DC0 <= code <= 0x1DFF
+            or 0x20D0 <= code <= 0x20FF or 0xFE20 <= code <= 0xFE2F)
+
+
+def collation_key(text: str) -> str:
+    """Fold text so values a ``utf8mb4_unicode_ci`` column treats as equal get the same key.
+
+    Case and accents are ignored and trailing spaces do not count. Rows read back by
+    an ``IN`` lookup on such a column carry the stored spelling, which may differ from
+    the one asked for; key both sides with this to match them up.
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not _is_diacritic(char)).casefold().rstrip(" ")
+
+
+def render_statements(schemas: Iterable[str]) -> None:
+    statements.render(schemas)
+    log.info(action="statements_rendered", trace_info="system", message=f"Rendered {len(statements._statements)} statements for {len(statements._schemas)} schema(s)", secure=False)
+
+
+# ─── Users ──────────────────────────────────────────────────────────────────
+# Not cached: these rows decide logins and account checks, and another worker may
+# have changed the password or deactivated the account a moment ago.
+
+statements.register("users.by_phone_name", """
+    SELECT * FROM global.users WHERE phone = %s AND fullname_norm = %s
+""", prepared=True)
+
+statements.register("users.id_by_phone_name", """
+    SELECT user_id FROM global.users WHERE phone = %s AND fullname_norm = %s
+""", prepared=True)
+
+statements.register("users.email_by_name_phone", """
+    SELECT email FROM global.users WHERE fullname = %s AND phone = %s
+""")
+
+statements.register("users.ids_by_phone_names", """
+    SELECT user_id, phone, fullname_norm FROM global.users WHERE (phone, fullname_norm) IN %s
+""")
+
+statements.register("users.deactivated_with_person", """
+    SELECT u.*, p.name FROM global.users u
+    JOIN {madrasa}.peoples p ON p.user_id = u.user_id
+    WHERE u.phone = %s AND u.fullname_norm = %s AND u.deactivated_at IS NOT NULL
+""")
+
+statements.register("users.account_check", """
+    SELECT u.deactivated_at, u.email, p.*
+    FROM global.users u
+    JOIN {madrasa}.peoples p ON p.user_id = u.user_id
+    WHERE u.phone = %s AND u.fullname_norm = %s
+""")
+
+# ─── People ─────────────────────────────────────────────────────────────────
+
+statements.register("peoples.user_id_by_phone_name", """
+    SELECT user_id FROM {madrasa}.peoples WHERE phone = %s AND name_norm = %s
+""")
+
+statements.register("peoples.by_user_ids", """
+    SELECT * FROM {madrasa}.peoples WHERE user_id IN %s
+""")
+
+statements.register("peoples.image_by_phone_name", """
+    SELECT image_path FROM {madrasa}.peoples WHERE phone = %s AND name_norm = %s
+""")
+
+statements.register("peoples.profile_by_name_phone", """
+    SELECT
+        p.*,
+        a.main_type AS acc_type, a.teacher, a.student, a.staff,
+        a.donor, a.badri_member, a.special_member
+    FROM {madrasa}.peoples p
+    JOIN global.acc_types a ON a.user_id = p.user_id
+    WHERE p.name_norm = %s AND p.phone = %s
+""", cache_ttl=30)
+
+statements.register("peoples.link_user", """
+    UPDATE {madrasa}.peoples SET user_id = %s WHERE name_norm = %s AND phone = %s
+""")
+
+# Column order of the rows passed to peoples.import_upsert
+PEOPLE_IMPORT_COLUMNS = (
+    "user_id", "name", "name_id", "father_name_id", "mother_name_id", "address_id",
+    "date_of_birth", "birth_certificate", "birth_certificate_encrypted",
+    "national_id", "national_id_encrypted", "blood_group", "gender", "title1", "title2",
+    "source", "present_address", "present_address_hash", "address_hash",
+    "permanent_address", "permanent_address_hash", "father_or_spouse", "class",
+    "student_id", "phone", "guardian_number", "degree", "acc_type",
+)
+_PEOPLE_IMPORT_UPDATES = ",\n        ".join(
+    f"{column} = new.{column}" for column in PEOPLE_IMPORT_COLUMNS if column not in ("user_id", "name", "phone")
+)
+statements.register("peoples.import_upsert", f"""
+    INSERT INTO {{madrasa}}.peoples ({", ".join(PEOPLE_IMPORT_COLUMNS)})
+    VALUES ({", ".join(["%s"] * len(PEOPLE_IMPORT_COLUMNS))}) AS new
+    ON DUPLICATE KEY UPDATE
+        user_id = COALESCE(new.user_id, user_id),
+        {_PEOPLE_IMPORT_UPDATES}
+""")
+
+statements.register("acc_types.upsert", """
+    INSERT INTO global.acc_types (user_id, main_type, teacher, student, staff, donor, badri_member, special_member)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s) AS new
+    ON DUPLICATE KEY UPDATE
+        main_type = new.main_type,
+        teacher = new.teacher,
+        student = new.student,
+        staff = new.staff,
+        donor = new.donor,
+        badri_member = new.badri_member,
+        special_member = new.special_member
+""")
+
+# ─── Translations ───────────────────────────────────────────────────────────
+
+statements.register("translations.upsert", """
+    INSERT INTO {madrasa}.translations (translation_text, bn_text, ar_text, context, table_name)
+    VALUES (%s, %s, %s, %s, %s) AS new
+    ON DUPLICATE KEY UPDATE
+        translation_id = LAST_INSERT_ID(translation_id),
+        bn_text = new.bn_text,
+        ar_text = new.ar_text,
+        context = new.context,
+        table_name = new.table_name
+""")
+
+statements.register("translations.ids_by_text", """
+    SELECT translation_id, translation_text FROM {madrasa}.translations WHERE translation_text IN %s
+""")
+
+_TRANSLATIONS_SELECT = "SELECT translation_id, translation_text, bn_text, ar_text, updated_at FROM {madrasa}.translations"
+statements.register("translations.all", _TRANSLATIONS_SELECT)
+statements.register("translations.since", _TRANSLATIONS_SELECT + " WHERE updated_at >= %s")
+statements.register("translations.by_ids", _TRANSLATIONS_SELECT + " WHERE translation_id IN %s")
+
+# ─── Datasets ───────────────────────────────────────────────────────────────
+# Translated columns are returned as translation ids and resolved in Python.
+
+_MEMBERS_SELECT = """
+    SELECT
+        p.name_id, p.address_id, p.father_name_id,
+        p.degree, p.gender, p.blood_group,
+        p.phone, p.image_path AS picUrl, p.serial, p.acc_type AS role,
+        COALESCE(p.title1, p.title2, p.class) AS title,
+        a.main_type AS acc_type,
+        a.teacher, a.student, a.staff, a.donor,
+        a.badri_member, a.special_member
+    FROM {madrasa}.peoples p
+    JOIN global.acc_types a ON a.user_id = p.user_id
+    WHERE p.serial IS NOT NULL
+"""
+statements.register("members.all", _MEMBERS_SELECT + " ORDER BY p.serial")
+statements.register("members.since", _MEMBERS_SELECT + " AND p.updated_at > %s ORDER BY p.serial")
+
+_ROUTINES_SELECT = """
+    SELECT
+        r.gender, r.class_group, r.class_level, r.weekday, r.serial,
+        r.subject_id, r.name_id
+    FROM {madrasa}.routines r
+"""
+statements.register("routines.all", _ROUTINES_SELECT + " ORDER BY r.class_level, r.weekday, r.serial")
+statements.register("routines.since", _ROUTINES_SELECT + " WHERE r.updated_at > %s ORDER BY r.class_level, r.weekday, r.serial")
+
+_EVENTS_SELECT = """
+    SELECT e.type, e.time, e.date, e.function_url, e.title_id
+    FROM {madrasa}.events e
+"""
+statements.register("events.all", _EVENTS_SELECT + " ORDER BY e.event_id DESC")
+statements.register("events.since", _EVENTS_SELECT + " WHERE e.created_at > %s ORDER BY e.event_id DESC")
+
+_EXAMS_SELECT = """
+    SELECT
+        e.class, e.gender, e.start_time, e.end_time, e.date, e.weekday,
+        e.sec_start_time, e.sec_end_time, e.book_id
+    FROM {madrasa}.exams e
+"""
+statements.register("exams.all", _EXAMS_SELECT + " ORDER BY e.exam_id")
+statements.register("exams.since", _EXAMS_SELECT + " WHERE e.created_at > %s ORDER BY e.exam_id")
+
+# ─── Payments ───────────────────────────────────────────────────────────────
+
+statements.register("payments.info_by_phone_name", """
+    SELECT p.class, p.gender, pay.special_food, pay.reduced_fee,
+        pay.food, pay.due_months AS month, pay.tax, u.phone, u.fullname
+    FROM global.users u
+    JOIN {madrasa}.peoples p ON p.user_id = u.user_id
+    JOIN {madrasa}.payments pay ON pay.user_id = u.user_id
+    WHERE u.phone = %s AND u.fullname_norm = %s
+""")
+
+statements.register("payments.transactions_by_user", """
+    SELECT
+        pt.transaction_id,
+        pt.amount,
+        pt.bank_ac,
+        pt.bank_name,
+        pt.payment_date,
+        pt.description,
+        pt.created_at,
+        p.class,
+        p.gender,
+        u.fullname,
+        u.phone
+    FROM {madrasa}.payments_transaction pt
+    JOIN global.users u ON pt.user_id = u.user_id
+    JOIN {madrasa}.peoples p ON p.user_id = u.user_id
+    WHERE pt.user_id = %s
+    ORDER BY pt.created_at DESC
+    LIMIT 50
+""")
+
+# ─── Interactions ───────────────────────────────────────────────────────────
+
+# IGNORE skips rows of users deleted since the counts were taken (FK failure)
+# instead of failing the whole batch, which the flush would then retry forever
+statements.register("interactions.add_opens", """
+    INSERT IGNORE INTO global.interactions (user_id, device_id, device_brand, ip_address, open_times)
+    VALUES (%s, %s, %s, %s, %s) AS new
+    ON DUPLICATE KEY UPDATE
+        open_times = open_times + new.open_times,
+        device_brand = new.device_brand,
+        ip_address = new.ip_address
+""")
+
+# ─── Verifications ──────────────────────────────────────────────────────────
+
+statements.register("verifications.audit", """
+    INSERT INTO global.verifications (phone, phone_hash, phone_encrypted, code, ip_address)
+    VALUES (%s, %s, %s, %s, %s)
+""")
+
+statements.register("verifications.prune", """
+    DELETE FROM global.verifications WHERE created_at < NOW() - INTERVAL %s DAY
+""")
+
+# ─── Logs ───────────────────────────────────────────────────────────────────
+
+statements.register("logs.insert", """
+    INSERT INTO logs.logs (action, trace_info, message, level, metadata, trace_info_hash, trace_info_encrypted)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+""")
+
+# ─── Maintenance ────────────────────────────────────────────────────────────
+
+statements.register("maintenance.checkpoint_get", """
+    SELECT position FROM global.maintenance_checkpoints WHERE task = %s
+""")
+
+statements.register("maintenance.checkpoint_set", """
+    INSERT INTO global.maintenance_checkpoints (task, position) VALUES (%s, %s) AS new
+    ON DUPLICATE KEY UPDATE position = new.position
+""")
+
+statements.register("maintenance.checkpoint_clear", """
+    DELETE FROM global.maintenance_checkpoints WHERE task = %s
+""")
+
+# Users whose scheduled deletion is due by the run's cutoff, re-checked in every
+# write so a deletion cancelled mid-run is left alone. The cutoff is a parameter
+# taken once per run, so every chunk and madrasa agrees on who is due.
+_DUE_USER_IDS = "SELECT user_id FROM global.users WHERE user_id IN %s AND scheduled_deletion_at < %s"
+
+statements.register("reaper.due_people", """
+    SELECT DISTINCT p.user_id
+    FROM {madrasa}.peoples p
+    JOIN global.users u ON u.user_id = p.user_id
+    WHERE u.scheduled_deletion_at < %s AND p.user_id > %s
+    ORDER BY p.user_id
+    LIMIT %s
+""")
+
+# Records of these account types are kept without their personal details
+statements.register("reaper.anonymize_people", f"""
+    UPDATE {{madrasa}}.peoples SET
+        date_of_birth = NULL,
+        birth_certificate = NULL,
+        birth_certificate_encrypted = '',
+        national_id = NULL,
+        national_id_encrypted = '',
+        source = NULL,
+        present_address = NULL,
+        present_address_hash = '',
+        address_id = NULL,
+        address_hash = '',
+        permanent_address = NULL,
+        permanent_address_hash = '',
+        father_or_spouse = NULL,
+        mother_name_id = NULL,
+        guardian_number = NULL,
+        available = NULL
+    WHERE user_id IN ({_DUE_USER_IDS}) AND acc_type IN %s
+""")
+
+statements.register("reaper.delete_people", f"""
+    DELETE FROM {{madrasa}}.peoples WHERE user_id IN ({_DUE_USER_IDS}) AND acc_type NOT IN %s
+""")
+
+statements.register("reaper.due_users", """
+    SELECT user_id, phone FROM global.users
+    WHERE scheduled_deletion_at < %s AND user_id > %s
+    ORDER BY user_id
+    LIMIT %s
+""")
+
+statements.register("reaper.delete_transactions", f"""
+    DELETE FROM global.transactions WHERE user_id IN ({_DUE_USER_IDS})
+""")
+
+statements.register("reaper.delete_verifications", """
+    DELETE FROM global.verifications WHERE phone IN %s
+""")
+
+statements.register("reaper.delete_users", """
+    DELETE FROM global.users WHERE user_id IN %s AND scheduled_deletion_at < %s
+""")
@@ -0,0 +1,190 @@
+import time
+import asyncio
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from utils.helpers.logger import log
+from utils.mysql.database_utils import get_traced_db_cursor
+from utils.mysql.statements import run_statement
+
+# (translation_text, bn_text, ar_text) keyed by translation_id
+TranslationEntry = Tuple[str, Optional[str], Optional[str]]
+TranslationEntries = Dict[int, TranslationEntry]
+
+# Id column -> response prefix for the people profile fields
+PEOPLE_TRANSLATION_FIELDS: Dict[str, str] = {
+    "name_id": "name",
+    "address_id": "address",
+    "father_name_id": "father",
+    "mother_name_id": "mother",
+}
+
+
+class MissingTranslationError(KeyError):
+    """A row references a translation_id that is not in the loaded dictionary"""
+
+
+class _MadrasaTranslations:
+    """Loaded translations of one madrasa plus the refresh bookkeeping"""
+
+    __slots__ = ("entries", "version", "watermark", "refreshed_at", "lock")
+
+    def __init__(self) -> None:
+        self.entries: TranslationEntries = {}
+        self.version = 0
+        self.watermark: Optional[datetime] = None
+        self.refreshed_at = 0.0
+        self.lock = asyncio.Lock()
+
+
+class TranslationDictionary:
+    """In-process dictionary of ``{madrasa}.translations``.
+
+    Each madrasa's table is loaded once on first use. After that only rows with
+    ``updated_at`` at or past the last seen watermark are fetched, at most once per
+    ``refresh_seconds``, so writes made by other workers show up without a reload.
+    Writes made through ``upsert_translation`` or a unit of work are applied immediately via ``record``.
+    ``version`` increases whenever the entries of a madrasa change.
+    """
+
+    def __init__(self, refresh_seconds: Optional[float] = None) -> None:
+        self._madrasas: Dict[str, _MadrasaTranslations] = {}
+        self._refresh_seconds = refresh_seconds
+
+    @property
+    def refresh_seconds(self) -> float:
+        if self._refresh_seconds is None:
+            from config.config import config
+            return float(getattr(config, "TRANSLATION_REFRESH_SECONDS", 60))
+        return self._refresh_seconds
+
+    def _state(self, madrasa_name: str) -> _MadrasaTranslations:
+        state = self._madrasas.get(madrasa_name)
+        if state is None:
+            state = self._madrasas[madrasa_name] = _MadrasaTranslations()
+        return state
+
+    def version(self, madrasa_name: str) -> int:
+        state = self._madrasas.get(madrasa_name)
+        return state.version if state else 0
+
+    async def get(self, madrasa_name: str) -> TranslationEntries:
+        """Return the entries for a madrasa, loading or delta-refreshing when stale"""
+        state = self._state(madrasa_name)
+        if time.monotonic() - state.refreshed_at < self.refresh_seconds:
+            return state.entries
+
+        async with state.lock:
+            if time.monotonic() - state.refreshed_at >= self.refresh_seconds:  # Double-check pattern
+                await self._refresh(madrasa_name, state)
+        return state.entries
+
+    async def _refresh(self, madrasa_name: str, state: _MadrasaTranslations) -> None:
+        # updated_at has second precision, so the delta re-reads the boundary second
+        name, params = ("translations.all", ()) if state.watermark is None else ("translations.since", (state.watermark,))
+
+        try:
+            async with get_traced_db_cursor() as cursor:
+                await run_statement(cursor, name, params, madrasa=madrasa_name)
+                rows = await cursor.fetchall()
+        except Exception as e:
+            # Serve what we have; the next request retries the refresh
+            log.error(action="translation_refresh_failed", trace_info=madrasa_name, message=str(e), secure=False)
+            return
+
+        changed = False
+        for row in rows:
+            value = (row["translation_text"], row["bn_text"], row["ar_text"])
+            if state.entries.get(row["translation_id"]) != value:
+                state.entries[row["translation_id"]] = value
+                changed = True
+            updated_at = row.get("updated_at")
+            if updated_at and (state.watermark is None or updated_at > state.watermark):
+                state.watermark = updated_at
+
+        if changed:
+            state.version += 1
+        state.refreshed_at = time.monotonic()
+
+    async def ensure(self, madrasa_name: str, ids: Iterable[int]) -> TranslationEntries:
+        """Return the entries for a madrasa, first loading any of ``ids`` not in them yet.
+
+        Covers rows written by another worker since the last refresh. The missing ids are
+        read with one query; database errors propagate so the caller never serves nulls.
+        """
+        entries = await self.get(madrasa_name)
+        missing = tuple({translation_id for translation_id in ids if translation_id not in entries})
+        if not missing:
+            return entries
+
+        async with get_traced_db_cursor() as cursor:
+            await run_statement(cursor, "translations.by_ids", (missing,), madrasa=madrasa_name)
+            rows = await cursor.fetchall()
+        for row in rows:
+            self.record(madrasa_name, row["translation_id"], row["translation_text"], row["bn_text"], row["ar_text"])
+        return entries
+
+    def record(self, madrasa_name: str, translation_id: int, translation_text: str,
+               bn_text: Optional[str] = None, ar_text: Optional[str] = None) -> None:
+        """Apply a write made by this process without waiting for the next refresh"""
+        state = self._madrasas.get(madrasa_name)
+        if state is None:
+            return  # not loaded yet; the first get() will read it from the table
+        value = (translation_text, bn_text, ar_text)
+        if state.entries.get(translation_id) != value:
+            state.entries[translation_id] = value
+            state.version += 1
+
+    def invalidate(self, madrasa_name: Optional[str] = None) -> None:
+        """Drop loaded entries so the next get() does a full reload"""
+        if madrasa_name is None:
+            self._madrasas.clear()
+        else:
+            self._madrasas.pop(madrasa_name, None)
+
+
+def translate_row(entries: Mapping[int, TranslationEntry], row: Dict[str, Any],
+                  fields: Mapping[str, str], keep_keys: bool = True) -> Dict[str, Any]:
+    """Expand ``translation_id`` columns into ``{prefix}_en/_bn/_ar`` in place.
+
+    ``fields`` maps the id column to the response prefix. With ``keep_keys=False``
+    the raw id columns are removed from the row. A NULL id gives NULL texts; an id
+    missing from ``entries`` raises ``MissingTranslationError``, load it first with
+    ``TranslationDictionary.ensure``.
+    """
+    for column, prefix in fields.items():
+        key = row.pop(column, None) if not keep_keys else row.get(column)
+        if key is None:
+            en_text = bn_text = ar_text = None
+        elif key in entries:
+            en_text, bn_text, ar_text = entries[key]
+        else:
+            raise MissingTranslationError(f"translation_id {key} ({column}) is not loaded")
+        row[f"{prefix}_en"] = en_text
+        row[f"{prefix}_bn"] = bn_text
+        row[f"{prefix}_ar"] = ar_text
+    return row
+
+
+async def translate_rows(madrasa_name: str, rows: Iterable[Dict[str, Any]],
+                         fields: Mapping[str, str], keep_keys: bool = True) -> List[Dict[str, Any]]:
+    """Resolve translation keys for a list of rows from the madrasa dictionary"""
+    rows = list(rows)
+    entries = await translation_dictionary.ensure(madrasa_name, translation_ids(rows, fields))
+    return [translate_row(entries, row, fields, keep_keys) for row in rows]
+
+
+def translation_ids(rows: Iterable[Mapping[str, Any]], fields: Iterable[str]) -> Set[int]:
+    """The non-NULL translation ids referenced by ``rows`` in the ``fields`` columns"""
+    return {row[column] for row in rows for column in fields if row.get(column) is not None}
+
+
+async def with_translations(madrasa_name: str, chunks: AsyncIterator[List[Dict[str, Any]]],
+                            fields: Mapping[str, str]) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Pass row chunks through, loading the translation ids each chunk references first"""
+    async for rows in chunks:
+        await translation_dictionary.ensure(madrasa_name, translation_ids(rows, fields))
+        yield rows
+
+
+translation_dictionary = TranslationDictionary()
@@ -0,0 +1,146 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from utils.mysql.database_utils import get_traced_db_cursor
+from utils.mysql.statements import collation_key, run_statement, run_statement_rows, statements
+from utils.mysql.translations import translation_dictionary
+
+
+class TranslationRef:
+    """Placeholder for a translation_id that is only known once the unit of work flushes"""
+
+    __slots__ = ("madrasa", "key", "translation_id")
+
+    def __init__(self, madrasa: str, key: str) -> None:
+        self.madrasa = madrasa
+        self.key = key
+        self.translation_id: Optional[int] = None
+
+    def __repr__(self) -> str:
+        return f"TranslationRef({self.madrasa!r}, {self.key!r}, id={self.translation_id})"
+
+
+class UnitOfWork:
+    """Queue writes and run them on one connection inside one transaction.
+
+    Translations are collected with ``translation`` and written per madrasa as
+    one multi-row upsert plus one id lookup, however many fields need them.
+    Queued statements then run in order, with every ``TranslationRef`` in their
+    parameters replaced by its id. Nothing is sent before ``flush``, which the
+    ``unit_of_work`` context calls right before COMMIT.
+    """
+
+    def __init__(self, cursor: Any) -> None:
+        self.cursor = cursor
+        # madrasa -> text key -> (text, bn, ar, context, table_name)
+        self._translations: Dict[str, Dict[str, Tuple[str, Optional[str], Optional[str], str, str]]] = {}
+        self._refs: Dict[Tuple[str, str], TranslationRef] = {}
+        # (statement name or None for raw SQL, raw SQL, params or rows, madrasa, multi-row)
+        self._queue: List[Tuple[Optional[str], str, Any, Optional[str], bool]] = []
+        self._written: List[Tuple[str, int, str, Optional[str], Optional[str]]] = []
+
+    def translation(self, madrasa: str, text: Optional[str], context: str, table_name: str,
+                    bn_text: Optional[str] = None, ar_text: Optional[str] = None) -> Optional[TranslationRef]:
+        """Queue a translation upsert and return a reference to its future id"""
+        if not text or not text.strip():
+            return None
+        text = text.strip()
+        # translation_text is unique under utf8mb4_unicode_ci: case and accents do not count
+        key = collation_key(text)
+        entries = self._translations.setdefault(madrasa, {})
+        # Same outcome as separate upserts: the first spelling is stored, later values update it
+        stored_text = entries[key][0] if key in entries else text
+        entries[key] = (stored_text, bn_text, ar_text, context, table_name)
+        ref = self._refs.get((madrasa, key))
+        if ref is None:
+            ref = self._refs[(madrasa, key)] = TranslationRef(madrasa, key)
+        return ref
+
+    def add(self, sql: str, params: Sequence[Any] = ()) -> None:
+        """Queue a raw statement"""
+        self._queue.append((None, sql, params, None, False))
+
+    def add_statement(self, name: str, params: Sequence[Any] = (), madrasa: Optional[str] = None) -> None:
+        """Queue a named statement from the registry"""
+        statements.get(name)  # fail fast on a typo
+        self._queue.append((name, "", params, madrasa, False))
+
+    def add_rows(self, name: str, rows: Sequence[Sequence[Any]], madrasa: Optional[str] = None) -> None:
+        """Queue a named single-row INSERT for many rows, sent as one multi-row statement"""
+        statements.get(name)
+        if rows:
+            self._queue.append((name, "", rows, madrasa, True))
+
+    @staticmethod
+    def _bind(params: Sequence[Any]) -> List[Any]:
+        bound = []
+        for value in params:
+            if isinstance(value, TranslationRef):
+                if value.translation_id is None:
+                    raise RuntimeError(f"{value!r} was not resolved")
+                value = value.translation_id
+            bound.append(value)
+        return bound
+
+    async def _flush_translations(self) -> None:
+        for madrasa, entries in self._translations.items():
+            await run_statement_rows(self.cursor, "translations.upsert", list(entries.values()), madrasa=madrasa)
+            await run_statement(self.cursor, "translations.ids_by_text",
+                                (tuple(entry[0] for entry in entries.values()),), madrasa=madrasa)
+            # The stored spelling may differ in case or accents from ours when the row already existed
+            stored = {collation_key(row["translation_text"]): (row["translation_id"], row["translation_text"])
+                      for row in await self.cursor.fetchall()}
+            for key, (text, bn_text, ar_text, _context, _table) in entries.items():
+                if key not in stored:
+                    raise RuntimeError(f"Translation {text!r} was upserted but not found in {madrasa}.translations")
+                translation_id, text = stored[key]
+                self._refs[(madrasa, key)].translation_id = translation_id
+                self._written.append((madrasa, translation_id, text, bn_text, ar_text))
+        self._translations.clear()
+
+    async def flush(self) -> None:
+        """Send queued translations, then queued statements, in order"""
+        await self._flush_translations()
+        queue, self._queue = self._queue, []
+        for name, sql, params, madrasa, multi_row in queue:
+            if name is None:
+                await self.cursor.execute(sql, self._bind(params))
+            elif multi_row:
+                await run_statement_rows(self.cursor, name, [self._bind(row) for row in params], madrasa=madrasa)
+            else:
+                await run_statement(self.cursor, name, self._bind(params), madrasa=madrasa)
+
+    def _committed(self) -> None:
+        # Only publish translations to the in-process dictionary once they are durable
+        for madrasa, translation_id, text, bn_text, ar_text in self._written:
+            translation_dictionary.record(madrasa, translation_id, text, bn_text, ar_text)
+        self._written.clear()
+
+
+@asynccontextmanager
+async def unit_of_work(commit: bool = True) -> AsyncIterator[UnitOfWork]:
+    """Run the queued writes in one transaction on the primary.
+
+    Commits when the block exits normally and rolls back on any exception. A
+    connection whose rollback fails is still in a transaction, and the pool
+    closes it instead of reusing it. ``commit=False`` runs everything and then
+    rolls back, for dry runs and benchmarks.
+    """
+    async with get_traced_db_cursor() as cursor:
+        conn = cursor.connection
+        uow = UnitOfWork(cursor)
+        await conn.begin()
+        try:
+            yield uow
+            await uow.flush()
+            if not commit:
+                await conn.rollback()
+                return
+            await conn.commit()
+        except BaseException:
+            try:
+                await conn.rollback()
+            except Exception:
+                pass
+            raise
+        uow._committed()
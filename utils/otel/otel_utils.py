@@ -1,3 +1,6 @@
+import time
+import functools
+import inspect
 from typing import Any, Callable, Iterable, Optional
 
 from opentelemetry import trace
@@ -8,6 +11,8 @@ from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
 
 from utils.helpers.improved_functions import get_env_var
+from utils.mysql.query_stats import query_log
+from utils.otel.round_trips import record_round_trip, record_rows, round_trip
 
 
 def init_otel(service_name: str, environment: Optional[str] = None, service_version: Optional[str] = None) -> None:
@@ -126,43 +131,134 @@ _tracer = trace.get_tracer(__name__)
 
 
 class TracedCursorWrapper:
-    """Wrap an aiomysql cursor object to create spans for execute/fetch."""
+    """Wrap an aiomysql cursor object to create spans for execute/fetch.
 
-    def __init__(self, cursor) -> None:
+    When a connection ``lease`` is given, every executed query and its duration
+    are reported to it, so the pool can tell query time from idle hold time and
+    notice writes. Every query and the fetches that follow it are also timed
+    into ``query_log``, with or without a tracing collector.
+    """
+
+    def __init__(self, cursor, lease: Any = None) -> None:
         self._cursor = cursor
+        self._lease = lease
+        self._served: Optional[list] = None
+        self._last: Any = None           # query_log entry of the last execute
+        self._count_fetched = False      # rowcount unknown (unbuffered), count fetched rows
 
     def __getattr__(self, name: str) -> Any:
         return getattr(self._cursor, name)
 
+    def serve_rows(self, rows: list) -> None:
+        """Answer the next fetch calls from ``rows`` (a cached result) instead of the server"""
+        self._served = list(rows)
+
+    async def fetchone(self) -> Any:
+        if self._served is not None:
+            return self._served.pop(0) if self._served else None
+        started = time.perf_counter()
+        row = await self._cursor.fetchone()
+        self._fetched(time.perf_counter() - started, 0 if row is None else 1)
+        return row
+
+    async def fetchmany(self, size: Optional[int] = None) -> Any:
+        if self._served is not None:
+            size = size or self._cursor.arraysize
+            rows, self._served = self._served[:size], self._served[size:]
+            return rows
+        started = time.perf_counter()
+        rows = await self._cursor.fetchmany(size)
+        self._fetched(time.perf_counter() - started, len(rows) if rows else 0)
+        return rows
+
+    async def fetchall(self) -> Any:
+        if self._served is not None:
+            rows, self._served = self._served, []
+            return rows
+        started = time.perf_counter()
+        rows = await self._cursor.fetchall()
+        self._fetched(time.perf_counter() - started, len(rows) if rows else 0)
+        return rows
+
+    def _fetched(self, seconds: float, rows: int) -> None:
+        record_rows(rows)
+        if self._last is not None:
+            self._last.fetch_seconds += seconds
+            if self._count_fetched:
+                self._last.rows += rows
+        if self._count_fetched:
+            # Unbuffered fetches read from the server
+            record_round_trip("mysql", seconds)
+
+    def _observe(self, query: str, args: Any, seconds: float, failed: bool) -> None:
+        if self._lease is not None:
+            self._lease.observe(query, seconds)
+        record_round_trip("mysql", seconds, query)
+        rowcount = None if failed else getattr(self._cursor, "rowcount", None)
+        # Unbuffered cursors report -1 / 2**64-1 until every row was read
+        rows = rowcount if isinstance(rowcount, int) and 0 <= rowcount < 2 ** 63 else None
+        self._count_fetched = rows is None and not failed
+        self._last = query_log.observe(query, seconds, rows, failed, args,
+                                       self._lease.caller if self._lease is not None else "stream")
+
     async def execute(self, query: str, args: Optional[Iterable[Any]] = None) -> Any:
+        self._served = None
         with _tracer.start_as_current_span("sql.execute") as span:
             span.set_attribute("db.system", "mysql")
             span.set_attribute("db.statement", query)
+            started = time.perf_counter()
+            failed = False
             try:
                 return await self._cursor.execute(query, args)
             except Exception as exc:
+                failed = True
                 span.record_exception(exc)
                 raise
+            finally:
+                self._observe(query, args, time.perf_counter() - started, failed)
 
     async def executemany(self, query: str, args: Iterable[Iterable[Any]]) -> Any:
+        self._served = None
         with _tracer.start_as_current_span("sql.executemany") as span:
             span.set_attribute("db.system", "mysql")
             span.set_attribute("db.statement", query)
+            started = time.perf_counter()
+            failed = False
             try:
                 return await self._cursor.executemany(query, args)
             except Exception as exc:
+                failed = True
                 span.record_exception(exc)
                 raise
+            finally:
+                self._observe(query, args, time.perf_counter() - started, failed)
+
+
+async def _counted(awaitable: Any) -> Any:
+    with round_trip("keydb"):
+        return await awaitable
 
 
 class TracedRedisPool:
-    """Wrap a KeyDB/aioredis pool with spans for basic commands used by the app."""
+    """Wrap a KeyDB/aioredis pool with spans for basic commands used by the app.
+
+    Every awaited command, including the ones passed through to the client,
+    counts as one KeyDB round trip of the current request.
+    """
 
     def __init__(self, pool) -> None:
         self._pool = pool
 
     def __getattr__(self, name: str) -> Any:
-        return getattr(self._pool, name)
+        attr = getattr(self._pool, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return _counted(result) if inspect.isawaitable(result) else result
+        return call
 
     async def get(self, key: str) -> Any:
         with _tracer.start_as_current_span("redis.get") as span:
@@ -170,7 +266,8 @@ class TracedRedisPool:
             span.set_attribute("db.operation", "get")
             span.set_attribute("db.redis.key", key)
             try:
-                return await self._pool.get(key)
+                with round_trip("keydb"):
+                    return await self._pool.get(key)
             except Exception as exc:
                 span.record_exception(exc)
                 raise
@@ -185,7 +282,8 @@ class TracedRedisPool:
                 if "expire" in kwargs and "ex" not in kwargs:
                     kwargs = {**kwargs}
                     kwargs["ex"] = kwargs.pop("expire")
-                return await self._pool.set(key, value, *args, **kwargs)
+                with round_trip("keydb"):
+                    return await self._pool.set(key, value, *args, **kwargs)
             except Exception as exc:
                 span.record_exception(exc)
                 raise
@@ -196,7 +294,8 @@ class TracedRedisPool:
             span.set_attribute("db.operation", "delete")
             span.set_attribute("db.redis.keys", ",".join(keys))
             try:
-                return await self._pool.delete(*keys)
+                with round_trip("keydb"):
+                    return await self._pool.delete(*keys)
             except Exception as exc:
                 span.record_exception(exc)
                 raise
@@ -207,7 +306,8 @@ class TracedRedisPool:
             span.set_attribute("db.operation", "keys")
             span.set_attribute("db.redis.pattern", pattern)
             try:
-                return await self._pool.keys(pattern)
+                with round_trip("keydb"):
+                    return await self._pool.keys(pattern)
             except Exception as exc:
                 span.record_exception(exc)
                 raise
@@ -218,7 +318,8 @@ class TracedRedisPool:
             span.set_attribute("db.system", "redis")
             try:
                 # redis.asyncio exposes execute_command
-                return await getattr(self._pool, "execute_command")(*args)
+                with round_trip("keydb"):
+                    return await getattr(self._pool, "execute_command")(*args)
             except Exception as exc:
                 span.record_exception(exc)
                 raise
@@ -0,0 +1,186 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Iterator, Optional, Set
+
+from utils.helpers.logger import log
+
+# Round trips with at least this many samples are checked for growth with rows
+_MIN_ROUTE_SAMPLES = 30
+
+
+class RoundTrips:
+    """Round trips and time per backend for one request"""
+
+    __slots__ = ("counts", "seconds", "rows", "repeats")
+
+    def __init__(self) -> None:
+        self.counts: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+        self.rows = 0
+        self.repeats: Dict[str, int] = {}  # SQL text -> executions
+
+    def add(self, backend: str, seconds: float, statement: Optional[str] = None) -> None:
+        self.counts[backend] = self.counts.get(backend, 0) + 1
+        self.seconds[backend] = self.seconds.get(backend, 0.0) + seconds
+        if statement is not None:
+            self.repeats[statement] = self.repeats.get(statement, 0) + 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def most_repeated(self) -> Optional[tuple]:
+        if not self.repeats:
+            return None
+        statement = max(self.repeats, key=self.repeats.__getitem__)
+        return statement, self.repeats[statement]
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value, e.g. ``mysql;dur=4.1;desc="3 round trips"``"""
+        return ", ".join(
+            f'{backend};dur={self.seconds[backend] * 1000:.1f};desc="{count} round trip{"s" if count != 1 else ""}"'
+            for backend, count in self.counts.items()
+        )
+
+
+_current: ContextVar[Optional[RoundTrips]] = ContextVar("round_trips", default=None)
+# Overrides the backend name, e.g. "log" for the log writer's inserts
+_label: ContextVar[Optional[str]] = ContextVar("round_trip_label", default=None)
+
+
+def start_round_trips() -> Token:
+    return _current.set(RoundTrips())
+
+
+def reset_round_trips(token: Token) -> None:
+    _current.reset(token)
+
+
+def current_round_trips() -> Optional[RoundTrips]:
+    return _current.get()
+
+
+def record_round_trip(backend: str, seconds: float, statement: Optional[str] = None) -> None:
+    trips = _current.get()
+    if trips is not None:
+        trips.add(_label.get() or backend, seconds, statement)
+
+
+def record_rows(rows: int) -> None:
+    trips = _current.get()
+    if trips is not None:
+        trips.rows += rows
+
+
+@contextmanager
+def round_trip(backend: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_round_trip(backend, time.perf_counter() - started)
+
+
+def label_round_trips(label: str) -> Token:
+    """Count this context's round trips under ``label`` instead of the backend"""
+    return _label.set(label)
+
+
+class RouteStats:
+    __slots__ = ("n", "sum_rows", "sum_trips", "sum_rows_trips", "sum_rows_sq", "max_trips")
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.sum_rows = 0.0
+        self.sum_trips = 0.0
+        self.sum_rows_trips = 0.0
+        self.sum_rows_sq = 0.0
+        self.max_trips = 0
+
+    def add(self, rows: int, trips: int) -> None:
+        self.n += 1
+        self.sum_rows += rows
+        self.sum_trips += trips
+        self.sum_rows_trips += rows * trips
+        self.sum_rows_sq += rows * rows
+        self.max_trips = max(self.max_trips, trips)
+
+    def slope(self) -> Optional[float]:
+        """Least-squares extra round trips per result row; None while rows never varied"""
+        variance = self.n * self.sum_rows_sq - self.sum_rows ** 2
+        if self.n < 2 or variance <= 0:
+            return None
+        return (self.n * self.sum_rows_trips - self.sum_rows * self.sum_trips) / variance
+
+
+class RouteRoundTrips:
+    """Per-route round-trip profile, used to spot N+1 query patterns.
+
+    A request that runs the same SQL ``N_PLUS_ONE_REPEATS`` times is logged
+    at once. Across requests, a route whose round trips rise with the rows it
+    returns (slope above ``N_PLUS_ONE_SLOPE`` round trips per row) is logged
+    once and marked in ``snapshot``.
+    """
+
+    def __init__(self) -> None:
+        self._routes: Dict[str, RouteStats] = {}
+        self._flagged: Set[str] = set()
+        self._otel: Optional[Dict[str, Any]] = None
+
+    def _instruments(self) -> Dict[str, Any]:
+        # The metrics API is a no-op until init_otel installs a MeterProvider
+        if self._otel is None:
+            from opentelemetry import metrics
+            meter = metrics.get_meter("madrasa.http.round_trips")
+            self._otel = {
+                "trips": meter.create_histogram("http.server.round_trips", description="Backend round trips per request"),
+                "time": meter.create_histogram("http.server.backend_time", unit="ms", description="Time spent in a backend per request"),
+            }
+        return self._otel
+
+    def observe(self, route: str, trips: RoundTrips, export: bool = False) -> None:
+        from config.config import config
+        total = trips.total
+        stats = self._routes.get(route)
+        if stats is None:
+            stats = self._routes[route] = RouteStats()
+        stats.add(trips.rows, total)
+
+        repeated = trips.most_repeated()
+        if repeated and repeated[1] >= config.N_PLUS_ONE_REPEATS:
+            from utils.mysql.query_stats import query_log
+            log.warning(action="n_plus_one_suspected", trace_info=route, message=f"Same query ran {repeated[1]} times in one request: {query_log.fingerprint(repeated[0])[:500]}", secure=False)
+
+        if route not in self._flagged and stats.n >= _MIN_ROUTE_SAMPLES:
+            slope = stats.slope()
+            if slope is not None and slope >= config.N_PLUS_ONE_SLOPE:
+                self._flagged.add(route)
+                log.warning(action="round_trips_grow_with_rows", trace_info=route, message=f"{slope:.2f} extra round trips per result row over {stats.n} requests", secure=False)
+
+        if export:
+            try:
+                instruments = self._instruments()
+                for backend, count in trips.counts.items():
+                    attributes = {"http.route": route, "backend": backend}
+                    instruments["trips"].record(count, attributes)
+                    instruments["time"].record(trips.seconds[backend] * 1000, attributes)
+            except Exception:
+                pass
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        data = {}
+        for route, stats in self._routes.items():
+            slope = stats.slope()
+            data[route] = {
+                "requests": stats.n,
+                "mean_round_trips": round(stats.sum_trips / stats.n, 2),
+                "max_round_trips": stats.max_trips,
+                "mean_rows": round(stats.sum_rows / stats.n, 2),
+                "round_trips_per_row": round(slope, 3) if slope is not None else None,
+                "flagged": route in self._flagged,
+            }
+        return data
+
+
+route_round_trips = RouteRoundTrips()